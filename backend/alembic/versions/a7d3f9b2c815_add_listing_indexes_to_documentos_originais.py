@@ -0,0 +1,66 @@
+"""add listing indexes to documentos_originais
+
+Revision ID: a7d3f9b2c815
+Revises: f5c2d8a1e604
+Create Date: 2025-04-29 09:15:42.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f9b2c815'
+down_revision: Union[str, None] = 'f5c2d8a1e604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands manually written ###
+    # Filtro por substring do nome (ILIKE '%...%') atendido por índice trigram
+    print("Aplicando upgrade: Criando extensão pg_trgm e índices de listagem de documentos")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    op.execute("""
+        CREATE INDEX ix_documentos_originais_nome_trgm
+        ON documentos_originais
+        USING gin (nome_arquivo gin_trgm_ops)
+        WHERE deleted_at IS NULL;
+    """)
+    # Ordenação + keyset por (chave, id). As expressões COALESCE devem ser idênticas
+    # às de _SORT_EXPRESSIONS em sm_document_repository.py.
+    op.execute("""
+        CREATE INDEX ix_documentos_originais_listagem_nome
+        ON documentos_originais (nome_arquivo, id)
+        WHERE deleted_at IS NULL;
+    """)
+    op.execute("""
+        CREATE INDEX ix_documentos_originais_listagem_upload
+        ON documentos_originais ((COALESCE(data_upload, '1970-01-01'::timestamp)), id)
+        WHERE deleted_at IS NULL;
+    """)
+    op.execute("""
+        CREATE INDEX ix_documentos_originais_listagem_tamanho
+        ON documentos_originais ((COALESCE(size_kb, 0)), id)
+        WHERE deleted_at IS NULL;
+    """)
+    # Estatísticas atualizadas para a contagem estimada (reltuples)
+    op.execute("ANALYZE documentos_originais;")
+    print("Índices de listagem de documentos criados.")
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando downgrade: Removendo índices de listagem de documentos")
+    op.drop_index('ix_documentos_originais_listagem_tamanho', table_name='documentos_originais')
+    op.drop_index('ix_documentos_originais_listagem_upload', table_name='documentos_originais')
+    op.drop_index('ix_documentos_originais_listagem_nome', table_name='documentos_originais')
+    op.drop_index('ix_documentos_originais_nome_trgm', table_name='documentos_originais')
+    # A extensão pg_trgm é mantida (pode ser usada por outros objetos)
+    print("Índices de listagem de documentos removidos.")
+    # ### end Alembic commands ###
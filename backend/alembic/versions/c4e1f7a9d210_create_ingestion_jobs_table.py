@@ -0,0 +1,76 @@
+"""create ingestion_jobs table
+
+Revision ID: c4e1f7a9d210
+Revises: b391ae018941
+Create Date: 2025-04-22 10:12:31.418204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1f7a9d210'
+down_revision: Union[str, None] = 'b391ae018941'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando upgrade: Criando tabela ingestion_jobs")
+    op.create_table('ingestion_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Text(), server_default='queued', nullable=False),
+        sa.Column('nome_arquivo', sa.Text(), nullable=False),
+        sa.Column('tipo_arquivo', sa.Text(), nullable=True),
+        sa.Column('caminho_arquivo', sa.Text(), nullable=False),
+        sa.Column('size_kb', sa.Float(), nullable=True),
+        sa.Column('metadados', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('documento_id', sa.Integer(), nullable=True),
+        sa.Column('etapa', sa.Text(), nullable=True),
+        sa.Column('progresso', sa.Float(), server_default='0', nullable=False),
+        sa.Column('tentativas', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_tentativas', sa.Integer(), server_default='3', nullable=False),
+        sa.Column('ultimo_erro', sa.Text(), nullable=True),
+        sa.Column('worker_id', sa.Text(), nullable=True),
+        sa.Column('heartbeat_em', sa.TIMESTAMP(), nullable=True),
+        sa.Column('proxima_tentativa_em', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('criado_em', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('atualizado_em', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('iniciado_em', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finalizado_em', sa.TIMESTAMP(), nullable=True),
+        sa.ForeignKeyConstraint(['documento_id'], ['documentos_originais.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_status'), 'ingestion_jobs', ['status'], unique=False)
+    # Índice parcial usado pelo claim (SELECT ... FOR UPDATE SKIP LOCKED) dos workers
+    op.execute("""
+        CREATE INDEX ix_ingestion_jobs_queued
+        ON ingestion_jobs (proxima_tentativa_em, id)
+        WHERE status = 'queued';
+    """)
+    # Índice parcial para recuperar jobs 'running' com heartbeat expirado (worker morto)
+    op.execute("""
+        CREATE INDEX ix_ingestion_jobs_running_heartbeat
+        ON ingestion_jobs (heartbeat_em)
+        WHERE status = 'running';
+    """)
+    print("Tabela ingestion_jobs criada.")
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando downgrade: Removendo tabela ingestion_jobs")
+    op.execute("DROP INDEX IF EXISTS ix_ingestion_jobs_running_heartbeat;")
+    op.execute("DROP INDEX IF EXISTS ix_ingestion_jobs_queued;")
+    op.drop_index(op.f('ix_ingestion_jobs_status'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    print("Tabela ingestion_jobs removida.")
+    # ### end Alembic commands ###
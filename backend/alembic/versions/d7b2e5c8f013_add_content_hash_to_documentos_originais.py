@@ -0,0 +1,44 @@
+"""add content_hash to documentos_originais
+
+Revision ID: d7b2e5c8f013
+Revises: c4e1f7a9d210
+Create Date: 2025-04-24 09:41:07.215530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b2e5c8f013'
+down_revision: Union[str, None] = 'c4e1f7a9d210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando upgrade: Adicionando coluna content_hash a documentos_originais")
+    op.add_column('documentos_originais', sa.Column('content_hash', sa.Text(), nullable=True))
+    # Preencher a partir do hash já gravado nos metadados JSONB
+    op.execute("""
+        UPDATE documentos_originais
+        SET content_hash = metadados->>'content_hash_sha256'
+        WHERE content_hash IS NULL AND metadados->>'content_hash_sha256' IS NOT NULL;
+    """)
+    op.create_index(op.f('ix_documentos_originais_content_hash'), 'documentos_originais', ['content_hash'], unique=False)
+    print("Coluna content_hash adicionada e indexada.")
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando downgrade: Removendo coluna content_hash de documentos_originais")
+    op.drop_index(op.f('ix_documentos_originais_content_hash'), table_name='documentos_originais')
+    op.drop_column('documentos_originais', 'content_hash')
+    print("Coluna content_hash removida.")
+    # ### end Alembic commands ###
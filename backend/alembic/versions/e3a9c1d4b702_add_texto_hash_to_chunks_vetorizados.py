@@ -0,0 +1,44 @@
+"""add texto_hash to chunks_vetorizados
+
+Revision ID: e3a9c1d4b702
+Revises: d7b2e5c8f013
+Create Date: 2025-04-25 14:18:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c1d4b702'
+down_revision: Union[str, None] = 'd7b2e5c8f013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando upgrade: Adicionando coluna texto_hash a chunks_vetorizados")
+    op.add_column('chunks_vetorizados', sa.Column('texto_hash', sa.Text(), nullable=True))
+    # Mesmo cálculo de Chunk.compute_text_hash: SHA-256 hex do texto em UTF-8
+    op.execute("""
+        UPDATE chunks_vetorizados
+        SET texto_hash = encode(sha256(convert_to(texto, 'UTF8')), 'hex')
+        WHERE texto_hash IS NULL;
+    """)
+    op.create_index('ix_chunks_vetorizados_documento_id_texto_hash', 'chunks_vetorizados', ['documento_id', 'texto_hash'], unique=False)
+    print("Coluna texto_hash adicionada e indexada.")
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando downgrade: Removendo coluna texto_hash de chunks_vetorizados")
+    op.drop_index('ix_chunks_vetorizados_documento_id_texto_hash', table_name='chunks_vetorizados')
+    op.drop_column('chunks_vetorizados', 'texto_hash')
+    print("Coluna texto_hash removida.")
+    # ### end Alembic commands ###
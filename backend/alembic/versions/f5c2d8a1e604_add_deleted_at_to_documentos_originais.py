@@ -0,0 +1,45 @@
+"""add deleted_at to documentos_originais
+
+Revision ID: f5c2d8a1e604
+Revises: e3a9c1d4b702
+Create Date: 2025-04-28 10:42:17.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c2d8a1e604'
+down_revision: Union[str, None] = 'e3a9c1d4b702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando upgrade: Adicionando coluna deleted_at a documentos_originais")
+    op.add_column('documentos_originais', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Índice parcial: só documentos aguardando purga (buscas filtram por eles; o purgador os lista)
+    op.create_index(
+        'ix_documentos_originais_deleted_at',
+        'documentos_originais',
+        ['deleted_at'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+    print("Coluna deleted_at adicionada e indexada.")
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands manually written ###
+    print("Aplicando downgrade: Removendo coluna deleted_at de documentos_originais")
+    op.drop_index('ix_documentos_originais_deleted_at', table_name='documentos_originais')
+    op.drop_column('documentos_originais', 'deleted_at')
+    print("Coluna deleted_at removida.")
+    # ### end Alembic commands ###
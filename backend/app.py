@@ -2,17 +2,14 @@
 Ponto de entrada principal da aplicação CTA Value Tech.
 """
 
-import time
+import asyncio
 import uvicorn
 import logging
 import asyncpg
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from infrastructure.metrics.prometheus.metrics_prometheus import (
-    HTTP_REQUESTS_TOTAL,
-    REQUEST_LATENCY,
-    update_system_metrics,
     create_metrics_app,
     init_app_info,
 )
@@ -21,16 +18,23 @@ from infrastructure.logging.config import configure_logging
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 # --- Importar o novo middleware ---
 from interface.middlewares.error_handling_middleware import CustomErrorHandlingMiddleware
+from interface.middlewares.metrics_middleware import PrometheusMetricsMiddleware
 # ---------------------------------
 
 # Importações dos módulos da aplicação
 from config.config import get_settings
 from interface.api.router import main_router
+from interface.api.dependencies import build_process_document_use_case
+from infrastructure.workers.ingestion_worker import IngestionWorker
+from infrastructure.workers.document_purger import DocumentPurger
+from infrastructure.workers.system_metrics_sampler import SystemMetricsSampler
+from infrastructure.processors.process_pool import shutdown_process_pools
+from infrastructure.llm.http_client import close_llm_http_client
 # TODO: Refatorar db.schema para usar asyncpg
 # from db.schema import setup_database, is_database_healthy
 
 # --- Importações SQLAlchemy/SQLModel Async ---
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 # -------------------------------------------
 
@@ -81,10 +85,59 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Falha ao inicializar OpenTelemetry: {e}")
 
+    # Iniciar workers de ingestão (fila durável em Postgres)
+    ingestion_workers = []
+    ingestion_tasks = []
+    if settings.INGESTION_WORKERS > 0:
+        worker_session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        for _ in range(settings.INGESTION_WORKERS):
+            worker = IngestionWorker(
+                session_factory=worker_session_factory,
+                process_use_case_factory=build_process_document_use_case,
+            )
+            ingestion_workers.append(worker)
+            ingestion_tasks.append(asyncio.create_task(worker.run()))
+        logger.info(f"{len(ingestion_workers)} worker(s) de ingestão iniciado(s).")
+
+    # Iniciar purgador de documentos excluídos (exclusão lógica + remoção de chunks em lotes)
+    purger = None
+    purger_task = None
+    if settings.PURGE_ENABLED:
+        purger = DocumentPurger(
+            engine=engine,
+            session_factory=async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession),
+        )
+        purger_task = asyncio.create_task(purger.run())
+
+    # Iniciar amostragem de CPU/memória (fora do caminho das requisições)
+    sampler = None
+    sampler_task = None
+    if settings.SYSTEM_METRICS_INTERVAL_SECONDS > 0:
+        sampler = SystemMetricsSampler()
+        sampler_task = asyncio.create_task(sampler.run())
+
     yield # Aplicação roda aqui
 
     # Código a ser executado APÓS a aplicação parar
     logger.info("Encerrando aplicação...")
+    if ingestion_tasks:
+        logger.info("Encerrando workers de ingestão...")
+        for worker in ingestion_workers:
+            worker.stop()
+        # Jobs em andamento são devolvidos à fila pelo próprio worker ao ser cancelado
+        for task in ingestion_tasks:
+            task.cancel()
+        await asyncio.gather(*ingestion_tasks, return_exceptions=True)
+        logger.info("Workers de ingestão encerrados.")
+    if purger_task:
+        purger.stop()
+        purger_task.cancel()
+        await asyncio.gather(purger_task, return_exceptions=True)
+    if sampler_task:
+        sampler.stop()
+        await asyncio.gather(sampler_task, return_exceptions=True)
+    shutdown_process_pools()
+    await close_llm_http_client()
     if hasattr(app.state, 'db_engine') and app.state.db_engine:
         logger.info("Dispondo da Async Engine SQLAlchemy...")
         await app.state.db_engine.dispose()
@@ -114,45 +167,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 3. Middleware de Métricas (pode vir depois do CORS e Erro)
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-
-    # Atualizar métricas do sistema
-    update_system_metrics()
-
-    # Registrar início da requisição
-    start_time = time.time()
-    status_code = 500  # Default para caso de erro inesperado antes da resposta
-
-    # Processar a requisição
-    try:
-        response = await call_next(request)
-        status_code = response.status_code
-    except Exception as e:
-        logger.exception("Erro não tratado durante a requisição")
-        status_code = 500
-        raise  # Re-lançar exceção para ser tratada pelo FastAPI
-    finally:
-        # Métricas que são registradas mesmo em caso de erro
-        endpoint = request.url.path
-        method = request.method
-
-        # 1. Incrementar contador de requisições
-        HTTP_REQUESTS_TOTAL.labels(
-            method=method, endpoint=endpoint, status=str(status_code)
-        ).inc()
-
-        # 2. Registrar latência
-        request_time = time.time() - start_time
-        REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(request_time)
-
-    return response
+# 3. Middleware de Métricas (ASGI puro; endpoints rotulados pelo template da rota)
+app.add_middleware(PrometheusMetricsMiddleware)
 
 
 # Incluir rotas da API (agora importa de interface.api)
 app.include_router(main_router)
 
+# Endpoint de scrape do Prometheus (OpenMetrics com exemplars trace_id)
+app.mount("/metrics", create_metrics_app())
+init_app_info(settings.APP_NAME, settings.APP_VERSION)
+
 # Instrumentar a aplicação DEPOIS de incluir as rotas
 FastAPIInstrumentor.instrument_app(app)
 
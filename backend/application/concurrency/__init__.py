@@ -0,0 +1,3 @@
+"""
+Utilitários de concorrência da camada de aplicação.
+"""
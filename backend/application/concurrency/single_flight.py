@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from infrastructure.metrics.prometheus.metrics_prometheus import record_single_flight, set_single_flight_in_flight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas concorrentes com a mesma chave: a primeira (líder)
+    executa a função e as demais (seguidoras) aguardam o mesmo resultado
+    ou exceção, em vez de repetir o trabalho.
+
+    A execução roda em uma tarefa própria; se o líder for cancelado (ex.:
+    cliente desconectou), as seguidoras continuam recebendo o resultado.
+    Por isso `fn` não deve usar recursos com o ciclo de vida da chamada
+    líder (ex.: a sessão de banco da requisição, fechada quando ela termina).
+    A chave é liberada assim que a execução termina, ou seja, só chamadas
+    simultâneas são coalescidas (não é um cache).
+    """
+
+    def __init__(self, operation: str):
+        self._operation = operation
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Executa `fn` ou aguarda a execução em andamento para `key`.
+
+        Returns:
+            Tuple[T, bool]: O resultado e True se esta chamada foi a líder.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            record_single_flight(self._operation, "follower")
+            logger.debug(f"SingleFlight[{self._operation}]: chamada coalescida com a execução em andamento.")
+            return await asyncio.shield(task), False
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        set_single_flight_in_flight(self._operation, len(self._calls))
+        task.add_done_callback(lambda _: self._forget(key, task))
+        record_single_flight(self._operation, "leader")
+        return await asyncio.shield(task), True
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        set_single_flight_in_flight(self._operation, len(self._calls))
+        if not task.cancelled() and task.exception() is not None:
+            # Exceção já entregue a quem aguardava; evita o aviso "exception was never retrieved"
+            logger.debug(f"SingleFlight[{self._operation}]: execução terminou com erro: {task.exception()!r}")
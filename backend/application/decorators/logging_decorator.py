@@ -1,4 +1,5 @@
 import functools
+import inspect
 import logging
 import time
 from typing import Any, Callable
@@ -10,15 +11,36 @@ logger = logging.getLogger(__name__)
 def log_execution(func: Callable) -> Callable:
     """
     Decorator para registrar o início, fim, argumentos, resultado e exceções
-    da execução de uma função.
+    da execução de uma função. Em funções async, o tempo e as exceções são os
+    da corrotina aguardada (não apenas da sua criação).
     """
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    def _log_prefix(args: tuple) -> str:
         func_name = func.__name__
         # Tenta obter 'self' ou 'cls' para identificar a classe (se for um método)
         instance_or_class = args[0] if args and hasattr(args[0], func_name) else None
         class_name = instance_or_class.__class__.__name__ if instance_or_class else None
-        log_prefix = f"{class_name}.{func_name}" if class_name else func_name
+        return f"{class_name}.{func_name}" if class_name else func_name
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            log_prefix = _log_prefix(args)
+            logger.info(f"Iniciando execução: {log_prefix}")
+            start_time = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                logger.info(f"Execução concluída: {log_prefix} em {time.perf_counter() - start_time:.4f} segundos.")
+                return result
+            except Exception as e:
+                duration = time.perf_counter() - start_time
+                logger.error(f"Erro durante execução de {log_prefix} após {duration:.4f} segundos: {e}", exc_info=True)
+                raise # Re-levanta a exceção para não alterar o comportamento
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        log_prefix = _log_prefix(args)
 
         logger.info(f"Iniciando execução: {log_prefix}")
         # Log dos argumentos (cuidado com dados sensíveis em produção)
@@ -1,4 +1,5 @@
 import functools
+import inspect
 import time
 import logging
 from typing import Any, Callable
@@ -6,19 +7,46 @@ from typing import Any, Callable
 # Importar as métricas específicas do arquivo (localização ATUALIZADA e CORRIGIDA)
 # from infrastructure.metrics.prometheus import USE_CASE_CALLS_TOTAL, USE_CASE_LATENCY_SECONDS # <-- Linha antiga comentada/removida
 from infrastructure.metrics.prometheus.metrics_prometheus import USE_CASE_CALLS_TOTAL, USE_CASE_LATENCY_SECONDS # <-- Linha corrigida
+from infrastructure.metrics.prometheus.metrics_prometheus import record_retrieval_time
 
 logger = logging.getLogger(__name__)
 
 def track_use_case_metrics(func: Callable) -> Callable:
     """
     Decorator para registrar métricas Prometheus (chamadas, latência, status)
-    para a execução de um caso de uso.
+    para a execução de um caso de uso. Em casos de uso async, a latência é a
+    da corrotina aguardada.
     """
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    def _use_case_name(args: tuple) -> str:
         # O primeiro argumento de um método de instância é 'self'
         instance = args[0] if args else None
-        use_case_name = instance.__class__.__name__ if instance else func.__name__
+        return instance.__class__.__name__ if instance else func.__name__
+
+    def _record(use_case_name: str, status: str, duration: float) -> None:
+        USE_CASE_LATENCY_SECONDS.labels(use_case=use_case_name).observe(duration)
+        USE_CASE_CALLS_TOTAL.labels(use_case=use_case_name, status=status).inc()
+        logger.debug(f"Métricas registradas para {use_case_name}: status={status}, duration={duration:.4f}s")
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            use_case_name = _use_case_name(args)
+            status = "success"
+            start_time = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                status = "error"
+                logger.error(f"Erro no caso de uso {use_case_name}: {e}", exc_info=False)
+                raise
+            finally:
+                _record(use_case_name, status, time.perf_counter() - start_time)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        use_case_name = _use_case_name(args)
         status = "success" # Assume sucesso inicialmente
         start_time = time.perf_counter()
 
@@ -30,14 +58,41 @@ def track_use_case_metrics(func: Callable) -> Callable:
             logger.error(f"Erro no caso de uso {use_case_name}: {e}", exc_info=False) # Log breve, o log_decorator pode logar detalhes
             raise # Re-levanta a exceção
         finally:
-            duration = time.perf_counter() - start_time
             # Registrar métricas
-            USE_CASE_LATENCY_SECONDS.labels(use_case=use_case_name).observe(duration)
-            USE_CASE_CALLS_TOTAL.labels(use_case=use_case_name, status=status).inc()
-            logger.debug(f"Métricas registradas para {use_case_name}: status={status}, duration={duration:.4f}s")
+            _record(use_case_name, status, time.perf_counter() - start_time)
 
     return wrapper
 
+def track_stage(phase: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator para registrar a duração de uma etapa do pipeline RAG no
+    histograma `rag_retrieval_time_seconds{phase}` (inclusive quando a etapa falha).
+    Suporta funções síncronas e async.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start_time = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_retrieval_time(time.perf_counter() - start_time, phase)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start_time = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_retrieval_time(time.perf_counter() - start_time, phase)
+
+        return wrapper
+
+    return decorator
+
 # Exemplo de uso (pode ser removido depois):
 # from utils.metrics_prometheus import * # Importar tudo para o exemplo
 # class DummyUseCase:
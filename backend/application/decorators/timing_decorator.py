@@ -1,4 +1,5 @@
 import functools
+import inspect
 import logging
 import time
 from typing import Any, Callable
@@ -8,15 +9,31 @@ logger = logging.getLogger(__name__) # Ou logging.getLogger('timing')
 
 def log_execution_time(func: Callable) -> Callable:
     """
-    Decorator para registrar o tempo de execução de uma função.
+    Decorator para registrar o tempo de execução de uma função (em funções
+    async, o tempo até a corrotina terminar).
     """
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    def _log_prefix(args: tuple) -> str:
         func_name = func.__name__
         # Tenta obter 'self' ou 'cls' para identificar a classe (se for um método)
         instance_or_class = args[0] if args and hasattr(args[0], func_name) else None
         class_name = instance_or_class.__class__.__name__ if instance_or_class else None
-        log_prefix = f"{class_name}.{func_name}" if class_name else func_name
+        return f"{class_name}.{func_name}" if class_name else func_name
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            start_time = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start_time
+                logger.info(f"Tempo de execução para {_log_prefix(args)}: {duration:.4f} segundos.")
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        log_prefix = _log_prefix(args)
 
         start_time = time.perf_counter()
         try:
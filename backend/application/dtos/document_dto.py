@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 # Ou use from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import datetime # Para o tipo do campo de data
 
 @dataclass # Ou class DocumentDTO(BaseModel):
@@ -21,6 +21,18 @@ class DocumentDTO:
     processed: Optional[bool]
     metadata: Dict[str, Any]
 
+@dataclass
+class DocumentPageDTO:
+    """
+    Página da listagem de documentos. `next_cursor` (None na última página)
+    deve ser reenviado para obter a página seguinte; `total_is_estimate`
+    indica que `total` veio das estatísticas do banco e não de um COUNT(*).
+    """
+    documents: List[DocumentDTO]
+    total: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
 # --- Adicionar um DTO para Chunks também pode ser útil ---
 @dataclass
 class ChunkDTO:
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional
+import datetime
+
+@dataclass
+class IngestionJobDTO:
+    """
+    Data Transfer Object com o estado de um job de ingestão,
+    exposto pela camada de Aplicação para a Interface (ex: polling de status).
+    """
+    id: int
+    status: str
+    file_name: str
+    file_type: Optional[str]
+    size_kb: Optional[float]
+    document_id: Optional[int]
+    stage: Optional[str]
+    progress: float
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str]
+    created_at: Optional[datetime.datetime]
+    updated_at: Optional[datetime.datetime]
+    started_at: Optional[datetime.datetime]
+    finished_at: Optional[datetime.datetime]
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # Opcional, mas recomendado: Importar Document do Langchain se for usar como tipo
 # from langchain_core.documents import Document
@@ -33,3 +33,23 @@ class Chunker(ABC):
              incluir a chave 'page_number'.
          """
          pass
+
+    async def split_pages_to_chunks(
+        self,
+        pages: List[Tuple[int, str]],
+        base_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+         """
+         Divide um lote de páginas (page_number, page_text) em chunks.
+
+         Permite que implementações processem várias páginas em uma única
+         chamada fora do event loop. A implementação padrão chama
+         `split_page_to_chunks` para cada página.
+
+         Returns:
+             Uma lista com os chunks de cada página, na mesma ordem de `pages`.
+         """
+         return [
+             await self.split_page_to_chunks(page_number, page_text, base_metadata)
+             for page_number, page_text in pages
+         ]
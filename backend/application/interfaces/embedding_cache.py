@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+import hashlib
+from typing import List, Dict, Any
+
+# Tipos de tráfego, usados nas métricas de acerto do cache
+TRAFFIC_QUERY = "query"
+TRAFFIC_INGESTION = "ingestion"
+# Sentenças do contexto pontuadas na compressão: efêmeras, não passam pelo cache
+TRAFFIC_CONTEXT = "context"
+
+
+def embedding_cache_key(model_name: str, clean_text: str) -> str:
+    """
+    Chave estável (entre processos e reinícios) de um embedding:
+    SHA-256 do nome do modelo e do texto limpo.
+    """
+    return hashlib.sha256(f"{model_name}\x00{clean_text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(ABC):
+    """
+    Interface para caches de embeddings indexados por `embedding_cache_key`.
+
+    As operações são em lote para permitir uma única ida ao armazenamento
+    (ex: disco) por chamada de `embed_batch`.
+    """
+
+    @abstractmethod
+    async def get_many(self, keys: List[str], traffic: str = TRAFFIC_QUERY) -> Dict[str, List[float]]:
+        """
+        Busca embeddings pelas chaves.
+
+        Args:
+            keys: Chaves calculadas com `embedding_cache_key`.
+            traffic: Origem da consulta ('query' ou 'ingestion'), para métricas.
+
+        Returns:
+            Dicionário chave -> vetor apenas com as chaves encontradas.
+        """
+        pass
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        """ Armazena embeddings (chave -> vetor). """
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """ Remove todas as entradas do cache. """
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """ Retorna estatísticas do cache (entradas, bytes, acertos, etc.). """
+        pass
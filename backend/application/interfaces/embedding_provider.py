@@ -11,12 +11,13 @@ class EmbeddingProvider(ABC):
     """
 
     @abstractmethod
-    async def embed_text(self, text: str) -> Embedding:
+    async def embed_text(self, text: str, traffic: str = "query") -> Embedding:
         """
         Gera o embedding vetorial para um único texto.
 
         Args:
             text: A string de texto a ser convertida em embedding.
+            traffic: Origem da chamada ('query', 'ingestion' ou 'context', que ignora o cache), usada pelo cache e métricas.
 
         Returns:
             O embedding gerado como um objeto Embedding.
@@ -27,18 +28,20 @@ class EmbeddingProvider(ABC):
         pass
 
     @abstractmethod
-    async def embed_batch(self, texts: List[str]) -> List[Embedding]:
+    async def embed_batch(self, texts: List[str], traffic: str = "ingestion") -> List[Embedding]:
         """
         Gera embeddings vetoriais para uma lista de textos em lote.
 
         Args:
             texts: Uma lista de strings de texto.
+            traffic: Origem da chamada ('query', 'ingestion' ou 'context', que ignora o cache), usada pelo cache e métricas.
 
         Returns:
             Uma lista de objetos Embedding.
             A ordem dos embeddings corresponde à ordem dos textos de entrada.
 
         Raises:
-            Exception: Em caso de erro durante a geração dos embeddings.
+            Exception: Em caso de erro durante a geração dos embeddings. Na
+                ingestão, o erro nunca é mascarado com vetores zero.
         """
         pass
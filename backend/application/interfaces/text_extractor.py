@@ -1,6 +1,74 @@
 # backend/application/interfaces/text_extractor.py
 from abc import ABC, abstractmethod
-from typing import IO, List, Dict, Any, Tuple # Adicionar Tuple
+import asyncio
+from typing import IO, List, Dict, Any, Tuple, AsyncIterator, Union # Adicionar Tuple
+
+# Fonte de um documento: bytes em memória ou caminho de arquivo em disco
+DocumentSource = Union[bytes, str]
+
+
+class ExtractedDocument(ABC):
+    """
+    Documento aberto uma única vez e compartilhado entre a extração de
+    metadados e a extração de páginas. Usado como `async with`.
+    """
+
+    async def open(self) -> None:
+        """ Abre o documento (chamado por `__aenter__`). """
+        pass
+
+    async def close(self) -> None:
+        """ Libera o documento (chamado por `__aexit__`). """
+        pass
+
+    @abstractmethod
+    async def extract_metadata(self) -> Dict[str, Any]:
+        """ Extrai metadados gerais do documento aberto. """
+        pass
+
+    @abstractmethod
+    def iter_pages(self) -> AsyncIterator[Dict[str, Any]]:
+        """ Itera sobre as páginas do documento aberto (mesmo formato de `TextExtractor.iter_pages`). """
+        pass
+
+    async def __aenter__(self) -> "ExtractedDocument":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+class _DelegatingExtractedDocument(ExtractedDocument):
+    """ Implementação padrão: carrega os bytes e delega para os métodos do extrator. """
+
+    def __init__(self, extractor: "TextExtractor", source: DocumentSource, file_type: str):
+        self._extractor = extractor
+        self._source = source
+        self._file_type = file_type
+        self._content: bytes = b""
+
+    async def open(self) -> None:
+        if isinstance(self._source, bytes):
+            self._content = self._source
+        else:
+            self._content = await asyncio.to_thread(_read_file_bytes, self._source)
+
+    async def close(self) -> None:
+        self._content = b""
+
+    async def extract_metadata(self) -> Dict[str, Any]:
+        return await self._extractor.extract_document_metadata(self._content, self._file_type)
+
+    async def iter_pages(self) -> AsyncIterator[Dict[str, Any]]:
+        async for page in self._extractor.iter_pages(self._content, self._file_type):
+            yield page
+
+
+def _read_file_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
 
 class TextExtractor(ABC):
     """ Interface para serviços de extração de texto de documentos. """
@@ -45,3 +113,32 @@ class TextExtractor(ABC):
         """
         pass
     # --------------------
+
+    async def iter_pages(self, file_content: bytes, file_type: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extrai as páginas de forma incremental (streaming), para que etapas
+        seguintes do pipeline possam começar antes do fim da extração.
+
+        Cada item tem as mesmas chaves de `extract_text` ('page_number', 'text')
+        e, quando conhecida, 'total_pages'. A implementação padrão delega para
+        `extract_text`; implementações concretas devem sobrescrever para
+        produzir uma página por vez.
+        """
+        pages = await self.extract_text(file_content, file_type)
+        for page in pages:
+            yield {**page, "total_pages": len(pages)}
+
+    def open_document(self, source: DocumentSource, file_type: str) -> ExtractedDocument:
+        """
+        Retorna um handle do documento para uso com `async with`, permitindo
+        abrir o arquivo uma única vez para metadados e páginas.
+
+        Args:
+            source: Conteúdo binário ou caminho do arquivo em disco.
+            file_type: O tipo do arquivo (ex: 'pdf').
+
+        A implementação padrão carrega os bytes e delega para
+        `extract_document_metadata`/`iter_pages`; implementações concretas
+        devem sobrescrever para compartilhar o documento aberto.
+        """
+        return _DelegatingExtractedDocument(self, source, file_type)
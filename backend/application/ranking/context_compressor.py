@@ -0,0 +1,166 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from application.interfaces.embedding_cache import TRAFFIC_CONTEXT
+from application.interfaces.embedding_provider import EmbeddingProvider
+from domain.aggregates.document.chunk import Chunk
+from infrastructure.processors.chunkers.sentence_chunker import split_sentences_regex
+
+logger = logging.getLogger(__name__)
+
+# Marca trechos omitidos entre sentenças mantidas de um mesmo chunk
+GAP_MARKER = " [...] "
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_ALNUM_PATTERN = re.compile(r"\w")
+
+
+@dataclass
+class CompressedPassage:
+    """ Trecho de um chunk selecionado após a compressão (sentenças mantidas, na ordem original). """
+    chunk: Chunk
+    score: float # Score do re-ranker do chunk de origem
+    text: str
+    sentences_kept: int
+    sentences_total: int
+
+
+@dataclass
+class CompressionResult:
+    passages: List[CompressedPassage]
+    original_tokens: int
+    compressed_tokens: int
+    duplicate_sentences: int
+
+
+def _normalize(sentence: str) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", sentence).strip().casefold()
+
+
+class ExtractiveContextCompressor:
+    """
+    Compressão extrativa do contexto do LLM: divide os chunks selecionados em
+    sentenças, descarta repetições (sobreposição entre chunks vizinhos do
+    SentenceChunker) e fragmentos sem conteúdo, pontua as restantes pela
+    similaridade com a query (um único embed_batch no modelo já carregado, sem
+    passar pelo cache de embeddings) e mantém as mais relevantes até o orçamento
+    de tokens.
+    """
+
+    def __init__(
+        self,
+        embedding_provider: EmbeddingProvider,
+        count_tokens: Callable[[str], int],
+        max_tokens: int,
+        min_relative_score: float = 0.0,
+        min_sentence_chars: int = 20,
+    ):
+        self._embedding_provider = embedding_provider
+        self._count_tokens = count_tokens
+        self._max_tokens = max_tokens
+        self._min_relative_score = min_relative_score
+        self._min_sentence_chars = min_sentence_chars
+
+    def _collect_sentences(
+        self, chunks_with_scores: List[Tuple[Chunk, float]]
+    ) -> Tuple[List[Tuple[int, int, str]], Dict[int, int], int]:
+        """
+        Retorna (sentenças únicas como (índice do chunk, posição, texto),
+        total de sentenças por chunk, número de duplicadas descartadas).
+        """
+        sentences: List[Tuple[int, int, str]] = []
+        totals: Dict[int, int] = {}
+        seen: List[str] = []
+        seen_set = set()
+        duplicates = 0
+        for chunk_index, (chunk, _) in enumerate(chunks_with_scores):
+            chunk_sentences = split_sentences_regex(chunk.text or "")
+            totals[chunk_index] = len(chunk_sentences)
+            for position, sentence in enumerate(chunk_sentences):
+                if len(_ALNUM_PATTERN.findall(sentence)) < self._min_sentence_chars:
+                    continue # Número de página, cabeçalho curto, marcador solto
+                normalized = _normalize(sentence)
+                # Repetida (sobreposição) ou fragmento de outra já mantida (sentença longa dividida)
+                if normalized in seen_set or any(normalized in other for other in seen):
+                    duplicates += 1
+                    continue
+                seen_set.add(normalized)
+                seen.append(normalized)
+                sentences.append((chunk_index, position, sentence.strip()))
+        return sentences, totals, duplicates
+
+    def _truncate(self, text: str) -> str:
+        """ Maior prefixo (em palavras) de `text` que cabe em max_tokens. """
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._count_tokens(" ".join(words[:middle])) <= self._max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
+
+    async def compress(
+        self, query_vector: List[float], chunks_with_scores: List[Tuple[Chunk, float]]
+    ) -> Optional[CompressionResult]:
+        """
+        Comprime os chunks (na ordem do ranking). Retorna None se não for
+        possível pontuar as sentenças (o chamador usa os chunks completos).
+        """
+        if not chunks_with_scores:
+            return None
+        original_tokens = sum(self._count_tokens(chunk.text or "") for chunk, _ in chunks_with_scores)
+        sentences, totals, duplicates = self._collect_sentences(chunks_with_scores)
+        if not sentences:
+            return None
+
+        embeddings = await self._embedding_provider.embed_batch([text for _, _, text in sentences], traffic=TRAFFIC_CONTEXT)
+        matrix = np.asarray([embedding.vector for embedding in embeddings], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        if not np.any(norms):
+            logger.warning("Compressão de contexto: embeddings das sentenças indisponíveis; usando chunks completos.")
+            return None
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(sentences), dtype=np.float32), where=norms > 0)
+
+        # Seleção gulosa pelas mais similares até o orçamento de tokens
+        min_score = float(scores.max()) * self._min_relative_score
+        selected: Dict[int, List[Tuple[int, str]]] = {}
+        used_tokens = 0
+        for index in np.argsort(-scores, kind="stable"):
+            if scores[index] < min_score:
+                break
+            chunk_index, position, text = sentences[index]
+            tokens = self._count_tokens(text)
+            if used_tokens + tokens > self._max_tokens:
+                if used_tokens:
+                    continue # Tenta sentenças menores que ainda caibam
+                # A sentença mais relevante sozinha excede o orçamento: mantém seu início
+                text = self._truncate(text)
+                if not text:
+                    continue
+                tokens = self._count_tokens(text)
+            selected.setdefault(chunk_index, []).append((position, text))
+            used_tokens += tokens
+
+        passages: List[CompressedPassage] = []
+        for chunk_index, (chunk, score) in enumerate(chunks_with_scores):
+            kept = sorted(selected.get(chunk_index, []))
+            if not kept:
+                continue
+            parts = [kept[0][1]]
+            for (previous, _), (position, text) in zip(kept, kept[1:]):
+                parts.append((" " if position == previous + 1 else GAP_MARKER) + text)
+            passages.append(CompressedPassage(chunk, score, "".join(parts), len(kept), totals[chunk_index]))
+
+        compressed_tokens = sum(self._count_tokens(passage.text) for passage in passages)
+        logger.info(
+            f"Contexto comprimido: {original_tokens} -> {compressed_tokens} tokens "
+            f"({len(passages)}/{len(chunks_with_scores)} chunks, {duplicates} sentenças repetidas removidas)."
+        )
+        return CompressionResult(passages, original_tokens, compressed_tokens, duplicates)
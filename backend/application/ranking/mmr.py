@@ -0,0 +1,67 @@
+from typing import List, Sequence, Tuple
+import logging
+
+import numpy as np
+
+from domain.aggregates.document.chunk import Chunk
+
+logger = logging.getLogger(__name__)
+
+
+def _normalized_rows(vectors: Sequence) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def maximal_marginal_relevance(
+    candidates: List[Tuple[Chunk, float]],
+    k: int,
+    lambda_mult: float = 0.7,
+) -> List[Tuple[Chunk, float]]:
+    """
+    Seleciona `k` chunks por Maximal Marginal Relevance usando os embeddings
+    já carregados (`Chunk.vector`):
+
+        argmax  λ · relevância(c) − (1 − λ) · max_{s ∈ selecionados} cos(c, s)
+
+    A relevância é o score do candidato (RRF ou cross-encoder) normalizado para
+    0-1, preservando o sinal da busca híbrida e do re-ranker.
+
+    Args:
+        candidates: Tuplas (Chunk, score) na ordem de relevância.
+        k: Número de chunks a selecionar.
+        lambda_mult: 1.0 = só relevância (ordem original); 0.0 = só diversidade.
+
+    Returns:
+        Os chunks selecionados com seus scores originais, na ordem de seleção.
+        Se algum candidato não tiver embedding, retorna os `k` primeiros sem alteração.
+    """
+    if k <= 0 or not candidates:
+        return []
+    if len(candidates) <= 1 or any(chunk.vector is None for chunk, _ in candidates):
+        if len(candidates) > 1:
+            logger.warning("MMR ignorado: há candidatos sem embedding carregado.")
+        return candidates[:k]
+
+    embeddings = _normalized_rows([chunk.vector for chunk, _ in candidates])
+    scores = np.asarray([score for _, score in candidates], dtype=np.float32)
+    spread = float(scores.max() - scores.min())
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    # Similaridade de cada candidato com o mais parecido já selecionado (atualizada por seleção)
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, len(candidates))):
+        if selected:
+            mmr = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        else:
+            mmr = relevance.copy()
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, embeddings @ embeddings[best], out=max_similarity)
+
+    return [candidates[index] for index in selected]
@@ -12,6 +12,10 @@ logger = logging.getLogger(__name__)
 class DeleteDocumentUseCase:
     """
     Caso de Uso para excluir um documento e todos os seus chunks associados.
+
+    A exclusão é lógica: o documento é marcado (deleted_at) e some das
+    listagens e buscas imediatamente; os chunks são removidos em lotes, fora
+    da requisição, pelo DocumentPurger (que também compacta os índices).
     """
 
     def __init__(
@@ -26,43 +30,34 @@ class DeleteDocumentUseCase:
 
     async def execute(self, document_id: int) -> bool:
         """
-        Exclui um documento e seus chunks pelo ID do documento.
+        Marca um documento como excluído pelo ID do documento.
 
         Args:
             document_id: O ID do documento a ser excluído.
 
         Returns:
-            True se o documento (e seus chunks) foram excluídos ou se o
-            documento já não existia. False se ocorreu um erro inesperado
-            durante a exclusão.
+            True se o documento foi marcado como excluído ou se o documento
+            já não existia (ou já estava marcado). False se ocorreu um erro
+            inesperado durante a exclusão.
             (Alternativa: Lançar DocumentNotFound se o documento não existe).
         """
-        logger.info(f"Iniciando exclusão do documento ID: {document_id} e seus chunks.")
+        logger.info(f"Iniciando exclusão (lógica) do documento ID: {document_id}.")
 
         try:
-            # 1. Excluir Chunks associados (é seguro chamar mesmo se não houver chunks)
-            # O método do repositório retorna a contagem, podemos logar se quisermos.
-            deleted_chunks_count = await self._chunk_repo.delete_by_document_id(document_id)
-            logger.info(f"{deleted_chunks_count} chunks excluídos para o documento ID: {document_id}.")
-
-            # 2. Excluir o Documento principal
-            # O método do repositório retorna True/False indicando se a exclusão ocorreu.
-            deleted_document = await self._doc_repo.delete(document_id)
+            # Uma única linha atualizada: os chunks são removidos depois pelo purgador
+            marked = await self._doc_repo.mark_deleted(document_id)
 
-            if not deleted_document:
-                # Se delete retornou False, pode significar que o documento
-                # não foi encontrado para ser excluído. Consideramos isso sucesso?
-                # Ou deveríamos verificar a existência primeiro com find_by_id?
-                # Abordagem atual: Considera sucesso se não estava lá ou foi deletado.
-                logger.warning(f"Documento principal com ID {document_id} não encontrado para exclusão (ou já excluído).")
+            if not marked:
+                # Documento inexistente ou já marcado: consideramos sucesso (operação idempotente)
+                logger.warning(f"Documento com ID {document_id} não encontrado para exclusão (ou já excluído).")
                 # Poderia lançar DocumentNotFound aqui se quiséssemos tratar diferente.
                 # raise DocumentNotFound(f"Documento com ID {document_id} não encontrado para exclusão.")
 
-            logger.info(f"Exclusão concluída para documento ID: {document_id}. Documento principal excluído: {deleted_document}")
+            logger.info(f"Exclusão registrada para documento ID: {document_id}. Chunks serão purgados em segundo plano.")
             return True # Retorna True indicando que a operação foi concluída (ou não era necessária)
 
         except Exception as e:
-            logger.exception(f"Erro ao excluir documento ID {document_id} e/ou seus chunks: {e}")
+            logger.exception(f"Erro ao excluir documento ID {document_id}: {e}")
             # Retornar False ou relançar uma exceção específica
             # raise RuntimeError(f"Erro ao excluir documento: {e}") from e
             return False
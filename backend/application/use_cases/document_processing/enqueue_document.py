@@ -0,0 +1,56 @@
+import logging
+from typing import Dict, Any, Optional
+
+# Importar entidade e repositório do domínio
+from domain.aggregates.ingestion.ingestion_job import IngestionJob
+from domain.repositories.ingestion_job_repository import IngestionJobRepository
+
+# Importar configurações
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class EnqueueDocumentUseCase:
+    """
+    Caso de Uso para enfileirar um documento já persistido em disco para
+    processamento assíncrono pelos workers de ingestão.
+    """
+
+    def __init__(self, ingestion_job_repository: IngestionJobRepository):
+        self._job_repo = ingestion_job_repository
+        self._settings = get_settings()
+        if self._job_repo is None:
+             raise ValueError("IngestionJobRepository cannot be None")
+
+    async def execute(
+        self,
+        file_name: str,
+        file_path: str,
+        file_type: str,
+        size_kb: float,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> IngestionJob:
+        """
+        Cria um job 'queued' apontando para o arquivo persistido.
+
+        Args:
+            file_name: Nome original do arquivo enviado.
+            file_path: Caminho do arquivo salvo no armazenamento de ingestão.
+            file_type: Tipo do arquivo (ex: 'pdf').
+            size_kb: Tamanho do arquivo em KB.
+            metadata: Metadados adicionais informados no upload.
+
+        Returns:
+            O IngestionJob criado (com ID).
+        """
+        job = IngestionJob(
+            file_name=file_name,
+            file_type=file_type,
+            file_path=file_path,
+            size_kb=size_kb,
+            metadata=metadata or {},
+            max_attempts=self._settings.INGESTION_MAX_ATTEMPTS,
+        )
+        created_job = await self._job_repo.create(job)
+        logger.info(f"Documento '{file_name}' enfileirado para ingestão (job ID: {created_job.id}).")
+        return created_job
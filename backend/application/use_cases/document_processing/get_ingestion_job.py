@@ -0,0 +1,53 @@
+import logging
+from typing import Optional
+
+# Importar repositório do domínio
+from domain.repositories.ingestion_job_repository import IngestionJobRepository
+
+# Importar o DTO
+from application.dtos.ingestion_job_dto import IngestionJobDTO
+
+logger = logging.getLogger(__name__)
+
+class GetIngestionJobUseCase:
+    """
+    Caso de Uso para consultar o estado de um job de ingestão por ID.
+    """
+
+    def __init__(self, ingestion_job_repository: IngestionJobRepository):
+        self._job_repo = ingestion_job_repository
+        if self._job_repo is None:
+             raise ValueError("IngestionJobRepository cannot be None")
+
+    async def execute(self, job_id: int) -> Optional[IngestionJobDTO]:
+        """
+        Busca um job pelo ID e retorna seu estado como DTO.
+
+        Args:
+            job_id: O ID do job de ingestão.
+
+        Returns:
+            Um IngestionJobDTO, ou None se o job não existir.
+        """
+        job = await self._job_repo.find_by_id(job_id)
+        if job is None:
+            logger.warning(f"Job de ingestão ID {job_id} não encontrado.")
+            return None
+
+        return IngestionJobDTO(
+            id=job.id,
+            status=job.status,
+            file_name=job.file_name,
+            file_type=job.file_type,
+            size_kb=job.size_kb,
+            document_id=job.document_id,
+            stage=job.stage,
+            progress=job.progress,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            last_error=job.last_error,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
@@ -1,15 +1,15 @@
-from typing import List, Optional, Tuple
+from typing import List, Optional
 from domain.aggregates.document.document import Document
 from domain.repositories.document_repository import DocumentRepository
-import asyncio
 import logging
-from application.dtos.document_dto import DocumentDTO
+from application.dtos.document_dto import DocumentDTO, DocumentPageDTO
 
 logger = logging.getLogger(__name__)
 
 class ListDocumentsUseCase:
     """
     Caso de Uso para listar documentos existentes, incluindo contagem total.
+    Filtro, ordenação e paginação são feitos pelo repositório (no banco).
     Retorna DTOs para desacoplar da camada de domínio.
     """
     def __init__(self, document_repository: DocumentRepository):
@@ -18,29 +18,47 @@ class ListDocumentsUseCase:
             raise ValueError("DocumentRepository cannot be None")
         self._document_repository = document_repository
 
-    async def execute(self, limit: int = 100, offset: int = 0) -> Tuple[List[DocumentDTO], int]:
+    async def execute(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        sort_by: str = "upload_date",
+        order: str = "desc",
+        name_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> DocumentPageDTO:
         """
         Executa o caso de uso, buscando uma página de documentos e a contagem total.
 
         Args:
             limit: Número máximo de documentos a retornar na página.
-            offset: Número de documentos a pular (para paginação).
+            offset: Número de documentos a pular (ignorado quando `cursor` é informado).
+            sort_by: Campo de ordenação (name, upload_date, size_kb).
+            order: Direção da ordenação (asc, desc).
+            name_filter: Substring do nome do documento (sem distinção de maiúsculas).
+            cursor: Cursor `next_cursor` da página anterior (paginação por keyset).
 
         Returns:
-            Uma tupla contendo:
-            - List[DocumentDTO]: A lista de DTOs dos documentos da página solicitada.
-            - int: O número total de documentos existentes.
+            DocumentPageDTO: Documentos da página, total (exato ou estimado) e cursor da próxima página.
+
+        Raises:
+            ValueError: Se o cursor for inválido ou de outra ordenação.
         """
-        logger.info(f"Executando ListDocumentsUseCase: limit={limit}, offset={offset}")
+        logger.info(f"Executando ListDocumentsUseCase: limit={limit}, offset={offset}, sort_by={sort_by}, order={order}, filtro={name_filter!r}, cursor={'sim' if cursor else 'não'}")
         try:
-            results = await asyncio.gather(
-                self._document_repository.find_all(limit=limit, offset=offset),
-                self._document_repository.count_all()
+            # Sequencial: as duas consultas usam a mesma AsyncSession, que não aceita operações concorrentes
+            documents_page: List[Document]
+            documents_page, next_cursor = await self._document_repository.find_page(
+                limit=limit,
+                sort_by=sort_by,
+                descending=order == "desc",
+                name_filter=name_filter,
+                cursor=cursor,
+                offset=offset,
             )
-            documents_page: List[Document] = results[0]
-            total_documents: int = results[1]
+            total_documents, total_is_estimate = await self._document_repository.count_estimate(name_filter=name_filter)
 
-            logger.debug(f"Repositório retornou {len(documents_page)} documentos e contagem total {total_documents}.")
+            logger.debug(f"Repositório retornou {len(documents_page)} documentos e contagem total {total_documents} (estimada: {total_is_estimate}).")
 
             document_dtos = [
                 DocumentDTO(
@@ -57,8 +75,15 @@ class ListDocumentsUseCase:
             ]
 
             logger.info(f"Mapeados {len(document_dtos)} documentos para DTOs.")
-            return document_dtos, total_documents
+            return DocumentPageDTO(
+                documents=document_dtos,
+                total=total_documents,
+                total_is_estimate=total_is_estimate,
+                next_cursor=next_cursor,
+            )
 
+        except ValueError:
+            raise # Cursor inválido: erro do cliente (400)
         except Exception as e:
              logger.exception(f"Erro no ListDocumentsUseCase ao buscar/mapear dados: {e}")
              raise RuntimeError(f"Erro ao listar documentos: {e}") from e
@@ -1,8 +1,11 @@
 import logging
 import time # Para métricas de tempo
-from typing import Dict, Any, Optional, List, Tuple # Adicionar Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable # Adicionar Tuple
 import re # <-- Adicionar import re
 import hashlib # <-- Importar hashlib
+import asyncio
+import os
+from dataclasses import dataclass, field
 
 # Importar entidades do domínio
 from domain.aggregates.document.document import Document
@@ -15,12 +18,14 @@ from domain.repositories.document_repository import DocumentRepository
 from domain.repositories.chunk_repository import ChunkRepository
 
 # Importar interfaces de serviços externos (Aplicação)
-from application.interfaces.text_extractor import TextExtractor
+from application.interfaces.text_extractor import TextExtractor, ExtractedDocument
 from application.interfaces.chunker import Chunker
 from application.interfaces.embedding_provider import EmbeddingProvider
 
 # Importar configurações (pode ser necessário para defaults)
 from config.config import get_settings
+from utils.filesystem_utils import calcular_sha256_arquivo
+from infrastructure.metrics.prometheus.metrics_prometheus import record_pipeline_stage, set_pipeline_queue_depth, record_embedding_throughput
 
 # Exceção específica (pode ser definida em application/exceptions.py)
 class DocumentProcessingError(Exception):
@@ -28,6 +33,10 @@ class DocumentProcessingError(Exception):
 
 logger = logging.getLogger(__name__)
 
+# Callback opcional de progresso: (etapa, progresso 0..1, document_id).
+# Usado pelo worker de ingestão para atualizar o job e renovar o heartbeat.
+ProgressCallback = Callable[[str, float, Optional[int]], Awaitable[None]]
+
 # --- Função Auxiliar de Limpeza (ou colocar em utils) ---
 def clean_page_markers(text: str) -> str:
     """ Remove marcadores como [Página X] do início do texto. """
@@ -64,21 +73,117 @@ class ProcessDocumentUseCase:
     async def execute(
         self,
         file_name: str,
-        file_content: bytes,
-        file_type: str,
+        file_content: Optional[bytes] = None,
+        file_type: str = "pdf",
         metadata: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        file_path: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        replace_document_id: Optional[int] = None,
     ) -> Document:
-        """ Executa o processamento completo do documento. """
+        """
+        Executa o processamento completo do documento.
+
+        O documento pode vir em memória (`file_content`) ou, preferencialmente,
+        como caminho em disco (`file_path`): nesse caso o arquivo é aberto uma
+        única vez pelo extrator, sem carregar o conteúdo inteiro na memória.
+        `content_hash` evita reler o arquivo quando o hash já foi calculado no upload.
+
+        Com `replace_document_id`, o arquivo é tratado como nova versão do
+        documento informado (reingestão incremental): apenas chunks novos ou
+        alterados recebem embeddings; os idênticos mantêm o embedding armazenado.
+        """
         start_time = time.time()
+        if file_content is None and not file_path:
+            raise DocumentProcessingError(f"Nenhum conteúdo ou caminho informado para o documento {file_name}.")
+        source = file_path if file_content is None else file_content
+
+        async def report(stage: str, progress: float, doc_id: Optional[int] = None) -> None:
+            # Falhas ao reportar progresso nunca devem interromper o processamento
+            if progress_callback is None:
+                return
+            try:
+                await progress_callback(stage, progress, doc_id)
+            except Exception as cb_err:
+                logger.warning(f"Falha no callback de progresso (etapa '{stage}'): {cb_err}")
+
         logger.info(f"Iniciando processamento para documento: {file_name}")
         initial_metadata_dict = metadata or {} # Renomear para clareza
         enriched_metadata_dict = initial_metadata_dict.copy() # Trabalhar com um dicionário temporário
-        enriched_metadata_dict["content_hash_sha256"] = hashlib.sha256(file_content).hexdigest() if file_content else None
+        if content_hash is None:
+            if file_content is not None:
+                content_hash = hashlib.sha256(file_content).hexdigest() if file_content else None
+            else:
+                content_hash = await asyncio.to_thread(calcular_sha256_arquivo, file_path)
+        enriched_metadata_dict["content_hash_sha256"] = content_hash
         enriched_metadata_dict["source_filename"] = file_name # Adicionar nome original ao dict
-
+        if file_content is not None:
+            size_kb = len(file_content) / 1024
+        else:
+            size_kb = await asyncio.to_thread(os.path.getsize, file_path) / 1024
+
+        replaced_document: Optional[Document] = None
+        if replace_document_id is not None:
+            replaced_document = await self._doc_repo.find_by_id(replace_document_id)
+            if replaced_document is None:
+                raise DocumentProcessingError(f"Documento {replace_document_id} a ser substituído não encontrado.")
+            if content_hash and replaced_document.content_hash == content_hash:
+                logger.info(f"Nova versão de {file_name} é idêntica ao documento ID {replace_document_id}. Nada a reprocessar.")
+                return replaced_document
+
+        # Upload idêntico a um documento já processado: reaproveitar conforme DEDUP_POLICY
+        if content_hash and replaced_document is None:
+            duplicate_document = await self._handle_duplicate(
+                content_hash=content_hash,
+                file_name=file_name,
+                file_type=file_type,
+                size_kb=size_kb,
+                enriched_metadata_dict=enriched_metadata_dict,
+                report=report,
+            )
+            if duplicate_document is not None:
+                logger.info(f"Documento {file_name} processado via deduplicação em {time.time() - start_time:.2f}s.")
+                return duplicate_document
+
+        # Documento aberto uma única vez e compartilhado entre metadados e páginas
+        try:
+            document_handle = self._extractor.open_document(source, file_type)
+            await document_handle.open()
+        except NotImplementedError as nie:
+            logger.error(f"Tipo de arquivo '{file_type}' não suportado pelo extrator para {file_name}.")
+            raise DocumentProcessingError(f"Tipo de arquivo não suportado: {file_type}") from nie
+        except Exception as e:
+            logger.exception(f"Falha ao abrir o documento {file_name}: {e}")
+            raise DocumentProcessingError(f"Erro na extração de texto: {e}") from e
+        try:
+            return await self._process_opened_document(
+                document_handle=document_handle,
+                file_name=file_name,
+                file_type=file_type,
+                size_kb=size_kb,
+                enriched_metadata_dict=enriched_metadata_dict,
+                report=report,
+                start_time=start_time,
+                replaced_document=replaced_document,
+            )
+        finally:
+            await document_handle.close()
+
+    async def _process_opened_document(
+        self,
+        document_handle: ExtractedDocument,
+        file_name: str,
+        file_type: str,
+        size_kb: float,
+        enriched_metadata_dict: Dict[str, Any],
+        report: Callable[..., Awaitable[None]],
+        start_time: float,
+        replaced_document: Optional[Document] = None,
+    ) -> Document:
+        """ Processa um documento já aberto: metadados, registro inicial, pipeline e estado final. """
         # --- Extração de Metadados (já existente) ---
         try:
-            doc_extracted_metadata = await self._extractor.extract_document_metadata(file_content, file_type)
+            doc_extracted_metadata = await document_handle.extract_metadata()
             # Atualizar o dicionário temporário com metadados extraídos
             for key, value in doc_extracted_metadata.items():
                  # Evitar sobrescrever chaves já existentes como content_hash? Ou permitir? Decidir política.
@@ -90,13 +195,26 @@ class ProcessDocumentUseCase:
              enriched_metadata_dict["extraction_status"] = "failed" # Atualizar status no dict
         # ------------------------------------
 
+        if replaced_document is not None:
+            return await self._process_new_version(
+                document_handle=document_handle,
+                document=replaced_document,
+                file_name=file_name,
+                file_type=file_type,
+                size_kb=size_kb,
+                enriched_metadata_dict=enriched_metadata_dict,
+                report=report,
+                start_time=start_time,
+            )
+
         # 1. Criar entidade Document inicial, passando o dicionário para o DocumentMetadata
         document = Document(
             name=file_name,
             file_type=file_type,
             # Criar o VO DocumentMetadata a partir do dicionário enriquecido
             metadata=DocumentMetadata.from_dict(enriched_metadata_dict), # <-- MUDANÇA: Usar from_dict
-            size_kb=len(file_content) / 1024 if file_content else 0.0,
+            size_kb=size_kb,
+            content_hash=enriched_metadata_dict.get("content_hash_sha256"),
             # processed e chunks_count são definidos depois
         )
 
@@ -108,129 +226,22 @@ class ProcessDocumentUseCase:
              document_id = saved_doc.id
              document.id = document_id # Atualizar objeto em memória com ID
              logger.info(f"Documento inicial salvo com ID: {document_id}")
+             await report("extracting", 0.05, document_id)
         except Exception as e: # Captura erro do save inicial
              logger.exception(f"Falha crítica ao salvar registro inicial do documento {file_name}: {e}")
              # Relança como DocumentProcessingError para ser pego pelo except principal
              raise DocumentProcessingError(f"Não foi possível salvar o registro inicial do documento: {e}") from e
 
-        # 3. Extrair texto por página
-        pages_data: List[Dict[str, Any]] = []
-        try: # <-- Try interno para extração de texto
-            pages_data = await self._extractor.extract_text(file_content, file_type)
-            if not pages_data:
-                logger.warning(f"Nenhum texto/página extraído do documento {file_name} (ID: {document_id}). Marcando como falha.")
-                raise DocumentProcessingError(f"Falha na extração de texto (sem páginas) para {file_name}")
-            logger.info(f"Texto extraído de {len(pages_data)} páginas para doc ID {document_id}.")
-        except NotImplementedError as nie: # Captura erro específico do extrator
-             logger.error(f"Tipo de arquivo '{file_type}' não suportado pelo extrator para {file_name} (ID: {document_id}).")
-             raise DocumentProcessingError(f"Tipo de arquivo não suportado: {file_type}") from nie
-        except Exception as e: # Captura outros erros de extração
-            logger.exception(f"Falha ao extrair texto do documento {document_id}: {e}")
-            raise DocumentProcessingError(f"Erro na extração de texto: {e}") from e
-
-        # ----- INÍCIO DO LOOP DE PROCESSAMENTO DE PÁGINAS E CHUNKS -----
-        chunks_to_save: List[Tuple[Chunk, List[float]]] = []
-        total_chunks_attempted = 0
-        total_chunks_failed = 0
-
-        for page_num, page_content in enumerate(pages_data, 1):
-            page_text = page_content.get("text", "")
-            if not page_text.strip():
-                continue
-            page_text_cleaned = clean_page_markers(page_text)
-            if not page_text_cleaned and page_text:
-                logger.warning(f"Texto da página {page_num} (Doc ID: {document_id}) ficou vazio após limpeza.")
-            logger.debug(f"[DEBUG] Processando Página: {page_num} (Doc ID: {document_id})")
-
-            page_chunks_data: List[Dict[str, Any]] = []
-            try:
-                chunk_base_metadata = {}
-                page_chunks_data = await self._chunker.split_page_to_chunks(
-                    page_number=page_num,
-                    page_text=page_text_cleaned,
-                    base_metadata=chunk_base_metadata
-                )
-            except Exception as chunk_err:
-                logger.error(f"Erro durante o chunking da página {page_num} (Doc ID: {document_id}): {chunk_err}", exc_info=True)
-                continue # Pula para a próxima página
-
-            logger.debug(f"[DEBUG] Chunker retornou {len(page_chunks_data)} chunks para a página {page_num} (Doc ID: {document_id}).")
-
-            # Preparar textos para embedding
-            chunk_texts_for_embedding: List[str] = [chunk_data.get("text", "") for chunk_data in page_chunks_data if chunk_data.get("text")]
-            chunk_metadata_list: List[Dict[str, Any]] = [chunk_data.get("metadata", {}) for chunk_data in page_chunks_data if chunk_data.get("text")] # Para metadados originais do chunker
-
-            page_chunk_embeddings_vectors: List[List[float]] = []
-            if chunk_texts_for_embedding:
-                try:
-                    # Geração de embeddings (retorna List[Embedding])
-                    page_chunk_embedding_objects: List[Embedding] = await self._embedder.embed_batch(chunk_texts_for_embedding)
-                    # Extrair vetores
-                    page_chunk_embeddings_vectors = [emb.vector for emb in page_chunk_embedding_objects]
-                    # Validar tamanho (já existente)
-                    if len(page_chunk_embeddings_vectors) != len(chunk_texts_for_embedding):
-                        logger.error(f"Número de embeddings ({len(page_chunk_embedding_objects)}) diferente do número de textos ({len(chunk_texts_for_embedding)}) para página {page_num}. Pulando página.")
-                        total_chunks_failed += len(chunk_texts_for_embedding) # Contar como falha
-                        continue # Pular página
-
-                except Exception as embed_err:
-                    logger.error(f"Erro ao gerar embeddings para chunks da página {page_num} (Doc ID: {document_id}): {embed_err}", exc_info=True)
-                    total_chunks_failed += len(chunk_texts_for_embedding) # Contar como falha
-                    continue # Pular página
-
-            # Criar entidades Chunk e preparar lista de tuplas para salvar
-            embedding_idx = 0
-            for i, chunk_data in enumerate(page_chunks_data):
-                 chunk_text = chunk_data.get("text", "")
-                 chunk_metadata = chunk_data.get("metadata", {}) # Metadados vindos do chunker
-                 if not chunk_text: continue
-
-                 if embedding_idx < len(page_chunk_embeddings_vectors):
-                     current_embedding_vector = page_chunk_embeddings_vectors[embedding_idx]
-
-                     # Criar a entidade Chunk (ainda sem ID)
-                     domain_chunk = Chunk(
-                         document_id=document_id,
-                         text=chunk_text,
-                         page_number=chunk_metadata.get("page_number", page_num), # Usar page_num se não vier do metadata
-                         position=total_chunks_attempted, # Posição global (ajustar se necessário)
-                         metadata=chunk_metadata # Usar metadados do chunker
-                     )
-                     # Adicionar tupla (Chunk, embedding_vector) à lista
-                     chunks_to_save.append((domain_chunk, current_embedding_vector)) # <-- Montar tupla aqui
-                     total_chunks_attempted += 1
-                     embedding_idx += 1
-                 else:
-                     logger.error(f"Faltando embedding para chunk {i}, pág {page_num}, doc {document_id}.")
-                     total_chunks_failed += 1 # Contar como falha
-
-        # ----- FIM DO LOOP -----
-
-        logger.info(f"Total de {len(chunks_to_save)} chunks preparados para salvar para doc ID {document_id}.")
-
-        # 6. Salvar chunks e embeddings em lote
-        saved_chunks: List[Chunk] = []
-        if chunks_to_save:
-            logger.info(f"Preparando para salvar {len(chunks_to_save)} chunks com embeddings para doc ID {document_id}.")
-            try:
-                 # Chamar o método específico da implementação
-                 # Não precisamos mais da verificação de tipo aqui por causa do check no __init__
-                 saved_chunks = await self._chunk_repo.save_batch_with_embeddings(chunks_to_save) # <-- CHAMADA AO NOVO MÉTODO
-
-                 if len(saved_chunks) != len(chunks_to_save):
-                     logger.warning(f"Número de chunks salvos ({len(saved_chunks)}) difere do número enviado ({len(chunks_to_save)}).")
-                     # Pode indicar falhas parciais no salvamento em lote
-
-                 logger.info(f"{len(saved_chunks)} chunks efetivamente salvos para o documento {document_id}.")
-
-            except NotImplementedError:
-                 # Caso o check no __init__ falhe ou seja removido
-                 logger.error(f"A implementação do ChunkRepository ({type(self._chunk_repo).__name__}) não suporta save_batch_with_embeddings.")
-                 raise DocumentProcessingError("Erro interno: Repositório de Chunks incompatível.") from None
-            except Exception as e:
-                logger.exception(f"Erro ao salvar chunks em lote para documento {document_id}: {e}")
-                # Considerar se deve levantar erro ou tentar salvar o estado parcial do documento
-                raise DocumentProcessingError(f"Falha ao salvar chunks: {e}") from e
+        # 3-6. Pipeline: extração -> chunking -> embeddings -> escrita em lote,
+        # etapas concorrentes ligadas por filas limitadas (memória constante
+        # mesmo para PDFs muito grandes).
+        saved_chunks_count = await self._run_pipeline(
+            document_handle=document_handle,
+            file_type=file_type,
+            file_name=file_name,
+            document_id=document_id,
+            report=report,
+        )
 
         # 7. Atualizar estado final do Documento
         # Se precisarmos atualizar metadados finais aqui:
@@ -246,7 +257,7 @@ class ProcessDocumentUseCase:
         document.metadata = DocumentMetadata.from_dict(current_meta_dict) # <-- MUDANÇA: Atualizar metadata via VO
 
         document.processed = True
-        document.chunks_count = len(saved_chunks)
+        document.chunks_count = saved_chunks_count
         logger.info(f"Documento {document_id} processado. Chunks salvos: {document.chunks_count}. Status metadados: {document.metadata.extraction_status}") # Acessar campo do VO
 
         # 8. Salvar estado final do Document no DB (DENTRO do try principal)
@@ -263,3 +274,450 @@ class ProcessDocumentUseCase:
         end_time = time.time()
         logger.info(f"Documento {document.id} ({file_name}) processado com sucesso em {end_time - start_time:.2f}s.")
         return document_to_return
+
+    # --- Reingestão Incremental ---
+
+    async def _process_new_version(
+        self,
+        document_handle: ExtractedDocument,
+        document: Document,
+        file_name: str,
+        file_type: str,
+        size_kb: float,
+        enriched_metadata_dict: Dict[str, Any],
+        report: Callable[..., Awaitable[None]],
+        start_time: float,
+    ) -> Document:
+        """
+        Reprocessa uma nova versão de um documento existente mantendo o mesmo ID.
+        Os chunks são comparados pela impressão digital do texto (`Chunk.text_hash`):
+        idênticos reaproveitam o embedding armazenado, novos/alterados são
+        embedados e os ausentes são excluídos, tudo em uma única transação.
+        """
+        document_id = document.id
+        try:
+            stored_hashes = await self._chunk_repo.find_text_hashes_by_document_id(document_id)
+        except Exception as e:
+            raise DocumentProcessingError(f"Falha ao carregar chunks do documento {document_id}: {e}") from e
+        reusable_chunks: Dict[str, List[int]] = {}
+        for chunk_id, text_hash in stored_hashes:
+            if text_hash:
+                reusable_chunks.setdefault(text_hash, []).append(chunk_id)
+        logger.info(f"Reingestão incremental do documento {document_id} ({file_name}): {len(stored_hashes)} chunks armazenados.")
+        # O ID não é reportado ao worker: em nova tentativa ele excluiria o documento existente
+        await report("extracting", 0.05)
+
+        saved_chunks_count = await self._run_pipeline(
+            document_handle=document_handle,
+            file_type=file_type,
+            file_name=file_name,
+            document_id=document_id,
+            report=report,
+            reusable_chunks=reusable_chunks,
+        )
+
+        new_metadata = dict(enriched_metadata_dict)
+        new_metadata["processing_status"] = "completed"
+        new_metadata["previous_content_hash_sha256"] = document.content_hash
+        document.name = file_name
+        document.file_type = file_type
+        document.size_kb = size_kb
+        document.content_hash = enriched_metadata_dict.get("content_hash_sha256")
+        document.metadata = DocumentMetadata.from_dict(new_metadata)
+        document.chunks_count = saved_chunks_count
+        document.processed = True
+        try:
+            document = await self._doc_repo.save(document)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar estado final do documento {document_id}: {e}")
+        logger.info(f"Nova versão do documento {document_id} ({file_name}) processada em {time.time() - start_time:.2f}s.")
+        return document
+
+    # --- Deduplicação por Hash de Conteúdo ---
+
+    async def _handle_duplicate(
+        self,
+        content_hash: str,
+        file_name: str,
+        file_type: str,
+        size_kb: float,
+        enriched_metadata_dict: Dict[str, Any],
+        report: Callable[..., Awaitable[None]],
+    ) -> Optional[Document]:
+        """
+        Aplica DEDUP_POLICY quando já existe um documento processado com o
+        mesmo hash. Retorna o documento resultante, ou None para seguir com
+        o processamento normal.
+        """
+        policy = (self._settings.DEDUP_POLICY or "none").lower()
+        if policy not in ("return_existing", "clone"):
+            return None
+        existing = await self._doc_repo.find_by_content_hash(content_hash)
+        if existing is None or not existing.id:
+            return None
+
+        if policy == "return_existing":
+            logger.info(f"Upload {file_name} idêntico ao documento ID {existing.id} (hash {content_hash[:12]}...). Retornando documento existente.")
+            return existing
+
+        # clone: novo registro com os chunks/embeddings copiados no servidor (sem extração nem embeddings)
+        logger.info(f"Upload {file_name} idêntico ao documento ID {existing.id}. Clonando chunks.")
+        clone_metadata = existing.metadata.to_dict() if existing.metadata else {}
+        clone_metadata.update(enriched_metadata_dict)
+        clone_metadata["deduplicated_from_document_id"] = existing.id
+        clone = Document(
+            name=file_name,
+            file_type=file_type,
+            metadata=DocumentMetadata.from_dict(clone_metadata),
+            size_kb=size_kb,
+            content_hash=content_hash,
+        )
+        try:
+            saved_clone = await self._doc_repo.save(clone)
+            if not saved_clone or not saved_clone.id:
+                raise DocumentProcessingError(f"Repositório não retornou um ID válido ao salvar clone de {file_name}")
+            # Informar o ID permite ao worker remover o clone parcial em caso de nova tentativa
+            await report("cloning", 0.1, saved_clone.id)
+            saved_clone.chunks_count = await self._chunk_repo.clone_chunks(existing.id, saved_clone.id)
+            saved_clone.processed = True
+            return await self._doc_repo.save(saved_clone)
+        except DocumentProcessingError:
+            raise
+        except Exception as e:
+            logger.exception(f"Falha ao clonar documento ID {existing.id} para {file_name}: {e}")
+            raise DocumentProcessingError(f"Falha ao clonar documento duplicado: {e}") from e
+
+    # --- Pipeline de Ingestão ---
+
+    async def _run_pipeline(
+        self,
+        document_handle: ExtractedDocument,
+        file_type: str,
+        file_name: str,
+        document_id: int,
+        report: Callable[..., Awaitable[None]],
+        reusable_chunks: Optional[Dict[str, List[int]]] = None,
+    ) -> int:
+        """
+        Executa as etapas de extração, chunking, embeddings e escrita como
+        tarefas concorrentes ligadas por `asyncio.Queue` limitadas. O
+        embedding (CPU) de uma página se sobrepõe à extração das próximas e
+        à escrita das anteriores. Retorna o número de chunks salvos.
+        """
+        queue_size = max(1, self._settings.INGESTION_QUEUE_SIZE)
+        pages_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        chunks_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        state = _PipelineState(document_id=document_id, file_name=file_name, reusable_chunks=reusable_chunks)
+
+        stages = [
+            asyncio.create_task(self._extract_stage(document_handle, file_type, pages_queue, state)),
+            asyncio.create_task(self._chunk_stage(pages_queue, chunks_queue, state)),
+            asyncio.create_task(self._embed_stage(chunks_queue, write_queue, state)),
+            asyncio.create_task(self._write_stage(write_queue, state, report)),
+        ]
+        try:
+            # Se qualquer etapa falhar, as demais são canceladas (evita bloqueio em filas cheias)
+            done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in stages:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            for queue_name in ("pages", "chunks", "embeddings"):
+                set_pipeline_queue_depth(queue_name, 0)
+
+        if state.total_chunks_failed:
+            logger.warning(f"{state.total_chunks_failed} chunks falharam no embedding para doc ID {document_id}.")
+        if state.is_incremental:
+            await self._apply_chunk_diff(state)
+        logger.info(f"{state.saved_chunks} chunks efetivamente salvos para o documento {document_id} ({state.pages_extracted} páginas).")
+        return state.saved_chunks
+
+    async def _extract_stage(self, document_handle: ExtractedDocument, file_type: str, out_queue: asyncio.Queue, state: "_PipelineState") -> None:
+        """ Etapa 1: extrai páginas (streaming) e as envia para o chunking. """
+        try:
+            stage_start = time.perf_counter()
+            async for page_content in document_handle.iter_pages():
+                state.total_pages = page_content.get("total_pages") or state.total_pages
+                state.pages_extracted += 1
+                record_pipeline_stage("extract", time.perf_counter() - stage_start)
+                await out_queue.put((page_content.get("page_number", state.pages_extracted), page_content.get("text", "")))
+                set_pipeline_queue_depth("pages", out_queue.qsize())
+                stage_start = time.perf_counter()
+        except NotImplementedError as nie: # Captura erro específico do extrator
+             logger.error(f"Tipo de arquivo '{file_type}' não suportado pelo extrator para {state.file_name} (ID: {state.document_id}).")
+             raise DocumentProcessingError(f"Tipo de arquivo não suportado: {file_type}") from nie
+        except Exception as e: # Captura outros erros de extração
+            logger.exception(f"Falha ao extrair texto do documento {state.document_id}: {e}")
+            raise DocumentProcessingError(f"Erro na extração de texto: {e}") from e
+
+        if state.pages_extracted == 0:
+            logger.warning(f"Nenhum texto/página extraído do documento {state.file_name} (ID: {state.document_id}). Marcando como falha.")
+            raise DocumentProcessingError(f"Falha na extração de texto (sem páginas) para {state.file_name}")
+        logger.info(f"Texto extraído de {state.pages_extracted} páginas para doc ID {state.document_id}.")
+        await out_queue.put(_END_OF_STREAM)
+
+    async def _chunk_stage(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue, state: "_PipelineState") -> None:
+        """
+        Etapa 2: divide as páginas em chunks. As páginas já disponíveis na
+        fila (até CHUNK_BATCH_PAGES) são enviadas ao chunker em uma única
+        chamada. Erros pulam apenas a página.
+        """
+        batch_limit = max(1, self._settings.CHUNK_BATCH_PAGES)
+        finished = False
+        while not finished:
+            batch: List[Tuple[int, str]] = []
+            item = await in_queue.get()
+            while True:
+                if item is _END_OF_STREAM:
+                    finished = True
+                    break
+                page_num, page_text = item
+                if not page_text.strip():
+                    state.pages_done += 1
+                else:
+                    page_text_cleaned = clean_page_markers(page_text)
+                    if not page_text_cleaned and page_text:
+                        logger.warning(f"Texto da página {page_num} (Doc ID: {state.document_id}) ficou vazio após limpeza.")
+                    batch.append((page_num, page_text_cleaned))
+                if len(batch) >= batch_limit or in_queue.empty():
+                    break
+                item = in_queue.get_nowait()
+            set_pipeline_queue_depth("pages", in_queue.qsize())
+            if batch:
+                await self._chunk_batch(batch, out_queue, state)
+        await out_queue.put(_END_OF_STREAM)
+
+    async def _chunk_batch(self, batch: List[Tuple[int, str]], out_queue: asyncio.Queue, state: "_PipelineState") -> None:
+        logger.debug(f"[DEBUG] Processando Páginas: {batch[0][0]}-{batch[-1][0]} (Doc ID: {state.document_id})")
+        stage_start = time.perf_counter()
+        try:
+            batch_chunks_data = await self._chunker.split_pages_to_chunks(batch, base_metadata={})
+        except Exception as batch_err:
+            # Refaz página a página para isolar a(s) página(s) com erro
+            logger.warning(f"Erro no chunking em lote das páginas {batch[0][0]}-{batch[-1][0]} (Doc ID: {state.document_id}): {batch_err}. Repetindo por página.")
+            batch_chunks_data = []
+            for page_num, page_text in batch:
+                try:
+                    batch_chunks_data.append(await self._chunker.split_page_to_chunks(
+                        page_number=page_num,
+                        page_text=page_text,
+                        base_metadata={}
+                    ))
+                except Exception as chunk_err:
+                    logger.error(f"Erro durante o chunking da página {page_num} (Doc ID: {state.document_id}): {chunk_err}", exc_info=True)
+                    batch_chunks_data.append(None)
+        record_pipeline_stage("chunk", time.perf_counter() - stage_start, items=len(batch))
+
+        for (page_num, _), page_chunks_data in zip(batch, batch_chunks_data):
+            if page_chunks_data is None:
+                state.pages_done += 1
+                continue # Pula para a próxima página
+            logger.debug(f"[DEBUG] Chunker retornou {len(page_chunks_data)} chunks para a página {page_num} (Doc ID: {state.document_id}).")
+            await out_queue.put((page_num, [chunk_data for chunk_data in page_chunks_data if chunk_data.get("text")]))
+            set_pipeline_queue_depth("chunks", out_queue.qsize())
+
+    async def _embed_stage(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue, state: "_PipelineState") -> None:
+        """
+        Etapa 3: acumula chunks de várias páginas em uma janela de até
+        INGESTION_EMBED_WINDOW_CHUNKS e gera os embeddings em uma única chamada
+        (páginas costumam render poucos chunks; lotes por página subutilizam o modelo).
+        Se a chamada falhar, a janela é refeita por página e só as páginas com
+        erro são descartadas. Monta as entidades Chunk com posição global em ordem.
+        """
+        window_limit = max(1, self._settings.INGESTION_EMBED_WINDOW_CHUNKS)
+        window: List[Tuple[int, Dict[str, Any]]] = []
+        window_pages = 0
+        while True:
+            item = await in_queue.get()
+            set_pipeline_queue_depth("chunks", in_queue.qsize())
+            finished = item is _END_OF_STREAM
+            if not finished:
+                page_num, page_chunks_data = item
+                window.extend((page_num, chunk_data) for chunk_data in page_chunks_data)
+                window_pages += 1
+            if window and (finished or len(window) >= window_limit):
+                await out_queue.put((window_pages, await self._embed_window(window, state)))
+                set_pipeline_queue_depth("embeddings", out_queue.qsize())
+                window, window_pages = [], 0
+            elif finished and window_pages:
+                # Páginas finais sem chunks ainda contam para o progresso
+                await out_queue.put((window_pages, []))
+            if finished:
+                await out_queue.put(_END_OF_STREAM)
+                return
+
+    async def _embed_window(self, window: List[Tuple[int, Dict[str, Any]]], state: "_PipelineState") -> List[Tuple[Chunk, Optional[List[float]]]]:
+        # Reingestão incremental: chunks com texto idêntico a um chunk armazenado reaproveitam o embedding (vetor None)
+        text_hashes = [Chunk.compute_text_hash(chunk_data["text"]) for _, chunk_data in window]
+        reused_ids = [state.take_reusable_chunk(text_hash) for text_hash in text_hashes]
+        embed_indexes = [i for i, reused_id in enumerate(reused_ids) if reused_id is None]
+        vectors_by_index: Dict[int, List[float]] = {}
+        if embed_indexes:
+            vectors_by_index = await self._embed_indexes(window, embed_indexes, state)
+        state.reused_chunks += len(window) - len(embed_indexes)
+
+        window_batch: List[Tuple[Chunk, Optional[List[float]]]] = []
+        for i, ((page_num, chunk_data), text_hash, reused_id) in enumerate(zip(window, text_hashes, reused_ids)):
+            if reused_id is None and i not in vectors_by_index:
+                continue # Embedding falhou: chunk descartado
+            chunk_metadata = chunk_data.get("metadata", {}) # Metadados vindos do chunker
+            domain_chunk = Chunk(
+                id=reused_id,
+                document_id=state.document_id,
+                text=chunk_data["text"],
+                page_number=chunk_metadata.get("page_number", page_num), # Usar page_num se não vier do metadata
+                position=state.next_position, # Posição global
+                metadata=chunk_metadata,
+                text_hash=text_hash,
+            )
+            window_batch.append((domain_chunk, vectors_by_index.get(i)))
+            state.next_position += 1
+        return window_batch
+
+    async def _embed_indexes(self, window: List[Tuple[int, Dict[str, Any]]], indexes: List[int], state: "_PipelineState") -> Dict[int, List[float]]:
+        """
+        Gera os embeddings dos chunks `indexes` da janela em uma única chamada.
+        Se ela falhar, repete página a página: apenas as páginas com erro são
+        descartadas, como no processamento por página.
+        """
+        vectors = await self._try_embed(window, indexes, state)
+        if vectors is not None:
+            return vectors
+
+        indexes_by_page: Dict[int, List[int]] = {}
+        for i in indexes:
+            indexes_by_page.setdefault(window[i][0], []).append(i)
+        if len(indexes_by_page) == 1:
+            state.total_chunks_failed += len(indexes)
+            return {}
+        logger.warning(f"Repetindo embeddings por página para as páginas {window[indexes[0]][0]}-{window[indexes[-1]][0]} (Doc ID: {state.document_id}).")
+        vectors = {}
+        for page_num, page_indexes in indexes_by_page.items():
+            page_vectors = await self._try_embed(window, page_indexes, state)
+            if page_vectors is None:
+                state.total_chunks_failed += len(page_indexes)
+            else:
+                vectors.update(page_vectors)
+        return vectors
+
+    async def _try_embed(self, window: List[Tuple[int, Dict[str, Any]]], indexes: List[int], state: "_PipelineState") -> Optional[Dict[int, List[float]]]:
+        """ Uma chamada a embed_batch; retorna índice -> vetor ou None em caso de falha. """
+        texts = [window[i][1]["text"] for i in indexes]
+        pages = f"{window[indexes[0]][0]}-{window[indexes[-1]][0]}"
+        stage_start = time.perf_counter()
+        try:
+            # Geração de embeddings (retorna List[Embedding])
+            embedding_objects: List[Embedding] = await self._embedder.embed_batch(texts)
+        except Exception as embed_err:
+            logger.error(f"Erro ao gerar embeddings para chunks das páginas {pages} (Doc ID: {state.document_id}): {embed_err}", exc_info=True)
+            return None
+        embeddings_vectors = [emb.vector for emb in embedding_objects]
+        if len(embeddings_vectors) != len(texts):
+            logger.error(f"Número de embeddings ({len(embeddings_vectors)}) diferente do número de textos ({len(texts)}) para as páginas {pages} (Doc ID: {state.document_id}).")
+            return None
+        elapsed = time.perf_counter() - stage_start
+        record_pipeline_stage("embed", elapsed, items=len(texts))
+        record_embedding_throughput(len(texts), elapsed)
+        return dict(zip(indexes, embeddings_vectors))
+
+    async def _write_stage(self, in_queue: asyncio.Queue, state: "_PipelineState", report: Callable[..., Awaitable[None]]) -> None:
+        """ Etapa 4: acumula chunks e grava em lotes de INGESTION_WRITE_BATCH_SIZE. """
+        batch_size = max(1, self._settings.INGESTION_WRITE_BATCH_SIZE)
+        pending: List[Tuple[Chunk, List[float]]] = []
+        while True:
+            item = await in_queue.get()
+            set_pipeline_queue_depth("embeddings", in_queue.qsize())
+            finished = item is _END_OF_STREAM
+            if not finished:
+                pages_in_item, chunk_batch = item
+                pending.extend(chunk_batch)
+                state.pages_done += pages_in_item
+            if pending and (finished or len(pending) >= batch_size):
+                await self._flush_chunks(pending, state)
+                pending = []
+            if state.total_pages:
+                # Pipeline ocupa a faixa 10%..95% do progresso
+                await report("embedding", 0.1 + 0.85 * min(state.pages_done, state.total_pages) / state.total_pages, state.progress_document_id)
+            if finished:
+                return
+
+    async def _flush_chunks(self, chunks_to_save: List[Tuple[Chunk, Optional[List[float]]]], state: "_PipelineState") -> None:
+        if state.is_incremental:
+            # Reingestão incremental: a escrita é feita de uma vez (uma transação) ao final do pipeline
+            state.diff_chunks.extend(chunks_to_save)
+            state.saved_chunks += len(chunks_to_save)
+            return
+        stage_start = time.perf_counter()
+        try:
+            saved_chunks = await self._chunk_repo.save_batch_with_embeddings(chunks_to_save)
+        except NotImplementedError:
+             logger.error(f"A implementação do ChunkRepository ({type(self._chunk_repo).__name__}) não suporta save_batch_with_embeddings.")
+             raise DocumentProcessingError("Erro interno: Repositório de Chunks incompatível.") from None
+        except Exception as e:
+            logger.exception(f"Erro ao salvar chunks em lote para documento {state.document_id}: {e}")
+            raise DocumentProcessingError(f"Falha ao salvar chunks: {e}") from e
+        if len(saved_chunks) != len(chunks_to_save):
+            logger.warning(f"Número de chunks salvos ({len(saved_chunks)}) difere do número enviado ({len(chunks_to_save)}).")
+        state.saved_chunks += len(saved_chunks)
+        record_pipeline_stage("write", time.perf_counter() - stage_start, items=len(saved_chunks))
+        logger.debug(f"Lote de {len(saved_chunks)} chunks salvo para doc ID {state.document_id} (total: {state.saved_chunks}).")
+
+    async def _apply_chunk_diff(self, state: "_PipelineState") -> None:
+        """ Grava a nova versão do documento: mantém, insere e exclui chunks em uma única transação. """
+        kept_chunks = [chunk for chunk, vector in state.diff_chunks if vector is None]
+        new_chunks = [(chunk, vector) for chunk, vector in state.diff_chunks if vector is not None]
+        removed_chunk_ids = [chunk_id for chunk_ids in state.reusable_chunks.values() for chunk_id in chunk_ids]
+        stage_start = time.perf_counter()
+        try:
+            state.saved_chunks = await self._chunk_repo.apply_chunk_diff(
+                state.document_id, kept_chunks, new_chunks, removed_chunk_ids
+            )
+        except Exception as e:
+            logger.exception(f"Erro ao aplicar diff de chunks para documento {state.document_id}: {e}")
+            raise DocumentProcessingError(f"Falha ao salvar nova versão dos chunks: {e}") from e
+        record_pipeline_stage("write", time.perf_counter() - stage_start, items=len(kept_chunks) + len(new_chunks))
+        logger.info(
+            f"Reingestão incremental do doc ID {state.document_id}: {len(kept_chunks)} embeddings reaproveitados, "
+            f"{len(new_chunks)} chunks novos/alterados, {len(removed_chunk_ids)} removidos."
+        )
+
+
+# Sentinela de fim de fluxo entre as etapas do pipeline
+_END_OF_STREAM = object()
+
+@dataclass
+class _PipelineState:
+    """ Estado compartilhado entre as etapas do pipeline de um documento. """
+    document_id: int
+    file_name: str
+    total_pages: int = 0
+    pages_extracted: int = 0
+    pages_done: int = 0
+    next_position: int = 0
+    total_chunks_failed: int = 0
+    saved_chunks: int = 0
+    # Reingestão incremental: texto_hash -> IDs de chunks armazenados ainda não reaproveitados
+    reusable_chunks: Optional[Dict[str, List[int]]] = None
+    reused_chunks: int = 0
+    diff_chunks: List[Tuple[Chunk, Optional[List[float]]]] = field(default_factory=list)
+
+    @property
+    def is_incremental(self) -> bool:
+        return self.reusable_chunks is not None
+
+    @property
+    def progress_document_id(self) -> Optional[int]:
+        # Na reingestão o documento já existia: não reportar o ID (o worker o trataria como parcial)
+        return None if self.is_incremental else self.document_id
+
+    def take_reusable_chunk(self, text_hash: str) -> Optional[int]:
+        """ Consome um chunk armazenado com o mesmo texto, se houver. """
+        if self.reusable_chunks is None:
+            return None
+        chunk_ids = self.reusable_chunks.get(text_hash)
+        return chunk_ids.pop(0) if chunk_ids else None
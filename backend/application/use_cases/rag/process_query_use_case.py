@@ -1,7 +1,7 @@
 import logging
 import time
 import asyncio
-from typing import Dict, Any, Optional, List, Tuple # Importar tipos necessários
+from typing import Dict, Any, Optional, List, Tuple, Callable, AsyncContextManager # Importar tipos necessários
 
 # Importar Interfaces e Repositórios do Domínio/Aplicação
 from application.interfaces.embedding_provider import EmbeddingProvider
@@ -15,6 +15,9 @@ from domain.value_objects.embedding import Embedding
 
 # Importar helpers/utils (RRF, normalização, etc.)
 from application.ranking.rrf import reciprocal_rank_fusion
+from application.ranking.mmr import maximal_marginal_relevance
+from application.ranking.context_compressor import CompressionResult, ExtractiveContextCompressor
+from application.concurrency.single_flight import SingleFlight
 from infrastructure.processors.normalizers.text_normalizer import clean_query # Ajustar import se necessário
 from config.config import get_settings # Para settings
 
@@ -26,17 +29,31 @@ from infrastructure.metrics.prometheus.metrics_prometheus import (
     record_retrieval_score,
     record_tokens,
     record_llm_error,
+    record_context_compression,
+    record_retrieval_time,
+    record_documents_retrieved,
 )
 import tiktoken # Se a contagem de tokens for feita aqui
 
 # --- Adicionar import dos decorators ---
 from application.decorators.logging_decorator import log_execution
 from application.decorators.timing_decorator import log_execution_time
-from application.decorators.metrics_decorator import track_use_case_metrics # Novo import
+from application.decorators.metrics_decorator import track_use_case_metrics, track_stage # Novo import
 # ---------------------------------------
 
 logger = logging.getLogger(__name__)
 
+# Consultas idênticas simultâneas (ex: treinamentos com a mesma pergunta de exemplo)
+# compartilham uma única execução do pipeline; compartilhado entre instâncias do caso de uso.
+_query_single_flight = SingleFlight("chat_query")
+
+
+def _coalescing_key(query: str, filtro_documentos: Optional[List[int]], limit: int) -> Tuple[str, Optional[Tuple[int, ...]], int]:
+    """ Chave do single-flight: query normalizada (limpeza + caixa + espaços), filtro (ordem irrelevante) e limite. """
+    normalized_query = " ".join(clean_query(query).casefold().split())
+    document_filter = tuple(sorted(set(filtro_documentos))) if filtro_documentos else None
+    return normalized_query, document_filter, limit
+
 
 class ProcessQueryUseCase:
     """
@@ -51,12 +68,20 @@ class ProcessQueryUseCase:
         llm_provider: LLMProvider,
         chunk_repository: ChunkRepository,
         reranker: ReRanker,
+        chunk_repository_scope: Optional[Callable[[], AsyncContextManager[ChunkRepository]]] = None,
     ):
-        """ Inicializa o caso de uso com suas dependências. """
+        """
+        Inicializa o caso de uso com suas dependências.
+
+        `chunk_repository_scope` abre um repositório com sessão própria, usado
+        pela execução compartilhada do single-flight; sem ele, as consultas não
+        são coalescidas (ex.: CLI e scripts de avaliação).
+        """
         self.settings = get_settings()
         self._embedding_provider = embedding_provider
         self._llm_provider = llm_provider
         self._chunk_repository = chunk_repository
+        self._chunk_repository_scope = chunk_repository_scope
         self._reranker = reranker
         self.tracer = get_tracer(__name__)
         # Inicializar tokenizador se a contagem for feita aqui
@@ -65,6 +90,13 @@ class ProcessQueryUseCase:
         except Exception:
             logger.warning("Tiktoken não encontrado no ProcessQueryUseCase.")
             self.tokenizer = None
+        self._context_compressor = ExtractiveContextCompressor(
+            embedding_provider=embedding_provider,
+            count_tokens=self._count_tokens,
+            max_tokens=self.settings.CONTEXT_COMPRESSION_MAX_TOKENS,
+            min_relative_score=self.settings.CONTEXT_COMPRESSION_MIN_RELATIVE_SCORE,
+            min_sentence_chars=self.settings.CONTEXT_COMPRESSION_MIN_SENTENCE_CHARS,
+        )
         # Verificar se dependências foram injetadas corretamente
         if not all([embedding_provider, llm_provider, chunk_repository, reranker]):
             logger.critical("ProcessQueryUseCase inicializado com dependências ausentes!")
@@ -85,6 +117,7 @@ class ProcessQueryUseCase:
             return len(text.split())
 
     # Método interno para re-ranking (chama a interface do reranker)
+    @track_stage("rerank")
     async def _rerank_results(self, chunks: List[Chunk], query: str) -> List[Tuple[Chunk, float]]:
          """ Reordena os chunks usando o ReRanker injetado e retorna tuplas (Chunk, score). """
          logger.info(f"Iniciando re-ranking de {len(chunks)} chunks via UseCase...")
@@ -95,6 +128,7 @@ class ProcessQueryUseCase:
 
     # --- Métodos Privados Refatorados ---
 
+    @track_stage("embed")
     async def _prepare_query(self, query: str) -> Tuple[str, Embedding]:
         """
         Limpa a query e gera seu embedding.
@@ -144,6 +178,7 @@ class ProcessQueryUseCase:
         clean_query: str,
         query_embedding_vector: List[float],
         initial_limit: int,
+        chunk_repository: ChunkRepository,
         filter_document_ids: Optional[List[int]] = None,
     ) -> Tuple[List[Tuple[Chunk, float]], List[Tuple[Chunk, float]]]:
         """
@@ -154,12 +189,14 @@ class ProcessQueryUseCase:
             vec_span.set_attribute("param.initial_limit", initial_limit)
             vec_span.set_attribute("param.has_filter", filter_document_ids is not None)
             start_vec_search = time.time()
-            vector_results: List[Tuple[Chunk, float]] = await self._chunk_repository.find_similar_chunks(
+            vector_results: List[Tuple[Chunk, float]] = await chunk_repository.find_similar_chunks(
                 embedding_vector=query_embedding_vector,
                 limit=initial_limit,
                 filter_document_ids=filter_document_ids,
             )
-            vec_duration_ms = int((time.time() - start_vec_search) * 1000)
+            vec_seconds = time.time() - start_vec_search
+            vec_duration_ms = int(vec_seconds * 1000)
+            record_retrieval_time(vec_seconds, "vector")
             vec_span.set_attribute("duration_ms", vec_duration_ms)
             vec_span.set_attribute("result.chunks_found_count", len(vector_results))
             logger.info(f"Busca vetorial retornou {len(vector_results)} chunks em {vec_duration_ms} ms.")
@@ -170,12 +207,14 @@ class ProcessQueryUseCase:
             key_span.set_attribute("param.initial_limit", initial_limit)
             key_span.set_attribute("param.has_filter", filter_document_ids is not None)
             start_kw_search = time.time()
-            keyword_results: List[Tuple[Chunk, float]] = await self._chunk_repository.find_by_keyword(
+            keyword_results: List[Tuple[Chunk, float]] = await chunk_repository.find_by_keyword(
                 query=clean_query,
                 limit=initial_limit,
                 filter_document_ids=filter_document_ids,
             )
-            kw_duration_ms = int((time.time() - start_kw_search) * 1000)
+            kw_seconds = time.time() - start_kw_search
+            kw_duration_ms = int(kw_seconds * 1000)
+            record_retrieval_time(kw_seconds, "keyword")
             key_span.set_attribute("duration_ms", kw_duration_ms)
             key_span.set_attribute("result.chunks_found_count", len(keyword_results))
             logger.info(f"Busca por keyword retornou {len(keyword_results)} chunks em {kw_duration_ms} ms.")
@@ -193,6 +232,10 @@ class ProcessQueryUseCase:
     ) -> Tuple[List[Tuple[Chunk, float]], Dict[int, float]]:
         """
         Combina resultados com RRF, re-rankeia e aplica o limite final.
+
+        Opcionalmente diversifica com MMR (embeddings já carregados na busca):
+        antes do re-ranking, reduz os candidatos do RRF a MMR_RERANK_CANDIDATES
+        chunks pouco redundantes; depois, escolhe o top-k final entre os re-rankeados.
         """
         # Reciprocal Rank Fusion (RRF)
         with self.tracer.start_as_current_span("ranking.rrf") as rrf_span:
@@ -200,7 +243,10 @@ class ProcessQueryUseCase:
             rrf_ranked_chunks, hybrid_scores = reciprocal_rank_fusion(
                 [vector_results, keyword_results], k=rrf_k
             )
-            rrf_duration_ms = int((time.time() - start_rrf) * 1000)
+            rrf_seconds = time.time() - start_rrf
+            rrf_duration_ms = int(rrf_seconds * 1000)
+            record_retrieval_time(rrf_seconds, "fusion")
+            record_documents_retrieved(len(rrf_ranked_chunks))
             rrf_span.set_attribute("duration_ms", rrf_duration_ms)
             rrf_span.set_attribute("rrf.input_vector_count", len(vector_results))
             rrf_span.set_attribute("rrf.input_keyword_count", len(keyword_results))
@@ -209,6 +255,23 @@ class ProcessQueryUseCase:
             logger.info(f"RRF (k={rrf_k}) combinou {len(vector_results)}+{len(keyword_results)} resultados em {len(rrf_ranked_chunks)} chunks únicos em {rrf_duration_ms} ms.")
             rrf_span.set_status(Status(StatusCode.OK))
 
+        # MMR antes do re-ranking: menos pares para o cross-encoder, sem quase-duplicatas
+        rerank_candidates = max(self.settings.MMR_RERANK_CANDIDATES, final_limit)
+        if self.settings.MMR_PRE_RERANK_ENABLED and len(rrf_ranked_chunks) > rerank_candidates:
+            with self.tracer.start_as_current_span("ranking.mmr_pre_rerank") as mmr_span:
+                start_mmr = time.time()
+                depth = max(self.settings.MMR_CANDIDATE_DEPTH, rerank_candidates)
+                candidates = [(chunk, hybrid_scores.get(chunk.id, 0.0)) for chunk in rrf_ranked_chunks[:depth]]
+                mmr_span.set_attribute("mmr.input_chunks_count", len(candidates))
+                mmr_span.set_attribute("mmr.lambda", self.settings.MMR_LAMBDA)
+                rrf_ranked_chunks = [
+                    chunk for chunk, _ in maximal_marginal_relevance(candidates, rerank_candidates, self.settings.MMR_LAMBDA)
+                ]
+                mmr_span.set_attribute("mmr.output_chunks_count", len(rrf_ranked_chunks))
+                record_retrieval_time(time.time() - start_mmr, "mmr")
+                logger.info(f"MMR antes do re-ranking selecionou {len(rrf_ranked_chunks)} de {len(candidates)} candidatos.")
+                mmr_span.set_status(Status(StatusCode.OK))
+
         # Re-ranking
         reranked_chunks_with_scores: List[Tuple[Chunk, float]] = []
         if rrf_ranked_chunks:
@@ -224,8 +287,19 @@ class ProcessQueryUseCase:
         else:
             logger.info("Pulando re-ranking pois RRF não retornou chunks.")
 
-        # Limitar ao número FINAL de resultados
-        final_chunks_with_scores = reranked_chunks_with_scores[:final_limit]
+        # Limitar ao número FINAL de resultados (com MMR, o top-k cobre passagens distintas)
+        if self.settings.MMR_POST_RERANK_ENABLED and len(reranked_chunks_with_scores) > final_limit:
+            with self.tracer.start_as_current_span("ranking.mmr_post_rerank") as mmr_span:
+                mmr_span.set_attribute("mmr.input_chunks_count", len(reranked_chunks_with_scores))
+                mmr_span.set_attribute("mmr.lambda", self.settings.MMR_LAMBDA)
+                start_mmr = time.time()
+                final_chunks_with_scores = maximal_marginal_relevance(
+                    reranked_chunks_with_scores, final_limit, self.settings.MMR_LAMBDA
+                )
+                record_retrieval_time(time.time() - start_mmr, "mmr")
+                mmr_span.set_status(Status(StatusCode.OK))
+        else:
+            final_chunks_with_scores = reranked_chunks_with_scores[:final_limit]
 
         # Calcular scores RRF apenas para os chunks finais
         final_rrf_scores: Dict[int, float] = {
@@ -236,13 +310,48 @@ class ProcessQueryUseCase:
         logger.info(f"Ranking e filtragem finalizados. {len(final_chunks_with_scores)} chunks selecionados.")
         return final_chunks_with_scores, final_rrf_scores
 
+    @track_stage("compression")
+    async def _compress_context(
+        self,
+        final_chunks_with_scores: List[Tuple[Chunk, float]],
+        query_embedding_vector: List[float],
+    ) -> Optional[CompressionResult]:
+        """
+        Mantém apenas as sentenças dos chunks mais similares à query, dentro de
+        CONTEXT_COMPRESSION_MAX_TOKENS. Retorna None (contexto com chunks completos)
+        se desativada, sem chunks ou em caso de falha.
+        """
+        if not self.settings.CONTEXT_COMPRESSION_ENABLED or not final_chunks_with_scores:
+            return None
+        with self.tracer.start_as_current_span("context_compression") as compression_span:
+            try:
+                compression = await self._context_compressor.compress(query_embedding_vector, final_chunks_with_scores)
+            except Exception as e:
+                logger.warning(f"Falha na compressão do contexto; usando chunks completos: {e}", exc_info=True)
+                compression_span.record_exception(e)
+                compression_span.set_status(Status(StatusCode.ERROR, description=str(e)))
+                return None
+            compression_span.set_attribute("compression.applied", compression is not None)
+            if compression is not None:
+                compression_span.set_attribute("compression.original_tokens", compression.original_tokens)
+                compression_span.set_attribute("compression.compressed_tokens", compression.compressed_tokens)
+                compression_span.set_attribute("compression.duplicate_sentences", compression.duplicate_sentences)
+                record_context_compression(compression.original_tokens, compression.compressed_tokens)
+            compression_span.set_status(Status(StatusCode.OK))
+            return compression
+
+    @track_stage("context")
     def _build_llm_context_and_prompt(
         self,
         final_chunks_with_scores: List[Tuple[Chunk, float]],
         query: str,
+        compression: Optional[CompressionResult] = None,
     ) -> Tuple[str, str, int, int]:
         """
         Constrói a string de contexto e monta o prompt para o LLM.
+
+        Com `compression`, cada bloco usa apenas as sentenças mantidas do chunk
+        (chunks sem sentenças mantidas são omitidos, preservando o rank original).
         """
         # Preparar contexto
         with self.tracer.start_as_current_span("context_preparation") as ctx_prep_span:
@@ -255,12 +364,16 @@ class ProcessQueryUseCase:
             else:
                 ctx_prep_span.set_attribute("context.empty", False)
                 ctx_prep_span.set_attribute("context.chunks_count", len(final_chunks_with_scores))
+                ctx_prep_span.set_attribute("context.compressed", compression is not None)
+                if compression is not None:
+                    ranks = {id(chunk): pos for pos, (chunk, _) in enumerate(final_chunks_with_scores, start=1)}
+                    blocks = [(ranks[id(p.chunk)], p.score, p.text) for p in compression.passages]
+                else:
+                    blocks = [(pos, score, chunk.text) for pos, (chunk, score) in enumerate(final_chunks_with_scores, start=1)]
                 chunk_texts = []
-                for i, (chunk, reranker_score) in enumerate(final_chunks_with_scores):
-                    rerank_pos = i + 1
+                for i, (rerank_pos, reranker_score, chunk_content) in enumerate(blocks):
                     score_info = f"[Rank: {rerank_pos}, Score: {reranker_score:.4f}]"
                     chunk_header = f"Contexto {i+1} {score_info}\n"
-                    chunk_content = chunk.text
                     full_chunk_text = chunk_header + chunk_content
                     chunk_texts.append(full_chunk_text)
                     context_tokens += self._count_tokens(chunk_content)
@@ -284,6 +397,7 @@ class ProcessQueryUseCase:
 
         return context, user_prompt_llm, context_tokens, prompt_tokens
 
+    @track_stage("llm")
     async def _generate_final_response(self, query: str, context: str) -> Tuple[str, int]:
         """
         Gera a resposta final usando o LLM Provider.
@@ -325,6 +439,7 @@ class ProcessQueryUseCase:
         prompt_tokens: int,
         response_tokens: int,
         initial_search_limit: int,
+        compression: Optional[CompressionResult] = None,
     ) -> Dict[str, Any]:
         """
         Monta o dicionário final de resultado, incluindo informações de debug.
@@ -357,6 +472,8 @@ class ProcessQueryUseCase:
             "retrieved_rrf_scores": final_rrf_scores,
             "context_used_length": len(context),
             "context_used_tokens": context_tokens,
+            "context_compressed": compression is not None,
+            "context_original_tokens": compression.original_tokens if compression is not None else context_tokens,
             "prompt_tokens": prompt_tokens,
             "response_tokens": response_tokens,
             "initial_search_limit": initial_search_limit,
@@ -385,6 +502,47 @@ class ProcessQueryUseCase:
     ) -> Dict[str, Any]:
         """
         Executa o pipeline RAG completo para a consulta dada (Refatorado).
+
+        Chamadas simultâneas com a mesma query normalizada, filtro e limite são
+        coalescidas (CHAT_SINGLE_FLIGHT_ENABLED): apenas a primeira executa o
+        pipeline e as demais recebem o mesmo resultado.
+        """
+        limit = max_results if max_results is not None else self.settings.MAX_RESULTS
+        if not self.settings.CHAT_SINGLE_FLIGHT_ENABLED or self._chunk_repository_scope is None:
+            return await self._run_pipeline(query, filtro_documentos, limit, self._chunk_repository)
+
+        key = _coalescing_key(query, filtro_documentos, limit)
+        result, is_leader = await _query_single_flight.do(
+            key, lambda: self._run_shared_pipeline(query, filtro_documentos, limit)
+        )
+        trace.get_current_span().set_attribute("query.coalesced", not is_leader)
+        if not is_leader:
+            logger.info(f"Query '{query[:50]}...' coalescida com execução idêntica em andamento.")
+            return dict(result) # Cópia rasa: o dicionário do líder não é compartilhado entre respostas
+        return result
+
+    async def _run_shared_pipeline(
+        self,
+        query: str,
+        filtro_documentos: Optional[List[int]],
+        limit: int,
+    ) -> Dict[str, Any]:
+        """
+        Execução do single-flight. Roda em tarefa própria, que continua se a
+        requisição líder for cancelada; por isso não usa a sessão da requisição
+        (fechada quando ela termina), e sim um repositório de `chunk_repository_scope`.
+        """
+        async with self._chunk_repository_scope() as chunk_repository:
+            return await self._run_pipeline(query, filtro_documentos, limit, chunk_repository)
+
+    async def _run_pipeline(
+        self,
+        query: str,
+        filtro_documentos: Optional[List[int]],
+        limit: int,
+        chunk_repository: ChunkRepository,
+    ) -> Dict[str, Any]:
+        """
         Orquestra a preparação, recuperação, ranqueamento, geração e montagem do resultado.
         """
         logger.info(f"Executando ProcessQueryUseCase para query: '{query[:50]}...'")
@@ -392,7 +550,6 @@ class ProcessQueryUseCase:
             "process_query_use_case.execute", kind=SpanKind.SERVER
         ) as span:
             start_time_total = time.time()
-            limit = max_results if max_results is not None else self.settings.MAX_RESULTS
             # Definir atributos gerais do span
             span.set_attribute("query.text", query)
             span.set_attribute("query.length", len(query))
@@ -413,6 +570,7 @@ class ProcessQueryUseCase:
                     clean_query=clean_query_text,
                     query_embedding_vector=query_embedding_vector,
                     initial_limit=initial_search_limit,
+                    chunk_repository=chunk_repository,
                     filter_document_ids=filtro_documentos
                 )
 
@@ -424,10 +582,12 @@ class ProcessQueryUseCase:
                     final_limit=limit
                 )
 
-                # 4. Construir Contexto e Prompt para LLM
+                # 4. Comprimir o contexto (sentenças relevantes) e construir o prompt para o LLM
+                compression = await self._compress_context(final_chunks_with_scores, query_embedding_vector)
                 context, _, context_tokens, prompt_tokens = self._build_llm_context_and_prompt(
                     final_chunks_with_scores=final_chunks_with_scores,
-                    query=query
+                    query=query,
+                    compression=compression,
                 )
 
                 # 5. Gerar resposta com o LLM
@@ -447,6 +607,7 @@ class ProcessQueryUseCase:
                     prompt_tokens=prompt_tokens,
                     response_tokens=response_tokens,
                     initial_search_limit=initial_search_limit,
+                    compression=compression,
                 )
                 # --- Fim da Orquestração ---
 
@@ -44,15 +44,44 @@ class Settings(BaseSettings):
 
     # LLM
     LLM_MODEL: str = "meta/llama3-70b-instruct"
+    LLM_BASE_URL: str = "https://integrate.api.nvidia.com/v1" # Qualquer API compatível OpenAI (ex: stub local em scripts/)
+    LLM_MAX_CONCURRENCY: int = 16 # Gerações simultâneas por processo; as demais aguardam na fila
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0 # Espera máxima na fila antes de falhar com 503
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0 # Timeout de leitura por requisição ao provedor
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_RETRIES: int = 2 # Retentativas do cliente OpenAI (erros de conexão, 429, 5xx)
+    LLM_MAX_CONNECTIONS: int = 32 # Pool HTTP compartilhado (keep-alive) com o provedor
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    # Hedging: segunda requisição quando a primeira passa do percentil de latência recente
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95 # Atraso do hedge = este percentil das latências recentes do modelo...
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5 # ...nunca abaixo deste valor
+    LLM_HEDGE_INITIAL_DELAY_SECONDS: float = 5.0 # Atraso usado até haver LLM_HEDGE_MIN_SAMPLES amostras
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_LATENCY_BUDGET_SECONDS: float = 0.0 # Limite total das tentativas (sem contar a fila); 0 = sem limite
+    LLM_FALLBACK_MODEL: str = "" # Modelo menor usado quando o orçamento se esgota (ex: meta/llama3-8b-instruct); vazio = falha
+    LLM_KEEPALIVE_SECONDS: float = 30.0 # Deve ser menor que o idle timeout do provedor (evita reusar conexão já fechada)
 
     # Configuração do modelo de embeddings
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-large-instruct"
     EMBEDDING_DIMENSION: int = 1024
     USE_GPU: bool = False
+    EMBEDDING_BATCH_SIZE: int = 32 # Textos por chamada ao modelo (agrupados por comprimento em tokens)
+    EMBEDDING_CACHE_MEMORY_MB: int = 64 # Orçamento da camada LRU em memória (0 = desativada)
+    EMBEDDING_CACHE_DISK_PATH: Optional[str] = None # Arquivo SQLite compartilhado entre processos (ex: data/embedding_cache.sqlite3)
+    EMBEDDING_CACHE_DISK_MAX_MB: int = 1024 # Limite dos vetores no disco; excedido, descarta os mais antigos (0 = sem limite)
+    EMBEDDING_CACHE_STORE_INGESTION: bool = False # Gravar no cache embeddings de chunks da ingestão (raramente reconsultados)
 
     # Configuração de processamento de texto
     CHUNK_SIZE: int = 800
     CHUNK_OVERLAP: int = 100
+    CHUNK_SIZE_UNIT: str = "chars" # chars (CHUNK_SIZE) | tokens (CHUNK_SIZE_TOKENS, tokenizer do modelo de embeddings)
+    CHUNK_SIZE_TOKENS: int = 256 # Tamanho alvo em tokens quando CHUNK_SIZE_UNIT="tokens"
+    CHUNK_MAX_TOKENS: int = 512 # Janela do modelo de embeddings (chunks maiores seriam truncados)
+    SENTENCE_SPLITTER: str = "punkt" # punkt (NLTK) | regex (pré-compilado, mais rápido)
+    CHUNK_BATCH_PAGES: int = 32 # Páginas divididas por chamada ao chunker na ingestão
+    CHUNK_PROCESS_POOL_MIN_CHARS: int = 400000 # Lotes a partir deste tamanho usam pool de processos (0 = desativado)
+    CHUNK_PROCESS_POOL_WORKERS: int = 0 # 0 = CPUs disponíveis para o processo (os.sched_getaffinity)
 
     # Servidor
     PORT: int = 8000
@@ -60,6 +89,16 @@ class Settings(BaseSettings):
 
     # RAG
     MAX_RESULTS: int = 4
+    MMR_PRE_RERANK_ENABLED: bool = False # Diversifica (MMR) os candidatos do RRF antes do cross-encoder
+    MMR_POST_RERANK_ENABLED: bool = False # Diversifica (MMR) o top-k final após o cross-encoder
+    MMR_LAMBDA: float = 0.7 # 1.0 = só relevância; 0.0 = só diversidade
+    MMR_CANDIDATE_DEPTH: int = 40 # Candidatos do RRF considerados pelo MMR antes do re-ranking
+    MMR_RERANK_CANDIDATES: int = 12 # Chunks diversificados enviados ao cross-encoder
+    CHAT_SINGLE_FLIGHT_ENABLED: bool = True # Coalesce consultas idênticas simultâneas em uma única execução do pipeline
+    CONTEXT_COMPRESSION_ENABLED: bool = False # Mantém no contexto do LLM apenas as sentenças relevantes dos chunks selecionados
+    CONTEXT_COMPRESSION_MAX_TOKENS: int = 600 # Orçamento de tokens do contexto comprimido
+    CONTEXT_COMPRESSION_MIN_RELATIVE_SCORE: float = 0.0 # Descarta sentenças com similaridade abaixo desta fração da melhor (0 desativa)
+    CONTEXT_COMPRESSION_MIN_SENTENCE_CHARS: int = 20 # Sentenças com menos caracteres alfanuméricos são descartadas
     RAG_SYSTEM_PROMPT: str = Field(
         default="""Você é um assistente prestativo. Use o contexto fornecido para responder à pergunta do usuário. Responda em português brasileiro.""",
         description="Prompt base do sistema para o RAG."
@@ -67,6 +106,46 @@ class Settings(BaseSettings):
 
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
+    # Extração de PDF
+    PDF_EXTRACTION_MODE: str = "sorted" # sorted | unsorted | blocks
+    PDF_PROCESS_POOL_MIN_PAGES: int = 200 # PDFs a partir deste tamanho usam pool de processos (0 = desativado)
+    PDF_PROCESS_POOL_WORKERS: int = 0 # 0 = CPUs disponíveis para o processo (os.sched_getaffinity)
+    PDF_PAGES_PER_TASK: int = 25 # Páginas por tarefa enviada ao pool
+
+    # Ingestão assíncrona (fila durável em Postgres)
+    INGESTION_STORAGE_DIR: str = "data/uploads"
+    INGESTION_WORKERS: int = 1 # Workers iniciados junto com a API (0 = apenas via CLI)
+    INGESTION_POLL_INTERVAL_SECONDS: float = 2.0
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BACKOFF_SECONDS: float = 30.0
+    INGESTION_JOB_LEASE_SECONDS: int = 300 # Heartbeat mais antigo que isso = worker morto
+    INGESTION_HEARTBEAT_SECONDS: float = 30.0
+    INGESTION_QUEUE_SIZE: int = 8 # Capacidade das filas entre etapas do pipeline (extração/chunking/embedding/escrita)
+    INGESTION_WRITE_BATCH_SIZE: int = 256 # Chunks por INSERT em lote na etapa de escrita
+    CHUNK_COPY_BATCH_SIZE: int = 5000 # Linhas por COPY binário (staging) no carregamento em massa de chunks
+    BULK_LOAD_MAINTENANCE_WORK_MEM: str = "1GB" # maintenance_work_mem ao recriar os índices após `migrate --bulk-load`
+    BULK_LOAD_PARALLEL_WORKERS: int = 4 # max_parallel_maintenance_workers ao recriar os índices
+    INGESTION_EMBED_WINDOW_CHUNKS: int = 256 # Chunks de várias páginas acumulados por chamada a embed_batch
+    # Deduplicação por hash de conteúdo (SHA-256) de uploads idênticos:
+    #   none            -> sempre reprocessa
+    #   return_existing -> retorna o documento já processado, sem novo registro
+    #   clone           -> cria novo documento copiando chunks/embeddings no servidor (INSERT ... SELECT)
+    DEDUP_POLICY: str = "return_existing"
+
+    # Exclusão lógica de documentos e purga em segundo plano
+    PURGE_ENABLED: bool = True # Purgador iniciado junto com a API (também disponível via CLI 'purge')
+    PURGE_INTERVAL_SECONDS: float = 30.0 # Intervalo entre verificações de documentos excluídos
+    PURGE_BATCH_SIZE: int = 2000 # Chunks por DELETE (transações curtas, sem bloquear a API)
+    PURGE_BATCH_PAUSE_SECONDS: float = 0.05 # Pausa entre lotes (limita a carga de I/O e WAL)
+    PURGE_VACUUM_MIN_DEAD_TUPLES: int = 50000 # VACUUM só a partir deste número de tuplas mortas...
+    PURGE_VACUUM_DEAD_RATIO: float = 0.1 # ...e desta proporção de tuplas mortas na tabela
+    PURGE_REINDEX_DEAD_RATIO: float = 0.3 # Acima desta proporção, REINDEX CONCURRENTLY dos índices HNSW/FTS
+    PURGE_PENDING_EF_SEARCH_FACTOR: int = 4 # Com exclusões pendentes, hnsw.ef_search = max(40, limit) * fator na busca vetorial (0 = desativado)
+
+    # Listagem de documentos
+    DOCUMENT_COUNT_EXACT_THRESHOLD: int = 10000 # Acima disso, o total da listagem é estimado (reltuples/EXPLAIN)
+    DOCUMENT_COUNT_CACHE_SECONDS: float = 30.0 # Validade do total em cache por filtro de nome
+
     # Configurações PostgreSQL
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
@@ -88,6 +167,9 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
 
+    # Métricas (Prometheus)
+    SYSTEM_METRICS_INTERVAL_SECONDS: float = 15.0 # Amostragem de CPU/memória do processo em segundo plano (0 desativa)
+
     # Configurações OpenTelemetry
     OTEL_EXPORTER_OTLP_ENDPOINT: str = Field(
         default=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317"),
@@ -97,6 +179,12 @@ class Settings(BaseSettings):
         default=os.getenv("OTEL_SERVICE_NAME", "cta-value-tech-rag"),
         description="Service name for OpenTelemetry.",
     )
+    OTEL_TRACES_EXPORTER: str = "otlp" # otlp, console (stdout; só para desenvolvimento) ou none (sem exportação nem gravação de spans)
+    OTEL_TRACES_SAMPLER_RATIO: float = 1.0 # Fração de traces mantidos (ParentBased: segue a decisão do chamador)
+    OTEL_TAIL_SAMPLING_ENABLED: bool = False # Mantém sempre traces lentos ou com erro; os demais seguem a fração acima
+    OTEL_TAIL_SLOW_THRESHOLD_SECONDS: float = 2.0 # Duração do span raiz a partir da qual o trace é mantido
+    OTEL_SPAN_ATTRIBUTE_MAX_LENGTH: int = 256 # Trunca valores de atributos (ex: query.text); 0 = sem limite
+    OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT: int = 64 # Máximo de atributos por span
 
     # --- Adicionar configuração do MLflow Tracking URI ---
     MLFLOW_TRACKING_URI: Optional[str] = Field(
@@ -2,6 +2,7 @@
 Modelo de domínio para representar chunks de texto na aplicação.
 """
 
+import hashlib
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List
 
@@ -21,6 +22,25 @@ class Chunk:
     page_number: Optional[int] = None
     position: Optional[int] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    text_hash: Optional[str] = None # Impressão digital do texto (reingestão incremental)
+    # Embedding carregado junto com a linha nas buscas (somente leitura; a escrita usa
+    # save_with_embedding). Usado pela diversificação MMR sem recalcular vetores.
+    vector: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    @staticmethod
+    def compute_text_hash(text: str) -> str:
+        """
+        Calcula a impressão digital (SHA-256) do texto do chunk exatamente como
+        é armazenado (sem normalização adicional de espaços ou caixa).
+
+        Os hashes gravados em `texto_hash` são comparados na reingestão
+        incremental: mudar o que entra no hash invalida todos eles e força o
+        re-embedding completo de todos os documentos.
+
+        Returns:
+            str: Hash hexadecimal
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
     @property
     def char_count(self) -> int:
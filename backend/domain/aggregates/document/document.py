@@ -27,6 +27,13 @@ class Document:
     chunks_count: int = 0
     processed: bool = False
     size_kb: float = 0.0
+    content_hash: Optional[str] = None # SHA-256 do conteúdo (deduplicação)
+    deleted_at: Optional[datetime] = None # Exclusão lógica: chunks removidos depois pelo purgador
+
+    @property
+    def is_deleted(self) -> bool:
+        """ Indica se o documento foi marcado como excluído (aguardando purga). """
+        return self.deleted_at is not None
 
     @property
     def file_extension(self) -> str:
@@ -68,5 +75,7 @@ class Document:
             "chunks_count": self.chunks_count,
             "processed": self.processed,
             "size_kb": self.size_kb,
+            "content_hash": self.content_hash,
+            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None,
         }
         return result
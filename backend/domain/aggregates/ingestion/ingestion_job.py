@@ -0,0 +1,74 @@
+"""
+Modelo de domínio para jobs de ingestão assíncrona de documentos.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+
+class IngestionJobStatus:
+    """ Estados possíveis de um job de ingestão. """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    FINAL_STATES = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class IngestionJob:
+    """
+    Representa um pedido de ingestão de documento enfileirado.
+
+    O arquivo enviado fica persistido em `file_path` até que um worker
+    reivindique o job, processe o documento e registre o resultado.
+    """
+
+    id: Optional[int] = None
+    status: str = IngestionJobStatus.QUEUED
+    file_name: str = ""
+    file_type: str = ""
+    file_path: str = ""
+    size_kb: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    document_id: Optional[int] = None
+
+    # Progresso
+    stage: Optional[str] = None
+    progress: float = 0.0
+
+    # Tentativas
+    attempts: int = 0
+    max_attempts: int = 3
+    last_error: Optional[str] = None
+    worker_id: Optional[str] = None
+
+    # Datas
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    next_attempt_at: Optional[datetime] = None
+
+    @property
+    def is_finished(self) -> bool:
+        """
+        Indica se o job já atingiu um estado final.
+
+        Returns:
+            bool: True se o job terminou (com sucesso ou falha definitiva)
+        """
+        return self.status in IngestionJobStatus.FINAL_STATES
+
+    @property
+    def can_retry(self) -> bool:
+        """
+        Indica se ainda restam tentativas para o job.
+
+        Returns:
+            bool: True se o número de tentativas ainda não atingiu o máximo
+        """
+        return self.attempts < self.max_attempts
@@ -41,6 +41,43 @@ class ChunkRepository(ABC):
         """ Exclui todos os chunks associados a um documento. Retorna o número de chunks excluídos. """
         pass
 
+    @abstractmethod
+    async def delete_batch_by_document_id(self, document_id: int, batch_size: int) -> int:
+        """
+        Exclui no máximo `batch_size` chunks do documento em uma transação curta.
+        Usado pelo purgador de documentos excluídos. Retorna o número excluído (0 = nada restante).
+        """
+        pass
+
+    @abstractmethod
+    async def clone_chunks(self, source_document_id: int, target_document_id: int) -> int:
+        """
+        Copia todos os chunks (texto, embedding, metadados) de um documento para
+        outro sem trafegar os vetores pela aplicação. Retorna o número de chunks copiados.
+        """
+        pass
+
+    @abstractmethod
+    async def find_text_hashes_by_document_id(self, document_id: int) -> List[Tuple[int, Optional[str]]]:
+        """ Retorna (id, texto_hash) dos chunks de um documento, em ordem de posição. """
+        pass
+
+    @abstractmethod
+    async def apply_chunk_diff(
+        self,
+        document_id: int,
+        kept_chunks: List[Chunk],
+        new_chunks: List[Tuple[Chunk, List[float]]],
+        removed_chunk_ids: List[int],
+    ) -> int:
+        """
+        Aplica, em uma única transação, a diferença entre a versão armazenada e a
+        nova versão de um documento: atualiza página/posição/metadados dos chunks
+        mantidos (embedding preservado), insere os novos com seus embeddings e
+        exclui os removidos. Retorna o número de chunks do documento após a operação.
+        """
+        pass
+
     # Interface para busca vetorial pode ser adicionada aqui ou em um serviço separado
     @abstractmethod
     async def find_similar_chunks(
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from ..aggregates.document.document import Document # Importa a entidade de domínio
 
 class DocumentRepository(ABC):
@@ -23,9 +23,57 @@ class DocumentRepository(ABC):
         """Lista todos os documentos com paginação."""
         pass
 
+    @abstractmethod
+    async def find_page(
+        self,
+        limit: int,
+        sort_by: str = "upload_date",
+        descending: bool = True,
+        name_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Document], Optional[str]]:
+        """
+        Lista uma página de documentos com filtro por nome (substring, sem
+        distinção de maiúsculas) e ordenação por `name`, `upload_date` ou
+        `size_kb` aplicados no banco. Com `cursor` (retornado pela página
+        anterior) a paginação é por keyset e `offset` é ignorado.
+        Retorna (documentos, cursor da próxima página ou None na última).
+        Levanta ValueError para cursor inválido ou de outra ordenação.
+        """
+        pass
+
+    @abstractmethod
+    async def count_estimate(self, name_filter: Optional[str] = None) -> Tuple[int, bool]:
+        """
+        Conta os documentos (opcionalmente filtrados por nome). Em tabelas
+        grandes retorna a estimativa do planejador em vez de um COUNT(*).
+        Retorna (total, True se o total é estimado).
+        """
+        pass
+
     @abstractmethod
     async def delete(self, document_id: int) -> bool:
         """Exclui um documento pelo seu ID."""
         pass
 
+    @abstractmethod
+    async def find_by_content_hash(self, content_hash: str) -> Optional[Document]:
+        """Busca o documento processado mais recente com o hash de conteúdo (SHA-256) informado."""
+        pass
+
+    @abstractmethod
+    async def mark_deleted(self, document_id: int) -> bool:
+        """
+        Marca o documento como excluído (exclusão lógica): ele deixa de aparecer
+        em listagens e buscas imediatamente; os chunks são removidos depois pelo
+        purgador. Retorna False se o documento não existe ou já estava marcado.
+        """
+        pass
+
+    @abstractmethod
+    async def find_deleted_ids(self, limit: int = 100) -> List[int]:
+        """Lista IDs de documentos marcados como excluídos (mais antigos primeiro), aguardando purga."""
+        pass
+
     # Adicionar outros métodos conforme necessário (ex: find_by_name, count, etc.)
@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from ..aggregates.ingestion.ingestion_job import IngestionJob
+
+class IngestionJobRepository(ABC):
+    """
+    Interface para o repositório de jobs de ingestão. Define o contrato
+    da fila durável usada pelos workers de processamento de documentos.
+    """
+
+    @abstractmethod
+    async def create(self, job: IngestionJob) -> IngestionJob:
+        """ Enfileira um novo job. Retorna o job com ID preenchido. """
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, job_id: int) -> Optional[IngestionJob]:
+        """ Busca um job pelo seu ID. """
+        pass
+
+    @abstractmethod
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[IngestionJob]:
+        """
+        Reivindica atomicamente o próximo job disponível para o worker.
+
+        Considera jobs 'queued' cuja próxima tentativa já venceu e jobs 'running'
+        cujo heartbeat expirou (worker que morreu no meio do processamento) e que
+        ainda têm tentativas restantes.
+        Deve ser seguro para múltiplos workers/réplicas concorrentes.
+        """
+        pass
+
+    @abstractmethod
+    async def fail_expired_exhausted(self, lease_seconds: int, error: str) -> List[IngestionJob]:
+        """
+        Marca como falha definitiva os jobs 'running' com heartbeat expirado que
+        já usaram todas as tentativas (ex: o job derruba o worker). Retorna os
+        jobs finalizados, para limpeza do documento parcial.
+        """
+        pass
+
+    @abstractmethod
+    async def update_progress(
+        self,
+        job_id: int,
+        worker_id: str,
+        stage: str,
+        progress: float,
+        document_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Atualiza progresso e heartbeat. Retorna False se o worker perdeu o lease;
+        erros de banco são propagados.
+        """
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """ Renova o lease do job. Retorna False se o worker perdeu o lease; erros de banco são propagados. """
+        pass
+
+    @abstractmethod
+    async def mark_succeeded(self, job_id: int, worker_id: str, document_id: Optional[int]) -> bool:
+        """ Marca o job como concluído com sucesso. """
+        pass
+
+    @abstractmethod
+    async def mark_failed(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: Optional[float] = None,
+        document_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Registra uma falha. Se `retry_delay_seconds` for informado o job volta
+        para a fila após o atraso; caso contrário a falha é definitiva.
+        `document_id` registra o documento parcial criado (limpo na próxima tentativa).
+        """
+        pass
+
+    @abstractmethod
+    async def release(self, job_id: int, worker_id: str) -> bool:
+        """ Devolve um job em execução para a fila (ex: desligamento do worker). """
+        pass
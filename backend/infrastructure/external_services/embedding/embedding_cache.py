@@ -0,0 +1,269 @@
+"""
+Implementações de cache de embeddings.
+
+- InMemoryLRUEmbeddingCache: LRU por processo limitado em bytes.
+- SqliteEmbeddingCache: arquivo SQLite (modo WAL) compartilhado entre
+  processos (ex: workers do uvicorn) e preservado entre reinícios,
+  limitado em bytes (descarta as entradas gravadas há mais tempo).
+- TieredEmbeddingCache: memória na frente do disco; acertos no disco
+  são promovidos para a memória.
+
+Os vetores são armazenados como blobs float32 (4 bytes por dimensão),
+bem menores que listas de floats do Python.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from application.interfaces.embedding_cache import EmbeddingCache, TRAFFIC_QUERY
+from config.config import Settings
+from infrastructure.metrics.prometheus.metrics_prometheus import (
+    record_embedding_cache_lookup,
+    set_embedding_cache_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_blob(vector: List[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def _from_blob(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class InMemoryLRUEmbeddingCache(EmbeddingCache):
+    """ Cache LRU em memória com orçamento em bytes (descarta as entradas menos usadas). """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    async def get_many(self, keys: List[str], traffic: str = TRAFFIC_QUERY) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        for key in keys:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                found[key] = _from_blob(blob)
+        self._hits += len(found)
+        self._misses += len(keys) - len(found)
+        record_embedding_cache_lookup(traffic, "memory", len(found), len(keys) - len(found))
+        return found
+
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        for key, vector in items.items():
+            blob = _to_blob(vector)
+            if len(blob) > self._max_bytes:
+                continue
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = blob
+            self._bytes += len(blob)
+        while self._bytes > self._max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+        set_embedding_cache_bytes(self._bytes)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        set_embedding_cache_bytes(0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "memory_max_bytes": self._max_bytes,
+            "memory_hits": self._hits,
+            "memory_misses": self._misses,
+            "memory_evictions": self._evictions,
+        }
+
+
+class SqliteEmbeddingCache(EmbeddingCache):
+    """
+    Cache em disco (SQLite, modo WAL) compartilhado entre processos.
+    Operações executadas fora do event loop; uma conexão protegida por lock.
+    Acima de `max_bytes` (0 = sem limite), as entradas com `created_at`
+    mais antigo são removidas a cada gravação.
+    """
+
+    _SELECT_BATCH = 500 # Limite de parâmetros por consulta IN (...)
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        self._path = path
+        self._max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self._path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Cache de embeddings em disco aberto: {self._path}")
+        return self._conn
+
+    def _get_many_sync(self, keys: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), self._SELECT_BATCH):
+                batch = keys[start:start + self._SELECT_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+                found.update(rows.fetchall())
+        return found
+
+    def _set_many_sync(self, rows: List[tuple]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows)
+            if self._max_bytes:
+                self._prune(conn)
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """ Remove as entradas mais antigas até os vetores caberem em `max_bytes`. """
+        excess = conn.execute("SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings").fetchone()[0] - self._max_bytes
+        if excess <= 0:
+            return
+        expired: List[str] = []
+        for key, size in conn.execute("SELECT key, length(vector) FROM embeddings ORDER BY created_at"):
+            if excess <= 0:
+                break
+            expired.append(key)
+            excess -= size
+        for start in range(0, len(expired), self._SELECT_BATCH):
+            batch = expired[start:start + self._SELECT_BATCH]
+            conn.execute(f"DELETE FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+        self._evictions += len(expired)
+
+    def _clear_sync(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+
+    async def get_many(self, keys: List[str], traffic: str = TRAFFIC_QUERY) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        try:
+            blobs = await asyncio.to_thread(self._get_many_sync, keys)
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache de embeddings em disco: {e}")
+            return {}
+        self._hits += len(blobs)
+        self._misses += len(keys) - len(blobs)
+        record_embedding_cache_lookup(traffic, "disk", len(blobs), len(keys) - len(blobs))
+        return {key: _from_blob(blob) for key, blob in blobs.items()}
+
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, _to_blob(vector), now) for key, vector in items.items()]
+        try:
+            await asyncio.to_thread(self._set_many_sync, rows)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de embeddings em disco: {e}")
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear_sync)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "disk_path": self._path,
+            "disk_max_bytes": self._max_bytes,
+            "disk_hits": self._hits,
+            "disk_misses": self._misses,
+            "disk_evictions": self._evictions,
+        }
+
+
+class TieredEmbeddingCache(EmbeddingCache):
+    """ Memória (LRU) na frente do disco; acertos no disco são promovidos para a memória. """
+
+    def __init__(self, memory: Optional[InMemoryLRUEmbeddingCache], disk: Optional[SqliteEmbeddingCache]):
+        self._memory = memory
+        self._disk = disk
+
+    async def get_many(self, keys: List[str], traffic: str = TRAFFIC_QUERY) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        if self._memory is not None:
+            found = await self._memory.get_many(keys, traffic)
+        if self._disk is not None and len(found) < len(keys):
+            missing = [key for key in keys if key not in found]
+            from_disk = await self._disk.get_many(missing, traffic)
+            if from_disk and self._memory is not None:
+                await self._memory.set_many(from_disk)
+            found.update(from_disk)
+        return found
+
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        if self._memory is not None:
+            await self._memory.set_many(items)
+        if self._disk is not None:
+            await self._disk.set_many(items)
+
+    async def clear(self) -> None:
+        if self._memory is not None:
+            await self._memory.clear()
+        if self._disk is not None:
+            await self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {}
+        if self._memory is not None:
+            stats.update(self._memory.stats())
+        if self._disk is not None:
+            stats.update(self._disk.stats())
+        return stats
+
+
+def build_embedding_cache(settings: Settings) -> Optional[EmbeddingCache]:
+    """
+    Monta o cache conforme EMBEDDING_CACHE_MEMORY_MB, EMBEDDING_CACHE_DISK_PATH
+    e EMBEDDING_CACHE_DISK_MAX_MB.
+    Retorna None se ambas as camadas estiverem desativadas.
+    """
+    memory = None
+    if settings.EMBEDDING_CACHE_MEMORY_MB > 0:
+        memory = InMemoryLRUEmbeddingCache(max_bytes=settings.EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024)
+    disk = None
+    if settings.EMBEDDING_CACHE_DISK_PATH:
+        disk = SqliteEmbeddingCache(
+            settings.EMBEDDING_CACHE_DISK_PATH, max_bytes=settings.EMBEDDING_CACHE_DISK_MAX_MB * 1024 * 1024
+        )
+    if memory is None and disk is None:
+        return None
+    return TieredEmbeddingCache(memory=memory, disk=disk)
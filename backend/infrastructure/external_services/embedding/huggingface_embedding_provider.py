@@ -16,6 +16,8 @@ from infrastructure.metrics.prometheus.metrics_prometheus import (
 )
 from opentelemetry.trace import SpanKind, Status, StatusCode
 from application.interfaces.embedding_provider import EmbeddingProvider
+from application.interfaces.embedding_cache import EmbeddingCache, embedding_cache_key, TRAFFIC_QUERY, TRAFFIC_INGESTION, TRAFFIC_CONTEXT
+from infrastructure.external_services.embedding.embedding_cache import build_embedding_cache
 import asyncio
 from sentence_transformers import SentenceTransformer
 from domain.value_objects.embedding import Embedding
@@ -40,22 +42,27 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
     _model_name: str = ""
     _device: str = ""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[EmbeddingCache] = None):
         """
         Inicializa o serviço de embeddings.
+
+        Args:
+            cache: Cache de embeddings; se omitido, é montado a partir das
+                configurações (EMBEDDING_CACHE_MEMORY_MB / EMBEDDING_CACHE_DISK_PATH).
         """
         with get_tracer(__name__).start_as_current_span(
             "embedding_service.__init__"
         ) as init_span:
             self.settings = get_settings()
-            self._cache: Dict[int, List[float]] = {}
+            self._cache: Optional[EmbeddingCache] = cache if cache is not None else build_embedding_cache(self.settings)
             self._cache_hits: int = 0
             self._cache_misses: int = 0
             self._total_embeddings: int = 0
             self.tracer = get_tracer(__name__)
 
-            init_span.set_attribute("cache.type", "in_memory")
-            init_span.set_attribute("cache.max_size", 10000)
+            init_span.set_attribute("cache.type", type(self._cache).__name__ if self._cache else "disabled")
+            init_span.set_attribute("cache.memory_mb", self.settings.EMBEDDING_CACHE_MEMORY_MB)
+            init_span.set_attribute("cache.disk_enabled", bool(self.settings.EMBEDDING_CACHE_DISK_PATH))
 
             self._initialize_model()
 
@@ -90,6 +97,7 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
                         raise RuntimeError(f"Falha ao inicializar HuggingFaceEmbeddingProvider: {e}") from e
                 else:
                     logger.info(f"Reutilizando modelo SentenceTransformer já carregado: {HuggingFaceEmbeddingProvider._model_name}")
+                    load_time = 0.0
                     span.set_attribute("embedding.model_name", HuggingFaceEmbeddingProvider._model_name)
                     span.set_attribute("embedding.device", HuggingFaceEmbeddingProvider._device)
                     span.set_status(Status(StatusCode.OK, "Modelo reutilizado."))
@@ -132,12 +140,13 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
                     f"Falha ao inicializar modelo de embeddings: {e}"
                 ) from e
 
-    async def embed_text(self, text: str) -> Embedding:
+    async def embed_text(self, text: str, traffic: str = TRAFFIC_QUERY) -> Embedding:
         """
         Gera embedding para um texto único.
 
         Args:
             text: Texto para gerar embedding
+            traffic: Origem da chamada ('query', 'ingestion' ou 'context', que ignora o cache), para métricas do cache
 
         Returns:
             Embedding: Objeto de embedding
@@ -149,6 +158,7 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
 
             span.set_attribute("vector.text_length", len(text))
             span.set_attribute("model.name", self.settings.EMBEDDING_MODEL)
+            span.set_attribute("cache.traffic", traffic)
 
             if not text or not text.strip():
                 logger.warning("Tentativa de embedding para texto vazio.")
@@ -158,212 +168,176 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
                 )
                 return Embedding(vector=[0.0] * self.settings.EMBEDDING_DIMENSION)
 
-            clean_text = clean_text_for_embedding(text).lower()
-            span.set_attribute("vector.cleaned_text_length", len(clean_text))
-
-            cache_key = hash(clean_text)
-            cached_embedding = self._cache.get(cache_key)
-
-            if cached_embedding is not None:
-                self._cache_hits += 1
-                span.set_attribute("cache.hit", True)
-                update_embedding_cache_metrics("hits", self._cache_hits)
-                hit_ratio = self._cache_hits / max(
-                    1, self._cache_hits + self._cache_misses
-                )
-                update_embedding_cache_metrics("hit_ratio", hit_ratio)
-                span.set_attribute("cache.hit_ratio", hit_ratio)
-
-                elapsed_time = time.time() - start_time
-                record_embedding_time(elapsed_time, operation_type="single")
-                span.set_attribute("duration_ms", int(elapsed_time * 1000))
-                span.set_attribute("vector.dimension", len(cached_embedding))
-                span.set_status(Status(StatusCode.OK))
-                return Embedding(vector=cached_embedding)
-
-            span.set_attribute("cache.hit", False)
-            self._cache_misses += 1
-            update_embedding_cache_metrics("misses", self._cache_misses)
-            hit_ratio = self._cache_hits / max(1, self._cache_hits + self._cache_misses)
-            update_embedding_cache_metrics("hit_ratio", hit_ratio)
-            span.set_attribute("cache.hit_ratio", hit_ratio)
-
             try:
-                embeddings_list: List[Embedding] = await self.embed_batch([text])
-                if embeddings_list and len(embeddings_list) == 1:
-                    embedding_obj = embeddings_list[0]
-                    span.set_attribute("embedding.vector_length", len(embedding_obj.vector))
-                    span.set_status(Status(StatusCode.OK))
-
-                    if cache_key not in self._cache and len(self._cache) < 10000:
-                        self._cache[cache_key] = embedding_obj.vector
-                        update_embedding_cache_metrics("size", len(self._cache))
-
-                    return embedding_obj
-                else:
-                    logger.error(f"embed_batch não retornou o resultado esperado para texto único: {text[:100]}...")
-                    span.set_status(Status(StatusCode.ERROR, "Resultado inesperado de embed_batch"))
-                    zero_vec = [0.0] * self.settings.EMBEDDING_DIMENSION
-                    return Embedding(vector=zero_vec)
-
+                vectors = await self._embed_with_cache([text], traffic, span)
+                span.set_attribute("embedding.vector_length", len(vectors[0]))
+                span.set_status(Status(StatusCode.OK))
+                return Embedding(vector=vectors[0])
             except Exception as e:
-                elapsed_time = time.time() - start_time
-                record_embedding_time(elapsed_time, operation_type="single")
                 logger.exception(f"Erro ao gerar embedding para texto único: {e}")
                 span.record_exception(e)
                 span.set_status(Status(StatusCode.ERROR, description=str(e)))
                 span.set_attribute("error.type", type(e).__name__)
                 zero_vec = [0.0] * self.settings.EMBEDDING_DIMENSION
                 return Embedding(vector=zero_vec)
+            finally:
+                elapsed_time = time.time() - start_time
+                record_embedding_time(elapsed_time, operation_type="single")
+                span.set_attribute("duration_ms", int(elapsed_time * 1000))
 
-    async def embed_batch(self, texts: List[str]) -> List[Embedding]:
+    async def embed_batch(self, texts: List[str], traffic: str = TRAFFIC_INGESTION) -> List[Embedding]:
         """
         Gera embeddings para múltiplos textos em lote.
 
         Args:
             texts: Lista de textos para gerar embeddings
+            traffic: Origem da chamada ('query', 'ingestion' ou 'context', que ignora o cache), para métricas do cache
 
         Returns:
-            list: Lista de objetos de embedding
+            list: Lista de objetos de embedding (vetor zero para falhas fora da ingestão)
+
+        Raises:
+            Exception: Na ingestão, a falha do modelo é propagada para que os
+                chunks não sejam gravados com vetores zero.
         """
         with self.tracer.start_as_current_span(
             "embedding_service.embed_batch", kind=SpanKind.INTERNAL
         ) as span:
             start_time = time.time()
-            batch_size = len(texts)
-            span.set_attribute("vector.batch_size", batch_size)
+            span.set_attribute("vector.batch_size", len(texts))
             span.set_attribute("model.name", self.settings.EMBEDDING_MODEL)
+            span.set_attribute("cache.traffic", traffic)
 
             if not texts:
                 span.set_status(Status(StatusCode.OK, "Batch vazio."))
                 return []
 
-            clean_texts_map: Dict[str, List[int]] = {}
-            original_clean_texts: List[Optional[str]] = [None] * batch_size
-            for i, text in enumerate(texts):
-                if not text or not text.strip():
-                    original_clean_texts[i] = None
-                    continue
-                clean_t = clean_text_for_embedding(text).lower()
-                original_clean_texts[i] = clean_t
-                if clean_t not in clean_texts_map:
-                    clean_texts_map[clean_t] = []
-                clean_texts_map[clean_t].append(i)
-
-            avg_len = sum(len(t) for t in clean_texts_map.keys()) / max(
-                1, len(clean_texts_map)
-            )
-            span.set_attribute("vector.unique_texts_count", len(clean_texts_map))
-            span.set_attribute("vector.avg_unique_text_length", avg_len)
-
-            embeddings: List[Optional[Embedding]] = [None] * batch_size
-            texts_to_embed_list: List[str] = []
-            cache_hits_in_batch = 0
-            initial_miss_count = self._cache_misses
-
-            for clean_text, indices in clean_texts_map.items():
-                cache_key = hash(clean_text)
-                cached_embedding = self._cache.get(cache_key)
-                if cached_embedding is not None:
-                    cache_hits_in_batch += len(indices)
-                    self._cache_hits += len(indices)
-                    for i in indices:
-                        embeddings[i] = Embedding(vector=cached_embedding)
-                else:
-                    texts_to_embed_list.append(clean_text)
-
-            if cache_hits_in_batch > 0:
-                update_embedding_cache_metrics("hits", self._cache_hits)
-
-            uncached_count = len(texts_to_embed_list)
-            span.set_attribute("cache.batch_hits_count", cache_hits_in_batch)
-            span.set_attribute("cache.batch_unique_misses_count", uncached_count)
-
-            if uncached_count > 0:
-                self._cache_misses += uncached_count
-                span.set_attribute("cache.misses_increment", uncached_count)
-                update_embedding_cache_metrics("misses", self._cache_misses)
-
-                try:
-                    def sync_embed_documents():
-                        return self.model.encode(texts_to_embed_list, convert_to_numpy=True, show_progress_bar=False)
-
-                    new_embeddings_np = await asyncio.to_thread(sync_embed_documents)
-                    new_embeddings_vectors: List[List[float]] = [embedding.tolist() for embedding in new_embeddings_np]
-
-                    self._total_embeddings += uncached_count
-
-                    cache_updated = False
-                    if len(self._cache) < 10000:
-                        space_available = 10000 - len(self._cache)
-                        can_add_count = min(space_available, len(new_embeddings_vectors))
-                        for i in range(can_add_count):
-                            clean_text = texts_to_embed_list[i]
-                            embedding = new_embeddings_vectors[i]
-                            cache_key = hash(clean_text)
-                            self._cache[cache_key] = embedding
-                            cache_updated = True
-                        span.set_attribute("cache.added_count", can_add_count)
-                        if can_add_count < len(new_embeddings_vectors):
-                            span.set_attribute("cache.full", True)
-
-                    embedding_idx = 0
-                    for clean_text, original_indices in clean_texts_map.items():
-                        if any(embeddings[idx] is None for idx in original_indices):
-                            if embedding_idx < len(new_embeddings_vectors):
-                                vector = new_embeddings_vectors[embedding_idx]
-                                embedding_obj = Embedding(vector=vector)
-                                for original_index in original_indices:
-                                    if embeddings[original_index] is None:
-                                        embeddings[original_index] = embedding_obj
-                                embedding_idx += 1
-                            else:
-                                logger.error("Índice de embedding fora dos limites, inconsistência.")
-                                # Lidar com erro (ex: preencher com zero vector ou levantar exceção)
-
-                    if cache_updated:
-                        update_embedding_cache_metrics("size", len(self._cache))
-
-                except Exception as e:
-                    logger.error(
-                        f"Erro ao gerar embeddings em lote para {uncached_count} textos: {e}",
-                        exc_info=True,
-                    )
-                    span.record_exception(e)
-                    span.set_status(Status(StatusCode.ERROR, description=str(e)))
-                    span.set_attribute("error.type", type(e).__name__)
-                    zero_vec = [0.0] * self.settings.EMBEDDING_DIMENSION
-                    zero_embedding = Embedding(vector=zero_vec)
-                    for i in range(len(embeddings)):
-                        if embeddings[i] is None:
-                            embeddings[i] = zero_embedding
-
-            final_embeddings: List[Embedding] = []
             zero_vec = [0.0] * self.settings.EMBEDDING_DIMENSION
-            zero_embedding = Embedding(vector=zero_vec)
-            for emb in embeddings:
-                final_embeddings.append(emb if emb is not None else zero_embedding)
+            try:
+                vectors = await self._embed_with_cache(texts, traffic, span)
+                span.set_status(Status(StatusCode.OK))
+            except Exception as e:
+                logger.error(f"Erro ao gerar embeddings em lote para {len(texts)} textos: {e}", exc_info=True)
+                span.record_exception(e)
+                span.set_status(Status(StatusCode.ERROR, description=str(e)))
+                span.set_attribute("error.type", type(e).__name__)
+                if traffic == TRAFFIC_INGESTION:
+                    record_embedding_time(time.time() - start_time, operation_type="batch")
+                    raise
+                vectors = [None] * len(texts)
 
-            hit_ratio = self._cache_hits / max(1, self._cache_hits + self._cache_misses)
-            update_embedding_cache_metrics("hit_ratio", hit_ratio)
+            final_embeddings = [Embedding(vector=vector if vector is not None else zero_vec) for vector in vectors]
 
             elapsed_time = time.time() - start_time
             record_embedding_time(elapsed_time, operation_type="batch")
-
             if span.is_recording():
-                span.set_attribute("cache.hit_ratio", hit_ratio)
                 span.set_attribute("duration_ms", int(elapsed_time * 1000))
                 if final_embeddings:
                     span.set_attribute("vector.dimension", len(final_embeddings[0].vector))
+            return final_embeddings
+
+    async def _embed_with_cache(self, texts: List[str], traffic: str, span: Any) -> List[Optional[List[float]]]:
+        """
+        Limpa os textos, deduplica, consulta o cache (chave estável por
+        modelo + texto limpo), codifica apenas os ausentes e devolve os
+        vetores na ordem original (None para textos vazios). Tráfego 'context'
+        não consulta nem grava o cache.
+        """
+        cache = self._cache if traffic != TRAFFIC_CONTEXT else None
+        clean_texts_map: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            clean_t = clean_text_for_embedding(text).lower()
+            clean_texts_map.setdefault(clean_t, []).append(i)
+        span.set_attribute("vector.unique_texts_count", len(clean_texts_map))
+
+        keys_by_text = {clean_t: embedding_cache_key(self.model_name, clean_t) for clean_t in clean_texts_map}
+        cached: Dict[str, List[float]] = {}
+        if cache is not None and keys_by_text:
+            try:
+                cached = await cache.get_many(list(keys_by_text.values()), traffic)
+            except Exception as e:
+                logger.warning(f"Falha ao consultar cache de embeddings: {e}")
+
+        vectors_by_text: Dict[str, List[float]] = {}
+        texts_to_embed_list: List[str] = []
+        for clean_t, key in keys_by_text.items():
+            if key in cached:
+                vectors_by_text[clean_t] = cached[key]
+            else:
+                texts_to_embed_list.append(clean_t)
+
+        hits, misses = len(vectors_by_text), len(texts_to_embed_list)
+        if traffic != TRAFFIC_CONTEXT: # Fora do cache: não entra na taxa de acerto
+            self._cache_hits += hits
+            self._cache_misses += misses
+        span.set_attribute("cache.batch_hits_count", hits)
+        span.set_attribute("cache.batch_unique_misses_count", misses)
+
+        if texts_to_embed_list:
+            new_embeddings_vectors: List[List[float]] = await asyncio.to_thread(
+                self._encode_length_sorted, texts_to_embed_list
+            )
+            span.set_attribute("vector.encode_batch_size", self.settings.EMBEDDING_BATCH_SIZE)
+            self._total_embeddings += len(texts_to_embed_list)
+            new_items = dict(zip(texts_to_embed_list, new_embeddings_vectors))
+            vectors_by_text.update(new_items)
+            # Chunks da ingestão raramente são reconsultados: só ocupam o cache se configurado
+            if cache is not None and (traffic != TRAFFIC_INGESTION or self.settings.EMBEDDING_CACHE_STORE_INGESTION):
+                try:
+                    await cache.set_many({keys_by_text[clean_t]: vector for clean_t, vector in new_items.items()})
+                except Exception as e:
+                    logger.warning(f"Falha ao gravar no cache de embeddings: {e}")
 
-                current_status = getattr(span, "status", None)
-                if (
-                    current_status is None
-                    or current_status.status_code != StatusCode.ERROR
-                ):
-                    span.set_status(Status(StatusCode.OK))
+        hit_ratio = self._cache_hits / max(1, self._cache_hits + self._cache_misses)
+        update_embedding_cache_metrics("hits", self._cache_hits)
+        update_embedding_cache_metrics("misses", self._cache_misses)
+        update_embedding_cache_metrics("hit_ratio", hit_ratio)
+        span.set_attribute("cache.hit_ratio", hit_ratio)
 
-            return final_embeddings
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for clean_t, indices in clean_texts_map.items():
+            for i in indices:
+                vectors[i] = vectors_by_text[clean_t]
+        return vectors
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Calcula o comprimento em tokens de cada texto com o tokenizer do modelo.
+        Usa o comprimento em caracteres como aproximação se o tokenizer falhar.
+        """
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is not None:
+            try:
+                encoded = tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+                return [len(ids) for ids in encoded]
+            except Exception as e:
+                logger.debug(f"Falha ao tokenizar para ordenação por comprimento, usando caracteres: {e}")
+        return [len(t) for t in texts]
+
+    def _encode_length_sorted(self, texts: List[str]) -> List[List[float]]:
+        """
+        Codifica os textos em lotes de EMBEDDING_BATCH_SIZE agrupados por
+        comprimento em tokens (menos padding por lote) e devolve os vetores
+        na ordem original. Executado fora do event loop.
+        """
+        batch_size = max(1, self.settings.EMBEDDING_BATCH_SIZE)
+        lengths = self._token_lengths(texts)
+        sorted_indices = sorted(range(len(texts)), key=lambda idx: lengths[idx], reverse=True)
+
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(sorted_indices), batch_size):
+            bucket = sorted_indices[start:start + batch_size]
+            bucket_embeddings = self.model.encode(
+                [texts[idx] for idx in bucket],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for idx, embedding in zip(bucket, bucket_embeddings):
+                vectors[idx] = embedding.tolist()
+        return vectors
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -379,34 +353,38 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
             hit_rate = (
                 self._cache_hits / max(1, total_requests) if total_requests > 0 else 0.0
             )
+            cache_stats = self._cache.stats() if self._cache is not None else {}
+            cache_size = cache_stats.get("memory_entries", 0)
 
-            update_embedding_cache_metrics("size", len(self._cache))
+            update_embedding_cache_metrics("size", cache_size)
             update_embedding_cache_metrics("hits", self._cache_hits)
             update_embedding_cache_metrics("misses", self._cache_misses)
             update_embedding_cache_metrics("hit_ratio", hit_rate)
 
             stats = {
-                "cache_size": len(self._cache),
+                "cache_size": cache_size,
                 "cache_hits": self._cache_hits,
                 "cache_misses": self._cache_misses,
                 "hit_rate": hit_rate,
                 "total_embeddings_generated": self._total_embeddings,
+                **cache_stats,
             }
             for key, value in stats.items():
                 span.set_attribute(f"cache.{key}", value)
             span.set_status(Status(StatusCode.OK))
             return stats
 
-    def clear_cache(self):
+    async def clear_cache(self):
         """
-        Limpa o cache de embeddings.
+        Limpa o cache de embeddings (memória e disco).
         """
         with self.tracer.start_as_current_span(
             "embedding_service.clear_cache", kind=SpanKind.INTERNAL
         ) as span:
-            previous_size = len(self._cache)
+            previous_size = self._cache.stats().get("memory_entries", 0) if self._cache is not None else 0
             span.set_attribute("cache.previous_size", previous_size)
-            self._cache.clear()
+            if self._cache is not None:
+                await self._cache.clear()
             logger.info(
                 f"Cache de embeddings limpo (tamanho anterior: {previous_size})"
             )
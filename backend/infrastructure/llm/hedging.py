@@ -0,0 +1,91 @@
+"""
+Requisições "hedged" ao LLM: se a primeira tentativa não responder dentro
+de um atraso derivado da latência recente (percentil configurável), uma
+segunda tentativa idêntica é disparada; a primeira resposta vence e a outra
+é cancelada.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+class LatencyTracker:
+    """ Janela deslizante das latências recentes (s) para calcular o atraso do hedge. """
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """ Percentil `q` (0-1, nearest-rank) das amostras, ou None sem amostras. """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[rank]
+
+
+async def hedged_call(
+    primary: Callable[[], Awaitable[T]],
+    hedge: Callable[[], Optional[Callable[[], Awaitable[T]]]],
+    hedge_delay: float,
+) -> Tuple[T, str, float, bool]:
+    """
+    Executa `primary` e, se não terminar em `hedge_delay` segundos, dispara a
+    tentativa retornada por `hedge()` (que pode devolver None para não
+    hedgear, ex.: sem capacidade ociosa). Um erro em uma tentativa só é
+    propagado se a outra também falhar.
+
+    Returns:
+        (resultado, vencedora PRIMARY/HEDGE, segundos até a resposta vencedora,
+        True se o hedge foi disparado). Quando o hedge vence, a latência da
+        primária é desconhecida (cancelada) e o tempo retornado é um limite inferior.
+    """
+    start = time.perf_counter()
+    primary_task = asyncio.ensure_future(primary())
+    started = [primary_task]
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay)
+        if done:
+            return primary_task.result(), PRIMARY, time.perf_counter() - start, False
+
+        hedge_factory = hedge()
+        if hedge_factory is None:
+            return await primary_task, PRIMARY, time.perf_counter() - start, False
+        hedge_task = asyncio.ensure_future(hedge_factory())
+        started.append(hedge_task)
+        tasks = {primary_task: PRIMARY, hedge_task: HEDGE}
+        pending = set(tasks)
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    loser = next(iter(pending), None)
+                    if loser is not None:
+                        loser.cancel()
+                    return task.result(), tasks[task], time.perf_counter() - start, True
+                first_error = first_error or task.exception()
+                logger.warning(f"Tentativa {tasks[task]} do LLM falhou com a outra ainda em andamento: {task.exception()!r}")
+        raise first_error
+    except asyncio.CancelledError:
+        # Orçamento de latência esgotado ou chamador cancelado: nenhuma tentativa continua
+        for task in started:
+            task.cancel()
+        raise
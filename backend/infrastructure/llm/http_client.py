@@ -0,0 +1,55 @@
+"""
+Pool de conexões HTTP compartilhado pelos clientes LLM (API compatível OpenAI).
+
+Um único `httpx.AsyncClient` por event loop mantém conexões keep-alive com
+o provedor, evitando um handshake TLS por geração. O cliente é recriado se
+o loop mudar (ex.: scripts que chamam `asyncio.run` mais de uma vez), pois
+conexões httpx não podem ser reutilizadas entre loops.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+    )
+    timeout = httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+    logger.info(
+        f"Criando pool HTTP do LLM: max_connections={limits.max_connections}, "
+        f"keepalive={limits.max_keepalive_connections} ({limits.keepalive_expiry}s)"
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """ Retorna o cliente HTTP compartilhado do event loop atual (deve ser chamado dentro do loop). """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = _build_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_llm_http_client() -> None:
+    """ Fecha as conexões do pool compartilhado (chamado no encerramento da aplicação). """
+    global _http_client, _http_client_loop
+    client, _http_client, _http_client_loop = _http_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Pool HTTP do LLM encerrado.")
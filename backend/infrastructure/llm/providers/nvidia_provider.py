@@ -10,12 +10,27 @@ from application.interfaces.llm_provider import LLMProvider
 from config.config import get_settings
 from shared.exceptions import LLMServiceError # Manter ou criar uma exceção específica da infra
 from infrastructure.telemetry.opentelemetry import get_tracer
-from infrastructure.metrics.prometheus.metrics_prometheus import record_llm_time, record_tokens, record_llm_error
+from infrastructure.metrics.prometheus.metrics_prometheus import (
+    record_llm_time,
+    record_tokens,
+    record_llm_error,
+    record_llm_queue_wait,
+    record_llm_queue_rejection,
+    set_llm_concurrency,
+    record_llm_hedge,
+    record_llm_hedge_winner,
+    record_llm_hedge_extra_tokens,
+    set_llm_hedge_delay,
+    record_llm_fallback,
+)
+from infrastructure.llm.http_client import get_llm_http_client
+from infrastructure.llm.hedging import LatencyTracker, hedged_call
 from opentelemetry import trace
 from opentelemetry.trace import SpanKind, Status, StatusCode
+from urllib.parse import urlparse
 
-# Usar cliente OpenAI para API NVIDIA
-from openai import OpenAI, AsyncOpenAI # AsyncOpenAI pode ser usado diretamente se suportado pela API NVIDIA
+# Cliente assíncrono nativo para a API NVIDIA (compatível OpenAI): nenhuma thread ocupada por geração
+from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +38,14 @@ class NvidiaProvider(LLMProvider):
     """
     Implementação do LLMProvider para interagir com a API da NVIDIA
     usando a interface compatível com OpenAI.
+
+    Usa `AsyncOpenAI` sobre o pool HTTP compartilhado (keep-alive) e limita
+    as gerações simultâneas a LLM_MAX_CONCURRENCY; as excedentes aguardam
+    na fila até LLM_QUEUE_TIMEOUT_SECONDS.
+
+    Opcionalmente (LLM_HEDGE_ENABLED) dispara uma segunda requisição quando a
+    primeira passa do percentil LLM_HEDGE_PERCENTILE das latências recentes,
+    e recorre a LLM_FALLBACK_MODEL quando LLM_LATENCY_BUDGET_SECONDS se esgota.
     """
 
     def __init__(self):
@@ -50,23 +73,29 @@ class NvidiaProvider(LLMProvider):
 
     def _initialize_client(self):
         """
-        Inicializa o cliente OpenAI para a API NVIDIA.
+        Prepara o cliente assíncrono para a API NVIDIA. O `AsyncOpenAI` e o
+        semáforo de concorrência são criados no primeiro uso dentro do event
+        loop (o provedor é instanciado fora dele, pelas dependências do FastAPI).
         """
         with self.tracer.start_as_current_span(
             "nvidia_provider.initialize_client", kind=SpanKind.INTERNAL
         ) as span:
             try:
-                # Nota: Verificar se a API NVIDIA suporta AsyncOpenAI seria ideal.
-                # Por enquanto, mantemos OpenAI síncrono e usaremos to_thread.
-                self.client = OpenAI(
-                    base_url="https://integrate.api.nvidia.com/v1",
-                    api_key=self.settings.API_KEY_NVIDEA,
-                )
+                self.base_url = self.settings.LLM_BASE_URL
+                self.max_concurrency = max(1, self.settings.LLM_MAX_CONCURRENCY)
+                self.client: Optional[AsyncOpenAI] = None
+                self._http_client = None
+                self._semaphore: Optional[asyncio.Semaphore] = None
+                self._loop: Optional[asyncio.AbstractEventLoop] = None
+                self._in_flight = 0
+                self._waiting = 0
+                self._latency_trackers: Dict[str, LatencyTracker] = {}
                 span.set_attribute("rpc.system", "openai_compatible")
-                span.set_attribute("server.address", "integrate.api.nvidia.com")
+                span.set_attribute("server.address", urlparse(self.base_url).hostname or self.base_url)
+                span.set_attribute("llm.max_concurrency", self.max_concurrency)
                 span.set_attribute("llm.client.initialized", True)
                 span.set_status(Status(StatusCode.OK))
-                logger.info("Cliente LLM (NVIDIA Provider) inicializado com sucesso")
+                logger.info(f"Cliente LLM (NVIDIA Provider) configurado: {self.base_url} (concorrência máx. {self.max_concurrency})")
             except Exception as e:
                 span.set_attribute("llm.client.initialized", False)
                 span.record_exception(e)
@@ -75,6 +104,126 @@ class NvidiaProvider(LLMProvider):
                 # Considerar relançar uma exceção mais específica da infraestrutura
                 raise LLMServiceError(f"Erro ao inicializar cliente LLM (NVIDIA Provider): {e}") from e
 
+    def _get_client(self) -> AsyncOpenAI:
+        """ Cliente e semáforo do event loop atual (recriados se o loop mudar, ex: asyncio.run repetido). """
+        http_client = get_llm_http_client()
+        loop = asyncio.get_running_loop()
+        if self.client is None or self._loop is not loop or self._http_client is not http_client:
+            self._http_client = http_client
+            self.client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.settings.API_KEY_NVIDEA,
+                http_client=http_client,
+                max_retries=self.settings.LLM_MAX_RETRIES,
+                timeout=self.settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            )
+            if self._loop is not loop:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+        return self.client
+
+    async def _acquire_slot(self, span: Any) -> None:
+        """ Aguarda uma vaga no limite de concorrência, registrando o tempo de fila. """
+        queue_start = time.perf_counter()
+        self._waiting += 1
+        set_llm_concurrency(self._in_flight, self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.settings.LLM_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            record_llm_queue_rejection()
+            raise LLMServiceError(
+                f"LLM sobrecarregado: nenhuma vaga em {self.settings.LLM_QUEUE_TIMEOUT_SECONDS:g}s "
+                f"({self.max_concurrency} gerações simultâneas)."
+            )
+        finally:
+            self._waiting -= 1
+        queue_wait = time.perf_counter() - queue_start
+        self._in_flight += 1
+        set_llm_concurrency(self._in_flight, self._waiting)
+        record_llm_queue_wait(queue_wait)
+        span.set_attribute("llm.queue_wait_ms", int(queue_wait * 1000))
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+        set_llm_concurrency(self._in_flight, self._waiting)
+
+    async def _attempt(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        slot_acquired: bool,
+    ) -> Any:
+        """ Uma requisição ao provedor; libera a vaga de concorrência ao terminar (ou ser cancelada). """
+        if not slot_acquired:
+            await self._semaphore.acquire()
+            self._in_flight += 1
+            set_llm_concurrency(self._in_flight, self._waiting)
+        try:
+            return await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                # Outros parâmetros podem ser adicionados/configurados
+                # top_p=0.9,
+                # frequency_penalty=0.3,
+                # presence_penalty=0.2,
+                stream=False, # Manter False para esta implementação
+                timeout=self.settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            )
+        finally:
+            self._release_slot()
+
+    def _hedge_delay(self, model: str) -> float:
+        """ Atraso até o hedge: percentil das latências recentes do modelo (valor inicial até haver amostras). """
+        tracker = self._latency_trackers.setdefault(model, LatencyTracker())
+        if len(tracker) < self.settings.LLM_HEDGE_MIN_SAMPLES:
+            delay = self.settings.LLM_HEDGE_INITIAL_DELAY_SECONDS
+        else:
+            delay = max(self.settings.LLM_HEDGE_MIN_DELAY_SECONDS, tracker.percentile(self.settings.LLM_HEDGE_PERCENTILE))
+        set_llm_hedge_delay(model, delay)
+        return delay
+
+    async def _hedged_completion(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        input_tokens: int,
+        span: Any,
+    ) -> Any:
+        """ Requisição primária (vaga já adquirida) com hedge opcional quando há capacidade ociosa. """
+        def primary():
+            return self._attempt(client, model, messages, max_tokens, temperature, slot_acquired=True)
+
+        if not self.settings.LLM_HEDGE_ENABLED:
+            return await primary()
+
+        def hedge():
+            if self._semaphore.locked():
+                # Sem vaga livre: hedgear só aumentaria a fila das demais gerações
+                record_llm_hedge("skipped")
+                return None
+            record_llm_hedge("sent")
+            record_llm_hedge_extra_tokens(input_tokens, "input")
+            span.add_event("llm.hedge.sent")
+            return lambda: self._attempt(client, model, messages, max_tokens, temperature, slot_acquired=False)
+
+        response, winner, elapsed, hedged = await hedged_call(primary, hedge, self._hedge_delay(model))
+        # Com o hedge vencedor, `elapsed` é um limite inferior da latência da primária
+        self._latency_trackers[model].observe(elapsed)
+        if hedged:
+            record_llm_hedge_winner(winner)
+            span.set_attribute("llm.hedge.winner", winner)
+        span.set_attribute("llm.hedge.sent", hedged)
+        return response
+
     def _count_tokens(self, text: str) -> int:
         """
         Conta tokens usando Tiktoken ou fallback.
@@ -162,21 +311,30 @@ class NvidiaProvider(LLMProvider):
                 span.set_attribute("llm.token_count_method", token_count_method)
                 record_tokens(input_tokens, "input") # Métrica
 
-                # --- Chamada Assíncrona à API Síncrona ---
-                def sync_llm_call():
-                    return self.client.chat.completions.create(
-                        model=effective_model,
-                        messages=messages,
-                        max_tokens=effective_max_tokens,
-                        temperature=effective_temperature,
-                        # Outros parâmetros podem ser adicionados/configurados
-                        # top_p=0.9,
-                        # frequency_penalty=0.3,
-                        # presence_penalty=0.2,
-                        stream=False, # Manter False para esta implementação
+                # --- Chamada assíncrona nativa (limitada por LLM_MAX_CONCURRENCY) ---
+                client = self._get_client()
+                await self._acquire_slot(span)
+                start_time = time.time() # Tempo de geração sem a espera na fila
+                completion = self._hedged_completion(
+                    client, effective_model, messages, effective_max_tokens, effective_temperature, input_tokens, span
+                )
+                budget = self.settings.LLM_LATENCY_BUDGET_SECONDS
+                try:
+                    response = await (asyncio.wait_for(completion, timeout=budget) if budget > 0 else completion)
+                except asyncio.TimeoutError:
+                    fallback_model = self.settings.LLM_FALLBACK_MODEL
+                    if not fallback_model or fallback_model == effective_model:
+                        raise TimeoutError(f"orçamento de latência de {budget:g}s excedido") from None
+                    # Orçamento esgotado: tentativas canceladas, nova requisição ao modelo menor
+                    logger.warning(
+                        f"LLM {effective_model} excedeu o orçamento de {budget:g}s; usando modelo de fallback {fallback_model}."
+                    )
+                    record_llm_fallback(fallback_model)
+                    span.set_attribute("llm.fallback_model", fallback_model)
+                    effective_model = fallback_model
+                    response = await self._attempt(
+                        client, fallback_model, messages, effective_max_tokens, effective_temperature, slot_acquired=False
                     )
-
-                response = await asyncio.to_thread(sync_llm_call)
                 # -----------------------------------------
 
                 response_text = response.choices[0].message.content if response.choices else ""
@@ -205,6 +363,14 @@ class NvidiaProvider(LLMProvider):
                 span.set_status(Status(StatusCode.OK))
                 return response_text
 
+            except LLMServiceError as e:
+                # Fila de concorrência esgotada (já contabilizada em llm_queue_rejections_total)
+                span.record_exception(e)
+                span.set_status(Status(StatusCode.ERROR, description=str(e)))
+                span.set_attribute("error.type", "queue_timeout")
+                logger.warning(str(e))
+                raise
+
             except Exception as e:
                 elapsed_time = time.time() - start_time
                 record_llm_time(elapsed_time, effective_model) # Métrica
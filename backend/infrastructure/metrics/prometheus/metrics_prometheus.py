@@ -6,11 +6,11 @@ Utilitários para métricas do Prometheus.
 """
 import time
 from prometheus_client import Counter, Histogram, Gauge, Summary, Info
-from prometheus_client import make_wsgi_app
-from starlette.middleware.wsgi import WSGIMiddleware
+from prometheus_client import make_asgi_app
+from opentelemetry import trace
 import logging
 import psutil
-from typing import TypeVar  # Adicionado para T = TypeVar('T')
+from typing import Dict, Optional, TypeVar  # Adicionado para T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +87,80 @@ CHUNKING_QUALITY_METRICS = Histogram(
     buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
 )
 
+# --- MÉTRICAS DA FILA DE INGESTÃO ---
+
+INGESTION_JOBS_TOTAL = Counter(
+    "ingestion_jobs_total",
+    "Total de jobs de ingestão por resultado",
+    ["status"],  # enqueued, succeeded, retried, failed, released, lease_lost
+)
+
+INGESTION_JOB_DURATION = Histogram(
+    "ingestion_job_duration_seconds",
+    "Duração de cada tentativa de processamento de um job de ingestão",
+    ["status"],  # succeeded, failed
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+
+INGESTION_PIPELINE_ITEMS = Counter(
+    "ingestion_pipeline_items_total",
+    "Itens processados por etapa do pipeline de ingestão",
+    ["stage"],  # extract (páginas), chunk (páginas), embed (chunks), write (chunks)
+)
+
+INGESTION_PIPELINE_STAGE_SECONDS = Histogram(
+    "ingestion_pipeline_stage_seconds",
+    "Tempo de trabalho de cada etapa do pipeline de ingestão por item/lote",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+INGESTION_PIPELINE_QUEUE_DEPTH = Gauge(
+    "ingestion_pipeline_queue_depth",
+    "Itens aguardando na fila de entrada de cada etapa do pipeline de ingestão",
+    ["queue"],  # pages, chunks, embeddings
+)
+
+INGESTION_EMBEDDING_THROUGHPUT = Gauge(
+    "ingestion_embedding_chunks_per_second",
+    "Vazão de geração de embeddings na ingestão (chunks/s) da última janela processada",
+)
+
+# --- MÉTRICAS DE EXCLUSÃO E PURGA DE DOCUMENTOS ---
+
+DOCUMENT_PURGE_PENDING = Gauge(
+    "document_purge_pending_documents",
+    "Documentos marcados como excluídos aguardando a purga dos chunks",
+)
+
+DOCUMENT_PURGE_CHUNKS_DELETED = Counter(
+    "document_purge_chunks_deleted_total",
+    "Chunks removidos pelo purgador de documentos excluídos",
+)
+
+DOCUMENT_PURGE_DOCUMENTS = Counter(
+    "document_purge_documents_total",
+    "Documentos excluídos completamente purgados",
+)
+
+DOCUMENT_PURGE_BATCH_SECONDS = Histogram(
+    "document_purge_batch_seconds",
+    "Duração de cada lote de exclusão de chunks do purgador",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+CHUNKS_TABLE_DEAD_TUPLES = Gauge(
+    "chunks_table_dead_tuples",
+    "Tuplas mortas em chunks_vetorizados (pg_stat_user_tables) na última verificação do purgador",
+)
+
+INDEX_MAINTENANCE_SECONDS = Histogram(
+    "chunks_index_maintenance_seconds",
+    "Duração das manutenções de chunks_vetorizados disparadas pelo purgador",
+    ["operation"],  # vacuum, reindex
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
 # --- MÉTRICAS DE EMBEDDING ---
 
 EMBEDDING_GENERATION_TIME = Histogram(
@@ -102,6 +176,17 @@ EMBEDDING_CACHE_METRICS = Gauge(
     ["metric_type"],  # size, hits, misses, hit_ratio
 )
 
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total",
+    "Consultas ao cache de embeddings por tipo de tráfego, camada e resultado",
+    ["traffic", "tier", "result"],  # traffic: query, ingestion; tier: memory, disk; result: hit, miss
+)
+
+EMBEDDING_CACHE_BYTES = Gauge(
+    "embedding_cache_bytes",
+    "Bytes ocupados pelos vetores na camada em memória do cache de embeddings",
+)
+
 # --- MÉTRICAS DE RECUPERAÇÃO (RAG - Movidas de rag_metrics.py) ---
 
 RETRIEVAL_SCORE_DISTRIBUTION = Histogram(
@@ -113,8 +198,8 @@ RETRIEVAL_SCORE_DISTRIBUTION = Histogram(
 
 RETRIEVAL_TIME = Histogram(
     "rag_retrieval_time_seconds",
-    "Tempo gasto em cada fase do processo de recuperação",
-    ["phase"],  # 'vector', 'text', 'hybrid', 'process', 'rerank', 'total'
+    "Tempo gasto em cada etapa do pipeline RAG (recuperação, contexto e geração)",
+    ["phase"],  # 'embed', 'vector', 'keyword', 'fusion', 'mmr', 'rerank', 'compression', 'context', 'llm'
     buckets=(
         0.001,
         0.005,
@@ -125,7 +210,10 @@ RETRIEVAL_TIME = Histogram(
         1.0,
         2.0,
         5.0,
-    ),  # Buckets para tempos menores
+        10.0,
+        30.0,
+        60.0,
+    ),  # Buckets de ms (fusão, contexto) a dezenas de segundos (geração no LLM)
 )
 
 DOCUMENTS_RETRIEVED = Histogram(
@@ -186,6 +274,77 @@ LLM_ERRORS_TOTAL = Counter(
     ["model"],  # Label para saber qual modelo falhou
 )
 
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Tempo de espera por uma vaga no limite de concorrência do LLM",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+LLM_REQUESTS_IN_FLIGHT = Gauge(
+    "llm_requests_in_flight",
+    "Gerações em andamento no provedor LLM",
+)
+
+LLM_REQUESTS_WAITING = Gauge(
+    "llm_requests_waiting",
+    "Gerações aguardando vaga no limite de concorrência do LLM",
+)
+
+LLM_QUEUE_REJECTIONS_TOTAL = Counter(
+    "llm_queue_rejections_total",
+    "Gerações recusadas por exceder LLM_QUEUE_TIMEOUT_SECONDS na fila",
+)
+
+LLM_HEDGE_REQUESTS_TOTAL = Counter(
+    "llm_hedge_requests_total",
+    "Decisões de hedge após o atraso (sent: segunda requisição enviada; skipped: sem vaga ociosa)",
+    ["outcome"],
+)
+
+LLM_HEDGE_WINS_TOTAL = Counter(
+    "llm_hedge_wins_total",
+    "Requisição vencedora quando houve hedge",
+    ["winner"],  # primary, hedge
+)
+
+LLM_HEDGE_EXTRA_TOKENS_TOTAL = Counter(
+    "llm_hedge_extra_tokens_total",
+    "Tokens adicionais enviados por requisições hedge (prompt duplicado; a saída da perdedora cancelada não é conhecida)",
+    ["type"],
+)
+
+LLM_HEDGE_DELAY_SECONDS = Gauge(
+    "llm_hedge_delay_seconds",
+    "Atraso atual até o hedge (percentil das latências recentes)",
+    ["model"],
+)
+
+LLM_FALLBACK_TOTAL = Counter(
+    "llm_fallback_total",
+    "Gerações redirecionadas ao modelo de fallback por orçamento de latência esgotado",
+    ["model"],
+)
+
+CONTEXT_COMPRESSION_RATIO = Histogram(
+    "context_compression_ratio",
+    "Fração dos tokens dos chunks selecionados mantida no contexto após a compressão extrativa",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+# --- MÉTRICAS DE COALESCÊNCIA (SINGLE-FLIGHT) ---
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "single_flight_requests_total",
+    "Chamadas por papel no single-flight (leader executa; follower reaproveita o resultado)",
+    ["operation", "role"],  # Ex: chat_query, leader/follower
+)
+
+SINGLE_FLIGHT_IN_FLIGHT = Gauge(
+    "single_flight_in_flight_keys",
+    "Execuções distintas em andamento no single-flight",
+    ["operation"],
+)
+
 # --- MÉTRICAS DE FEEDBACK ---
 
 USER_FEEDBACK = Counter(
@@ -203,22 +362,23 @@ T = TypeVar("T")  # Definindo T
 # --- FUNÇÕES AUXILIARES ---
 
 
-def update_system_metrics():
+def update_system_metrics(process: Optional[psutil.Process] = None):
     """
     Atualiza métricas do sistema (CPU, memória).
-    Esta função deve ser chamada periodicamente ou a cada requisição.
+    Chamada periodicamente pelo SystemMetricsSampler. O CPU é medido desde a
+    chamada anterior com o mesmo `process`; sem ele (novo psutil.Process), o
+    valor é sempre 0.0.
     """
     try:
-        process = psutil.Process()
+        process = process or psutil.Process()
         # Atualizar uso de memória
         memory_info = process.memory_info()
         MEMORY_USAGE.set(memory_info.rss)  # RSS: Resident Set Size
 
         # Atualizar uso de CPU
-        # Usar cpu_percent(interval=None) para obter desde a última chamada é mais eficiente em middlewares
+        # cpu_percent(interval=None): % desde a última chamada no mesmo objeto Process (não bloqueia)
         cpu_percent = process.cpu_percent(interval=None)
         # Primeira chamada retorna 0.0, chamadas subsequentes o % desde a última.
-        # Se chamado com intervalo muito curto pode subestimar picos. Chamar a cada req pode ser ok.
         if (
             cpu_percent is not None
         ):  # Ignorar a primeira chamada potencialmente 0.0 ou None
@@ -237,9 +397,24 @@ def init_app_info(app_name: str, app_version: str):
 
 def create_metrics_app():
     """
-    Cria um aplicativo WSGI para expor métricas do Prometheus.
+    Cria um aplicativo ASGI para expor métricas do Prometheus.
+
+    O formato segue o cabeçalho Accept: o Prometheus pede OpenMetrics
+    (application/openmetrics-text), único formato que inclui os exemplars.
+    """
+    return make_asgi_app()
+
+
+def current_trace_exemplar() -> Optional[Dict[str, str]]:
+    """
+    Exemplar {"trace_id": ...} do span atual, para ligar uma observação de
+    histograma ao trace no Tempo (label `trace_id` da datasource no Grafana).
+    None fora de um trace amostrado.
     """
-    return WSGIMiddleware(make_wsgi_app())
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid or not span_context.trace_flags.sampled:
+        return None
+    return {"trace_id": format(span_context.trace_id, "032x")}
 
 
 # --- Funções de Registro Específicas ---
@@ -251,7 +426,7 @@ def record_embedding_time(seconds: float, operation_type: str):  # Parâmetro re
     """
     EMBEDDING_GENERATION_TIME.labels(
         operation_type=operation_type  # Label renomeado
-    ).observe(seconds)
+    ).observe(seconds, exemplar=current_trace_exemplar())
 
 
 def update_embedding_cache_metrics(metric_type: str, value: float):
@@ -261,11 +436,28 @@ def update_embedding_cache_metrics(metric_type: str, value: float):
     EMBEDDING_CACHE_METRICS.labels(metric_type=metric_type).set(value)
 
 
+def record_embedding_cache_lookup(traffic: str, tier: str, hits: int, misses: int):
+    """
+    Registra acertos/falhas de uma consulta ao cache de embeddings.
+    """
+    if hits:
+        EMBEDDING_CACHE_LOOKUPS.labels(traffic=traffic, tier=tier, result="hit").inc(hits)
+    if misses:
+        EMBEDDING_CACHE_LOOKUPS.labels(traffic=traffic, tier=tier, result="miss").inc(misses)
+
+
+def set_embedding_cache_bytes(value: int):
+    """
+    Atualiza os bytes ocupados pela camada em memória do cache de embeddings.
+    """
+    EMBEDDING_CACHE_BYTES.set(value)
+
+
 def record_llm_time(seconds: float, model: str):
     """
     Registra tempo de geração do LLM.
     """
-    LLM_GENERATION_TIME.labels(model=model).observe(seconds)
+    LLM_GENERATION_TIME.labels(model=model).observe(seconds, exemplar=current_trace_exemplar())
 
 
 def record_tokens(count: int, type_name: str):
@@ -275,6 +467,64 @@ def record_tokens(count: int, type_name: str):
     LLM_TOKENS.labels(type=type_name).observe(count)
 
 
+def record_llm_queue_wait(seconds: float):
+    """Registra o tempo de espera na fila de concorrência do LLM."""
+    LLM_QUEUE_WAIT_SECONDS.observe(seconds)
+
+
+def set_llm_concurrency(in_flight: int, waiting: int):
+    """Atualiza os gauges de gerações em andamento e em espera."""
+    LLM_REQUESTS_IN_FLIGHT.set(in_flight)
+    LLM_REQUESTS_WAITING.set(waiting)
+
+
+def record_llm_queue_rejection():
+    """Registra uma geração recusada por tempo de fila esgotado."""
+    LLM_QUEUE_REJECTIONS_TOTAL.inc()
+
+
+def record_llm_hedge(outcome: str):
+    """Registra a decisão de hedge (sent/skipped) de uma geração lenta."""
+    LLM_HEDGE_REQUESTS_TOTAL.labels(outcome=outcome).inc()
+
+
+def record_llm_hedge_winner(winner: str):
+    """Registra qual requisição (primary/hedge) respondeu primeiro."""
+    LLM_HEDGE_WINS_TOTAL.labels(winner=winner).inc()
+
+
+def record_llm_hedge_extra_tokens(count: int, type_name: str):
+    """Registra tokens gastos a mais por uma requisição hedge."""
+    LLM_HEDGE_EXTRA_TOKENS_TOTAL.labels(type=type_name).inc(count)
+
+
+def set_llm_hedge_delay(model: str, seconds: float):
+    """Atualiza o atraso atual até o hedge do modelo."""
+    LLM_HEDGE_DELAY_SECONDS.labels(model=model).set(seconds)
+
+
+def record_llm_fallback(model: str):
+    """Registra uma geração redirecionada ao modelo de fallback."""
+    LLM_FALLBACK_TOTAL.labels(model=model).inc()
+
+
+def record_context_compression(original_tokens: int, compressed_tokens: int):
+    """Registra os tokens do contexto antes da compressão e a fração mantida."""
+    record_tokens(original_tokens, "context_uncompressed")
+    if original_tokens:
+        CONTEXT_COMPRESSION_RATIO.observe(compressed_tokens / original_tokens)
+
+
+def record_single_flight(operation: str, role: str):
+    """Registra uma chamada líder ou coalescida (seguidora) no single-flight."""
+    SINGLE_FLIGHT_REQUESTS.labels(operation=operation, role=role).inc()
+
+
+def set_single_flight_in_flight(operation: str, keys: int):
+    """Atualiza o número de execuções distintas em andamento."""
+    SINGLE_FLIGHT_IN_FLIGHT.labels(operation=operation).set(keys)
+
+
 def record_document_processing(status: str, file_type: str):
     """
     Registra processamento de documento.
@@ -321,8 +571,8 @@ def record_threshold_filtering(action: str, count: int = 1):
 
 # Nova função para registrar tempo de recuperação
 def record_retrieval_time(seconds: float, phase: str):
-    """Registra o tempo gasto em uma fase do processo de recuperação."""
-    RETRIEVAL_TIME.labels(phase=phase).observe(seconds)
+    """Registra o tempo gasto em uma etapa do pipeline RAG."""
+    RETRIEVAL_TIME.labels(phase=phase).observe(seconds, exemplar=current_trace_exemplar())
 
 
 # Função para registrar qualidade do chunking (associada a CHUNKING_QUALITY_METRICS)
@@ -336,3 +586,53 @@ def record_chunking_quality(score: float, strategy: str, file_type: str):
 def record_llm_error(model: str):
     """Registra um erro ocorrido na chamada ao LLM."""
     LLM_ERRORS_TOTAL.labels(model=model).inc()
+
+
+def record_ingestion_job(status: str, seconds: float = None):
+    """Registra uma transição de job de ingestão e, opcionalmente, a duração da tentativa."""
+    INGESTION_JOBS_TOTAL.labels(status=status).inc()
+    if seconds is not None:
+        INGESTION_JOB_DURATION.labels(status=status).observe(seconds)
+
+
+def record_pipeline_stage(stage: str, seconds: float, items: int = 1):
+    """Registra o trabalho de uma etapa do pipeline de ingestão."""
+    INGESTION_PIPELINE_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    INGESTION_PIPELINE_ITEMS.labels(stage=stage).inc(items)
+
+
+def set_pipeline_queue_depth(queue: str, depth: int):
+    """Atualiza a profundidade de uma fila do pipeline de ingestão."""
+    INGESTION_PIPELINE_QUEUE_DEPTH.labels(queue=queue).set(depth)
+
+
+def record_embedding_throughput(chunks: int, seconds: float):
+    """Atualiza a vazão de embeddings da ingestão (chunks/s)."""
+    if seconds > 0:
+        INGESTION_EMBEDDING_THROUGHPUT.set(chunks / seconds)
+
+
+def set_purge_pending(documents: int):
+    """Atualiza o número de documentos aguardando purga."""
+    DOCUMENT_PURGE_PENDING.set(documents)
+
+
+def record_purge_batch(chunks: int, seconds: float):
+    """Registra um lote de chunks removido pelo purgador."""
+    DOCUMENT_PURGE_CHUNKS_DELETED.inc(chunks)
+    DOCUMENT_PURGE_BATCH_SECONDS.observe(seconds)
+
+
+def record_purged_document():
+    """Registra um documento completamente purgado."""
+    DOCUMENT_PURGE_DOCUMENTS.inc()
+
+
+def set_chunks_dead_tuples(dead_tuples: int):
+    """Atualiza o número de tuplas mortas observado em chunks_vetorizados."""
+    CHUNKS_TABLE_DEAD_TUPLES.set(dead_tuples)
+
+
+def record_index_maintenance(operation: str, seconds: float):
+    """Registra uma manutenção (vacuum/reindex) de chunks_vetorizados."""
+    INDEX_MAINTENANCE_SECONDS.labels(operation=operation).observe(seconds)
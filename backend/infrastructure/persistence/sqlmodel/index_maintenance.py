@@ -0,0 +1,187 @@
+"""
+Manutenção dos índices de busca de `chunks_vetorizados` (HNSW e FTS).
+
+Usado pelo modo de carga em massa da migração: os índices são removidos
+antes da carga (inserções sem manutenção de índice linha a linha) e
+recriados uma única vez ao final, com `maintenance_work_mem` ampliado e
+workers paralelos. Tudo com CONCURRENTLY, então consultas continuam
+funcionando sobre os dados existentes (via varredura sequencial enquanto
+os índices não existem).
+
+Também usado pelo purgador de documentos excluídos, que dispara VACUUM e
+REINDEX CONCURRENTLY quando a proporção de tuplas mortas ultrapassa os
+limites configurados.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    """ Definição de um índice de busca: nome e cláusula após `ON`. """
+    name: str
+    definition: str
+
+
+# Definições centralizadas (mesmas das migrações 2d94142679e3 e 2aa3aa042983)
+CHUNK_SEARCH_INDEXES: List[IndexDefinition] = [
+    IndexDefinition(
+        name="ix_chunks_embedding",
+        definition="chunks_vetorizados USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)",
+    ),
+    IndexDefinition(
+        name="idx_fts_chunks_texto",
+        definition="chunks_vetorizados USING gin(to_tsvector('portuguese', texto))",
+    ),
+]
+
+_PROGRESS_SQL = """
+    SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total
+    FROM pg_stat_progress_create_index
+    WHERE relid = 'chunks_vetorizados'::regclass
+"""
+
+_TABLE_STATS_SQL = """
+    SELECT n_live_tup, n_dead_tup
+    FROM pg_stat_user_tables
+    WHERE relname = 'chunks_vetorizados'
+"""
+
+# Chave do advisory lock de manutenção: uma única réplica executa VACUUM/REINDEX por vez
+_MAINTENANCE_LOCK_KEY = 0x63687576 # "chuv"
+
+ProgressReporter = Callable[[str], None]
+
+
+async def drop_chunk_search_indexes(engine: AsyncEngine, report: Optional[ProgressReporter] = None) -> None:
+    """ Remove os índices de busca sem bloquear leituras (DROP INDEX CONCURRENTLY). """
+    report = report or logger.info
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for index in CHUNK_SEARCH_INDEXES:
+            report(f"Removendo índice {index.name}...")
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+    report("Índices de busca removidos; inserções não fazem mais manutenção de HNSW/FTS.")
+
+
+async def rebuild_chunk_search_indexes(
+    engine: AsyncEngine,
+    maintenance_work_mem: str,
+    parallel_workers: int,
+    report: Optional[ProgressReporter] = None,
+    progress_interval_seconds: float = 10.0,
+) -> None:
+    """
+    Recria os índices de busca (CREATE INDEX CONCURRENTLY), um por vez, com
+    `maintenance_work_mem` e `max_parallel_maintenance_workers` ajustados na
+    sessão. Índices inválidos (build concorrente interrompido) são recriados.
+    O progresso é lido de `pg_stat_progress_create_index`.
+    """
+    report = report or logger.info
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT set_config('maintenance_work_mem', :value, false)"), {"value": maintenance_work_mem})
+        await conn.execute(
+            text("SELECT set_config('max_parallel_maintenance_workers', :value, false)"), {"value": str(parallel_workers)}
+        )
+        for index in CHUNK_SEARCH_INDEXES:
+            state = await _index_state(conn, index.name)
+            if state == "valid":
+                report(f"Índice {index.name} já existe; nada a fazer.")
+                continue
+            if state == "invalid":
+                report(f"Índice {index.name} inválido (build anterior interrompido); removendo...")
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+
+            report(f"Recriando índice {index.name} (maintenance_work_mem={maintenance_work_mem}, workers={parallel_workers})...")
+            progress_task = asyncio.create_task(_report_progress(engine, index.name, report, progress_interval_seconds))
+            try:
+                await conn.execute(text(f"CREATE INDEX CONCURRENTLY {index.name} ON {index.definition}"))
+            finally:
+                progress_task.cancel()
+                try:
+                    await progress_task
+                except asyncio.CancelledError:
+                    pass
+            report(f"Índice {index.name} recriado.")
+        await conn.execute(text("ANALYZE chunks_vetorizados"))
+    report("Índices de busca recriados e estatísticas atualizadas.")
+
+
+async def _index_state(conn, index_name: str) -> Optional[str]:
+    """ Retorna 'valid', 'invalid' ou None (inexistente). """
+    result = await conn.execute(
+        text("""
+            SELECT i.indisvalid
+            FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :name
+        """),
+        {"name": index_name},
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return "valid" if row.indisvalid else "invalid"
+
+
+async def _report_progress(engine: AsyncEngine, index_name: str, report: ProgressReporter, interval: float) -> None:
+    """ Lê periodicamente o progresso do CREATE INDEX em outra conexão. """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.connect() as conn:
+                row = (await conn.execute(text(_PROGRESS_SQL))).first()
+        except Exception as e:
+            logger.debug(f"Falha ao ler progresso do índice {index_name}: {e}")
+            continue
+        if row is None:
+            continue
+        parts = [f"fase '{row.phase}'"]
+        if row.blocks_total:
+            parts.append(f"blocos {row.blocks_done}/{row.blocks_total} ({100 * row.blocks_done / row.blocks_total:.0f}%)")
+        if row.tuples_total:
+            parts.append(f"tuplas {row.tuples_done}/{row.tuples_total} ({100 * row.tuples_done / row.tuples_total:.0f}%)")
+        report(f"Índice {index_name}: " + ", ".join(parts))
+
+
+async def get_chunk_table_stats(engine: AsyncEngine) -> Dict[str, int]:
+    """ Tuplas vivas e mortas de chunks_vetorizados segundo pg_stat_user_tables. """
+    async with engine.connect() as conn:
+        row = (await conn.execute(text(_TABLE_STATS_SQL))).first()
+    if row is None:
+        return {"live_tuples": 0, "dead_tuples": 0}
+    return {"live_tuples": int(row.n_live_tup or 0), "dead_tuples": int(row.n_dead_tup or 0)}
+
+
+async def vacuum_chunks_table(engine: AsyncEngine, reindex: bool = False, report: Optional[ProgressReporter] = None) -> bool:
+    """
+    Executa VACUUM (ANALYZE) em chunks_vetorizados e, se `reindex`, recria os
+    índices de busca com REINDEX INDEX CONCURRENTLY (sem bloquear consultas).
+    Protegido por advisory lock: retorna False se outra réplica já está executando.
+    """
+    report = report or logger.info
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _MAINTENANCE_LOCK_KEY})).scalar()
+        if not acquired:
+            report("Manutenção de chunks_vetorizados já em andamento em outra instância; ignorando.")
+            return False
+        try:
+            if reindex:
+                for index in CHUNK_SEARCH_INDEXES:
+                    report(f"Recriando índice {index.name} (REINDEX CONCURRENTLY)...")
+                    await conn.execute(text(f"REINDEX INDEX CONCURRENTLY {index.name}"))
+            report("Executando VACUUM (ANALYZE) em chunks_vetorizados...")
+            await conn.execute(text("VACUUM (ANALYZE) chunks_vetorizados"))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _MAINTENANCE_LOCK_KEY})
+    report("Manutenção de chunks_vetorizados concluída.")
+    return True
@@ -26,6 +26,8 @@ class DocumentoDB(SQLModel, table=True):
     size_kb: Optional[float] = Field(default=0.0) # Para armazenar o tamanho do arquivo
     chunks_count: Optional[int] = Field(default=0) # Para armazenar a contagem de chunks
     processed: Optional[bool] = Field(default=False) # Para indicar status de processamento
+    content_hash: Optional[str] = Field(default=None, index=True) # SHA-256 do arquivo (deduplicação)
+    deleted_at: Optional[datetime.datetime] = Field(default=None) # Exclusão lógica; índice parcial criado na migração
 
 class ChunkDB(SQLModel, table=True):
     """ Modelo SQLModel para a tabela 'chunks_vetorizados'. """
@@ -38,3 +40,43 @@ class ChunkDB(SQLModel, table=True):
     pagina: Optional[int] = Field(default=None)
     posicao: Optional[int] = Field(default=None)
     metadados: Optional[Dict[str, Any]] = Field(default_factory=dict, sa_column=Column(JSONB))
+    texto_hash: Optional[str] = Field(default=None) # SHA-256 do texto; índice (documento_id, texto_hash) criado na migração
+
+class IngestionJobDB(SQLModel, table=True):
+    """ Modelo SQLModel para a tabela 'ingestion_jobs' (fila durável de ingestão). """
+    __tablename__ = "ingestion_jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: str = Field(default="queued", index=True, nullable=False) # queued, running, succeeded, failed
+    nome_arquivo: str = Field(nullable=False)
+    tipo_arquivo: Optional[str] = Field(default=None)
+    caminho_arquivo: str = Field(nullable=False) # Arquivo persistido em INGESTION_STORAGE_DIR
+    size_kb: Optional[float] = Field(default=0.0)
+    metadados: Optional[Dict[str, Any]] = Field(default_factory=dict, sa_column=Column(JSONB))
+    documento_id: Optional[int] = Field(default=None, foreign_key="documentos_originais.id")
+
+    # Progresso reportado pelo worker
+    etapa: Optional[str] = Field(default=None)
+    progresso: float = Field(default=0.0)
+
+    # Controle de tentativas e lease
+    tentativas: int = Field(default=0)
+    max_tentativas: int = Field(default=3)
+    ultimo_erro: Optional[str] = Field(default=None)
+    worker_id: Optional[str] = Field(default=None)
+    heartbeat_em: Optional[datetime.datetime] = Field(default=None)
+    proxima_tentativa_em: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column_kwargs={"server_default": sa.text("CURRENT_TIMESTAMP")}
+    )
+
+    criado_em: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column_kwargs={"server_default": sa.text("CURRENT_TIMESTAMP")}
+    )
+    atualizado_em: Optional[datetime.datetime] = Field(
+        default=None,
+        sa_column_kwargs={"server_default": sa.text("CURRENT_TIMESTAMP")}
+    )
+    iniciado_em: Optional[datetime.datetime] = Field(default=None)
+    finalizado_em: Optional[datetime.datetime] = Field(default=None)
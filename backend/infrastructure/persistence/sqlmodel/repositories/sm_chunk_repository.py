@@ -15,8 +15,62 @@ from domain.aggregates.document.chunk import Chunk # Importar Chunk do domínio
 from infrastructure.persistence.sqlmodel.models import ChunkDB, DocumentoDB, EMBEDDING_DIM # Importar ambos
 from pgvector.sqlalchemy import Vector # Importar Vector
 
+from config.config import get_settings
+
 logger = logging.getLogger(__name__)
 
+# --- Staging do carregamento em massa (COPY binário) ---
+
+_STAGING_COLUMNS = ("id", "documento_id", "texto", "embedding", "pagina", "posicao", "metadados", "texto_hash")
+
+# Tabela temporária por sessão; ON COMMIT DROP evita resíduos entre transações
+_CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS chunks_vetorizados_staging (
+        id INTEGER NOT NULL,
+        documento_id INTEGER NOT NULL,
+        texto TEXT NOT NULL,
+        embedding REAL[],
+        pagina INTEGER,
+        posicao INTEGER,
+        metadados JSONB,
+        texto_hash TEXT
+    ) ON COMMIT DROP
+"""
+
+_MOVE_STAGING_SQL = """
+    INSERT INTO chunks_vetorizados (id, documento_id, texto, embedding, pagina, posicao, metadados, texto_hash)
+    SELECT id, documento_id, texto, embedding::vector, pagina, posicao, metadados, texto_hash
+    FROM chunks_vetorizados_staging
+    ORDER BY id
+"""
+
+# Limites do hnsw.ef_search do pgvector (padrão 40, máximo 1000)
+_HNSW_DEFAULT_EF_SEARCH = 40
+_HNSW_MAX_EF_SEARCH = 1000
+
+# Aumenta hnsw.ef_search apenas na transação atual (set_config local = SET LOCAL)
+# e apenas se houver documentos excluídos ainda não purgados.
+_RAISE_EF_SEARCH_IF_DELETIONS_PENDING_SQL = text("""
+    SELECT set_config('hnsw.ef_search', :ef_search, true)
+    WHERE EXISTS (SELECT 1 FROM documentos_originais WHERE deleted_at IS NOT NULL)
+""")
+
+def _not_from_deleted_document():
+    """
+    Filtro das buscas: exclui chunks de documentos marcados como excluídos
+    (ainda não purgados). A subconsulta usa o índice parcial em deleted_at.
+
+    Limitação na busca vetorial: o filtro é aplicado depois da varredura do
+    índice HNSW, que devolve no máximo `hnsw.ef_search` candidatos. Se muitos
+    deles forem de documentos excluídos, a busca retorna menos que `limit`
+    linhas. Enquanto houver exclusões pendentes, find_similar_chunks aumenta
+    ef_search (PURGE_PENDING_EF_SEARCH_FACTOR); ainda assim, um documento
+    excluído muito grande e muito próximo da consulta pode reduzir o
+    resultado até ser purgado.
+    """
+    deleted_document_ids = select(DocumentoDB.id).where(DocumentoDB.deleted_at.is_not(None))
+    return ChunkDB.documento_id.not_in(deleted_document_ids)
+
 class SqlModelChunkRepository(ChunkRepository):
     """ Implementação do ChunkRepository usando SQLModel e AsyncSession. """
 
@@ -51,7 +105,9 @@ class SqlModelChunkRepository(ChunkRepository):
             text=db_chunk.texto,
             page_number=db_chunk.pagina,
             position=db_chunk.posicao,
-            metadata=metadata_dict
+            metadata=metadata_dict,
+            text_hash=db_chunk.texto_hash,
+            vector=db_chunk.embedding, # numpy.ndarray (pgvector); já vem na linha selecionada
         )
 
     # --- Métodos da Interface (Com assinatura limpa, mas funcionalidade limitada) ---
@@ -154,58 +210,34 @@ class SqlModelChunkRepository(ChunkRepository):
 
 
     async def save_batch_with_embeddings(self, chunks_with_embeddings: List[Tuple[Chunk, List[float]]]) -> List[Chunk]:
-        """ Salva uma lista de chunks com seus embeddings associados de forma eficiente. """
-        # Esta é a lógica que estava anteriormente em save_batch()
+        """
+        Salva uma lista de chunks com seus embeddings associados de forma eficiente.
+
+        Com asyncpg, usa o carregador em massa (COPY binário para uma tabela
+        de staging, em lotes de CHUNK_COPY_BATCH_SIZE); sem o limite de
+        parâmetros de um INSERT multi-linha. IDs retornados na ordem de entrada.
+        """
         logger.debug(f"Executando save_batch_with_embeddings para {len(chunks_with_embeddings)} chunks.")
         if not chunks_with_embeddings:
             return []
 
-        # Mapear entidades de domínio + embeddings para o formato do banco (lista de dicts)
-        values_to_insert = []
         chunks_to_return: List[Chunk] = [] # Para manter a ordem e retornar
+        rows: List[Dict[str, Any]] = []
         for domain_chunk, embedding_vector in chunks_with_embeddings:
              if not domain_chunk.document_id:
                  logger.error(f"Chunk sem documento_id não pode ser salvo: {domain_chunk}")
                  continue # Pular este chunk
-
-             values_to_insert.append({
-                 "documento_id": domain_chunk.document_id,
-                 "texto": domain_chunk.text,
-                 "embedding": embedding_vector, # Embedding já é List[float]
-                 "pagina": domain_chunk.page_number,
-                 "posicao": domain_chunk.position,
-                 "metadados": json.dumps(domain_chunk.metadata) if domain_chunk.metadata else None # Garantir JSON para metadados
-             })
+             rows.append(self._chunk_to_row(domain_chunk, domain_chunk.document_id, embedding_vector))
              chunks_to_return.append(domain_chunk) # Adiciona o chunk original à lista
 
         try:
-            # Usar INSERT ... ON CONFLICT (UPSERT) se o ID não for garantido único ou se for atualização
-            # Se for sempre inserção nova (ID gerado pelo DB), um INSERT simples basta.
-            # Assumindo INSERT simples por enquanto.
-            # Se a tabela ChunkDB tiver um ID auto-incrementável, precisamos recuperá-los.
-
-            # Usar a sintaxe pg_insert para retornar os IDs (ou todos os campos)
-            stmt = pg_insert(ChunkDB).values(values_to_insert)
-            # Adicionar cláusula RETURNING para obter os IDs (ou outros campos) gerados
-            # Ajuste o nome 'id' se for diferente na sua classe ChunkDB
-            stmt = stmt.returning(ChunkDB.id, ChunkDB.documento_id, ChunkDB.texto, ChunkDB.pagina, ChunkDB.posicao, ChunkDB.metadados)
-
-            result = await self._session.execute(stmt)
+            inserted_ids = await self._bulk_insert_rows(rows)
             await self._session.commit()
-
-            # Mapear resultados de volta para atualizar IDs nos Chunks de domínio
-            inserted_rows = result.fetchall() # Fetchall para pegar todas as linhas retornadas
-            if len(inserted_rows) != len(chunks_to_return):
-                 logger.warning(f"Número de linhas retornadas ({len(inserted_rows)}) diferente do número de chunks enviados ({len(chunks_to_return)})")
-                 # Pode precisar de lógica mais robusta para mapear de volta se a ordem não for garantida
-
-            # Atualizar os IDs nos objetos Chunk que vamos retornar
-            for i, row in enumerate(inserted_rows):
-                 if i < len(chunks_to_return):
-                     # row[0] deve ser o ID retornado
-                     chunks_to_return[i].id = row[0] # Atualiza o ID no objeto de domínio
-
-            logger.info(f"{len(inserted_rows)} chunks salvos em lote (com embeddings).")
+            if len(inserted_ids) != len(chunks_to_return):
+                 logger.warning(f"Número de IDs retornados ({len(inserted_ids)}) diferente do número de chunks enviados ({len(chunks_to_return)})")
+            for domain_chunk, chunk_id in zip(chunks_to_return, inserted_ids):
+                domain_chunk.id = chunk_id # Atualiza o ID no objeto de domínio
+            logger.info(f"{len(inserted_ids)} chunks salvos em lote (com embeddings).")
             return chunks_to_return # Retorna os chunks originais, agora com IDs
 
         except Exception as e:
@@ -213,6 +245,85 @@ class SqlModelChunkRepository(ChunkRepository):
             await self._session.rollback()
             raise
 
+    # --- Carregamento em Massa ---
+
+    @staticmethod
+    def _chunk_to_row(chunk: Chunk, document_id: int, embedding_vector: List[float]) -> Dict[str, Any]:
+        """ Converte um chunk de domínio + embedding para uma linha de chunks_vetorizados. """
+        return {
+            "documento_id": document_id,
+            "texto": chunk.text,
+            "embedding": embedding_vector, # Embedding já é List[float]
+            "pagina": chunk.page_number,
+            "posicao": chunk.position,
+            "metadados": json.dumps(chunk.metadata) if chunk.metadata else None, # Garantir JSON para metadados
+            "texto_hash": chunk.text_hash or Chunk.compute_text_hash(chunk.text),
+        }
+
+    async def _bulk_insert_rows(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insere linhas em chunks_vetorizados dentro da transação corrente (sem commit),
+        em lotes limitados. Retorna os IDs na mesma ordem das linhas.
+        """
+        if not rows:
+            return []
+        settings = get_settings()
+        connection = await self._session.connection()
+        use_copy = connection.dialect.driver == "asyncpg"
+        # INSERT multi-linha: 7 parâmetros por linha, abaixo do limite de 32.767 do protocolo
+        batch_size = max(1, settings.CHUNK_COPY_BATCH_SIZE if use_copy else min(settings.CHUNK_COPY_BATCH_SIZE, 32767 // len(rows[0])))
+        inserted_ids: List[int] = []
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if use_copy:
+                inserted_ids.extend(await self._copy_batch(batch))
+            else:
+                result = await self._session.execute(pg_insert(ChunkDB).values(batch).returning(ChunkDB.id))
+                inserted_ids.extend(row[0] for row in result.fetchall())
+        return inserted_ids
+
+    async def _copy_batch(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Carrega um lote via COPY ... FROM STDIN (FORMAT binary) do asyncpg.
+
+        1. Reserva os IDs na sequência (garante a ordem dos IDs retornados).
+        2. COPY binário para uma tabela temporária de staging; o embedding vai
+           como float4[] (binário, sem serializar o vetor em texto).
+        3. INSERT ... SELECT para chunks_vetorizados, convertendo para vector.
+        """
+        # Executado via sessão: garante que a transação do SQLAlchemy já está aberta
+        # antes de usar a conexão asyncpg diretamente (a staging some no commit).
+        await self._session.execute(text(_CREATE_STAGING_SQL))
+        await self._session.execute(text("TRUNCATE chunks_vetorizados_staging"))
+        result = await self._session.execute(
+            text("SELECT nextval(pg_get_serial_sequence('chunks_vetorizados', 'id')) FROM generate_series(1, :n)"),
+            {"n": len(rows)},
+        )
+        chunk_ids = [row[0] for row in result.fetchall()]
+
+        records = [
+            (
+                chunk_id,
+                row["documento_id"],
+                row["texto"],
+                [float(x) for x in row["embedding"]],
+                row["pagina"],
+                row["posicao"],
+                row["metadados"],
+                row["texto_hash"],
+            )
+            for chunk_id, row in zip(chunk_ids, rows)
+        ]
+        connection = await self._session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "chunks_vetorizados_staging",
+            records=records,
+            columns=list(_STAGING_COLUMNS),
+        )
+        await self._session.execute(text(_MOVE_STAGING_SQL))
+        return chunk_ids
+
     # --- Métodos find_* e delete_* (Manter como estão, eles operam sobre dados existentes) ---
     async def find_by_id(self, chunk_id: int) -> Optional[Chunk]:
         """ Busca um chunk pelo seu ID. """
@@ -250,6 +361,116 @@ class SqlModelChunkRepository(ChunkRepository):
             await self._session.rollback()
             return 0 # Retorna 0 em caso de erro
 
+    async def delete_batch_by_document_id(self, document_id: int, batch_size: int) -> int:
+        """ Exclui um lote de chunks do documento (DELETE ... WHERE id IN (SELECT ... LIMIT)). """
+        try:
+            result = await self._session.execute(
+                text("""
+                    DELETE FROM chunks_vetorizados
+                    WHERE id IN (
+                        SELECT id FROM chunks_vetorizados
+                        WHERE documento_id = :document_id
+                        LIMIT :batch_size
+                    )
+                """),
+                {"document_id": document_id, "batch_size": batch_size},
+            )
+            await self._session.commit()
+            deleted_count = result.rowcount if result.rowcount is not None else 0
+            logger.debug(f"Lote de {deleted_count} chunks excluído para documento ID {document_id}.")
+            return deleted_count
+        except Exception as e:
+            logger.exception(f"Erro ao excluir lote de chunks para documento ID {document_id}: {e}")
+            await self._session.rollback()
+            raise
+
+    async def clone_chunks(self, source_document_id: int, target_document_id: int) -> int:
+        """ Copia os chunks de um documento para outro com INSERT ... SELECT (vetores não saem do banco). """
+        try:
+            query = text("""
+                INSERT INTO chunks_vetorizados (documento_id, texto, embedding, pagina, posicao, metadados, texto_hash)
+                SELECT :target_document_id, texto, embedding, pagina, posicao, metadados, texto_hash
+                FROM chunks_vetorizados
+                WHERE documento_id = :source_document_id
+                ORDER BY posicao
+            """)
+            result = await self._session.execute(
+                query, {"source_document_id": source_document_id, "target_document_id": target_document_id}
+            )
+            await self._session.commit()
+            cloned_count = result.rowcount if result.rowcount is not None else 0
+            logger.info(f"{cloned_count} chunks clonados do documento ID {source_document_id} para {target_document_id}.")
+            return cloned_count
+        except Exception as e:
+            logger.exception(f"Erro ao clonar chunks do documento ID {source_document_id} para {target_document_id}: {e}")
+            await self._session.rollback()
+            raise
+
+    async def find_text_hashes_by_document_id(self, document_id: int) -> List[Tuple[int, Optional[str]]]:
+        """ Retorna (id, texto_hash) dos chunks do documento, sem carregar texto nem embeddings. """
+        try:
+            statement = (
+                select(ChunkDB.id, ChunkDB.texto_hash)
+                .where(ChunkDB.documento_id == document_id)
+                .order_by(ChunkDB.posicao)
+            )
+            results = await self._session.execute(statement)
+            return [(row.id, row.texto_hash) for row in results.all()]
+        except Exception as e:
+            logger.exception(f"Erro ao buscar hashes de chunks para documento ID {document_id}: {e}")
+            raise
+
+    async def apply_chunk_diff(
+        self,
+        document_id: int,
+        kept_chunks: List[Chunk],
+        new_chunks: List[Tuple[Chunk, List[float]]],
+        removed_chunk_ids: List[int],
+    ) -> int:
+        """ Aplica a diferença de chunks de um documento em uma única transação. """
+        try:
+            if removed_chunk_ids:
+                await self._session.execute(
+                    sqlalchemy_delete(ChunkDB).where(
+                        ChunkDB.documento_id == document_id,
+                        ChunkDB.id.in_(removed_chunk_ids),
+                    )
+                )
+            if kept_chunks:
+                # executemany: chunks mantidos só mudam de página/posição (embedding não é tocado)
+                await self._session.execute(
+                    text("""
+                        UPDATE chunks_vetorizados
+                        SET pagina = :pagina, posicao = :posicao, metadados = CAST(:metadados AS JSONB)
+                        WHERE id = :id AND documento_id = :documento_id
+                    """),
+                    [
+                        {
+                            "id": chunk.id,
+                            "documento_id": document_id,
+                            "pagina": chunk.page_number,
+                            "posicao": chunk.position,
+                            "metadados": json.dumps(chunk.metadata) if chunk.metadata else None,
+                        }
+                        for chunk in kept_chunks
+                    ],
+                )
+            if new_chunks:
+                await self._bulk_insert_rows([
+                    self._chunk_to_row(chunk, document_id, embedding_vector)
+                    for chunk, embedding_vector in new_chunks
+                ])
+            await self._session.commit()
+            logger.info(
+                f"Diff de chunks aplicado ao documento ID {document_id}: "
+                f"{len(kept_chunks)} mantidos, {len(new_chunks)} novos, {len(removed_chunk_ids)} removidos."
+            )
+            return len(kept_chunks) + len(new_chunks)
+        except Exception as e:
+            logger.exception(f"Erro ao aplicar diff de chunks para documento ID {document_id}: {e}")
+            await self._session.rollback()
+            raise
+
     async def get_chunk_by_id(self, chunk_id: int):
         """Recupera um chunk específico pelo ID."""
         try:
@@ -297,10 +518,16 @@ class SqlModelChunkRepository(ChunkRepository):
              # Escolher o operador de distância/similaridade
              # Ex: Cosseno (<=>), L2 (<->), Produto Interno (<#>)
              # Para Cosseno, score = 1 - distance. Para Produto Interno, score é o próprio resultado (se normalizado).
+             await self._raise_ef_search_if_deletions_pending(limit)
              distance_op = ChunkDB.embedding.cosine_distance(embedding_vector) # Exemplo com Cosseno
              # Se usar produto interno e quiser score maior = melhor: distance_op = (ChunkDB.embedding.max_inner_product(embedding_vector) * -1)
 
-             stmt = select(ChunkDB, distance_op.label("distance")).order_by(distance_op).limit(limit)
+             stmt = (
+                 select(ChunkDB, distance_op.label("distance"))
+                 .where(_not_from_deleted_document())
+                 .order_by(distance_op)
+                 .limit(limit)
+             )
 
              if filter_document_ids:
                  stmt = stmt.where(ChunkDB.documento_id.in_(filter_document_ids))
@@ -328,6 +555,14 @@ class SqlModelChunkRepository(ChunkRepository):
              logger.exception(f"Erro durante a busca por similaridade de chunks: {e}")
              return [] # Retorna lista vazia em caso de erro
 
+    async def _raise_ef_search_if_deletions_pending(self, limit: int) -> None:
+        """ Compensa os candidatos do HNSW descartados pelo filtro de documentos excluídos. """
+        factor = get_settings().PURGE_PENDING_EF_SEARCH_FACTOR
+        if factor <= 0:
+            return
+        ef_search = min(_HNSW_MAX_EF_SEARCH, max(_HNSW_DEFAULT_EF_SEARCH, limit) * factor)
+        await self._session.execute(_RAISE_EF_SEARCH_IF_DELETIONS_PENDING_SQL, {"ef_search": str(ef_search)})
+
     async def find_by_keyword(self, query: str, limit: int, filter_document_ids: Optional[List[int]] = None) -> List[Tuple[Chunk, float]]:
         """ Encontra chunks baseados na relevância textual (keyword search) usando FTS. """
         logger.debug(f"Executando find_by_keyword para query: '{query}', limit: {limit}, filtro: {filter_document_ids}")
@@ -344,7 +579,7 @@ class SqlModelChunkRepository(ChunkRepository):
 
             # Montar a query: SELECT chunk.*, rank WHERE expressao @@ query ORDER BY rank DESC LIMIT limit
             stmt = select(ChunkDB, rank_function).\
-                   where(ts_vector_expression.op('@@')(ts_query)).\
+                   where(ts_vector_expression.op('@@')(ts_query), _not_from_deleted_document()).\
                    order_by(rank_function.desc()).\
                    limit(limit)
 
@@ -1,9 +1,12 @@
 import logging
-from typing import List, Optional, Tuple
+import base64
+import datetime
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import json # Necessário para lidar com a desserialização inicial
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, delete as sqlalchemy_delete # Importar delete
+from sqlalchemy import func, literal_column, text, tuple_, delete as sqlalchemy_delete, update as sqlalchemy_update # Importar delete/update
 from sqlmodel import select # Usar select do SQLModel/SQLAlchemy
 
 # Importar interface do domínio e entidades/VOs do domínio
@@ -13,9 +16,63 @@ from domain.aggregates.document.document_metadata import DocumentMetadata # <--
 
 # Importar modelo SQLModel do banco
 from infrastructure.persistence.sqlmodel.models import DocumentoDB
+from config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# --- Listagem: ordenação, keyset e contagem ---
+
+# Valores usados no lugar de NULL na ordenação. As expressões precisam ser
+# idênticas às dos índices da migração a7d3f9b2c815 para que o Postgres os use.
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SORT_EXPRESSIONS = {
+    "name": DocumentoDB.nome_arquivo,
+    "upload_date": func.coalesce(DocumentoDB.data_upload, literal_column("'1970-01-01'::timestamp")),
+    "size_kb": func.coalesce(DocumentoDB.size_kb, literal_column("0")),
+}
+
+def _sort_value(document: Document, sort_by: str) -> Any:
+    """ Valor da chave de ordenação de um documento, serializável em JSON (igual à expressão SQL). """
+    if sort_by == "name":
+        return document.name
+    if sort_by == "upload_date":
+        return (document.upload_date or _EPOCH).isoformat()
+    return float(document.size_kb or 0.0)
+
+def _encode_cursor(sort_by: str, descending: bool, document: Document) -> str:
+    payload = {"s": sort_by, "d": descending, "v": _sort_value(document, sort_by), "id": document.id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple[Any, int]:
+    """ Retorna (valor da chave, id) do último documento da página anterior. """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, last_id = payload["v"], int(payload["id"])
+        if sort_by == "upload_date":
+            value = datetime.datetime.fromisoformat(value)
+        elif sort_by == "size_kb":
+            value = float(value)
+        elif not isinstance(value, str):
+            raise TypeError("valor de nome inválido")
+    except Exception as e:
+        raise ValueError(f"Cursor de paginação inválido: {e}") from e
+    if payload.get("s") != sort_by or payload.get("d") != descending:
+        raise ValueError("Cursor de paginação gerado para outra ordenação (sort_by/order).")
+    return value, last_id
+
+def _name_pattern(name_filter: str) -> str:
+    """ Padrão ILIKE de substring com curingas do usuário escapados (atendido pelo índice trigram). """
+    escaped = name_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+# Contagens recentes por filtro, compartilhadas entre requisições do processo:
+# {filtro: (expira_em, total, estimado)}
+_COUNT_CACHE: Dict[str, Tuple[float, int, bool]] = {}
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+def _invalidate_count_cache() -> None:
+    _COUNT_CACHE.clear()
+
 class SqlModelDocumentRepository(DocumentRepository):
     """ Implementação do DocumentRepository usando SQLModel e AsyncSession. """
 
@@ -64,6 +121,8 @@ class SqlModelDocumentRepository(DocumentRepository):
                 size_kb=db_doc.size_kb if db_doc.size_kb is not None else 0.0,
                 chunks_count=db_doc.chunks_count if db_doc.chunks_count is not None else 0,
                 processed=db_doc.processed if db_doc.processed is not None else False,
+                content_hash=db_doc.content_hash,
+                deleted_at=db_doc.deleted_at,
             )
             logger.debug(f"Mapeamento para Document (domínio) bem-sucedido para ID: {domain_document.id}")
             return domain_document
@@ -96,6 +155,7 @@ class SqlModelDocumentRepository(DocumentRepository):
                     db_doc.size_kb = document.size_kb
                     db_doc.chunks_count = document.chunks_count
                     db_doc.processed = document.processed
+                    db_doc.content_hash = document.content_hash
                     logger.debug(f"Preparando para atualizar DocumentoDB ID: {document.id}")
                 else:
                     logger.error(f"Tentativa de atualizar DocumentoDB ID {document.id} que não existe.")
@@ -111,12 +171,15 @@ class SqlModelDocumentRepository(DocumentRepository):
                     size_kb=document.size_kb,
                     chunks_count=document.chunks_count,
                     processed=document.processed,
+                    content_hash=document.content_hash,
                 )
                 self._session.add(db_doc)
                 logger.debug(f"Preparando para inserir novo DocumentoDB: {document.name}")
 
             await self._session.commit()
             await self._session.refresh(db_doc)
+            if not document.id:
+                _invalidate_count_cache()
             logger.info(f"Documento salvo com ID: {db_doc.id} (SizeKB: {db_doc.size_kb:.2f}, Chunks: {db_doc.chunks_count}, Processed: {db_doc.processed})")
 
             # Mapear de volta para o domínio para retornar o estado atualizado (já com o ID)
@@ -129,12 +192,12 @@ class SqlModelDocumentRepository(DocumentRepository):
             raise
 
     async def find_by_id(self, document_id: int) -> Optional[Document]:
-        """ Busca um documento pelo ID usando SQLModel. """
+        """ Busca um documento pelo ID usando SQLModel (documentos marcados como excluídos são ignorados). """
         # Código anterior com prints de debug removido para clareza
         try:
             # Usar .get() é mais direto para buscar por PK
             db_doc = await self._session.get(DocumentoDB, document_id)
-            if db_doc:
+            if db_doc and db_doc.deleted_at is None:
                 logger.debug(f"DocumentoDB ID {document_id} encontrado.")
                 return self._map_db_to_domain(db_doc)
             else:
@@ -144,10 +207,36 @@ class SqlModelDocumentRepository(DocumentRepository):
              logger.exception(f"Erro ao buscar documento por ID {document_id}: {e}")
              return None
 
+    async def find_by_content_hash(self, content_hash: str) -> Optional[Document]:
+        """ Busca o documento processado mais recente com o hash informado (usa o índice em content_hash). """
+        try:
+            statement = (
+                select(DocumentoDB)
+                .where(
+                    DocumentoDB.content_hash == content_hash,
+                    DocumentoDB.processed == True, # noqa: E712
+                    DocumentoDB.deleted_at.is_(None),
+                )
+                .order_by(DocumentoDB.id.desc())
+                .limit(1)
+            )
+            results = await self._session.execute(statement)
+            db_doc = results.scalars().first()
+            return self._map_db_to_domain(db_doc) if db_doc else None
+        except Exception as e:
+            logger.exception(f"Erro ao buscar documento por content_hash {content_hash}: {e}")
+            return None
+
     async def find_all(self, limit: int = 100, offset: int = 0) -> List[Document]:
          """ Lista documentos com paginação usando SQLModel. """
          try:
-             statement = select(DocumentoDB).offset(offset).limit(limit).order_by(DocumentoDB.data_upload.desc())
+             statement = (
+                 select(DocumentoDB)
+                 .where(DocumentoDB.deleted_at.is_(None))
+                 .offset(offset)
+                 .limit(limit)
+                 .order_by(DocumentoDB.data_upload.desc())
+             )
              results = await self._session.execute(statement)
              db_docs: List[DocumentoDB] = results.scalars().all()
              logger.debug(f"Busca find_all (limit={limit}, offset={offset}) retornou {len(db_docs)} objetos DocumentoDB.")
@@ -159,6 +248,149 @@ class SqlModelDocumentRepository(DocumentRepository):
             logger.exception(f"Erro ao buscar todos os documentos (limit={limit}, offset={offset}): {e}")
             return []
 
+    async def find_page(
+        self,
+        limit: int,
+        sort_by: str = "upload_date",
+        descending: bool = True,
+        name_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Document], Optional[str]]:
+        """
+        Página de documentos com filtro e ordenação no SQL. A ordenação é sempre
+        (chave, id), atendida pelos índices parciais de listagem; o cursor guarda
+        a chave e o id do último documento, de modo que páginas profundas não
+        varrem as anteriores como o OFFSET.
+        """
+        if sort_by not in _SORT_EXPRESSIONS:
+            raise ValueError(f"Campo de ordenação inválido: {sort_by}")
+        sort_expression = _SORT_EXPRESSIONS[sort_by]
+        after = _decode_cursor(cursor, sort_by, descending) if cursor else None
+
+        statement = select(DocumentoDB).where(DocumentoDB.deleted_at.is_(None))
+        if name_filter:
+            statement = statement.where(DocumentoDB.nome_arquivo.ilike(_name_pattern(name_filter), escape="\\"))
+        if after is not None:
+            keyset = tuple_(sort_expression, DocumentoDB.id)
+            statement = statement.where(keyset < tuple_(*after) if descending else keyset > tuple_(*after))
+        elif offset:
+            statement = statement.offset(offset)
+        if descending:
+            statement = statement.order_by(sort_expression.desc(), DocumentoDB.id.desc())
+        else:
+            statement = statement.order_by(sort_expression.asc(), DocumentoDB.id.asc())
+        # Um documento a mais indica se existe próxima página
+        statement = statement.limit(limit + 1)
+
+        try:
+            results = await self._session.execute(statement)
+            db_docs: List[DocumentoDB] = results.scalars().all()
+        except Exception as e:
+            logger.exception(f"Erro ao listar documentos (sort_by={sort_by}, filtro={name_filter!r}): {e}")
+            return [], None
+
+        has_next = len(db_docs) > limit
+        domain_docs = [domain_doc for db_doc in db_docs[:limit] if (domain_doc := self._map_db_to_domain(db_doc)) is not None]
+        next_cursor = _encode_cursor(sort_by, descending, domain_docs[-1]) if has_next and domain_docs else None
+        logger.debug(f"find_page (limit={limit}, sort_by={sort_by}, cursor={'sim' if cursor else 'não'}) retornou {len(domain_docs)} documentos.")
+        return domain_docs, next_cursor
+
+    async def count_estimate(self, name_filter: Optional[str] = None) -> Tuple[int, bool]:
+        """
+        Contagem exata até DOCUMENT_COUNT_EXACT_THRESHOLD documentos; acima disso,
+        reltuples (sem filtro) ou a estimativa de linhas do EXPLAIN (com filtro).
+        O resultado fica em cache por DOCUMENT_COUNT_CACHE_SECONDS.
+        """
+        settings = get_settings()
+        cache_key = (name_filter or "").lower()
+        cached = _COUNT_CACHE.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+
+        threshold = settings.DOCUMENT_COUNT_EXACT_THRESHOLD
+        try:
+            if name_filter:
+                # COUNT limitado: nunca lê mais que threshold + 1 linhas
+                matching = (
+                    select(DocumentoDB.id)
+                    .where(
+                        DocumentoDB.deleted_at.is_(None),
+                        DocumentoDB.nome_arquivo.ilike(_name_pattern(name_filter), escape="\\"),
+                    )
+                    .limit(threshold + 1)
+                    .subquery()
+                )
+                total = (await self._session.execute(select(func.count()).select_from(matching))).scalar_one()
+                estimated = total > threshold
+                if estimated:
+                    plan = await self._session.execute(
+                        text(
+                            "EXPLAIN (FORMAT JSON) SELECT 1 FROM documentos_originais "
+                            "WHERE deleted_at IS NULL AND nome_arquivo ILIKE :pattern ESCAPE '\\'"
+                        ),
+                        {"pattern": _name_pattern(name_filter)},
+                    )
+                    plan_json = plan.scalar_one()
+                    if isinstance(plan_json, str):
+                        plan_json = json.loads(plan_json)
+                    total = max(total, int(plan_json[0]["Plan"]["Plan Rows"]))
+            else:
+                reltuples = (await self._session.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'documentos_originais'::regclass")
+                )).scalar_one_or_none()
+                # reltuples = -1: tabela ainda não analisada
+                estimated = reltuples is not None and reltuples > threshold
+                if estimated:
+                    total = int(reltuples)
+                else:
+                    total = await self.count_all()
+        except Exception as e:
+            logger.exception(f"Erro ao estimar contagem de documentos (filtro={name_filter!r}): {e}")
+            return 0, True
+
+        if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX_ENTRIES:
+            _COUNT_CACHE.pop(next(iter(_COUNT_CACHE)))
+        _COUNT_CACHE[cache_key] = (time.monotonic() + settings.DOCUMENT_COUNT_CACHE_SECONDS, total, estimated)
+        logger.debug(f"Contagem de documentos (filtro={name_filter!r}): {total} ({'estimada' if estimated else 'exata'}).")
+        return total, estimated
+
+    async def mark_deleted(self, document_id: int) -> bool:
+        """ Marca o documento como excluído (UPDATE de uma linha; chunks ficam para o purgador). """
+        try:
+            statement = (
+                sqlalchemy_update(DocumentoDB)
+                .where(DocumentoDB.id == document_id, DocumentoDB.deleted_at.is_(None))
+                .values(deleted_at=func.now())
+            )
+            result = await self._session.execute(statement)
+            await self._session.commit()
+            if result.rowcount > 0:
+                _invalidate_count_cache()
+                logger.info(f"Documento ID {document_id} marcado como excluído.")
+                return True
+            logger.warning(f"Nenhum documento ativo com ID {document_id} para marcar como excluído.")
+            return False
+        except Exception as e:
+            logger.exception(f"Erro ao marcar documento ID {document_id} como excluído: {e}")
+            await self._session.rollback()
+            raise
+
+    async def find_deleted_ids(self, limit: int = 100) -> List[int]:
+        """ Lista IDs de documentos aguardando purga (usa o índice parcial em deleted_at). """
+        try:
+            statement = (
+                select(DocumentoDB.id)
+                .where(DocumentoDB.deleted_at.is_not(None))
+                .order_by(DocumentoDB.deleted_at)
+                .limit(limit)
+            )
+            results = await self._session.execute(statement)
+            return list(results.scalars().all())
+        except Exception as e:
+            logger.exception(f"Erro ao listar documentos marcados como excluídos: {e}")
+            return []
+
     async def delete(self, document_id: int) -> bool:
         """ Exclui um documento pelo ID usando SQLModel. """
         try:
@@ -181,7 +413,7 @@ class SqlModelDocumentRepository(DocumentRepository):
     async def count_all(self) -> int:
         """ Conta todos os documentos usando SQLModel. """
         try:
-            statement = select(func.count(DocumentoDB.id))
+            statement = select(func.count(DocumentoDB.id)).where(DocumentoDB.deleted_at.is_(None))
             results = await self._session.execute(statement)
             count = results.scalar_one_or_none()
             logger.debug(f"Contagem total de documentos retornou: {count}")
@@ -0,0 +1,274 @@
+import logging
+from typing import Optional, Any, Dict, List
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update, text, func
+
+# Importar interface do domínio e entidade do domínio
+from domain.repositories.ingestion_job_repository import IngestionJobRepository
+from domain.aggregates.ingestion.ingestion_job import IngestionJob, IngestionJobStatus
+
+# Importar modelo SQLModel do banco
+from infrastructure.persistence.sqlmodel.models import IngestionJobDB
+
+logger = logging.getLogger(__name__)
+
+# Reivindicação atômica do próximo job. FOR UPDATE SKIP LOCKED garante que
+# workers concorrentes (inclusive em réplicas diferentes) nunca peguem o mesmo job.
+# Jobs 'running' com heartbeat expirado são recuperados (worker morreu no meio),
+# desde que ainda tenham tentativas: um job que derruba o worker (OOM, segfault)
+# não pode ser reivindicado para sempre; esses vão para 'failed' via _FAIL_EXHAUSTED_SQL.
+_CLAIM_NEXT_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'running',
+        tentativas = tentativas + 1,
+        worker_id = :worker_id,
+        heartbeat_em = CURRENT_TIMESTAMP,
+        iniciado_em = COALESCE(iniciado_em, CURRENT_TIMESTAMP),
+        atualizado_em = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM ingestion_jobs
+        WHERE (status = 'queued' AND proxima_tentativa_em <= CURRENT_TIMESTAMP)
+           OR (status = 'running' AND heartbeat_em < CURRENT_TIMESTAMP - make_interval(secs => :lease_seconds)
+               AND tentativas < max_tentativas)
+        ORDER BY proxima_tentativa_em, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *
+""")
+
+# Jobs 'running' com lease expirado que já usaram todas as tentativas: falha definitiva.
+_FAIL_EXHAUSTED_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'failed',
+        ultimo_erro = :error,
+        finalizado_em = CURRENT_TIMESTAMP,
+        atualizado_em = CURRENT_TIMESTAMP
+    WHERE id IN (
+        SELECT id FROM ingestion_jobs
+        WHERE status = 'running'
+          AND tentativas >= max_tentativas
+          AND heartbeat_em < CURRENT_TIMESTAMP - make_interval(secs => :lease_seconds)
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *
+""")
+
+class SqlModelIngestionJobRepository(IngestionJobRepository):
+    """ Implementação do IngestionJobRepository usando SQLModel e AsyncSession. """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    # --- Funções Auxiliares de Mapeamento ---
+
+    def _map_row_to_domain(self, row: Any) -> Optional[IngestionJob]:
+        """ Mapeia um IngestionJobDB (ou Row do SQL cru com as mesmas colunas) para o domínio. """
+        if row is None:
+            return None
+
+        metadata_from_db = row.metadados
+        if isinstance(metadata_from_db, str):
+            try:
+                metadata_from_db = json.loads(metadata_from_db)
+            except json.JSONDecodeError:
+                logger.error(f"Falha ao decodificar JSON de metadados para job ID {row.id}")
+                metadata_from_db = {}
+        metadata_dict: Dict[str, Any] = metadata_from_db if isinstance(metadata_from_db, dict) else {}
+
+        return IngestionJob(
+            id=row.id,
+            status=row.status,
+            file_name=row.nome_arquivo,
+            file_type=row.tipo_arquivo or "",
+            file_path=row.caminho_arquivo,
+            size_kb=row.size_kb if row.size_kb is not None else 0.0,
+            metadata=metadata_dict,
+            document_id=row.documento_id,
+            stage=row.etapa,
+            progress=row.progresso if row.progresso is not None else 0.0,
+            attempts=row.tentativas if row.tentativas is not None else 0,
+            max_attempts=row.max_tentativas if row.max_tentativas is not None else 3,
+            last_error=row.ultimo_erro,
+            worker_id=row.worker_id,
+            created_at=row.criado_em,
+            updated_at=row.atualizado_em,
+            started_at=row.iniciado_em,
+            finished_at=row.finalizado_em,
+            next_attempt_at=row.proxima_tentativa_em,
+        )
+
+    async def _guarded_update(
+        self, job_id: int, worker_id: str, values: Dict[str, Any], action: str, reraise: bool = False
+    ) -> bool:
+        """
+        Executa um UPDATE condicionado ao worker que detém o job.
+        Se outro worker reivindicou o job (lease expirado), nada é alterado.
+        Com `reraise`, erros de banco são propagados (após o rollback) em vez de
+        retornar False, para não serem confundidos com perda do lease.
+        """
+        try:
+            statement = (
+                update(IngestionJobDB)
+                .where(IngestionJobDB.id == job_id)
+                .where(IngestionJobDB.worker_id == worker_id)
+                .where(IngestionJobDB.status == IngestionJobStatus.RUNNING)
+                .values(atualizado_em=func.now(), **values)
+            )
+            result = await self._session.execute(statement)
+            await self._session.commit()
+            if result.rowcount == 0:
+                logger.warning(f"Job ID {job_id}: '{action}' ignorado, worker '{worker_id}' não detém mais o job.")
+                return False
+            return True
+        except Exception as e:
+            logger.exception(f"Erro ao executar '{action}' no job ID {job_id}: {e}")
+            await self._session.rollback()
+            if reraise:
+                raise
+            return False
+
+    # --- Implementação dos Métodos do Repositório ---
+
+    async def create(self, job: IngestionJob) -> IngestionJob:
+        """ Insere um novo job na fila. """
+        try:
+            db_job = IngestionJobDB(
+                status=IngestionJobStatus.QUEUED,
+                nome_arquivo=job.file_name,
+                tipo_arquivo=job.file_type,
+                caminho_arquivo=job.file_path,
+                size_kb=job.size_kb,
+                metadados=job.metadata or {},
+                max_tentativas=job.max_attempts,
+            )
+            self._session.add(db_job)
+            await self._session.commit()
+            await self._session.refresh(db_job)
+            logger.info(f"Job de ingestão ID {db_job.id} enfileirado para '{db_job.nome_arquivo}'.")
+            return self._map_row_to_domain(db_job)
+        except Exception as e:
+            logger.exception(f"Erro ao enfileirar job de ingestão para '{job.file_name}': {e}")
+            await self._session.rollback()
+            raise
+
+    async def find_by_id(self, job_id: int) -> Optional[IngestionJob]:
+        """ Busca um job pelo ID. """
+        try:
+            db_job = await self._session.get(IngestionJobDB, job_id, populate_existing=True)
+            return self._map_row_to_domain(db_job)
+        except Exception as e:
+            logger.exception(f"Erro ao buscar job de ingestão ID {job_id}: {e}")
+            return None
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[IngestionJob]:
+        """ Reivindica o próximo job disponível (FOR UPDATE SKIP LOCKED). """
+        try:
+            result = await self._session.execute(
+                _CLAIM_NEXT_SQL,
+                {"worker_id": worker_id, "lease_seconds": float(lease_seconds)}
+            )
+            row = result.first()
+            await self._session.commit()
+            if row is None:
+                return None
+            job = self._map_row_to_domain(row)
+            logger.info(f"Worker '{worker_id}' reivindicou job ID {job.id} (tentativa {job.attempts}/{job.max_attempts}).")
+            return job
+        except Exception as e:
+            logger.exception(f"Erro ao reivindicar job de ingestão (worker '{worker_id}'): {e}")
+            await self._session.rollback()
+            return None
+
+    async def fail_expired_exhausted(self, lease_seconds: int, error: str) -> List[IngestionJob]:
+        """ Marca como 'failed' os jobs com lease expirado e sem tentativas restantes. """
+        try:
+            result = await self._session.execute(
+                _FAIL_EXHAUSTED_SQL,
+                {"lease_seconds": float(lease_seconds), "error": error}
+            )
+            rows = result.all()
+            await self._session.commit()
+            jobs = [self._map_row_to_domain(row) for row in rows]
+            for job in jobs:
+                logger.error(f"Job ID {job.id} marcado como falha definitiva: lease expirado na última tentativa ({job.attempts}/{job.max_attempts}).")
+            return jobs
+        except Exception as e:
+            logger.exception(f"Erro ao finalizar jobs de ingestão com tentativas esgotadas: {e}")
+            await self._session.rollback()
+            return []
+
+    async def update_progress(
+        self,
+        job_id: int,
+        worker_id: str,
+        stage: str,
+        progress: float,
+        document_id: Optional[int] = None,
+    ) -> bool:
+        """ Atualiza etapa/progresso e renova o heartbeat. """
+        values: Dict[str, Any] = {
+            "etapa": stage,
+            "progresso": max(0.0, min(1.0, progress)),
+            "heartbeat_em": func.now(),
+        }
+        if document_id is not None:
+            values["documento_id"] = document_id
+        return await self._guarded_update(job_id, worker_id, values, "update_progress", reraise=True)
+
+    async def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """ Renova o lease do job. """
+        return await self._guarded_update(job_id, worker_id, {"heartbeat_em": func.now()}, "heartbeat", reraise=True)
+
+    async def mark_succeeded(self, job_id: int, worker_id: str, document_id: Optional[int]) -> bool:
+        """ Marca o job como concluído. """
+        values: Dict[str, Any] = {
+            "status": IngestionJobStatus.SUCCEEDED,
+            "etapa": "completed",
+            "progresso": 1.0,
+            "ultimo_erro": None,
+            "finalizado_em": func.now(),
+        }
+        if document_id is not None:
+            values["documento_id"] = document_id
+        return await self._guarded_update(job_id, worker_id, values, "mark_succeeded")
+
+    async def mark_failed(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: Optional[float] = None,
+        document_id: Optional[int] = None,
+    ) -> bool:
+        """ Registra falha: reenfileira com atraso ou marca falha definitiva. """
+        values: Dict[str, Any] = {"ultimo_erro": error[:4000] if error else error}
+        if document_id is not None:
+            values["documento_id"] = document_id
+        if retry_delay_seconds is not None:
+            values.update({
+                "status": IngestionJobStatus.QUEUED,
+                "worker_id": None,
+                "heartbeat_em": None,
+                "proxima_tentativa_em": func.now() + func.make_interval(0, 0, 0, 0, 0, 0, retry_delay_seconds),
+            })
+        else:
+            values.update({
+                "status": IngestionJobStatus.FAILED,
+                "finalizado_em": func.now(),
+            })
+        return await self._guarded_update(job_id, worker_id, values, "mark_failed")
+
+    async def release(self, job_id: int, worker_id: str) -> bool:
+        """ Devolve o job para a fila sem consumir a tentativa atual. """
+        values: Dict[str, Any] = {
+            "status": IngestionJobStatus.QUEUED,
+            "worker_id": None,
+            "heartbeat_em": None,
+            "tentativas": IngestionJobDB.tentativas - 1,
+            "proxima_tentativa_em": func.now(),
+        }
+        return await self._guarded_update(job_id, worker_id, values, "release")
+
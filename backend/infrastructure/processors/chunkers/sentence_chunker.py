@@ -1,59 +1,301 @@
 import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 import nltk # Importar NLTK
 
 # Importar Interface da Aplicação
 from application.interfaces.chunker import Chunker
 # Importar Configurações
 from config.config import get_settings
+from ..process_pool import SpawnProcessPool
 
 logger = logging.getLogger(__name__)
 
 # --- Download de Dados NLTK (Necessário apenas uma vez) ---
-try:
-    nltk.data.find('tokenizers/punkt')
-    logger.debug("NLTK 'punkt' tokenizer já está disponível.")
-except LookupError:
-    logger.info("Baixando NLTK 'punkt' tokenizer...")
+# NLTK >= 3.9 usa 'punkt_tab'; versões anteriores usam 'punkt'
+for _punkt_resource in ("punkt", "punkt_tab"):
     try:
-        nltk.download('punkt', quiet=True)
-        logger.info("NLTK 'punkt' baixado com sucesso.")
-    except Exception as e:
-        logger.error(f"Falha ao baixar NLTK 'punkt'. O chunking por sentença pode falhar: {e}", exc_info=True)
-        # Considerar levantar um erro aqui se for crítico para a aplicação iniciar
+        nltk.data.find(f'tokenizers/{_punkt_resource}')
+        logger.debug(f"NLTK '{_punkt_resource}' tokenizer já está disponível.")
+    except LookupError:
+        logger.info(f"Baixando NLTK '{_punkt_resource}' tokenizer...")
+        try:
+            nltk.download(_punkt_resource, quiet=True)
+            logger.info(f"NLTK '{_punkt_resource}' baixado com sucesso.")
+        except Exception as e:
+            logger.error(f"Falha ao baixar NLTK '{_punkt_resource}'. O chunking por sentença pode falhar: {e}", exc_info=True)
+            # Considerar levantar um erro aqui se for crítico para a aplicação iniciar
 # ------------------------------------------------------------
 
+# Divisores de sentença:
+#   punkt -> nltk.sent_tokenize (modelo treinado para português)
+#   regex -> expressão pré-compilada com lista de abreviações (mais rápida)
+SENTENCE_SPLITTERS = ("punkt", "regex")
+# Unidade do tamanho de chunk:
+#   chars  -> caracteres (CHUNK_SIZE)
+#   tokens -> tokens do tokenizer do modelo de embeddings (CHUNK_SIZE_TOKENS)
+CHUNK_SIZE_UNITS = ("chars", "tokens")
+
+# Tokens especiais adicionados pelo modelo ao codificar um texto ([CLS]/<s> e [SEP]/</s>)
+_SPECIAL_TOKENS_RESERVED = 2
+
+# --- Divisor de sentenças por regex (pré-compilado) ---
+
+# Candidato a fim de sentença: pontuação final, fechamentos opcionais e espaço
+_SENTENCE_END_RE = re.compile(r"[.!?…]+[\"'”’»)\]]*\s+")
+# Palavra imediatamente antes da pontuação (para checar abreviações)
+_LAST_WORD_RE = re.compile(r"(\w+)\W*$")
+# Início válido de sentença: maiúscula, dígito ou abertura de citação/parêntese
+_SENTENCE_START_RE = re.compile(r"[A-ZÀ-ÖØ-Þ0-9\"“«(\[—–-]")
+# Abreviações comuns em textos jurídicos/administrativos em português (minúsculas, sem ponto)
+_ABBREVIATIONS = frozenset({
+    "sr", "sra", "srs", "sras", "srta", "dr", "dra", "drs", "dras", "prof", "profa", "profs",
+    "exmo", "exma", "ilmo", "ilma", "excia", "sto", "sta", "eng", "adv", "min", "des",
+    "art", "arts", "inc", "incs", "par", "al", "alín", "cap", "caps", "tít", "seç",
+    "n", "nº", "no", "nos", "núm", "p", "pp", "pág", "págs", "fl", "fls", "vol", "vols", "ed",
+    "ex", "obs", "cf", "op", "cit", "aprox", "tel", "av", "r", "pça", "ltda", "cia",
+    "jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez",
+})
+
+
+def split_sentences_regex(text: str) -> List[str]:
+    """
+    Divide o texto em sentenças com expressões pré-compiladas: quebra após
+    '.', '!', '?' ou '…' seguidos de espaço e de início de sentença, exceto
+    após abreviações conhecidas e iniciais (uma única letra).
+    """
+    sentences: List[str] = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        end = match.end()
+        if end >= len(text) or not _SENTENCE_START_RE.match(text, end):
+            continue
+        if text[match.start()] == ".":
+            # Só a janela final importa (abreviações são curtas); evita reescanear a sentença inteira
+            last_word = _LAST_WORD_RE.search(text, max(start, match.start() - 32), match.start())
+            if last_word is not None:
+                word = last_word.group(1).lower()
+                if word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                    continue
+        sentence = text[start:match.start() + len(match.group().rstrip())].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _split_sentences(text: str, splitter: str) -> List[str]:
+    if splitter == "regex":
+        return split_sentences_regex(text)
+    return nltk.sent_tokenize(text, language='portuguese') # Especificar idioma ajuda
+
+
+@functools.lru_cache(maxsize=2)
+def _get_tokenizer(model_name: str) -> Any:
+    """ Carrega (uma vez por processo) o tokenizer do modelo de embeddings. """
+    from transformers import AutoTokenizer # Dependência de sentence-transformers
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+# --- Funções de módulo (precisam ser "picklable" para o ProcessPoolExecutor) ---
+
+@dataclass(frozen=True)
+class _ChunkingConfig:
+    """ Parâmetros do chunking enviados aos processos do pool. """
+    chunk_size: int
+    overlap_sentences: int
+    sentence_joiner: str
+    splitter: str
+    unit: str
+    tokenizer_name: Optional[str] = None
+
+
+def _chunk_pages(pages: List[Tuple[int, str]], config: _ChunkingConfig, base_metadata: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """
+    Divide um lote de páginas em chunks em uma única chamada (thread ou
+    processo do pool). Retorna uma lista de chunks por página, na ordem.
+    """
+    tokenizer = _get_tokenizer(config.tokenizer_name) if config.unit == "tokens" else None
+    page_sentences: List[List[str]] = []
+    for page_number, page_text in pages:
+        if not page_text or not page_text.strip():
+            page_sentences.append([])
+            continue
+        try:
+            page_sentences.append(_split_sentences(page_text, config.splitter))
+        except Exception as tokenize_err:
+            logger.error(f"Erro ao tokenizar sentenças na página {page_number}: {tokenize_err}", exc_info=True)
+            # Fallback: tratar a página inteira como uma única "sentença"
+            page_sentences.append([page_text.strip()])
+
+    if tokenizer is not None:
+        # Tokenização de todas as sentenças do lote em uma única chamada (tokenizer "fast" em lote)
+        all_sentences = [sentence for sentences in page_sentences for sentence in sentences]
+        encoded = tokenizer(all_sentences, add_special_tokens=False, truncation=False)["input_ids"] if all_sentences else []
+        lengths_iter = iter([len(ids) for ids in encoded])
+        page_lengths = [[next(lengths_iter) for _ in sentences] for sentences in page_sentences]
+        joiner_len = 1 # Estimativa conservadora: o separador pode virar um token
+    else:
+        page_lengths = [[len(sentence) for sentence in sentences] for sentences in page_sentences]
+        joiner_len = len(config.sentence_joiner)
+
+    results: List[List[Dict[str, Any]]] = []
+    for (page_number, _), sentences, lengths in zip(pages, page_sentences, page_lengths):
+        if tokenizer is not None:
+            sentences, lengths = _split_long_sentences(sentences, lengths, config.chunk_size, tokenizer)
+        page_metadata = {**base_metadata, "page_number": page_number}
+        results.append(_group_sentences(page_number, sentences, lengths, joiner_len, config, page_metadata))
+    return results
+
+
+def _split_long_sentences(sentences: List[str], lengths: List[int], max_tokens: int, tokenizer: Any) -> Tuple[List[str], List[int]]:
+    """
+    Divide sentenças maiores que `max_tokens` em pedaços de até `max_tokens`
+    tokens (pelos offsets do tokenizer), para que nenhum chunk seja truncado
+    silenciosamente pelo modelo de embeddings.
+    """
+    if all(length <= max_tokens for length in lengths):
+        return sentences, lengths
+    out_sentences: List[str] = []
+    out_lengths: List[int] = []
+    for sentence, length in zip(sentences, lengths):
+        if length <= max_tokens:
+            out_sentences.append(sentence)
+            out_lengths.append(length)
+            continue
+        offsets = tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        for start in range(0, len(offsets), max_tokens):
+            window = offsets[start:start + max_tokens]
+            piece = sentence[window[0][0]:window[-1][1]].strip()
+            if piece:
+                out_sentences.append(piece)
+                out_lengths.append(len(window))
+    return out_sentences, out_lengths
+
+
+def _group_sentences(
+    page_number: int,
+    sentences: List[str],
+    lengths: List[int],
+    joiner_len: int,
+    config: _ChunkingConfig,
+    page_metadata: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """ Agrupa sentenças em chunks de até `chunk_size` (na unidade configurada), com overlap por sentenças. """
+    chunk_list: List[Dict[str, Any]] = []
+    current_chunk_sentences: List[str] = []
+    current_chunk_lengths: List[int] = []
+    current_chunk_len = 0
+
+    for sentence, sentence_len in zip(sentences, lengths):
+        # Calcular tamanho potencial se adicionar a sentença atual
+        potential_len = current_chunk_len + sentence_len + (joiner_len if current_chunk_sentences else 0)
+
+        # Se cabe ou é a primeira sentença do chunk
+        if potential_len <= config.chunk_size or not current_chunk_sentences:
+            current_chunk_sentences.append(sentence)
+            current_chunk_lengths.append(sentence_len)
+            current_chunk_len = potential_len
+            continue
+
+        # Finalizar o chunk atual
+        chunk_list.append({"text": config.sentence_joiner.join(current_chunk_sentences), "metadata": page_metadata.copy()})
+
+        # Começar novo chunk com overlap (últimas 'overlap_sentences' do chunk anterior) + sentença atual
+        overlap = config.overlap_sentences if config.overlap_sentences > 0 else 0
+        current_chunk_sentences = (current_chunk_sentences[-overlap:] if overlap else []) + [sentence]
+        current_chunk_lengths = (current_chunk_lengths[-overlap:] if overlap else []) + [sentence_len]
+        current_chunk_len = sum(current_chunk_lengths) + joiner_len * (len(current_chunk_lengths) - 1)
+        # Em tokens, o overlap não pode fazer o chunk exceder a janela do modelo: descarta sentenças do overlap
+        while config.unit == "tokens" and current_chunk_len > config.chunk_size and len(current_chunk_sentences) > 1:
+            current_chunk_len -= current_chunk_lengths.pop(0) + joiner_len
+            current_chunk_sentences.pop(0)
+
+    # Adicionar o último chunk se houver sentenças restantes
+    if current_chunk_sentences:
+        chunk_text = config.sentence_joiner.join(current_chunk_sentences)
+        # Sentença única muito longa (só ocorre em caracteres; em tokens ela já foi dividida)
+        if current_chunk_len > config.chunk_size:
+            logger.warning(f"Último chunk da página {page_number} excedeu chunk_size ({current_chunk_len} > {config.chunk_size}). Pode indicar sentença muito longa.")
+        chunk_list.append({"text": chunk_text, "metadata": page_metadata.copy()})
+    return chunk_list
+
+
+# --- Pool de processos para documentos grandes ---
+
+_chunking_pool = SpawnProcessPool("chunking", "CHUNK_PROCESS_POOL_WORKERS")
+
+
 class SentenceChunker(Chunker):
     """
     Implementação de Chunker que divide o texto em sentenças e as agrupa
     em chunks de tamanho definido, com sobreposição baseada em sentenças.
+
+    Lotes de páginas são divididos em uma única chamada fora do event loop;
+    lotes com pelo menos CHUNK_PROCESS_POOL_MIN_CHARS caracteres são
+    distribuídos entre os processos de um pool. Com CHUNK_SIZE_UNIT="tokens",
+    o tamanho é medido com o tokenizer do modelo de embeddings e limitado à
+    janela do modelo (CHUNK_MAX_TOKENS), evitando truncamento silencioso.
     """
 
     def __init__(
         self,
         chunk_size: Optional[int] = None,
         overlap_sentences: int = 1, # Define overlap por número de sentenças
+        splitter: Optional[str] = None,
+        unit: Optional[str] = None,
     ):
         """
         Inicializa o SentenceChunker.
 
         Args:
-            chunk_size: Tamanho máximo alvo para cada chunk (em caracteres).
-                        Se None, usa o valor de settings.CHUNK_SIZE.
+            chunk_size: Tamanho máximo alvo para cada chunk, na unidade `unit`.
+                        Se None, usa settings.CHUNK_SIZE (caracteres) ou
+                        settings.CHUNK_SIZE_TOKENS (tokens).
             overlap_sentences: Número de sentenças do final do chunk anterior
                                a serem repetidas no início do próximo chunk.
+            splitter: 'punkt' ou 'regex'. Se None, usa settings.SENTENCE_SPLITTER.
+            unit: 'chars' ou 'tokens'. Se None, usa settings.CHUNK_SIZE_UNIT.
         """
         self.settings = get_settings()
-        self.chunk_size = chunk_size or self.settings.CHUNK_SIZE
+        self.splitter = splitter or self.settings.SENTENCE_SPLITTER
+        if self.splitter not in SENTENCE_SPLITTERS:
+            logger.warning(f"Divisor de sentenças '{self.splitter}' inválido; usando 'punkt'.")
+            self.splitter = "punkt"
+        self.unit = unit or self.settings.CHUNK_SIZE_UNIT
+        if self.unit not in CHUNK_SIZE_UNITS:
+            logger.warning(f"Unidade de chunk '{self.unit}' inválida; usando 'chars'.")
+            self.unit = "chars"
+
+        if self.unit == "tokens":
+            # O modelo trunca acima da janela: o chunk (sem tokens especiais) precisa caber nela
+            max_tokens = self.settings.CHUNK_MAX_TOKENS - _SPECIAL_TOKENS_RESERVED
+            self.chunk_size = min(chunk_size or self.settings.CHUNK_SIZE_TOKENS, max_tokens)
+        else:
+            self.chunk_size = chunk_size or self.settings.CHUNK_SIZE
         # Garantir que o overlap seja pelo menos 0
         self.overlap_sentences = max(0, overlap_sentences)
         # Delimitador para juntar sentenças (parágrafo preserva mais contexto)
         self.sentence_joiner = "\n" # Ou " " se preferir mais compacto
+        self._config = _ChunkingConfig(
+            chunk_size=self.chunk_size,
+            overlap_sentences=self.overlap_sentences,
+            sentence_joiner=self.sentence_joiner,
+            splitter=self.splitter,
+            unit=self.unit,
+            tokenizer_name=self.settings.EMBEDDING_MODEL if self.unit == "tokens" else None,
+        )
 
         logger.info(
-            f"SentenceChunker inicializado com chunk_size={self.chunk_size}, "
-            f"overlap_sentences={self.overlap_sentences}"
+            f"SentenceChunker inicializado com chunk_size={self.chunk_size} ({self.unit}), "
+            f"overlap_sentences={self.overlap_sentences}, splitter={self.splitter}"
         )
 
     async def split_page_to_chunks(
@@ -66,70 +308,41 @@ class SentenceChunker(Chunker):
         if not page_text or not page_text.strip():
             logger.debug(f"Texto vazio ou apenas espaços em branco para página {page_number}. Nenhum chunk gerado.")
             return []
+        results = await self.split_pages_to_chunks([(page_number, page_text)], base_metadata)
+        return results[0]
 
-        try:
-            # Usar asyncio.to_thread para a tokenização que pode ser CPU-bound
-            def sync_tokenize():
-                try:
-                     return nltk.sent_tokenize(page_text, language='portuguese') # Especificar idioma ajuda
-                except Exception as tokenize_err:
-                     logger.error(f"Erro ao tokenizar sentenças na página {page_number}: {tokenize_err}", exc_info=True)
-                     # Fallback: tratar a página inteira como uma única "sentença"
-                     return [page_text.strip()]
-
-            sentences: List[str] = await asyncio.to_thread(sync_tokenize)
-
-        except Exception as e:
-             logger.error(f"Erro inesperado durante a tokenização NLTK na página {page_number}: {e}", exc_info=True)
-             return [] # Retornar vazio se a tokenização falhar
-
-        if not sentences:
-            logger.debug(f"Nenhuma sentença encontrada após tokenização na página {page_number}.")
+    async def split_pages_to_chunks(
+        self,
+        pages: List[Tuple[int, str]],
+        base_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """ Divide um lote de páginas em uma única chamada (thread) ou no pool de processos. """
+        if not pages:
             return []
+        base_metadata = base_metadata or {}
+        total_chars = sum(len(text) for _, text in pages)
+        min_chars = self.settings.CHUNK_PROCESS_POOL_MIN_CHARS
+        if min_chars > 0 and total_chars >= min_chars and len(pages) > 1 and _chunking_pool.configured_workers() > 1:
+            results = await self._split_in_process_pool(pages, base_metadata)
+        else:
+            results = await asyncio.to_thread(_chunk_pages, pages, self._config, base_metadata)
+        logger.debug(f"{len(pages)} páginas divididas em {sum(len(r) for r in results)} chunks usando SentenceChunker.")
+        return results
 
-        page_metadata = base_metadata or {}
-        page_metadata["page_number"] = page_number
-
-        chunk_list: List[Dict[str, Any]] = []
-        current_chunk_sentences: List[str] = []
-        current_chunk_len = 0
-        len_joiner = len(self.sentence_joiner)
-
-        for i, sentence in enumerate(sentences):
-            sentence_len = len(sentence)
-            # Calcular tamanho potencial se adicionar a sentença atual
-            potential_len = current_chunk_len + sentence_len + (len_joiner if current_chunk_sentences else 0)
-
-            # Se cabe ou é a primeira sentença do chunk
-            if potential_len <= self.chunk_size or not current_chunk_sentences:
-                current_chunk_sentences.append(sentence)
-                current_chunk_len = potential_len
-            else:
-                # Finalizar o chunk atual
-                chunk_text = self.sentence_joiner.join(current_chunk_sentences)
-                chunk_list.append({"text": chunk_text, "metadata": page_metadata.copy()}) # Usar cópia dos metadados
-
-                # Preparar o próximo chunk com overlap
-                # Pegar as últimas 'overlap_sentences' do chunk que acabamos de formar
-                overlap_part = current_chunk_sentences[-self.overlap_sentences:] if self.overlap_sentences > 0 else []
-
-                # Começar novo chunk com overlap + sentença atual
-                current_chunk_sentences = overlap_part + [sentence]
-                # Recalcular tamanho do novo chunk inicial
-                current_chunk_len = len(self.sentence_joiner.join(current_chunk_sentences))
-
-
-        # Adicionar o último chunk se houver sentenças restantes
-        if current_chunk_sentences:
-            chunk_text = self.sentence_joiner.join(current_chunk_sentences)
-            # Garantir que mesmo o último chunk não exceda (pode acontecer se uma única sentença for muito grande)
-            if len(chunk_text) > self.chunk_size:
-                 logger.warning(f"Último chunk da página {page_number} excedeu chunk_size ({len(chunk_text)} > {self.chunk_size}). Pode indicar sentença muito longa.")
-                 # Opção 1: Truncar (simples)
-                 # chunk_text = chunk_text[:self.chunk_size]
-                 # Opção 2: Dividir a última sentença (complexo, pode usar RecursiveCharacterTextSplitter como fallback aqui)
-                 # Por simplicidade, vamos permitir que exceda por enquanto, mas logamos.
-            chunk_list.append({"text": chunk_text, "metadata": page_metadata.copy()})
-
-        logger.info(f"Página {page_number} dividida em {len(chunk_list)} chunks usando SentenceChunker.")
-        return chunk_list
+    async def _split_in_process_pool(self, pages: List[Tuple[int, str]], base_metadata: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """ Distribui o lote em fatias contíguas de páginas, uma por processo, preservando a ordem. """
+        pool = _chunking_pool.get()
+        slice_size = -(-len(pages) // _chunking_pool.max_workers)
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(pool, _chunk_pages, pages[start:start + slice_size], self._config, base_metadata)
+            for start in range(0, len(pages), slice_size)
+        ]
+        try:
+            slices = await asyncio.gather(*futures)
+        except BrokenProcessPool as e:
+            # Processo morto (ex: OOM): descartar o pool e refazer o lote em thread
+            logger.error(f"Pool de processos de chunking quebrado: {e}")
+            _chunking_pool.shutdown()
+            return await asyncio.to_thread(_chunk_pages, pages, self._config, base_metadata)
+        return [page_chunks for page_slice in slices for page_chunks in page_slice]
@@ -68,26 +68,40 @@ class PDFExtractor:
         """
         try:
             doc = fitz.open(stream=file_content, filetype="pdf")
-
-            metadata = {
-                "page_count": len(doc),
-                "title": doc.metadata.get("title", ""),
-                "author": doc.metadata.get("author", ""),
-                "subject": doc.metadata.get("subject", ""),
-                "keywords": doc.metadata.get("keywords", ""),
-                "creator": doc.metadata.get("creator", ""),
-                "producer": doc.metadata.get("producer", ""),
-                "format": "PDF " + doc.metadata.get("format", ""),
-                "encryption": doc.metadata.get("encryption", None) is not None,
-                "has_toc": doc.get_toc() is not None and len(doc.get_toc()) > 0,
-            }
-
-            return metadata
+            try:
+                return PDFExtractor.metadata_from_document(doc)
+            finally:
+                doc.close()
 
         except Exception as e:
             logger.error(f"Erro na extração de metadados PDF: {str(e)}")
             return {"error": str(e)}
 
+    @staticmethod
+    def metadata_from_document(doc: "fitz.Document") -> Dict[str, Any]:
+        """
+        Extrai metadados de um documento PDF já aberto (evita reabrir o arquivo).
+
+        Args:
+            doc: Documento PyMuPDF aberto
+
+        Returns:
+            dict: Metadados extraídos
+        """
+        toc = doc.get_toc()
+        return {
+            "page_count": len(doc),
+            "title": doc.metadata.get("title", ""),
+            "author": doc.metadata.get("author", ""),
+            "subject": doc.metadata.get("subject", ""),
+            "keywords": doc.metadata.get("keywords", ""),
+            "creator": doc.metadata.get("creator", ""),
+            "producer": doc.metadata.get("producer", ""),
+            "format": "PDF " + doc.metadata.get("format", ""),
+            "encryption": doc.metadata.get("encryption", None) is not None,
+            "has_toc": toc is not None and len(toc) > 0,
+        }
+
     @staticmethod
     def extract_structure(file_content: bytes) -> List[Dict[str, Any]]:
         """
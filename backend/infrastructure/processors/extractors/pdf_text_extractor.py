@@ -1,8 +1,11 @@
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, AsyncIterator, Optional
 import logging
 import asyncio
 import io # Importar io
 import hashlib # <-- Importar hashlib
+import os
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
 
 # Importar PyMuPDF (fitz)
 try:
@@ -12,18 +15,70 @@ except ImportError:
     fitz = None
 
 # Importar a Interface da Aplicação
-from application.interfaces.text_extractor import TextExtractor
+from application.interfaces.text_extractor import TextExtractor, ExtractedDocument, DocumentSource
 # Importar a implementação concreta (agora dentro da infraestrutura)
 from .pdf_extractor import PDFExtractor # Assumindo que pdf_extractor.py está no mesmo dir
 from ..normalizers.text_normalizer import normalize_text
+from ..process_pool import SpawnProcessPool
+from config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Modos de extração de texto por página:
+#   sorted   -> get_text("text", sort=True): ordem de leitura (padrão histórico, mais lento)
+#   unsorted -> get_text("text"): ordem do content stream (mais rápido)
+#   blocks   -> get_text("blocks", sort=True): blocos de texto unidos por linha em branco
+EXTRACTION_MODES = ("sorted", "unsorted", "blocks")
+
+
+# --- Funções de módulo (precisam ser "picklable" para o ProcessPoolExecutor) ---
+
+def _extract_page_text(page: Any, mode: str) -> str:
+    """ Extrai o texto de uma página no modo solicitado. """
+    if mode == "unsorted":
+        return page.get_text("text")
+    if mode == "blocks":
+        # Bloco: (x0, y0, x1, y1, texto, block_no, block_type); block_type 0 = texto
+        blocks = page.get_text("blocks", sort=True)
+        return "\n\n".join(block[4].strip() for block in blocks if block[6] == 0 and block[4].strip())
+    return page.get_text("text", sort=True)
+
+def _extract_page_range(pdf_path: str, start: int, end: int, mode: str) -> List[Tuple[int, str]]:
+    """
+    Abre o PDF a partir do arquivo compartilhado e extrai as páginas [start, end).
+    Executada nos processos do pool; cada processo abre sua própria cópia do documento.
+    """
+    pdf_document = fitz.open(pdf_path)
+    try:
+        return [
+            (page_num, _extract_page_text(pdf_document.load_page(page_num), mode).strip())
+            for page_num in range(start, end)
+        ]
+    finally:
+        pdf_document.close()
+
+
+# --- Pool de processos compartilhado ---
+
+_extraction_pool = SpawnProcessPool("extração de PDF", "PDF_PROCESS_POOL_WORKERS")
+
+
 class PdfTextExtractor(TextExtractor):
     """
     Implementação de TextExtractor para arquivos PDF usando PyMuPDF (fitz).
+
+    PDFs com pelo menos PDF_PROCESS_POOL_MIN_PAGES páginas são divididos em
+    faixas de páginas extraídas em paralelo por um pool de processos
+    (PyMuPDF segura o GIL durante a extração, então threads não escalam).
     """
 
+    def __init__(self, mode: Optional[str] = None):
+        self._settings = get_settings()
+        self._mode = (mode or self._settings.PDF_EXTRACTION_MODE).lower()
+        if self._mode not in EXTRACTION_MODES:
+            logger.warning(f"Modo de extração de PDF '{self._mode}' inválido. Usando 'sorted'.")
+            self._mode = "sorted"
+
     async def extract_text(self, file_content: bytes, file_type: str) -> List[Dict[str, Any]]:
         """
         Extrai texto de um conteúdo de arquivo PDF, página por página.
@@ -31,45 +86,29 @@ class PdfTextExtractor(TextExtractor):
         Retorna uma lista de dicionários, um para cada página,
         contendo 'page_number' e 'text'.
         """
+        return [
+            {"page_number": page["page_number"], "text": page["text"]}
+            async for page in self.iter_pages(file_content, file_type)
+        ]
+
+    def open_document(self, source: DocumentSource, file_type: str) -> ExtractedDocument:
+        """
+        Abre o PDF uma única vez (a partir do caminho em disco ou dos bytes)
+        e compartilha o documento entre metadados e extração de páginas.
+        """
         if file_type.lower() != "pdf":
             raise NotImplementedError(f"Tipo de arquivo '{file_type}' não suportado por PdfTextExtractor.")
         if not fitz:
              raise RuntimeError("Biblioteca PyMuPDF (fitz) não está disponível.")
+        return _PdfDocument(source, self._mode, self._settings)
 
-        pages_data = []
-        try:
-            # Abrir o PDF a partir do conteúdo binário em memória
-            pdf_document = fitz.open(stream=io.BytesIO(file_content), filetype="pdf")
-
-            # Função síncrona para processar o documento
-            def sync_extract():
-                extracted_pages = []
-                logger.info(f"Processando PDF com {len(pdf_document)} páginas...")
-                for page_num_zero_based in range(len(pdf_document)):
-                    page = pdf_document.load_page(page_num_zero_based)
-                    page_text = page.get_text("text", sort=True) # Extrai texto simples, ordenado
-                    page_number_one_based = page_num_zero_based + 1
-                    extracted_pages.append({
-                        "page_number": page_number_one_based,
-                        "text": page_text.strip() # Remover espaços em branco extras
-                    })
-                    # Log a cada X páginas para não poluir muito
-                    if page_number_one_based % 20 == 0:
-                         logger.info(f"Extraído texto até a página {page_number_one_based}...")
-                logger.info("Extração de texto de todas as páginas concluída.")
-                return extracted_pages
-
-            # Executar a função síncrona em um thread separado
-            pages_data = await asyncio.to_thread(sync_extract)
-
-            pdf_document.close() # Fechar o documento
-
-        except Exception as e:
-            logger.error(f"Erro ao extrair texto do PDF: {e}", exc_info=True)
-            # Relançar ou retornar lista vazia? Relançar parece mais correto.
-            raise RuntimeError(f"Erro durante a extração de texto do PDF: {e}") from e
-
-        return pages_data
+    async def iter_pages(self, file_content: bytes, file_type: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extrai o PDF página a página, liberando cada página assim que extraída.
+        """
+        async with self.open_document(file_content, file_type) as pdf_document:
+            async for page in pdf_document.iter_pages():
+                yield page
 
     async def extract_document_metadata(self, file_content: bytes, file_type: str) -> Dict[str, Any]:
         """ Extrai metadados gerais de arquivos PDF. """
@@ -98,3 +137,134 @@ class PdfTextExtractor(TextExtractor):
     # Método 'extract' pode ser removido se não for mais usado diretamente
     # async def extract(self, file_content: bytes, file_type: str) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
     #     ...
+
+
+class _PdfDocument(ExtractedDocument):
+    """
+    PDF aberto uma única vez com PyMuPDF. Quando a fonte é um caminho, o
+    PyMuPDF lê o arquivo sob demanda (sem copiar o conteúdo para a memória)
+    e os processos do pool abrem o mesmo arquivo diretamente.
+
+    Documentos pequenos são extraídos em um thread (uma página por vez);
+    documentos grandes usam o pool de processos por faixas de páginas,
+    com os resultados entregues em ordem de página.
+    """
+
+    def __init__(self, source: DocumentSource, mode: str, settings: Any):
+        self._source = source
+        self._mode = mode
+        self._settings = settings
+        self._doc = None
+
+    async def open(self) -> None:
+        def sync_open():
+            if isinstance(self._source, bytes):
+                return fitz.open(stream=io.BytesIO(self._source), filetype="pdf")
+            return fitz.open(self._source, filetype="pdf")
+        try:
+            self._doc = await asyncio.to_thread(sync_open)
+        except Exception as e:
+            logger.error(f"Erro ao abrir PDF para extração: {e}", exc_info=True)
+            raise RuntimeError(f"Erro durante a extração de texto do PDF: {e}") from e
+
+    async def close(self) -> None:
+        if self._doc is not None and not self._doc.is_closed:
+            self._doc.close()
+        self._doc = None
+
+    async def extract_metadata(self) -> Dict[str, Any]:
+        """ Extrai metadados do documento já aberto. """
+        try:
+            extracted_metadata = await asyncio.to_thread(PDFExtractor.metadata_from_document, self._doc)
+            logger.info(f"Metadados extraídos do PDF.")
+            return extracted_metadata if extracted_metadata else {}
+        except Exception as e:
+            logger.exception(f"Erro ao extrair metadados do PDF: {e}")
+            return {"metadata_extraction_error": str(e)}
+
+    async def iter_pages(self) -> AsyncIterator[Dict[str, Any]]:
+        total_pages = len(self._doc)
+        min_pages = self._settings.PDF_PROCESS_POOL_MIN_PAGES
+        # Com um único processo o pool só adiciona overhead (spawn, reabertura do PDF por faixa)
+        use_process_pool = min_pages > 0 and total_pages >= min_pages and _extraction_pool.configured_workers() > 1
+        logger.info(f"Processando PDF com {total_pages} páginas (modo '{self._mode}', {'pool de processos' if use_process_pool else 'thread'})...")
+
+        if use_process_pool:
+            async for page in self._iter_pages_process_pool(total_pages):
+                yield page
+        else:
+            for page_num_zero_based in range(total_pages):
+                try:
+                    page_text = await asyncio.to_thread(
+                        lambda n=page_num_zero_based: _extract_page_text(self._doc.load_page(n), self._mode)
+                    )
+                except Exception as e:
+                    logger.error(f"Erro ao extrair texto da página {page_num_zero_based + 1}: {e}", exc_info=True)
+                    raise RuntimeError(f"Erro durante a extração de texto do PDF: {e}") from e
+                yield {
+                    "page_number": page_num_zero_based + 1,
+                    "text": page_text.strip(),
+                    "total_pages": total_pages,
+                }
+        logger.info("Extração de texto de todas as páginas concluída.")
+
+    async def _iter_pages_process_pool(self, total_pages: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Divide o documento em faixas de PDF_PAGES_PER_TASK páginas e extrai
+        cada faixa em um processo do pool. Cada processo abre o arquivo em
+        disco (o próprio arquivo de origem, ou um temporário quando a fonte
+        são bytes). O número de faixas em andamento é limitado para manter
+        a memória constante quando o consumidor (pipeline) é mais lento.
+        """
+        pages_per_task = max(1, self._settings.PDF_PAGES_PER_TASK)
+        ranges = [(start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task)]
+        pool = _extraction_pool.get()
+        max_in_flight = max(1, 2 * _extraction_pool.max_workers)
+        loop = asyncio.get_running_loop()
+
+        owns_tmp_file = isinstance(self._source, bytes)
+        pdf_path = await asyncio.to_thread(_write_temp_pdf, self._source) if owns_tmp_file else self._source
+        in_flight: List[asyncio.Future] = []
+        next_range = 0
+        try:
+            while next_range < len(ranges) or in_flight:
+                while next_range < len(ranges) and len(in_flight) < max_in_flight:
+                    start, end = ranges[next_range]
+                    in_flight.append(loop.run_in_executor(pool, _extract_page_range, pdf_path, start, end, self._mode))
+                    next_range += 1
+                # Consumir sempre a faixa mais antiga: garante ordem de página
+                try:
+                    range_pages = await in_flight.pop(0)
+                except BrokenProcessPool as e:
+                    # Processo morto (ex: OOM): descartar o pool para que o próximo documento crie outro
+                    logger.error(f"Pool de processos de extração quebrado: {e}")
+                    _extraction_pool.shutdown()
+                    raise RuntimeError(f"Erro durante a extração de texto do PDF: {e}") from e
+                except Exception as e:
+                    logger.error(f"Erro ao extrair faixa de páginas no pool de processos: {e}", exc_info=True)
+                    raise RuntimeError(f"Erro durante a extração de texto do PDF: {e}") from e
+                for page_num_zero_based, page_text in range_pages:
+                    yield {
+                        "page_number": page_num_zero_based + 1,
+                        "text": page_text,
+                        "total_pages": total_pages,
+                    }
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if owns_tmp_file:
+                await asyncio.to_thread(_remove_temp_pdf, pdf_path)
+
+
+# --- Funções Auxiliares ---
+
+def _write_temp_pdf(file_content: bytes) -> str:
+    with tempfile.NamedTemporaryFile(prefix="cta_pdf_", suffix=".pdf", delete=False) as tmp:
+        tmp.write(file_content)
+        return tmp.name
+
+def _remove_temp_pdf(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Não foi possível remover arquivo temporário {path}: {e}")
@@ -3,12 +3,67 @@ Normalização e limpeza de texto para processamento.
 """
 
 import re
+import string
 import logging
 import unicodedata
+from functools import lru_cache
 from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# --- Padrões e tabelas pré-compilados ---
+# Cada função aplica as mesmas transformações, na mesma ordem, da versão
+# original com re.sub em sequência (paridade verificada por
+# scripts/bench_text_normalizer.py); passos são pulados quando o texto não
+# contém o caractere que os dispara, e textos ASCII usam str.translate.
+
+_CONTROL_CHARS = [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F]
+_CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]")
+_CONTROL_CHARS_TABLE = {code: None for code in _CONTROL_CHARS}
+# Só sequências que mudam (tabs ou 2+ espaços): espaços simples não geram substituições
+_HORIZONTAL_SPACE_RE = re.compile(r"\t[ \t]*| [ \t]+")
+_CARRIAGE_RETURN_RE = re.compile(r"\r\n?")
+_MULTIPLE_NEWLINES_RE = re.compile(r"\n{3,}")
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]+")
+_ASCII_UPPERCASE_BYTES = string.ascii_uppercase.encode("ascii")
+
+# URLs e emails ficam em passos separados: a remoção de URLs pode desfazer um
+# "email" (ex: "a@http://x" -> "a@ "), então fundi-los alteraria o resultado
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_EMAIL_RE = re.compile(r"\S+@\S+")
+_ISOLATED_NUMBER_RE = re.compile(r"\b\d+\b")
+_REPEATED_PUNCTUATION_RE = re.compile(r"([.!?]){2,}")
+
+_QUERY_SPECIAL_CHARS_RE = re.compile(r"[^\w\s.!?]+", flags=re.UNICODE)
+# Equivalente ASCII de [^\w\s.!?]: caracteres trocados por espaço (espaços são colapsados depois)
+_QUERY_SPECIAL_CHARS_TABLE = {
+    code: " "
+    for code in range(128)
+    if not (chr(code).isalnum() or chr(code) == "_" or chr(code).isspace() or chr(code) in ".!?")
+}
+
+# Textos normalizados repetidos (overlap entre chunks, reingestão, consultas frequentes)
+_EMBEDDING_CLEAN_CACHE_SIZE = 4096
+_QUERY_CLEAN_CACHE_SIZE = 1024
+
+
+def _is_mostly_uppercase(text: str, threshold: float = 0.3) -> bool:
+    """
+    Equivale a `sum(c.isupper() for c in text) / len(text) > threshold`:
+    maiúsculas ASCII são contadas com bytes.translate e só os caracteres não
+    ASCII são verificados um a um (e apenas se puderem mudar o resultado).
+    """
+    ascii_bytes = text.encode("ascii", "ignore")
+    uppercase = len(ascii_bytes) - len(ascii_bytes.translate(None, _ASCII_UPPERCASE_BYTES))
+    length = max(len(text), 1)
+    non_ascii_count = len(text) - len(ascii_bytes)
+    if (uppercase + non_ascii_count) / length <= threshold:
+        return False
+    if non_ascii_count:
+        uppercase += sum(map(str.isupper, "".join(_NON_ASCII_RE.findall(text))))
+    return uppercase / length > threshold
+
 
 def normalize_text(text: str) -> str:
     """
@@ -23,23 +78,25 @@ def normalize_text(text: str) -> str:
     if not text:
         return ""
 
+    is_ascii = text.isascii()
+
     # Remover caracteres nulos e de controle
-    text = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", text)
+    text = text.translate(_CONTROL_CHARS_TABLE) if is_ascii else _CONTROL_CHARS_RE.sub("", text)
 
     # Normalizar espaços em branco (sem colapsar quebras de linha)
-    text = re.sub(r"[ \t]+", " ", text)
+    text = _HORIZONTAL_SPACE_RE.sub(" ", text)
 
     # Normalizar quebras de linha
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "\r" in text:
+        text = _CARRIAGE_RETURN_RE.sub("\n", text)
 
     # Normalizar múltiplas quebras de linha
-    while "\n\n\n" in text:
-        text = text.replace("\n\n\n", "\n\n")
+    if "\n\n\n" in text:
+        text = _MULTIPLE_NEWLINES_RE.sub("\n\n", text)
 
     # Normalizar capitalização se necessário
-    uppercase_ratio = sum(1 for c in text if c.isupper()) / max(len(text), 1)
-    if uppercase_ratio > 0.3:
-        sentences = re.split(r"(?<=[.!?])\s+", text)
+    if _is_mostly_uppercase(text):
+        sentences = _SENTENCE_BOUNDARY_RE.split(text)
         sentences = [s.capitalize() for s in sentences if s]
         text = " ".join(sentences)
 
@@ -52,6 +109,7 @@ def normalize_text(text: str) -> str:
 def clean_text_for_embedding(text: str) -> str:
     """
     Limpa o texto para fins de embedding, mantendo apenas o conteúdo relevante.
+    Resultados são memorizados (LRU) para textos repetidos.
 
     Args:
         text: Texto a ser limpo
@@ -61,37 +119,38 @@ def clean_text_for_embedding(text: str) -> str:
     """
     if not text:
         return ""
+    return _clean_text_for_embedding(text)
 
-    # Converter para minúsculas
-    text = text.lower()
 
-    # Normalizar unicode
-    text = unicodedata.normalize("NFKC", text)
+@lru_cache(maxsize=_EMBEDDING_CLEAN_CACHE_SIZE)
+def _clean_text_for_embedding(text: str) -> str:
+    # Converter para minúsculas e normalizar unicode (texto ASCII já está em NFKC)
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
 
     # Remover URLs
-    text = re.sub(r"https?://\S+|www\.\S+", " ", text)
+    if "http" in text or "www." in text:
+        text = _URL_RE.sub(" ", text)
 
     # Remover emails
-    text = re.sub(r"\S+@\S+", " ", text)
+    if "@" in text:
+        text = _EMAIL_RE.sub(" ", text)
 
     # Remover números isolados (mas não números que fazem parte de palavras)
-    text = re.sub(r"\b\d+\b", " ", text)
+    text = _ISOLATED_NUMBER_RE.sub(" ", text)
 
     # Remover pontuação repetida
-    text = re.sub(r"([.!?]){2,}", r"\1", text)
+    text = _REPEATED_PUNCTUATION_RE.sub(r"\1", text)
 
-    # Normalizar espaços
-    text = re.sub(r"\s+", " ", text)
-
-    # Remover espaços no início e fim
-    text = text.strip()
-
-    return text
+    # Normalizar espaços e remover espaços no início e fim (split() usa os mesmos espaços de \s)
+    return " ".join(text.split())
 
 
 def clean_query(query: str) -> str:
     """
     Limpa e normaliza a consulta do usuário para busca.
+    Resultados são memorizados (LRU) para consultas repetidas.
 
     Args:
         query: Consulta original do usuário
@@ -101,20 +160,20 @@ def clean_query(query: str) -> str:
     """
     if not query:
         return ""
+    return _clean_query(query)
 
-    # Normalizar unicode
-    query = unicodedata.normalize("NFKC", query)
-
-    # Remover caracteres especiais, mantendo palavras, números e pontuação básica
-    query = re.sub(r"[^\w\s.!?]+", " ", query, flags=re.UNICODE)
-
-    # Normalizar espaços
-    query = re.sub(r"\s+", " ", query)
 
-    # Remover espaços no início e fim
-    query = query.strip()
+@lru_cache(maxsize=_QUERY_CLEAN_CACHE_SIZE)
+def _clean_query(query: str) -> str:
+    # Normalizar unicode e remover caracteres especiais, mantendo palavras, números e pontuação básica
+    if query.isascii():
+        query = query.translate(_QUERY_SPECIAL_CHARS_TABLE)
+    else:
+        query = unicodedata.normalize("NFKC", query)
+        query = _QUERY_SPECIAL_CHARS_RE.sub(" ", query)
 
-    return query
+    # Normalizar espaços e remover espaços no início e fim
+    return " ".join(query.split())
 
 
 def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
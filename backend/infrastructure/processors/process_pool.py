@@ -0,0 +1,72 @@
+"""
+Pools de processos compartilhados pelos processadores de documentos
+(extração de PDF, chunking): criados sob demanda e reutilizados.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Todos os pools criados no processo, para o encerramento no desligamento da aplicação
+_POOLS: List["SpawnProcessPool"] = []
+
+
+class SpawnProcessPool:
+    """
+    ProcessPoolExecutor criado na primeira utilização e reutilizado.
+
+    Usa 'spawn' para não herdar threads/estado do processo da API (fork +
+    threads é inseguro). O número de processos vem da configuração
+    `workers_setting` (0 = CPUs disponíveis para este processo).
+    """
+
+    def __init__(self, name: str, workers_setting: str):
+        self.name = name
+        self._workers_setting = workers_setting
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.max_workers: int = 0 # Processos do pool atual
+        self._lock = threading.Lock()
+        _POOLS.append(self)
+
+    def configured_workers(self) -> int:
+        """ Número de processos do pool: configurado ou CPUs disponíveis para este processo. """
+        configured = getattr(get_settings(), self._workers_setting)
+        if configured > 0:
+            return configured
+        try:
+            return len(os.sched_getaffinity(0))
+        except AttributeError: # Plataformas sem sched_getaffinity
+            return os.cpu_count() or 1
+
+    def get(self) -> ProcessPoolExecutor:
+        """ Retorna o pool (criado sob demanda). """
+        with self._lock:
+            if self._executor is None:
+                max_workers = self.configured_workers()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self.max_workers = max_workers
+                logger.info(f"Pool de processos para {self.name} criado com {max_workers} workers.")
+            return self._executor
+
+    def shutdown(self) -> None:
+        """ Encerra o pool, se existir; o próximo uso cria outro (ex: após BrokenProcessPool). """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def shutdown_process_pools() -> None:
+    """ Encerra todos os pools de processos criados. """
+    for pool in _POOLS:
+        pool.shutdown()
@@ -6,21 +6,91 @@ Este módulo configura o rastreamento distribuído usando OpenTelemetry,
 permitindo acompanhar o fluxo de requisições através dos componentes do sistema.
 """
 import logging
-import os
 from typing import Optional
 
 # OpenTelemetry Imports
 from opentelemetry import trace, metrics
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.sampling import ParentBased, ALWAYS_ON
+from opentelemetry.sdk.trace import SpanLimits, TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, ALWAYS_ON, ALWAYS_OFF, Sampler, TraceIdRatioBased
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter as GRPCSpanExporter
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
 from opentelemetry.sdk.resources import SERVICE_NAME as ResourceAttributesServiceName, Resource
 
+from config.config import get_settings, Settings
+from infrastructure.telemetry.tail_sampling import TailSamplingSpanProcessor
+
 logger = logging.getLogger(__name__)
 
 _tracer_provider: Optional[TracerProvider] = None
 
+def _build_sampler(settings: Settings, exporter_name: str) -> Sampler:
+    """ Sampler de cabeça: o tail sampling precisa gravar todos os spans para decidir no fim. """
+    if exporter_name == "none":
+        return ParentBased(ALWAYS_OFF) # Spans não gravados: custo mínimo, contexto ainda propagado
+    if settings.OTEL_TAIL_SAMPLING_ENABLED:
+        return ParentBased(ALWAYS_ON)
+    return ParentBased(TraceIdRatioBased(settings.OTEL_TRACES_SAMPLER_RATIO))
+
+def build_tracer_provider(
+    service_name: str,
+    settings: Optional[Settings] = None,
+    exporter: Optional[SpanExporter] = None,
+    otlp_endpoint: Optional[str] = None,
+) -> TracerProvider:
+    """
+    Monta o TracerProvider conforme as configurações OTEL_* (sampler, limites
+    de atributos, exportador e tail sampling), sem registrá-lo globalmente.
+
+    Args:
+        exporter: Exportador a usar no lugar do definido por OTEL_TRACES_EXPORTER (ex: benchmarks).
+    """
+    settings = settings or get_settings()
+    exporter_name = "custom" if exporter is not None else settings.OTEL_TRACES_EXPORTER.lower()
+    if exporter is None and exporter_name == "otlp":
+        actual_otlp_endpoint = otlp_endpoint or settings.OTEL_EXPORTER_OTLP_ENDPOINT
+        if actual_otlp_endpoint:
+            logger.info(f"Configurando OTLP gRPC Span Exporter para: {actual_otlp_endpoint}")
+            # Usar insecure=True se o endpoint não for HTTPS ou não tiver certificado válido
+            # A opção padrão é verificar certificados
+            exporter = GRPCSpanExporter(
+                endpoint=actual_otlp_endpoint,
+                # insecure=True # Descomente se necessário (ex: localhost sem TLS)
+            )
+        else:
+            # Sem endpoint não há para onde exportar; não imprimir spans no stdout da API
+            logger.warning("Endpoint OTLP não configurado. Tracing sem exportação (OTEL_TRACES_EXPORTER=none).")
+            exporter_name = "none"
+    elif exporter is None and exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter is None and exporter_name != "none":
+        logger.warning(f"OTEL_TRACES_EXPORTER desconhecido: '{exporter_name}'. Tracing sem exportação.")
+        exporter_name = "none"
+
+    if settings.OTEL_SPAN_ATTRIBUTE_MAX_LENGTH:
+        # O SDK registra um warning a cada valor truncado (ex: query.text em todo chat); o truncamento é esperado
+        logging.getLogger("opentelemetry.attributes").setLevel(logging.ERROR)
+    span_limits = SpanLimits(
+        max_span_attributes=settings.OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT,
+        max_span_attribute_length=settings.OTEL_SPAN_ATTRIBUTE_MAX_LENGTH or None,
+    )
+    provider = TracerProvider(
+        resource=Resource(attributes={ResourceAttributesServiceName: service_name}),
+        sampler=_build_sampler(settings, exporter_name),
+        span_limits=span_limits,
+    )
+    if exporter_name == "none":
+        return provider
+
+    span_processor = BatchSpanProcessor(exporter)
+    if settings.OTEL_TAIL_SAMPLING_ENABLED:
+        span_processor = TailSamplingSpanProcessor(
+            span_processor,
+            ratio=settings.OTEL_TRACES_SAMPLER_RATIO,
+            slow_threshold_seconds=settings.OTEL_TAIL_SLOW_THRESHOLD_SECONDS,
+        )
+    provider.add_span_processor(span_processor)
+    return provider
+
 def initialize_telemetry(service_name: str, otlp_endpoint: Optional[str] = None):
     """
     Configura e inicializa o OpenTelemetry para Tracing (e opcionalmente Metrics).
@@ -28,8 +98,8 @@ def initialize_telemetry(service_name: str, otlp_endpoint: Optional[str] = None)
     Args:
         service_name: Nome do serviço a ser reportado (ex: 'rag-api', 'rag-script').
         otlp_endpoint: Endpoint do coletor OTLP (ex: 'http://tempo:4317').
-                       Se None, tentará obter da variável de ambiente OTEL_EXPORTER_OTLP_ENDPOINT
-                       ou usará ConsoleSpanExporter como fallback.
+                       Se None, usa OTEL_EXPORTER_OTLP_ENDPOINT; sem endpoint, os
+                       spans não são exportados (OTEL_TRACES_EXPORTER=console imprime no stdout).
     """
     global _tracer_provider
     if _tracer_provider:
@@ -37,32 +107,15 @@ def initialize_telemetry(service_name: str, otlp_endpoint: Optional[str] = None)
         return
 
     try:
-        resource = Resource(attributes={
-            ResourceAttributesServiceName: service_name
-        })
-
         # --- Configuração do Tracer ---
-        _tracer_provider = TracerProvider(resource=resource)
+        settings = get_settings()
+        _tracer_provider = build_tracer_provider(service_name, settings, otlp_endpoint=otlp_endpoint)
         trace.set_tracer_provider(_tracer_provider)
-
-        actual_otlp_endpoint = otlp_endpoint or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
-
-        if actual_otlp_endpoint:
-            logger.info(f"Configurando OTLP gRPC Span Exporter para: {actual_otlp_endpoint}")
-            # Usar insecure=True se o endpoint não for HTTPS ou não tiver certificado válido
-            # A opção padrão é verificar certificados
-            exporter = GRPCSpanExporter(
-                endpoint=actual_otlp_endpoint,
-                # insecure=True # Descomente se necessário (ex: localhost sem TLS)
-            )
-            span_processor = BatchSpanProcessor(exporter)
-        else:
-            logger.warning("Endpoint OTLP não configurado. Usando ConsoleSpanExporter.")
-            exporter = ConsoleSpanExporter() # Fallback para console se não houver endpoint
-            span_processor = BatchSpanProcessor(exporter)
-
-        _tracer_provider.add_span_processor(span_processor)
-        logger.info(f"OpenTelemetry Tracing inicializado para serviço: '{service_name}'")
+        logger.info(
+            f"OpenTelemetry Tracing inicializado para serviço: '{service_name}' "
+            f"(exporter={settings.OTEL_TRACES_EXPORTER}, ratio={settings.OTEL_TRACES_SAMPLER_RATIO:g}, "
+            f"tail={settings.OTEL_TAIL_SAMPLING_ENABLED})"
+        )
 
     except Exception as e:
         logger.error(f"Falha ao inicializar OpenTelemetry: {e}", exc_info=True)
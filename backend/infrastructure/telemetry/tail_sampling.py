@@ -0,0 +1,81 @@
+"""
+Amostragem "tail" local: os spans de cada trace ficam em memória até o span
+raiz local terminar; só então decide-se exportar o trace inteiro (lento, com
+erro ou dentro da fração amostrada) ou descartá-lo.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.sdk.trace.sampling import TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+logger = logging.getLogger(__name__)
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Envolve outro SpanProcessor (ex: BatchSpanProcessor) e só repassa os spans
+    de traces mantidos. Requer que todos os spans sejam gravados (sampler
+    ParentBased(ALWAYS_ON)); a fração `ratio` é aplicada aqui, por trace_id,
+    com o mesmo critério do TraceIdRatioBased.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        ratio: float,
+        slow_threshold_seconds: float,
+        max_buffered_traces: int = 2048,
+    ):
+        self._delegate = delegate
+        self._bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self._slow_threshold_ns = int(slow_threshold_seconds * 1e9)
+        self._max_buffered_traces = max_buffered_traces
+        self._buffers: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._errors: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            buffered = self._buffers.pop(trace_id, [])
+            buffered.append(span)
+            has_error = self._errors.pop(trace_id, False) or span.status.status_code == StatusCode.ERROR
+            if not is_local_root:
+                self._buffers[trace_id] = buffered # Reinsere no fim (mais recente)
+                self._errors[trace_id] = has_error
+                if len(self._buffers) > self._max_buffered_traces:
+                    evicted, _ = self._buffers.popitem(last=False)
+                    self._errors.pop(evicted, None)
+                    logger.debug(f"Trace {evicted:032x} descartado do buffer de tail sampling (limite atingido).")
+                return
+
+        if self._keep(trace_id, span, has_error):
+            for buffered_span in buffered:
+                self._delegate.on_end(buffered_span)
+
+    def _keep(self, trace_id: int, root: ReadableSpan, has_error: bool) -> bool:
+        if has_error:
+            return True
+        if root.end_time is not None and root.start_time is not None:
+            if root.end_time - root.start_time >= self._slow_threshold_ns:
+                return True
+        return trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self._bound
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+            self._errors.clear()
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
@@ -0,0 +1,148 @@
+"""
+Purgador de documentos excluídos.
+
+`DeleteDocumentUseCase` apenas marca o documento (deleted_at); as buscas
+já o ignoram. Este worker remove os chunks desses documentos em lotes
+limitados (transações curtas, com pausa entre lotes), exclui o registro
+do documento e, quando a proporção de tuplas mortas em chunks_vetorizados
+ultrapassa os limites configurados, dispara VACUUM e REINDEX CONCURRENTLY
+dos índices HNSW/FTS.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from config.config import get_settings, Settings
+from infrastructure.persistence.sqlmodel.repositories.sm_document_repository import SqlModelDocumentRepository
+from infrastructure.persistence.sqlmodel.repositories.sm_chunk_repository import SqlModelChunkRepository
+from infrastructure.persistence.sqlmodel.index_maintenance import get_chunk_table_stats, vacuum_chunks_table
+from infrastructure.metrics.prometheus.metrics_prometheus import (
+    set_purge_pending,
+    record_purge_batch,
+    record_purged_document,
+    set_chunks_dead_tuples,
+    record_index_maintenance,
+)
+
+logger = logging.getLogger(__name__)
+
+# Documentos buscados por ciclo (o restante fica para o próximo ciclo)
+_DOCUMENTS_PER_CYCLE = 100
+
+
+class DocumentPurger:
+    """ Loop de purga de documentos marcados como excluídos (mesmo ciclo de vida do IngestionWorker). """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        session_factory: async_sessionmaker,
+        settings: Optional[Settings] = None,
+    ):
+        self._engine = engine
+        self._session_factory = session_factory
+        self._settings = settings or get_settings()
+        self._stop_event = asyncio.Event()
+
+    # --- Ciclo de Vida ---
+
+    def stop(self) -> None:
+        """ Sinaliza para o loop parar após o lote atual. """
+        self._stop_event.set()
+
+    async def run(self) -> None:
+        """ Executa ciclos de purga até `stop()`, aguardando PURGE_INTERVAL_SECONDS entre eles. """
+        logger.info("Purgador de documentos excluídos iniciado.")
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    logger.exception(f"Erro no ciclo do purgador de documentos: {e}")
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=self._settings.PURGE_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            logger.info("Purgador de documentos excluídos encerrado.")
+
+    async def run_once(self) -> int:
+        """
+        Purga os documentos marcados como excluídos e verifica a necessidade
+        de manutenção da tabela de chunks.
+
+        Returns:
+            int: Número de documentos completamente purgados neste ciclo.
+        """
+        async with self._session_factory() as session:
+            document_ids = await SqlModelDocumentRepository(session=session).find_deleted_ids(limit=_DOCUMENTS_PER_CYCLE)
+        set_purge_pending(len(document_ids))
+        if not document_ids:
+            return 0
+
+        purged_documents = 0
+        for position, document_id in enumerate(document_ids):
+            if self._stop_event.is_set():
+                break
+            if await self._purge_document(document_id):
+                purged_documents += 1
+            set_purge_pending(len(document_ids) - position - 1)
+
+        await self._maybe_compact()
+        return purged_documents
+
+    # --- Purga de um Documento ---
+
+    async def _purge_document(self, document_id: int) -> bool:
+        batch_size = max(1, self._settings.PURGE_BATCH_SIZE)
+        total_deleted = 0
+        start_time = time.monotonic()
+        while not self._stop_event.is_set():
+            batch_start = time.perf_counter()
+            async with self._session_factory() as session:
+                deleted = await SqlModelChunkRepository(session=session).delete_batch_by_document_id(document_id, batch_size)
+            record_purge_batch(deleted, time.perf_counter() - batch_start)
+            total_deleted += deleted
+            if deleted < batch_size:
+                break
+            await asyncio.sleep(self._settings.PURGE_BATCH_PAUSE_SECONDS)
+        else:
+            logger.info(f"Purga do documento ID {document_id} interrompida após {total_deleted} chunks; continua no próximo ciclo.")
+            return False
+
+        async with self._session_factory() as session:
+            if not await SqlModelDocumentRepository(session=session).delete(document_id):
+                return False
+        record_purged_document()
+        logger.info(f"Documento ID {document_id} purgado: {total_deleted} chunks removidos em {time.monotonic() - start_time:.1f}s.")
+        return True
+
+    # --- Compactação da Tabela e dos Índices ---
+
+    async def _maybe_compact(self) -> None:
+        """ Dispara VACUUM (e REINDEX) conforme as tuplas mortas em chunks_vetorizados. """
+        try:
+            stats = await get_chunk_table_stats(self._engine)
+        except Exception as e:
+            logger.warning(f"Não foi possível ler estatísticas de chunks_vetorizados: {e}")
+            return
+        dead, live = stats["dead_tuples"], stats["live_tuples"]
+        set_chunks_dead_tuples(dead)
+        dead_ratio = dead / max(1, dead + live)
+        if dead < self._settings.PURGE_VACUUM_MIN_DEAD_TUPLES or dead_ratio < self._settings.PURGE_VACUUM_DEAD_RATIO:
+            logger.debug(f"chunks_vetorizados: {dead} tuplas mortas ({dead_ratio:.1%}); manutenção não necessária.")
+            return
+
+        reindex = dead_ratio >= self._settings.PURGE_REINDEX_DEAD_RATIO
+        operation = "reindex" if reindex else "vacuum"
+        logger.info(f"chunks_vetorizados com {dead} tuplas mortas ({dead_ratio:.1%}); iniciando {operation}.")
+        start_time = time.monotonic()
+        try:
+            if await vacuum_chunks_table(self._engine, reindex=reindex):
+                record_index_maintenance(operation, time.monotonic() - start_time)
+        except Exception as e:
+            logger.exception(f"Falha na manutenção de chunks_vetorizados ({operation}): {e}")
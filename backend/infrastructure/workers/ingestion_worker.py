@@ -0,0 +1,301 @@
+"""
+Worker de ingestão assíncrona de documentos.
+
+Consome a fila durável `ingestion_jobs` (Postgres) e executa o
+ProcessDocumentUseCase fora do ciclo de requisição HTTP. Vários workers
+(no mesmo processo ou em réplicas diferentes) podem rodar em paralelo:
+a reivindicação usa FOR UPDATE SKIP LOCKED e cada job mantém um lease
+renovado por heartbeat.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Callable, Optional, Dict, Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config.config import get_settings, Settings
+from domain.aggregates.ingestion.ingestion_job import IngestionJob
+from application.use_cases.document_processing.process_document import ProcessDocumentUseCase
+from application.use_cases.document_processing.delete_document import DeleteDocumentUseCase
+from infrastructure.persistence.sqlmodel.repositories.sm_ingestion_job_repository import SqlModelIngestionJobRepository
+from infrastructure.persistence.sqlmodel.repositories.sm_document_repository import SqlModelDocumentRepository
+from infrastructure.persistence.sqlmodel.repositories.sm_chunk_repository import SqlModelChunkRepository
+from infrastructure.metrics.prometheus.metrics_prometheus import record_ingestion_job
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo entre escritas de progresso no banco (evita um UPDATE por página)
+_PROGRESS_FLUSH_MIN_INTERVAL_SECONDS = 1.0
+
+_EXHAUSTED_LEASE_ERROR = "Lease expirado na última tentativa (worker interrompido durante o processamento)."
+
+
+class NonRetryableIngestionError(Exception):
+    """ Falha que não deve ser retentada (ex: arquivo persistido não existe mais). """
+    pass
+
+
+class IngestionWorker:
+    """
+    Loop de consumo da fila de ingestão.
+
+    `process_use_case_factory` recebe uma AsyncSession e devolve um
+    ProcessDocumentUseCase montado com os repositórios dessa sessão.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        process_use_case_factory: Callable[[AsyncSession], ProcessDocumentUseCase],
+        worker_id: Optional[str] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self._session_factory = session_factory
+        self._process_use_case_factory = process_use_case_factory
+        self._settings = settings or get_settings()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop_event = asyncio.Event()
+
+    # --- Ciclo de Vida ---
+
+    def stop(self) -> None:
+        """ Sinaliza para o loop parar após o job atual. """
+        self._stop_event.set()
+
+    async def run(self) -> None:
+        """ Executa o loop: reivindica um job ou aguarda o intervalo de polling. """
+        logger.info(f"Worker de ingestão '{self.worker_id}' iniciado.")
+        try:
+            while not self._stop_event.is_set():
+                processed = await self.run_once()
+                if not processed:
+                    try:
+                        await asyncio.wait_for(
+                            self._stop_event.wait(),
+                            timeout=self._settings.INGESTION_POLL_INTERVAL_SECONDS,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            logger.info(f"Worker de ingestão '{self.worker_id}' encerrado.")
+
+    async def run_once(self) -> bool:
+        """
+        Reivindica e processa no máximo um job.
+
+        Returns:
+            bool: True se um job foi processado (com sucesso ou falha).
+        """
+        async with self._session_factory() as session:
+            job_repo = SqlModelIngestionJobRepository(session=session)
+            exhausted = await job_repo.fail_expired_exhausted(
+                self._settings.INGESTION_JOB_LEASE_SECONDS, _EXHAUSTED_LEASE_ERROR
+            )
+            job = await job_repo.claim_next(self.worker_id, self._settings.INGESTION_JOB_LEASE_SECONDS)
+        for exhausted_job in exhausted:
+            # Worker anterior morreu na última tentativa: o documento parcial não deve ficar pesquisável
+            record_ingestion_job("failed")
+            if exhausted_job.document_id is not None:
+                await self._cleanup_partial_document(exhausted_job.document_id)
+        if job is None:
+            return False
+        await self._process_job(job)
+        return True
+
+    # --- Processamento de um Job ---
+
+    async def _process_job(self, job: IngestionJob) -> None:
+        start_time = time.monotonic()
+        state: Dict[str, Any] = {"stage": "starting", "progress": 0.0, "document_id": None, "lease_lost": False}
+        state_changed = asyncio.Event()
+
+        if job.attempts > job.max_attempts:
+            # Proteção extra: a reivindicação já exclui jobs sem tentativas restantes
+            await self._fail_exhausted_job(job)
+            return
+
+        async def on_progress(stage: str, progress: float, document_id: Optional[int]) -> None:
+            # Apenas atualiza o estado em memória; a escrita no banco é feita
+            # pela tarefa de heartbeat (único escritor do job durante o processamento).
+            state["stage"] = stage
+            state["progress"] = progress
+            if document_id is not None:
+                state["document_id"] = document_id
+            state_changed.set()
+
+        # O processamento roda em uma tarefa própria para que o heartbeat possa
+        # cancelá-lo se o lease for perdido (outro worker reivindicou o job).
+        processing_task = asyncio.create_task(self._execute_job(job, on_progress))
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop(job, state, state_changed, processing_task))
+        try:
+            document = await processing_task
+            await _stop_task(heartbeat_task)
+
+            async with self._session_factory() as session:
+                job_repo = SqlModelIngestionJobRepository(session=session)
+                await job_repo.mark_succeeded(job.id, self.worker_id, document.id if document else None)
+            record_ingestion_job("succeeded", time.monotonic() - start_time)
+            logger.info(f"Job {job.id} concluído (documento ID: {document.id if document else None}) em {time.monotonic() - start_time:.2f}s.")
+            await asyncio.to_thread(_remove_file, job.file_path)
+
+        except asyncio.CancelledError:
+            await _stop_task(heartbeat_task)
+            if state["lease_lost"] and not asyncio.current_task().cancelling():
+                # Outro worker detém o job agora: descartar o documento parcial desta execução
+                # (idempotente se o novo dono já o removeu) e seguir consumindo a fila.
+                logger.warning(f"Processamento do job {job.id} cancelado: worker '{self.worker_id}' perdeu o lease.")
+                record_ingestion_job("lease_lost", time.monotonic() - start_time)
+                if state["document_id"] is not None:
+                    await self._cleanup_partial_document(state["document_id"])
+                return
+            # Desligamento do worker: devolver o job para a fila sem consumir tentativa
+            logger.warning(f"Worker '{self.worker_id}' interrompido durante job {job.id}. Devolvendo à fila.")
+            try:
+                async with self._session_factory() as session:
+                    await SqlModelIngestionJobRepository(session=session).release(job.id, self.worker_id)
+                record_ingestion_job("released")
+            except Exception as release_err:
+                logger.error(f"Falha ao devolver job {job.id} à fila: {release_err}")
+            raise
+
+        except Exception as e:
+            await _stop_task(heartbeat_task)
+            duration = time.monotonic() - start_time
+            retryable = not isinstance(e, NonRetryableIngestionError) and job.can_retry
+            retry_delay = None
+            if retryable:
+                retry_delay = self._settings.INGESTION_RETRY_BACKOFF_SECONDS * (2 ** max(job.attempts - 1, 0))
+            error_message = f"{type(e).__name__}: {e}"
+            logger.error(
+                f"Job {job.id} falhou na tentativa {job.attempts}/{job.max_attempts}: {error_message}"
+                + (f" Nova tentativa em {retry_delay:.0f}s." if retry_delay is not None else " Falha definitiva."),
+                exc_info=True,
+            )
+            async with self._session_factory() as session:
+                job_repo = SqlModelIngestionJobRepository(session=session)
+                await job_repo.mark_failed(
+                    job.id,
+                    self.worker_id,
+                    error_message,
+                    retry_delay_seconds=retry_delay,
+                    document_id=state["document_id"],
+                )
+            record_ingestion_job("retried" if retryable else "failed", duration)
+            if retry_delay is None and state["document_id"] is not None:
+                # Sem nova tentativa, ninguém mais limparia o documento parcial
+                await self._cleanup_partial_document(state["document_id"])
+
+    async def _execute_job(self, job: IngestionJob, on_progress) -> Any:
+        """ Executa o ProcessDocumentUseCase para o job (após limpar tentativas anteriores). """
+        # Tentativa anterior deixou um documento parcial: remover antes de reprocessar
+        if job.document_id is not None:
+            await self._cleanup_partial_document(job.document_id)
+
+        if not os.path.isfile(job.file_path):
+            raise NonRetryableIngestionError(f"Arquivo do job não encontrado: {job.file_path}")
+
+        async with self._session_factory() as session:
+            use_case = self._process_use_case_factory(session)
+            return await use_case.execute(
+                file_name=job.file_name,
+                file_type=job.file_type,
+                metadata=job.metadata,
+                progress_callback=on_progress,
+                # Arquivo aberto diretamente pelo extrator (sem cópia em memória); hash já calculado no upload
+                file_path=job.file_path,
+                content_hash=(job.metadata or {}).get("content_hash_sha256"),
+                replace_document_id=(job.metadata or {}).get("replace_document_id"),
+            )
+
+    async def _fail_exhausted_job(self, job: IngestionJob) -> None:
+        """ Finaliza como falha um job reivindicado sem tentativas restantes. """
+        logger.error(f"Job {job.id} sem tentativas restantes ({job.attempts}/{job.max_attempts}). Falha definitiva.")
+        async with self._session_factory() as session:
+            job_repo = SqlModelIngestionJobRepository(session=session)
+            await job_repo.mark_failed(job.id, self.worker_id, job.last_error or _EXHAUSTED_LEASE_ERROR)
+        record_ingestion_job("failed")
+        if job.document_id is not None:
+            await self._cleanup_partial_document(job.document_id)
+
+    async def _heartbeat_loop(
+        self,
+        job: IngestionJob,
+        state: Dict[str, Any],
+        state_changed: asyncio.Event,
+        processing_task: asyncio.Task,
+    ) -> None:
+        """
+        Renova o lease periodicamente e grava o progresso (com throttling).
+        Se o lease for perdido, cancela o processamento para que dois workers
+        não ingiram o mesmo arquivo. Erros de banco são retentados com backoff.
+        """
+        consecutive_errors = 0
+        async with self._session_factory() as session:
+            job_repo = SqlModelIngestionJobRepository(session=session)
+            while True:
+                # asyncio.timeout em vez de wait_for: no Python 3.11 o wait_for descarta o
+                # cancelamento se o evento disparar no mesmo ciclo, e a tarefa nunca terminaria.
+                try:
+                    async with asyncio.timeout(self._settings.INGESTION_HEARTBEAT_SECONDS):
+                        await state_changed.wait()
+                except TimeoutError:
+                    pass
+                state_changed.clear()
+                try:
+                    still_owner = await job_repo.update_progress(
+                        job.id, self.worker_id, state["stage"], state["progress"], state["document_id"]
+                    )
+                except Exception as e:
+                    consecutive_errors += 1
+                    retry_in = min(
+                        _PROGRESS_FLUSH_MIN_INTERVAL_SECONDS * (2 ** consecutive_errors),
+                        self._settings.INGESTION_HEARTBEAT_SECONDS,
+                    )
+                    logger.warning(f"Falha ao renovar o lease do job {job.id} ({consecutive_errors}x): {e}. Nova tentativa em {retry_in:.0f}s.")
+                    await asyncio.sleep(retry_in)
+                    state_changed.set() # Tentar de novo sem esperar o próximo intervalo de heartbeat
+                    continue
+                consecutive_errors = 0
+                if not still_owner:
+                    logger.error(f"Worker '{self.worker_id}' perdeu o lease do job {job.id}. Cancelando o processamento.")
+                    state["lease_lost"] = True
+                    processing_task.cancel()
+                    return
+                await asyncio.sleep(_PROGRESS_FLUSH_MIN_INTERVAL_SECONDS)
+
+    async def _cleanup_partial_document(self, document_id: int) -> None:
+        logger.info(f"Removendo documento parcial ID {document_id}.")
+        try:
+            async with self._session_factory() as session:
+                delete_use_case = DeleteDocumentUseCase(
+                    document_repository=SqlModelDocumentRepository(session=session),
+                    chunk_repository=SqlModelChunkRepository(session=session),
+                )
+                await delete_use_case.execute(document_id)
+        except Exception as e:
+            logger.error(f"Falha ao remover documento parcial ID {document_id}: {e}")
+
+
+# --- Funções Auxiliares ---
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Não foi possível remover arquivo processado {path}: {e}")
+
+async def _stop_task(task: asyncio.Task) -> None:
+    if task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.warning(f"Erro ao encerrar tarefa de heartbeat: {e}")
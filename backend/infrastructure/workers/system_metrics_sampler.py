@@ -0,0 +1,45 @@
+"""
+Amostrador de métricas do sistema.
+
+Atualiza os gauges de CPU e memória do processo (psutil) em intervalos
+fixos, fora do caminho das requisições HTTP.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import psutil
+
+from config.config import get_settings, Settings
+from infrastructure.metrics.prometheus.metrics_prometheus import update_system_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SystemMetricsSampler:
+    """ Loop de amostragem de CPU/memória (mesmo ciclo de vida do DocumentPurger). """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self._settings = settings or get_settings()
+        self._stop_event = asyncio.Event()
+        # Mesmo Process entre amostras: cpu_percent mede o uso desde a amostra anterior
+        self._process = psutil.Process()
+
+    def stop(self) -> None:
+        """ Sinaliza para o loop parar. """
+        self._stop_event.set()
+
+    async def run(self) -> None:
+        """ Amostra as métricas a cada SYSTEM_METRICS_INTERVAL_SECONDS até `stop()`. """
+        interval = self._settings.SYSTEM_METRICS_INTERVAL_SECONDS
+        logger.info(f"Amostrador de métricas do sistema iniciado (intervalo {interval:g}s).")
+        try:
+            while not self._stop_event.is_set():
+                update_system_metrics(self._process)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            logger.info("Amostrador de métricas do sistema encerrado.")
@@ -1,12 +1,13 @@
 # Remover import asyncpg se ainda existir
 # import asyncpg
 from fastapi import Depends, Query, Request, HTTPException, status
-from typing import Annotated, Dict, Optional, AsyncGenerator
+from typing import Annotated, Dict, Optional, AsyncGenerator, AsyncIterator, AsyncContextManager, Callable
+from contextlib import asynccontextmanager
 import logging
 from functools import lru_cache
 
 # --- Importações SQLAlchemy/SQLModel Async ---
-from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 # -------------------------------------------
@@ -14,6 +15,7 @@ from sqlalchemy import text
 # Importar interfaces e casos de uso
 from domain.repositories.document_repository import DocumentRepository
 from domain.repositories.chunk_repository import ChunkRepository
+from domain.repositories.ingestion_job_repository import IngestionJobRepository
 from application.use_cases.document_processing.list_documents import ListDocumentsUseCase
 from application.use_cases.document_processing.process_document import ProcessDocumentUseCase
 from application.interfaces.text_extractor import TextExtractor
@@ -23,9 +25,12 @@ from application.interfaces.llm_provider import LLMProvider
 # Importar a implementação concreta do repositório (baseada em asyncpg)
 from infrastructure.persistence.sqlmodel.repositories.sm_document_repository import SqlModelDocumentRepository
 from infrastructure.persistence.sqlmodel.repositories.sm_chunk_repository import SqlModelChunkRepository
+from infrastructure.persistence.sqlmodel.repositories.sm_ingestion_job_repository import SqlModelIngestionJobRepository
 # Importar logger
 from application.use_cases.document_processing.get_document_details import GetDocumentDetailsUseCase
 from application.use_cases.document_processing.delete_document import DeleteDocumentUseCase
+from application.use_cases.document_processing.enqueue_document import EnqueueDocumentUseCase
+from application.use_cases.document_processing.get_ingestion_job import GetIngestionJobUseCase
 
 # --- Importar implementações de SERVIÇOS ---
 from infrastructure.processors.extractors.pdf_text_extractor import PdfTextExtractor
@@ -77,6 +82,24 @@ def get_document_repository(session: SessionDep) -> DocumentRepository:
 def get_chunk_repository(session: SessionDep) -> ChunkRepository:
     """ Fornece a implementação do repositório de chunks usando SQLModel. """
     return SqlModelChunkRepository(session=session)
+
+def get_chunk_repository_scope(request: Request) -> Callable[[], AsyncContextManager[ChunkRepository]]:
+    """
+    Fornece uma fábrica de repositórios de chunks com sessão própria, independente
+    da sessão da requisição (usada por execuções que podem sobreviver a ela, ex: single-flight).
+    """
+    session_factory = async_sessionmaker(bind=request.app.state.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def chunk_repository_scope() -> AsyncIterator[ChunkRepository]:
+        async with session_factory() as session:
+            yield SqlModelChunkRepository(session=session)
+
+    return chunk_repository_scope
+
+def get_ingestion_job_repository(session: SessionDep) -> IngestionJobRepository:
+    """ Fornece a implementação do repositório da fila de ingestão usando SQLModel. """
+    return SqlModelIngestionJobRepository(session=session)
 # -------------------------------------------------------
 
 # --- Provedores de Serviços ---
@@ -130,6 +153,29 @@ def get_process_document_use_case(
         embedding_provider=embedder,
     )
 
+def build_process_document_use_case(session: AsyncSession) -> ProcessDocumentUseCase:
+    """
+    Monta o ProcessDocumentUseCase fora do contexto de requisição
+    (usado pelos workers de ingestão, que gerenciam suas próprias sessões).
+    """
+    return ProcessDocumentUseCase(
+        document_repository=SqlModelDocumentRepository(session=session),
+        chunk_repository=SqlModelChunkRepository(session=session),
+        text_extractor=get_text_extractor(),
+        chunker=get_chunker(),
+        embedding_provider=get_embedding_provider(),
+    )
+
+def get_enqueue_document_use_case(
+    job_repo: Annotated[IngestionJobRepository, Depends(get_ingestion_job_repository)]
+) -> EnqueueDocumentUseCase:
+    return EnqueueDocumentUseCase(ingestion_job_repository=job_repo)
+
+def get_get_ingestion_job_use_case(
+    job_repo: Annotated[IngestionJobRepository, Depends(get_ingestion_job_repository)]
+) -> GetIngestionJobUseCase:
+    return GetIngestionJobUseCase(ingestion_job_repository=job_repo)
+
 def get_get_document_details_use_case(
     repo: Annotated[DocumentRepository, Depends(get_document_repository)]
 ) -> GetDocumentDetailsUseCase:
@@ -163,6 +209,7 @@ def get_process_query_use_case(
     llm_provider: Annotated[LLMProvider, Depends(get_llm_provider)],
     chunk_repo: Annotated[ChunkRepository, Depends(get_chunk_repository)],
     reranker: Annotated[ReRanker, Depends(get_reranker)],
+    chunk_repo_scope: Annotated[Callable[[], AsyncContextManager[ChunkRepository]], Depends(get_chunk_repository_scope)],
 ) -> ProcessQueryUseCase:
     """ Fornece a instância do caso de uso ProcessQueryUseCase. """
     logger.debug("Criando instância de ProcessQueryUseCase...") # Log opcional
@@ -171,6 +218,7 @@ def get_process_query_use_case(
         llm_provider=llm_provider,
         chunk_repository=chunk_repo,
         reranker=reranker,
+        chunk_repository_scope=chunk_repo_scope,
     )
 # --------------------------------------------
 
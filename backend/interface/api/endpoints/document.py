@@ -2,7 +2,9 @@
 Endpoints para gerenciamento de documentos.
 """
 
+import asyncio
 import datetime
+import os
 from fastapi import (
     APIRouter,
     Depends,
@@ -20,12 +22,15 @@ import logging
 from domain.aggregates.document.document import Document
 from config.config import get_settings, Settings
 from application.use_cases.document_processing.list_documents import ListDocumentsUseCase
-from interface.api.dependencies import validate_api_key, verify_db_health, common_query_parameters, get_list_documents_use_case, get_process_document_use_case, get_get_document_details_use_case, get_delete_document_use_case
-from application.use_cases.document_processing.process_document import ProcessDocumentUseCase, DocumentProcessingError
+from interface.api.dependencies import validate_api_key, verify_db_health, common_query_parameters, get_list_documents_use_case, get_enqueue_document_use_case, get_get_ingestion_job_use_case, get_get_document_details_use_case, get_delete_document_use_case
+from application.use_cases.document_processing.enqueue_document import EnqueueDocumentUseCase
+from application.use_cases.document_processing.get_ingestion_job import GetIngestionJobUseCase
 from application.use_cases.document_processing.get_document_details import GetDocumentDetailsUseCase
 from application.use_cases.document_processing.delete_document import DeleteDocumentUseCase
 from application.dtos.document_dto import DocumentDTO
 from shared.exceptions import ResourceNotFoundError
+from utils.filesystem_utils import salvar_upload_ingestao, ArquivoMuitoGrandeError
+from infrastructure.metrics.prometheus.metrics_prometheus import record_ingestion_job
 
 logger = logging.getLogger(__name__)
 
@@ -51,20 +56,42 @@ class DocumentListResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 
-class DocumentUploadResponse(BaseModel):
-    """Modelo para resposta de upload de documento."""
+class DocumentUploadAcceptedResponse(BaseModel):
+    """Modelo para resposta de upload aceito (processamento assíncrono)."""
 
-    id: int
+    job_id: int
+    status: str
     name: str
     file_type: str
     size_kb: float
-    chunks_count: int
-    processed: bool
+    status_url: str
     message: str
 
 
+class IngestionJobResponse(BaseModel):
+    """Modelo para resposta com o estado de um job de ingestão."""
+
+    id: int
+    status: str
+    name: str
+    file_type: Optional[str]
+    size_kb: Optional[float]
+    document_id: Optional[int]
+    stage: Optional[str]
+    progress: float
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str]
+    created_at: Optional[datetime.datetime]
+    updated_at: Optional[datetime.datetime]
+    started_at: Optional[datetime.datetime]
+    finished_at: Optional[datetime.datetime]
+
+
 # Roteador para endpoints de documentos
 router = APIRouter(prefix="/documents", tags=["documents"])
 
@@ -78,33 +105,34 @@ async def list_documents(
     list_docs_use_case: ListDocumentsUseCase = Depends(get_list_documents_use_case),
     params: Dict = Depends(common_query_parameters),
     name_filter: Optional[str] = Query(
-        None, description="Filtrar por nome do documento (case-insensitive)"
+        None, max_length=200, description="Filtrar por nome do documento (substring, case-insensitive)"
+    ),
+    cursor: Optional[str] = Query(
+        None, max_length=1024, description="Cursor `next_cursor` da página anterior (paginação por keyset; ignora `offset`)"
     ),
 ):
     """
     Lista documentos disponíveis com filtros, ordenação e paginação.
+
+    Filtro e ordenação são aplicados no banco sobre todos os documentos.
+    Para navegar por muitas páginas, use `next_cursor` em vez de `offset`.
     """
     limit = params["limit"]
     offset = params["offset"]
     sort_by = params["sort_by"]
     order = params["order"]
 
-    document_dtos_page, total_documents = await list_docs_use_case.execute(limit=limit, offset=offset)
-
-    if name_filter:
-        filtered_documents_page = [
-            dto for dto in document_dtos_page if name_filter.lower() in dto.name.lower()
-        ]
-    else:
-        filtered_documents_page = document_dtos_page
-
-    reverse_sort = order == "desc"
-    if sort_by == "name":
-        filtered_documents_page.sort(key=lambda x: x.name, reverse=reverse_sort)
-    elif sort_by == "upload_date":
-        filtered_documents_page.sort(key=lambda x: x.upload_date or datetime.datetime.min, reverse=reverse_sort)
-    elif sort_by == "size_kb":
-        filtered_documents_page.sort(key=lambda x: x.size_kb or 0.0, reverse=reverse_sort)
+    try:
+        page = await list_docs_use_case.execute(
+            limit=limit,
+            offset=offset,
+            sort_by=sort_by,
+            order=order,
+            name_filter=name_filter,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     document_responses = [
         DocumentResponse(
@@ -117,72 +145,134 @@ async def list_documents(
             processed=dto.processed,
             metadata=dto.metadata,
         )
-        for dto in filtered_documents_page
+        for dto in page.documents
     ]
 
     return DocumentListResponse(
         documents=document_responses,
-        total=total_documents,
+        total=page.total,
         limit=limit,
-        offset=offset,
+        offset=0 if cursor else offset,
+        total_is_estimate=page.total_is_estimate,
+        next_cursor=page.next_cursor,
     )
 
 
 @router.post(
     "/upload",
-    response_model=DocumentUploadResponse,
+    response_model=DocumentUploadAcceptedResponse,
     dependencies=[Depends(validate_api_key), Depends(verify_db_health)],
-    status_code=status.HTTP_201_CREATED,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def upload_document(
-    process_use_case: ProcessDocumentUseCase = Depends(get_process_document_use_case),
+    enqueue_use_case: EnqueueDocumentUseCase = Depends(get_enqueue_document_use_case),
+    get_details_use_case: GetDocumentDetailsUseCase = Depends(get_get_document_details_use_case),
     file: UploadFile = File(...),
+    replace_document_id: Optional[int] = Query(
+        None, ge=1, description="ID de um documento existente do qual este arquivo é uma nova versão (reingestão incremental)"
+    ),
+    settings: Settings = Depends(get_settings),
 ):
     """
-    Faz upload e dispara o processamento de um novo documento.
+    Recebe um documento, persiste o arquivo e enfileira o processamento.
+    O progresso pode ser acompanhado em `GET /documents/jobs/{job_id}`.
+
+    Com `replace_document_id`, o arquivo substitui o documento informado
+    mantendo seu ID; apenas chunks novos ou alterados são re-embedados.
     """
-    MAX_FILE_SIZE = 20 * 1024 * 1024 # Exemplo: 20MB
-    if file.size > MAX_FILE_SIZE:
-         raise HTTPException(
-             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-             detail=f"Arquivo muito grande. O tamanho máximo é {MAX_FILE_SIZE // (1024*1024)}MB",
-         )
+    if replace_document_id is not None and await get_details_use_case.execute(replace_document_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Documento com ID {replace_document_id} não encontrado.")
 
-    try:
-        file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
-        if file_extension != "pdf":
-            logger.warning(f"Recebido upload de arquivo não-PDF: {file.filename}")
+    MAX_FILE_SIZE = 20 * 1024 * 1024 # Exemplo: 20MB
+    too_large_detail = f"Arquivo muito grande. O tamanho máximo é {MAX_FILE_SIZE // (1024*1024)}MB"
+    # file.size pode ser None (upload sem Content-Length); o limite também é verificado durante a gravação
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+         raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=too_large_detail)
 
-        file_content = await file.read()
-        if not file_content:
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo enviado está vazio.")
+    file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
+    if file_extension != "pdf":
+        logger.warning(f"Recebido upload de arquivo não-PDF: {file.filename}")
 
-        initial_metadata = {"source": "api_upload", "original_filename": file.filename}
+    # Gravação em disco em blocos com hash incremental (memória por upload limitada a um bloco)
+    try:
+        file_path, size_bytes, content_hash = await salvar_upload_ingestao(
+            settings.INGESTION_STORAGE_DIR, file.filename, file, MAX_FILE_SIZE
+        )
+    except ArquivoMuitoGrandeError:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=too_large_detail)
+    if size_bytes == 0:
+         await asyncio.to_thread(os.remove, file_path)
+         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo enviado está vazio.")
+
+    initial_metadata = {
+        "source": "api_upload",
+        "original_filename": file.filename,
+        "content_hash_sha256": content_hash,
+    }
+    if replace_document_id is not None:
+        initial_metadata["replace_document_id"] = replace_document_id
+    size_kb = size_bytes / 1024
 
-        processed_document = await process_use_case.execute(
+    try:
+        job = await enqueue_use_case.execute(
             file_name=file.filename,
-            file_content=file_content,
+            file_path=file_path,
             file_type=file_extension,
+            size_kb=size_kb,
             metadata=initial_metadata,
         )
+    except Exception:
+        # Sem job, nenhum worker removeria o arquivo persistido
+        try:
+            await asyncio.to_thread(os.remove, file_path)
+        except OSError as remove_err:
+            logger.warning(f"Não foi possível remover o upload {file_path} após falha ao enfileirar: {remove_err}")
+        raise
+    record_ingestion_job("enqueued")
+
+    return DocumentUploadAcceptedResponse(
+        job_id=job.id,
+        status=job.status,
+        name=job.file_name,
+        file_type=job.file_type,
+        size_kb=round(size_kb, 2),
+        status_url=f"/documents/jobs/{job.id}",
+        message=f"Documento '{job.file_name}' recebido e enfileirado para processamento.",
+    )
 
-        original_size_kb = file.size / 1024 if file.size else 0
 
-        return DocumentUploadResponse(
-            id=processed_document.id,
-            name=processed_document.name,
-            file_type=processed_document.file_type,
-            size_kb=round(original_size_kb, 2),
-            chunks_count=processed_document.chunks_count,
-            processed=processed_document.processed,
-            message=f"Documento '{processed_document.name}' recebido e processamento iniciado/concluído.",
-        )
-
-    except DocumentProcessingError as e:
-        logger.error(f"Erro ao processar documento '{file.filename}': {e}")
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
-    except HTTPException:
-        raise
+@router.get(
+    "/jobs/{job_id}",
+    response_model=IngestionJobResponse,
+    dependencies=[Depends(verify_db_health)],
+    responses={404: {"description": "Job de ingestão não encontrado"}}
+)
+async def get_ingestion_job(
+    get_job_use_case: GetIngestionJobUseCase = Depends(get_get_ingestion_job_use_case),
+    job_id: int = Path(..., description="ID do job de ingestão", ge=1),
+):
+    """ Obtém o estado/progresso de um job de ingestão. """
+    job_dto = await get_job_use_case.execute(job_id)
+    if job_dto is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job de ingestão com ID {job_id} não encontrado.")
+
+    return IngestionJobResponse(
+        id=job_dto.id,
+        status=job_dto.status,
+        name=job_dto.file_name,
+        file_type=job_dto.file_type,
+        size_kb=job_dto.size_kb,
+        document_id=job_dto.document_id,
+        stage=job_dto.stage,
+        progress=job_dto.progress,
+        attempts=job_dto.attempts,
+        max_attempts=job_dto.max_attempts,
+        last_error=job_dto.last_error,
+        created_at=job_dto.created_at,
+        updated_at=job_dto.updated_at,
+        started_at=job_dto.started_at,
+        finished_at=job_dto.finished_at,
+    )
 
 
 @router.get(
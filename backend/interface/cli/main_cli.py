@@ -11,6 +11,8 @@ from .migrate_command import migrar_documentos
 from .search_command import testar_busca
 # --- Adicionar import do diagnóstico ---
 from .diagnostico_db import diagnosticar_sistema_rag
+from .worker_command import executar_workers
+from .purge_command import executar_purga
 
 # --- Importar configuração e inicialização ---
 # (Imports atualizados para infrastructure)
@@ -28,6 +30,10 @@ async def main(settings: Settings): # <-- Receber settings como argumento
 
     migrate_parser = subparsers.add_parser( "migrate", help="Migrar documentos para o banco de dados" )
     migrate_parser.add_argument( "--dir", type=str, default="documents", help="Diretório de documentos" )
+    migrate_parser.add_argument( "--workers", type=int, default=4, help="Arquivos ingeridos em paralelo" )
+    migrate_parser.add_argument( "--manifest", type=str, default=None, help="Manifesto de checkpoint (padrão: <dir>/.migration_manifest.jsonl)" )
+    migrate_parser.add_argument( "--no-resume", action="store_true", help="Ignorar o manifesto existente e reprocessar tudo" )
+    migrate_parser.add_argument( "--bulk-load", action="store_true", help="Remover os índices HNSW/FTS durante a carga e recriá-los uma única vez no final" )
 
     search_parser = subparsers.add_parser("search", help="Testar busca RAG")
     search_parser.add_argument( "query", type=str, nargs="?", default="O que é repartição de benefícios?", help="Consulta para teste", )
@@ -36,6 +42,12 @@ async def main(settings: Settings): # <-- Receber settings como argumento
     diagnose_parser = subparsers.add_parser("diagnose", help="Executar diagnóstico do banco de dados")
     # Não precisa de argumentos específicos por enquanto
 
+    worker_parser = subparsers.add_parser("worker", help="Executar workers da fila de ingestão")
+    worker_parser.add_argument( "--workers", type=int, default=None, help="Número de workers (padrão: INGESTION_WORKERS)" )
+
+    purge_parser = subparsers.add_parser("purge", help="Remover chunks de documentos excluídos e compactar índices")
+    purge_parser.add_argument( "--continuous", action="store_true", help="Continuar executando em intervalos (PURGE_INTERVAL_SECONDS)" )
+
     args = parser.parse_args()
 
     # Settings agora são recebidos como argumento
@@ -46,11 +58,15 @@ async def main(settings: Settings): # <-- Receber settings como argumento
 
     try:
         if args.comando == "migrate":
-            await migrar_documentos(settings, args.dir) # Passar settings
+            await migrar_documentos(settings, args.dir, num_workers=args.workers, manifest_path=args.manifest, resume=not args.no_resume, bulk_load=args.bulk_load) # Passar settings
         elif args.comando == "search":
             await testar_busca(settings, args.query) # Passar settings
         elif args.comando == "diagnose":
             await diagnosticar_sistema_rag(settings) # Passar settings
+        elif args.comando == "worker":
+            await executar_workers(settings, args.workers or settings.INGESTION_WORKERS)
+        elif args.comando == "purge":
+            await executar_purga(settings, continuo=args.continuous)
     except Exception as main_exc:
             logger.error(f"Erro na execução do comando {args.comando}: {main_exc}", exc_info=True)
 
@@ -1,7 +1,10 @@
 import os
+import json
+import time
 import logging
 import asyncio
 import dotenv
+from dataclasses import dataclass, field
 from os import listdir
 from os.path import isfile, join, isdir
 from typing import Dict, Any, Optional, List # Adicionado Optional, List
@@ -14,7 +17,7 @@ from config.config import get_settings, Settings
 from infrastructure.telemetry.opentelemetry import get_tracer # <-- Corrigido
 from opentelemetry import trace
 from opentelemetry.trace import Status, StatusCode
-from utils.filesystem_utils import lista_arquivos
+from utils.filesystem_utils import lista_arquivos, calcular_sha256_arquivo
 
 # Importar Interfaces, Repositórios, Providers e Use Cases necessários
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
@@ -29,6 +32,7 @@ from application.interfaces.embedding_provider import EmbeddingProvider
 # Importar Implementações Concretas
 from infrastructure.persistence.sqlmodel.repositories.sm_document_repository import SqlModelDocumentRepository
 from infrastructure.persistence.sqlmodel.repositories.sm_chunk_repository import SqlModelChunkRepository
+from infrastructure.persistence.sqlmodel.index_maintenance import drop_chunk_search_indexes, rebuild_chunk_search_indexes
 from infrastructure.processors.extractors.pdf_text_extractor import PdfTextExtractor
 from infrastructure.processors.chunkers.sentence_chunker import SentenceChunker
 # from infrastructure.evaluation.chunk_evaluator import BasicChunkQualityEvaluator # Ou None
@@ -100,26 +104,120 @@ async def create_dependencies_for_migration(settings: Settings, session: AsyncSe
             span.set_status(Status(StatusCode.ERROR, "Falha ao criar dependências de migração"))
             raise # Relança para a função chamadora saber
 
+# --- Manifesto de Checkpoint ---
+
+class MigrationManifest:
+    """
+    Manifesto de checkpoint da migração (JSON Lines, uma linha por arquivo concluído).
+    Permite retomar uma migração interrompida sem reprocessar arquivos já
+    ingeridos; a última linha de cada caminho prevalece.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    def load(self) -> int:
+        """ Carrega entradas existentes; retorna quantas foram lidas. """
+        if not os.path.isfile(self.path):
+            return 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Linha inválida ignorada no manifesto {self.path}: {line[:100]}")
+                    continue
+                self._entries[entry["path"]] = entry
+        return len(self._entries)
+
+    def is_done(self, path: str, content_hash: str) -> bool:
+        """ Arquivo já concluído com o mesmo conteúdo (hash)? """
+        entry = self._entries.get(path)
+        return bool(entry) and entry.get("status") in ("done", "skipped_duplicate") and entry.get("content_hash") == content_hash
+
+    async def record(self, entry: Dict[str, Any]) -> None:
+        """ Registra o resultado de um arquivo (append + flush fora do event loop). """
+        async with self._lock:
+            self._entries[entry["path"]] = entry
+            await asyncio.to_thread(self._append, json.dumps(entry, ensure_ascii=False))
+
+    def _append(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+@dataclass
+class _MigrationStats:
+    """ Contadores da migração para relatório de progresso. """
+    total: int
+    started_at: float = field(default_factory=time.monotonic)
+    done: int = 0
+    processed: int = 0
+    skipped: int = 0
+    errors: int = 0
+    pages: int = 0
+    chunks: int = 0
+
+    def progress_line(self) -> str:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return (
+            f"[{self.done}/{self.total}] processados={self.processed} pulados={self.skipped} erros={self.errors} | "
+            f"{self.pages / elapsed:.1f} págs/s, {self.chunks / elapsed:.1f} chunks/s, "
+            f"{self.done / elapsed:.2f} arquivos/s"
+        )
+
+
 # --- Função Principal do Comando 'migrate' ---
 
-async def migrar_documentos(settings: Settings, dir_documentos: str):
-    """Migra documentos da pasta usando a nova arquitetura."""
+async def migrar_documentos(
+    settings: Settings,
+    dir_documentos: str,
+    num_workers: int = 1,
+    manifest_path: Optional[str] = None,
+    resume: bool = True,
+    bulk_load: bool = False,
+):
+    """
+    Migra documentos da pasta usando a nova arquitetura.
+
+    Os arquivos são ingeridos por `num_workers` tarefas concorrentes, cada uma
+    com sua própria sessão. Um manifesto de checkpoint (`manifest_path`, padrão
+    `<dir>/.migration_manifest.jsonl`) permite retomar a migração; arquivos
+    cujo hash já existe no banco são pulados.
+
+    Com `bulk_load`, os índices HNSW e FTS de chunks são removidos antes da
+    carga e recriados uma única vez ao final (mesmo se houver erros), com
+    BULK_LOAD_MAINTENANCE_WORK_MEM e BULK_LOAD_PARALLEL_WORKERS. Consultas
+    continuam respondendo sobre os dados existentes durante a carga.
+    """
     # NOTA: A inicialização de Telemetria e Logging idealmente ocorreria
     # no ponto de entrada (__main__ em main_cli.py) antes de chamar esta função.
     tracer = get_tracer(__name__)
     engine = None  # Inicializar engine como None
-    
+    num_workers = max(1, num_workers)
+    manifest_path = manifest_path or os.path.join(dir_documentos, ".migration_manifest.jsonl")
+
     try:
         with tracer.start_as_current_span("cli.command.migrate") as span:
             span.set_attribute("command.name", "migrate")
             span.set_attribute("input.directory", dir_documentos)
-            logger.info(f"Iniciando migração de documentos da pasta: {dir_documentos}")
+            span.set_attribute("workers.count", num_workers)
+            span.set_attribute("bulk_load", bulk_load)
+            logger.info(f"Iniciando migração de documentos da pasta: {dir_documentos} ({num_workers} workers)")
 
             try:
-                # --- ADICIONAR PRINT PARA DEBUG ---
-                print(f"DEBUG: Tentando criar engine com URL: {settings.DATABASE_URL}")
-                # ---------------------------------
-                engine = create_async_engine(settings.DATABASE_URL, echo=False)
+                db_url = settings.DATABASE_URL
+                if db_url.startswith("postgresql://"):
+                    db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+                # Uma conexão por worker (+ folga para a verificação de hash)
+                engine = create_async_engine(db_url, echo=False, pool_size=num_workers + 1, max_overflow=num_workers)
                 AsyncSessionFactory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
                 logger.info("Engine e SessionFactory criados para migração.")
                 span.set_attribute("db.setup_successful", True)
@@ -130,7 +228,8 @@ async def migrar_documentos(settings: Settings, dir_documentos: str):
                 span.set_attribute("db.setup_successful", False)
                 return  # Sair se não conseguir conectar ao DB
 
-            arquivos = lista_arquivos(dir_documentos)
+            arquivos = await asyncio.to_thread(lista_arquivos, dir_documentos)
+            arquivos = [arquivo for arquivo in arquivos if os.path.abspath(arquivo) != os.path.abspath(manifest_path)]
             span.set_attribute("files.found", len(arquivos))
             logger.info(f"Encontrados {len(arquivos)} arquivos em {dir_documentos}")
             if not arquivos:
@@ -140,88 +239,154 @@ async def migrar_documentos(settings: Settings, dir_documentos: str):
                 span.set_status(Status(StatusCode.OK, "No files found"))
                 return
 
-            processed_count = 0
-            error_count = 0
-            try:  # Bloco try para o contexto da sessão
-                async with AsyncSessionFactory() as session:
-                    # Span para criação de dependências
-                    with tracer.start_as_current_span("cli.create_migration_dependencies") as dep_span:
-                        try:
-                            deps = await create_dependencies_for_migration(settings, session)
-                            process_doc_use_case: ProcessDocumentUseCase = deps['process_doc_use_case']
-                            dep_span.set_status(Status(StatusCode.OK))
-                        except Exception as dep_exc:
-                            logger.error(f"Erro crítico durante a criação de dependências de migração: {dep_exc}", exc_info=True)
-                            dep_span.record_exception(dep_exc)
-                            dep_span.set_status(Status(StatusCode.ERROR, "Falha ao criar dependências"))
-                            span.record_exception(dep_exc) # Registrar no span pai também
-                            span.set_status(Status(StatusCode.ERROR, "Falha ao criar dependências"))
-                            await session.rollback() # Rollback se falhar aqui
-                            raise # Re-lança para sair do bloco da sessão
-
-                    # Loop de processamento de arquivos
-                    for arquivo_idx, arquivo in enumerate(arquivos):
-                        # Span para cada arquivo
-                        with tracer.start_as_current_span(f"cli.process_file.{arquivo_idx}") as file_span:
-                            nome_arquivo = os.path.basename(arquivo)
-                            file_span.set_attribute("file.name", nome_arquivo)
-                            file_span.set_attribute("file.path", arquivo)
-                            logger.info(f"Processando [{arquivo_idx+1}/{len(arquivos)}]: {nome_arquivo}...")
-                            try:
-                                tipo_arquivo = os.path.splitext(arquivo)[1][1:].lower()
-                                file_span.set_attribute("file.type", tipo_arquivo)
-                                if tipo_arquivo != "pdf": # Exemplo: só processa PDF neste script
-                                    logger.warning(f"Pulando arquivo {nome_arquivo}: tipo não suportado ({tipo_arquivo})")
-                                    file_span.set_attribute("file.skipped", True)
-                                    file_span.set_attribute("file.skip_reason", "unsupported_type")
-                                    file_span.set_status(Status(StatusCode.OK, "File skipped"))
-                                    continue
-
-                                with open(arquivo, "rb") as file:
-                                    conteudo_binario = file.read()
-                                file_span.set_attribute("file.size_bytes", len(conteudo_binario))
-
-                                # Executar o Use Case (pode ter spans internos)
-                                documento_processado = await process_doc_use_case.execute(
-                                    file_name=nome_arquivo,
-                                    file_content=conteudo_binario,
-                                    file_type=tipo_arquivo,
-                                    metadata={"path": arquivo, "origem": "cli_migration"}, # Metadados de origem
-                                )
-                                if documento_processado and documento_processado.id is not None:
-                                    logger.info(f"Documento {nome_arquivo} processado com sucesso. ID: {documento_processado.id}")
-                                    processed_count += 1
-                                    file_span.set_attribute("file.processed_doc_id", documento_processado.id)
-                                    file_span.set_status(Status(StatusCode.OK))
-                                else:
-                                    logger.error(f"Processamento de {nome_arquivo} não retornou documento válido ou ID.")
-                                    error_count += 1
-                                    file_span.set_status(Status(StatusCode.ERROR, "Processing returned invalid document or ID"))
-
-                            except Exception as e:
-                                logger.error(f"Erro ao processar arquivo {nome_arquivo}: {e}", exc_info=True)
-                                error_count += 1
-                                file_span.record_exception(e)
-                                file_span.set_status(Status(StatusCode.ERROR, "Exception during file processing"))
-                                # Não fazemos rollback aqui, pois o erro é por arquivo.
-
-            except Exception as session_or_dep_exc:
-                logger.error(f"Erro não recuperável no processamento em lote da migração: {session_or_dep_exc}", exc_info=True)
-                span.record_exception(session_or_dep_exc)
-                span.set_status(Status(StatusCode.ERROR, "Erro irrecuperável no bloco da sessão de migração"))
-                # A sessão já foi encerrada ou está em estado de erro
-
-            span.set_attribute("files.processed_count", processed_count)
-            span.set_attribute("files.error_count", error_count)
-            logger.info(f"Migração concluída. {processed_count} arquivos processados, {error_count} erros.")
-            if error_count > 0:
-                final_status = Status(StatusCode.ERROR, f"{error_count} errors during migration")
+            manifest = MigrationManifest(manifest_path)
+            if resume:
+                loaded = await asyncio.to_thread(manifest.load)
+                if loaded:
+                    logger.info(f"Retomando migração: {loaded} entradas no manifesto {manifest_path}")
+
+            # Carregar o modelo de embeddings uma vez, antes de iniciar os workers
+            await asyncio.to_thread(get_cached_provider, "embedding", HuggingFaceEmbeddingProvider)
+
+            stats = _MigrationStats(total=len(arquivos))
+            file_queue: asyncio.Queue = asyncio.Queue()
+            for arquivo_idx, arquivo in enumerate(arquivos):
+                file_queue.put_nowait((arquivo_idx, arquivo))
+
+            async def worker() -> None:
+                while True:
+                    try:
+                        arquivo_idx, arquivo = file_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    await _migrar_arquivo(settings, AsyncSessionFactory, manifest, stats, arquivo_idx, arquivo)
+                    stats.done += 1
+                    print(stats.progress_line(), flush=True)
+
+            if bulk_load:
+                print("[bulk-load] Removendo índices de busca antes da carga...", flush=True)
+                await drop_chunk_search_indexes(engine, report=_print_bulk_load)
+            try:
+                await asyncio.gather(*(worker() for _ in range(min(num_workers, len(arquivos)))))
+            finally:
+                if bulk_load:
+                    print("[bulk-load] Carga concluída; recriando índices de busca...", flush=True)
+                    rebuild_start = time.monotonic()
+                    await rebuild_chunk_search_indexes(
+                        engine,
+                        maintenance_work_mem=settings.BULK_LOAD_MAINTENANCE_WORK_MEM,
+                        parallel_workers=settings.BULK_LOAD_PARALLEL_WORKERS,
+                        report=_print_bulk_load,
+                    )
+                    span.set_attribute("bulk_load.rebuild_seconds", time.monotonic() - rebuild_start)
+
+            span.set_attribute("files.processed_count", stats.processed)
+            span.set_attribute("files.skipped_count", stats.skipped)
+            span.set_attribute("files.error_count", stats.errors)
+            span.set_attribute("pages.count", stats.pages)
+            span.set_attribute("chunks.count", stats.chunks)
+            logger.info(f"Migração concluída. {stats.progress_line()}")
+            if stats.errors > 0:
+                final_status = Status(StatusCode.ERROR, f"{stats.errors} errors during migration")
             else:
                 final_status = Status(StatusCode.OK)
             span.set_status(final_status)
-            
+
     finally:
         # Garantir que o engine seja fechado
         if engine:
             await engine.dispose()
             logger.info("Engine de migração finalizado.")
+
+
+def _print_bulk_load(message: str) -> None:
+    """ Reporta o progresso da manutenção de índices no terminal e no log. """
+    logger.info(message)
+    print(f"[bulk-load] {message}", flush=True)
+
+
+async def _migrar_arquivo(
+    settings: Settings,
+    session_factory: async_sessionmaker,
+    manifest: MigrationManifest,
+    stats: _MigrationStats,
+    arquivo_idx: int,
+    arquivo: str,
+) -> None:
+    """ Ingere um arquivo com sessão própria e registra o resultado no manifesto. """
+    tracer = get_tracer(__name__)
+    with tracer.start_as_current_span(f"cli.process_file.{arquivo_idx}") as file_span:
+        nome_arquivo = os.path.basename(arquivo)
+        file_span.set_attribute("file.name", nome_arquivo)
+        file_span.set_attribute("file.path", arquivo)
+        tipo_arquivo = os.path.splitext(arquivo)[1][1:].lower()
+        file_span.set_attribute("file.type", tipo_arquivo)
+        if tipo_arquivo != "pdf": # Exemplo: só processa PDF neste script
+            logger.warning(f"Pulando arquivo {nome_arquivo}: tipo não suportado ({tipo_arquivo})")
+            stats.skipped += 1
+            file_span.set_attribute("file.skipped", True)
+            file_span.set_attribute("file.skip_reason", "unsupported_type")
+            file_span.set_status(Status(StatusCode.OK, "File skipped"))
+            return
+
+        try:
+            # Hash calculado em blocos fora do event loop (sem ler o arquivo inteiro na memória)
+            content_hash = await asyncio.to_thread(calcular_sha256_arquivo, arquivo)
+            file_span.set_attribute("file.size_bytes", os.path.getsize(arquivo))
+            if manifest.is_done(arquivo, content_hash):
+                logger.info(f"Pulando {nome_arquivo}: já concluído segundo o manifesto.")
+                stats.skipped += 1
+                file_span.set_attribute("file.skipped", True)
+                file_span.set_attribute("file.skip_reason", "manifest")
+                return
+
+            async with session_factory() as session:
+                existing = await SqlModelDocumentRepository(session=session).find_by_content_hash(content_hash)
+                if existing is not None:
+                    logger.info(f"Pulando {nome_arquivo}: conteúdo já ingerido como documento ID {existing.id}.")
+                    stats.skipped += 1
+                    file_span.set_attribute("file.skipped", True)
+                    file_span.set_attribute("file.skip_reason", "content_hash")
+                    await manifest.record({
+                        "path": arquivo, "status": "skipped_duplicate", "content_hash": content_hash,
+                        "document_id": existing.id,
+                    })
+                    return
+
+                logger.info(f"Processando [{arquivo_idx+1}/{stats.total}]: {nome_arquivo}...")
+                deps = await create_dependencies_for_migration(settings, session)
+                process_doc_use_case: ProcessDocumentUseCase = deps['process_doc_use_case']
+                # Executar o Use Case (pode ter spans internos); o extrator abre o arquivo pelo caminho
+                documento_processado = await process_doc_use_case.execute(
+                    file_name=nome_arquivo,
+                    file_type=tipo_arquivo,
+                    metadata={"path": arquivo, "origem": "cli_migration"}, # Metadados de origem
+                    file_path=arquivo,
+                    content_hash=content_hash,
+                )
+
+            if documento_processado and documento_processado.id is not None:
+                page_count = documento_processado.metadata.page_count or 0
+                stats.processed += 1
+                stats.pages += page_count
+                stats.chunks += documento_processado.chunks_count
+                logger.info(f"Documento {nome_arquivo} processado com sucesso. ID: {documento_processado.id}")
+                file_span.set_attribute("file.processed_doc_id", documento_processado.id)
+                file_span.set_status(Status(StatusCode.OK))
+                await manifest.record({
+                    "path": arquivo, "status": "done", "content_hash": content_hash,
+                    "document_id": documento_processado.id, "pages": page_count,
+                    "chunks": documento_processado.chunks_count,
+                })
+            else:
+                logger.error(f"Processamento de {nome_arquivo} não retornou documento válido ou ID.")
+                stats.errors += 1
+                file_span.set_status(Status(StatusCode.ERROR, "Processing returned invalid document or ID"))
+
+        except Exception as e:
+            logger.error(f"Erro ao processar arquivo {nome_arquivo}: {e}", exc_info=True)
+            stats.errors += 1
+            file_span.record_exception(e)
+            file_span.set_status(Status(StatusCode.ERROR, "Exception during file processing"))
+            # Erro por arquivo: registrado no manifesto, mas será tentado novamente ao retomar
+            await manifest.record({"path": arquivo, "status": "error", "error": str(e)[:500]})
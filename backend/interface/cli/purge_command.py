@@ -0,0 +1,39 @@
+import logging
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from config.config import Settings
+from infrastructure.telemetry.opentelemetry import get_tracer
+from infrastructure.workers.document_purger import DocumentPurger
+
+logger = logging.getLogger(__name__)
+
+async def executar_purga(settings: Settings, continuo: bool = False):
+    """
+    Purga os chunks de documentos marcados como excluídos e executa a
+    manutenção da tabela de chunks quando necessário. Por padrão executa um
+    único ciclo completo; com `continuo`, roda até a interrupção (Ctrl+C).
+    """
+    tracer = get_tracer(__name__)
+    with tracer.start_as_current_span("cli.command.purge") as span:
+        span.set_attribute("command.name", "purge")
+        span.set_attribute("purge.continuous", continuo)
+
+        db_url = settings.DATABASE_URL
+        if db_url.startswith("postgresql://"):
+            db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        engine = create_async_engine(db_url, echo=False)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        purger = DocumentPurger(engine=engine, session_factory=session_factory, settings=settings)
+        try:
+            if continuo:
+                await purger.run()
+            else:
+                total = 0
+                # Ciclos até não restarem documentos marcados (cada ciclo processa até 100)
+                while (purged := await purger.run_once()) > 0:
+                    total += purged
+                span.set_attribute("purge.documents_count", total)
+                logger.info(f"Purga concluída: {total} documento(s) removido(s).")
+        finally:
+            await engine.dispose()
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from config.config import Settings
+from infrastructure.telemetry.opentelemetry import get_tracer
+from infrastructure.workers.ingestion_worker import IngestionWorker
+from application.use_cases.document_processing.process_document import ProcessDocumentUseCase
+from infrastructure.persistence.sqlmodel.repositories.sm_document_repository import SqlModelDocumentRepository
+from infrastructure.persistence.sqlmodel.repositories.sm_chunk_repository import SqlModelChunkRepository
+from infrastructure.processors.extractors.pdf_text_extractor import PdfTextExtractor
+from infrastructure.processors.chunkers.sentence_chunker import SentenceChunker
+from infrastructure.external_services.embedding.huggingface_embedding_provider import HuggingFaceEmbeddingProvider
+from .shared import get_cached_provider
+
+logger = logging.getLogger(__name__)
+
+def _build_process_document_use_case(session: AsyncSession) -> ProcessDocumentUseCase:
+    """ Monta o use case de processamento para a sessão do worker. """
+    return ProcessDocumentUseCase(
+        document_repository=SqlModelDocumentRepository(session=session),
+        chunk_repository=SqlModelChunkRepository(session=session),
+        text_extractor=PdfTextExtractor(),
+        chunker=SentenceChunker(),
+        embedding_provider=get_cached_provider("embedding", HuggingFaceEmbeddingProvider),
+    )
+
+async def executar_workers(settings: Settings, num_workers: int):
+    """
+    Executa workers de ingestão standalone (fora da API), consumindo a fila
+    `ingestion_jobs` até a interrupção (Ctrl+C).
+    """
+    tracer = get_tracer(__name__)
+    with tracer.start_as_current_span("cli.command.worker") as span:
+        span.set_attribute("command.name", "worker")
+        span.set_attribute("workers.count", num_workers)
+
+        db_url = settings.DATABASE_URL
+        if db_url.startswith("postgresql://"):
+            db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        engine = create_async_engine(db_url, echo=False)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+        workers = [
+            IngestionWorker(session_factory=session_factory, process_use_case_factory=_build_process_document_use_case)
+            for _ in range(max(1, num_workers))
+        ]
+        logger.info(f"Iniciando {len(workers)} worker(s) de ingestão...")
+        try:
+            await asyncio.gather(*(worker.run() for worker in workers))
+        finally:
+            # Cancelamento (Ctrl+C) propaga para os workers, que devolvem jobs em andamento à fila
+            await engine.dispose()
+            logger.info("Workers de ingestão finalizados.")
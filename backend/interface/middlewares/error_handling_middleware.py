@@ -1,8 +1,9 @@
 import logging
-from fastapi import Request, status
+from typing import Tuple, Type
+
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Importar exceções customizadas
 try:
@@ -21,69 +22,65 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-class CustomErrorHandlingMiddleware(BaseHTTPMiddleware):
+# Mapeamento exceção -> (status, prefixo do detalhe, nível de log, mensagem de log, exc_info).
+# A ordem importa: a primeira classe compatível (isinstance) vence, como numa cadeia de except.
+_ERROR_MAPPINGS: Tuple[Tuple[Type[Exception], int, str, int, str, bool], ...] = (
+    (ValidationError, status.HTTP_400_BAD_REQUEST, "Erro de validação: ", logging.WARNING, "Erro de validação da aplicação", False),
+    (ValueError, status.HTTP_400_BAD_REQUEST, "Valor inválido fornecido: ", logging.WARNING, "ValueError não tratado", False),
+    (ResourceNotFoundError, status.HTTP_404_NOT_FOUND, "", logging.WARNING, "Recurso não encontrado", False),
+    (LLMServiceError, status.HTTP_503_SERVICE_UNAVAILABLE, "Serviço de linguagem indisponível: ", logging.ERROR, "Erro no serviço LLM", True),
+    (ServiceUnavailableError, status.HTTP_503_SERVICE_UNAVAILABLE, "Serviço indisponível: ", logging.ERROR, "Serviço externo indisponível", True),
+    (DatabaseError, status.HTTP_503_SERVICE_UNAVAILABLE, "Erro no serviço de banco de dados: ", logging.ERROR, "Erro de banco de dados", True), # Pode ser 500 também, dependendo do caso
+    (CoreException, status.HTTP_500_INTERNAL_SERVER_ERROR, "Erro interno na aplicação: ", logging.ERROR, "Erro Core da aplicação", True),
+)
+
+
+def _error_response(exc: Exception) -> JSONResponse:
+    """ Converte uma exceção na resposta JSON padronizada (registrando o log correspondente). """
+    for exc_type, status_code, detail_prefix, level, log_message, exc_info in _ERROR_MAPPINGS:
+        if isinstance(exc, exc_type):
+            logger.log(level, f"{log_message}: {exc}", exc_info=exc if exc_info else None)
+            return JSONResponse(status_code=status_code, content={"detail": f"{detail_prefix}{exc}"})
+
+    # --- Captura Genérica (Fallback) ---
+    logger.error("Erro inesperado não tratado:", exc_info=exc)
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "Ocorreu um erro interno inesperado no servidor."},
+    )
+
+
+class CustomErrorHandlingMiddleware:
     """
-    Middleware para capturar exceções conhecidas e desconhecidas,
+    Middleware ASGI para capturar exceções conhecidas e desconhecidas,
     retornando respostas JSON padronizadas.
+
+    Não envolve o corpo da resposta (streaming passa direto). Se a exceção
+    ocorrer depois que a resposta começou a ser enviada, não há como trocar o
+    status: o erro é registrado e re-lançado para o servidor encerrar a conexão.
     """
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        try:
-            response = await call_next(request)
-            return response
-
-        # --- Captura de Exceções Específicas ---
-
-        # except ValidationException as exc: # <-- Linha antiga comentada/removida
-        except ValidationError as exc: # <-- Linha corrigida
-            logger.warning(f"Erro de validação da aplicação: {exc}", exc_info=False)
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"detail": f"Erro de validação: {exc}"},
-            )
-        except ValueError as exc:
-             logger.warning(f"ValueError não tratado: {exc}", exc_info=False)
-             return JSONResponse(
-                 status_code=status.HTTP_400_BAD_REQUEST,
-                 content={"detail": f"Valor inválido fornecido: {exc}"},
-             )
-        except ResourceNotFoundError as exc: # Adicionado handler
-             logger.warning(f"Recurso não encontrado: {exc}", exc_info=False)
-             return JSONResponse(
-                 status_code=status.HTTP_404_NOT_FOUND,
-                 content={"detail": str(exc)},
-             )
-        except LLMServiceError as exc:
-            logger.error(f"Erro no serviço LLM: {exc}", exc_info=True)
-            return JSONResponse(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                content={"detail": f"Serviço de linguagem indisponível: {exc}"},
-            )
-        except ServiceUnavailableError as exc: # Adicionado handler
-             logger.error(f"Serviço externo indisponível: {exc}", exc_info=True)
-             return JSONResponse(
-                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                 content={"detail": f"Serviço indisponível: {exc}"},
-             )
-        except DatabaseError as exc:
-            logger.error(f"Erro de banco de dados: {exc}", exc_info=True)
-            return JSONResponse(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, # Pode ser 500 também, dependendo do caso
-                content={"detail": f"Erro no serviço de banco de dados: {exc}"},
-            )
-        except CoreException as exc:
-            logger.error(f"Erro Core da aplicação: {exc}", exc_info=True)
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": f"Erro interno na aplicação: {exc}"},
-            )
-
-        # --- Captura Genérica (Fallback) ---
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
-            logger.exception("Erro inesperado não tratado:")
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Ocorreu um erro interno inesperado no servidor."},
-            )
+            if response_started:
+                logger.error(f"Erro após o início da resposta (streaming interrompido): {exc}", exc_info=exc)
+                raise
+            response = _error_response(exc)
+            await response(scope, receive, send)
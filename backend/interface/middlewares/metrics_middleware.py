@@ -0,0 +1,62 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infrastructure.metrics.prometheus.metrics_prometheus import HTTP_REQUESTS_TOTAL, REQUEST_LATENCY, current_trace_exemplar
+
+logger = logging.getLogger(__name__)
+
+# Label das requisições que não casaram com nenhuma rota (404, scanners):
+# o path bruto não é usado para não criar uma série por URL
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+def _route_template(scope: Scope) -> str:
+    """ Template da rota que atendeu a requisição (ex: /documents/{document_id}). """
+    route = scope.get("route")
+    if route is None:
+        # Apps montados (ex: /metrics) não gravam a rota; usa o prefixo da montagem
+        return scope.get("root_path") or UNMATCHED_ENDPOINT
+    return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ENDPOINT)
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Middleware ASGI puro que registra HTTP_REQUESTS_TOTAL e REQUEST_LATENCY (com
+    exemplar do trace) por método, template da rota e status. O roteamento do
+    FastAPI grava a rota em `scope["route"]`, que é o mesmo dicionário visto
+    aqui após a resposta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500 # Default para caso de erro inesperado antes da resposta
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception("Erro não tratado durante a requisição")
+            status_code = 500
+            raise # Re-lançar exceção para ser tratada pelo servidor
+        finally:
+            method = scope["method"]
+            endpoint = _route_template(scope)
+            HTTP_REQUESTS_TOTAL.labels(method=method, endpoint=endpoint, status=str(status_code)).inc()
+            # Span do servidor (OpenTelemetryMiddleware, mais externo) ainda ativo: exemplar com o trace_id
+            REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(
+                time.perf_counter() - start_time, exemplar=current_trace_exemplar()
+            )
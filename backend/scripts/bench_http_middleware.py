@@ -0,0 +1,129 @@
+"""
+Benchmark da pilha de middlewares HTTP (ASGI puro).
+
+Compara a pilha atual (CustomErrorHandlingMiddleware + PrometheusMetricsMiddleware,
+ambos ASGI puros) com a anterior baseada em BaseHTTPMiddleware (reproduzida
+aqui: mesmo mapeamento de erros via `dispatch`/`call_next` e o hook
+`@app.middleware("http")` de métricas), chamando o app ASGI diretamente
+(sem rede, mede apenas o custo do app e dos middlewares) e reporta as
+requisições por segundo em GET /health/ping (mesmo handler do endpoint real).
+Streaming e mapeamento de erros são verificados em
+tests/interface/test_error_handling_middleware.py.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_http_middleware --requests 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI, Request  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from interface.middlewares.error_handling_middleware import CustomErrorHandlingMiddleware, _error_response  # noqa: E402
+from interface.middlewares.metrics_middleware import PrometheusMetricsMiddleware  # noqa: E402
+from infrastructure.metrics.prometheus.metrics_prometheus import HTTP_REQUESTS_TOTAL, REQUEST_LATENCY  # noqa: E402
+
+# Logs dos middlewares não devem poluir a saída do benchmark
+logging.basicConfig(level=logging.CRITICAL)
+
+
+class LegacyErrorHandlingMiddleware(BaseHTTPMiddleware):
+    """ Implementação anterior: mesmo mapeamento de erros, via BaseHTTPMiddleware. """
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as exc:
+            return _error_response(exc)
+
+
+async def legacy_metrics_middleware(request: Request, call_next):
+    """ Hook anterior (@app.middleware("http")): path bruto como label. """
+    start_time = time.time()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        HTTP_REQUESTS_TOTAL.labels(method=request.method, endpoint=request.url.path, status=str(status_code)).inc()
+        REQUEST_LATENCY.labels(method=request.method, endpoint=request.url.path).observe(time.time() - start_time)
+    return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health/ping")
+    async def ping():
+        return {"status": "ok", "message": "pong"}
+
+    if legacy:
+        app.add_middleware(LegacyErrorHandlingMiddleware)
+        app.middleware("http")(legacy_metrics_middleware)
+    else:
+        app.add_middleware(CustomErrorHandlingMiddleware)
+        app.add_middleware(PrometheusMetricsMiddleware)
+    return app
+
+
+async def call(app, path: str) -> None:
+    """ Executa uma requisição GET diretamente no app ASGI. """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600) # Cliente conectado até o fim da resposta
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def requests_per_second(app, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call(app, "/health/ping")
+
+    await asyncio.gather(*(one() for _ in range(200))) # Aquecimento
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark da pilha de middlewares HTTP")
+    parser.add_argument("--requests", type=int, default=20000, help="Requisições a /health/ping por pilha")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requisições simultâneas")
+    args = parser.parse_args()
+
+    results = {}
+    for label, legacy in (("BaseHTTPMiddleware", True), ("ASGI puro", False)):
+        results[label] = await requests_per_second(build_app(legacy), args.requests, args.concurrency)
+
+    print(f"\n/health/ping, {args.requests} requisições, concorrência {args.concurrency}:")
+    for label, rps in results.items():
+        print(f"  {label:<20} {rps:>8.0f} req/s")
+    print(f"  Ganho: {results['ASGI puro'] / results['BaseHTTPMiddleware']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark do cliente LLM assíncrono contra o stub local.
+
+Sobe `scripts.llm_stub_server` no mesmo processo (porta livre), aponta
+LLM_BASE_URL para ele e dispara --requests gerações simultâneas pelo
+NvidiaProvider. Reporta:
+  - vazão e latência (p50/p95) das gerações e o tempo de fila;
+  - máximo de requisições simultâneas no stub e conexões TCP distintas
+    (keep-alive: bem menos que o número de requisições);
+  - latência de uma tarefa curta no executor padrão (asyncio.to_thread) enquanto
+    as gerações estão em andamento, comparada com a implementação anterior
+    (cliente OpenAI síncrono em asyncio.to_thread, --reference).
+Limite de concorrência, recusa por fila e timeouts são verificados em
+tests/infrastructure/test_nvidia_provider.py.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_llm_client --requests 64 --concurrency 16 --latency 0.3 --reference
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from scripts.llm_stub_server import create_stub_app  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def executor_probe(stop: asyncio.Event, samples: list) -> None:
+    """ Mede quanto uma tarefa trivial espera por uma thread do executor padrão. """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.to_thread(lambda: None)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+
+async def run_load(generate, requests: int) -> dict:
+    latencies, probe_samples = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(executor_probe(stop, probe_samples))
+
+    async def one(i: int):
+        start = time.perf_counter()
+        await generate(f"Pergunta {i} sobre repartição de benefícios")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await probe
+    latencies.sort()
+    return {
+        "wall": wall,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "probe_max": max(probe_samples) if probe_samples else 0.0,
+        "probe_p50": statistics.median(probe_samples) if probe_samples else 0.0,
+    }
+
+async def stub_stats(base: str, reset: bool = False) -> dict:
+    async with httpx.AsyncClient() as client:
+        if reset:
+            await client.post(f"{base}/stats/reset")
+            return {}
+        return (await client.get(f"{base}/stats")).json()
+
+def print_result(label: str, result: dict, stats: dict) -> None:
+    print(
+        f"{label:<22} {result['wall']:>7.2f}s  p50={result['p50'] * 1000:>6.0f}ms  p95={result['p95'] * 1000:>6.0f}ms  "
+        f"stub: máx. simultâneas={stats['max_in_flight']:>3} conexões={stats['connections']:>3}  "
+        f"executor: p50={result['probe_p50'] * 1000:.1f}ms máx={result['probe_max'] * 1000:.0f}ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cliente LLM assíncrono (stub local)")
+    parser.add_argument("--requests", type=int, default=64, help="Gerações disparadas simultaneamente")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM_MAX_CONCURRENCY")
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência do stub (s)")
+    parser.add_argument("--reference", action="store_true", help="Comparar com OpenAI síncrono + asyncio.to_thread")
+    args = parser.parse_args()
+
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        "LLM_BASE_URL": f"{base}/v1",
+        "API_KEY_NVIDEA": "stub",
+        "LLM_MAX_CONCURRENCY": str(args.concurrency),
+        "LLM_MAX_RETRIES": "0",
+    })
+    from config.config import get_settings
+    get_settings.cache_clear()
+    from infrastructure.llm.providers.nvidia_provider import NvidiaProvider
+    from infrastructure.llm.http_client import close_llm_http_client
+
+    stub_app = create_stub_app(latency=args.latency)
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="warning", timeout_keep_alive=60))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    provider = NvidiaProvider()
+    await provider.generate_response("aquecimento")
+    print(f"{args.requests} gerações simultâneas, stub com {args.latency * 1000:.0f}ms, LLM_MAX_CONCURRENCY={args.concurrency}\n")
+
+    await stub_stats(base, reset=True)
+    result = await run_load(provider.generate_response, args.requests)
+    stats = await stub_stats(base)
+    print_result("AsyncOpenAI + pool", result, stats)
+
+    if args.reference:
+        from openai import OpenAI
+        sync_client = OpenAI(base_url=f"{base}/v1", api_key="stub", max_retries=0)
+
+        async def reference_generate(prompt: str):
+            def call():
+                return sync_client.chat.completions.create(
+                    model="stub", messages=[{"role": "user", "content": prompt}], max_tokens=64
+                )
+            return await asyncio.to_thread(call)
+
+        await stub_stats(base, reset=True)
+        result = await run_load(reference_generate, args.requests)
+        print_result("OpenAI síncrono/thread", result, await stub_stats(base))
+        sync_client.close()
+
+    await close_llm_http_client()
+    server.should_exit = True
+    await server_task
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark de hedging e fallback do NvidiaProvider contra o stub local.
+
+O stub responde em --latency, mas uma fração --slow-rate das respostas
+demora --slow-latency (cauda lenta). Compara p50/p95/p99 das gerações com
+hedging desligado e ligado, e reporta a taxa de hedge, as vitórias do hedge
+e os tokens extras (métricas do Prometheus). Por fim, mede o fallback:
+com o modelo principal lento, a geração termina no modelo de fallback
+após o orçamento LLM_LATENCY_BUDGET_SECONDS. O comportamento do hedge e do
+fallback é verificado em tests/infrastructure/test_llm_hedging.py.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_llm_hedging --requests 300 --slow-rate 0.05 --slow-latency 2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import uvicorn  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+from scripts.llm_stub_server import create_stub_app  # noqa: E402
+from scripts.bench_llm_client import free_port  # noqa: E402
+
+logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FALLBACK_MODEL = "stub/fallback-small"
+
+
+def metric(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def run(provider, requests: int, parallel: int) -> list:
+    """ Gerações em `parallel` fluxos contínuos; retorna as latências. """
+    latencies = []
+    counter = iter(range(requests))
+
+    async def stream():
+        for i in counter:
+            start = time.perf_counter()
+            await provider.generate_response(f"Pergunta {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(stream() for _ in range(parallel)))
+    return latencies
+
+def configure(**values) -> None:
+    from config.config import get_settings
+    os.environ.update({key: str(value) for key, value in values.items()})
+    get_settings.cache_clear()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de hedging/fallback do LLM (stub local)")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--parallel", type=int, default=4, help="Fluxos de geração simultâneos")
+    parser.add_argument("--latency", type=float, default=0.1, help="Latência típica do stub (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fração de respostas lentas")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="Latência da cauda (s)")
+    args = parser.parse_args()
+
+    port = free_port()
+    configure(
+        LLM_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        API_KEY_NVIDEA="stub",
+        LLM_MODEL="stub/main",
+        LLM_MAX_RETRIES=0,
+        LLM_MAX_CONCURRENCY=args.parallel * 2,
+        LLM_HEDGE_MIN_SAMPLES=20,
+        LLM_HEDGE_INITIAL_DELAY_SECONDS=args.latency * 3,
+        LLM_HEDGE_MIN_DELAY_SECONDS=args.latency,
+    )
+    from infrastructure.llm.providers.nvidia_provider import NvidiaProvider
+    from infrastructure.llm.http_client import close_llm_http_client
+
+    stub_app = create_stub_app(latency=args.latency, jitter=args.latency / 2, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="warning", timeout_keep_alive=60))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    print(f"{args.requests} gerações ({args.parallel} em paralelo); stub: {args.latency * 1000:.0f}ms, "
+          f"{args.slow_rate:.0%} com {args.slow_latency * 1000:.0f}ms\n")
+    print(f"{'modo':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8} {'hedges':>8} {'vitórias hedge':>15} {'tokens extras':>14}")
+    for mode, enabled in (("sem hedge", False), ("hedge", True)):
+        configure(LLM_HEDGE_ENABLED=enabled)
+        provider = NvidiaProvider()
+        sent_before = metric("llm_hedge_requests_total", {"outcome": "sent"})
+        wins_before = metric("llm_hedge_wins_total", {"winner": "hedge"})
+        tokens_before = metric("llm_hedge_extra_tokens_total", {"type": "input"})
+        latencies = await run(provider, args.requests, args.parallel)
+        sent = metric("llm_hedge_requests_total", {"outcome": "sent"}) - sent_before
+        wins = metric("llm_hedge_wins_total", {"winner": "hedge"}) - wins_before
+        tokens = metric("llm_hedge_extra_tokens_total", {"type": "input"}) - tokens_before
+        p99 = percentile(latencies, 0.99)
+        print(
+            f"{mode:<10} {percentile(latencies, 0.5) * 1000:>6.0f}ms {percentile(latencies, 0.95) * 1000:>6.0f}ms "
+            f"{p99 * 1000:>6.0f}ms {max(latencies) * 1000:>6.0f}ms {sent / args.requests:>8.1%} "
+            f"{(wins / sent if sent else 0):>15.0%} {tokens:>14.0f}"
+        )
+
+    # Fallback: modelo principal sempre lento, orçamento curto
+    stub_app.state.model_latency = {"stub/main": args.slow_latency, FALLBACK_MODEL: args.latency}
+    budget = args.latency * 4
+    configure(LLM_HEDGE_ENABLED=False, LLM_LATENCY_BUDGET_SECONDS=budget, LLM_FALLBACK_MODEL=FALLBACK_MODEL)
+    provider = NvidiaProvider()
+    fallbacks_before = metric("llm_fallback_total", {"model": FALLBACK_MODEL})
+    start = time.perf_counter()
+    await provider.generate_response("pergunta com modelo principal lento")
+    elapsed = time.perf_counter() - start
+    fallbacks = metric("llm_fallback_total", {"model": FALLBACK_MODEL}) - fallbacks_before
+    print(f"\nFallback: {elapsed * 1000:.0f}ms (orçamento {budget * 1000:.0f}ms + modelo menor), fallbacks={fallbacks:.0f}")
+
+    await close_llm_http_client()
+    server.should_exit = True
+    await server_task
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark de chunking por sentenças.
+
+Gera páginas sintéticas em português (padrão: 500) e mede a vazão em
+páginas/s de:
+  - por página: uma chamada `split_page_to_chunks` (um salto de thread) por página;
+  - lote: todas as páginas em uma única chamada `split_pages_to_chunks`;
+  - pool: o mesmo lote distribuído no pool de processos;
+para os divisores punkt e regex. Também reporta a concordância das
+fronteiras de sentença do regex com o punkt e, com --tokens, o maior chunk
+em tokens do modelo de embeddings.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_sentence_chunking --pages 500 --workers 4 --tokens
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from infrastructure.processors.chunkers.sentence_chunker import (  # noqa: E402
+    SENTENCE_SPLITTERS,
+    SentenceChunker,
+    _get_tokenizer,
+    split_sentences_regex,
+)
+from infrastructure.processors.process_pool import shutdown_process_pools  # noqa: E402
+from config.config import get_settings  # noqa: E402
+import nltk  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PARAGRAPH = (
+    "Nos termos do art. 5º da Lei nº 13.123, o acesso ao patrimônio genético depende de cadastro. "
+    "O Sr. Silva, representante da empresa, apresentou o pedido às fls. 12! "
+    "A repartição de benefícios será de 1% da receita líquida anual? "
+    "Conforme o parecer do Dr. J. Souza, a exigência é aplicável desde 2015. "
+)
+
+def build_synthetic_pages(pages: int) -> list:
+    """ Páginas com ~2.500 caracteres cada, com abreviações e números. """
+    return [(page + 1, f"Página {page + 1}. " + PARAGRAPH * 8) for page in range(pages)]
+
+def boundary_agreement(pages: list) -> float:
+    """ Percentual de sentenças idênticas entre o divisor regex e o punkt. """
+    same = total = 0
+    for _, text in pages:
+        punkt = nltk.sent_tokenize(text, language='portuguese')
+        regex = set(split_sentences_regex(text))
+        total += len(punkt)
+        same += sum(1 for sentence in punkt if sentence in regex)
+    return 100 * same / total if total else 0.0
+
+async def bench_per_page(chunker: SentenceChunker, pages: list) -> float:
+    start = time.perf_counter()
+    for page_number, text in pages:
+        await chunker.split_page_to_chunks(page_number, text)
+    return time.perf_counter() - start
+
+async def bench_batch(chunker: SentenceChunker, pages: list) -> float:
+    start = time.perf_counter()
+    await chunker.split_pages_to_chunks(pages)
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de chunking por sentenças")
+    parser.add_argument("--pages", type=int, default=500, help="Número de páginas sintéticas")
+    parser.add_argument("--workers", type=int, default=0, help="Processos do pool (0 = cpu_count)")
+    parser.add_argument("--tokens", action="store_true", help="Incluir o modo CHUNK_SIZE_UNIT=tokens (carrega o tokenizer)")
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ["CHUNK_PROCESS_POOL_WORKERS"] = str(args.workers)
+    # O próprio benchmark decide quando usar o pool
+    os.environ["CHUNK_PROCESS_POOL_MIN_CHARS"] = "0"
+    get_settings.cache_clear()
+
+    pages = build_synthetic_pages(args.pages)
+    print(f"{args.pages} páginas sintéticas ({sum(len(t) for _, t in pages) / 1024:.0f} KB de texto)")
+    print(f"Concordância regex x punkt: {boundary_agreement(pages):.1f}% das sentenças\n")
+
+    units = ["chars", "tokens"] if args.tokens else ["chars"]
+    print(f"{'divisor':<8} {'unidade':<8} {'por página':>12} {'lote':>10} {'pool':>10}   (páginas/s)")
+    for unit in units:
+        for splitter in SENTENCE_SPLITTERS:
+            chunker = SentenceChunker(splitter=splitter, unit=unit)
+            await bench_batch(chunker, pages[:2]) # Aquecimento (modelos/tokenizer)
+            per_page = await bench_per_page(chunker, pages)
+            batch = await bench_batch(chunker, pages)
+
+            get_settings.cache_clear()
+            os.environ["CHUNK_PROCESS_POOL_MIN_CHARS"] = "1"
+            pooled_chunker = SentenceChunker(splitter=splitter, unit=unit)
+            await bench_batch(pooled_chunker, pages[:8]) # Aquecer o pool (spawn) fora da medição
+            pooled = await bench_batch(pooled_chunker, pages)
+            os.environ["CHUNK_PROCESS_POOL_MIN_CHARS"] = "0"
+            get_settings.cache_clear()
+
+            print(
+                f"{splitter:<8} {unit:<8} {args.pages / per_page:>12.0f} "
+                f"{args.pages / batch:>10.0f} {args.pages / pooled:>10.0f}"
+            )
+            if unit == "tokens":
+                tokenizer = _get_tokenizer(get_settings().EMBEDDING_MODEL)
+                chunks = [chunk["text"] for page in await chunker.split_pages_to_chunks(pages) for chunk in page]
+                largest = max(len(ids) for ids in tokenizer(chunks)["input_ids"])
+                print(f"{'':<17} maior chunk: {largest} tokens (janela: {get_settings().CHUNK_MAX_TOKENS})")
+
+    shutdown_process_pools()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark do normalizador de texto.
+
+Compara a vazão (textos/s e MB/s) de `normalize_text`,
+`clean_text_for_embedding` e `clean_query` com as implementações de
+referência (re.sub em sequência, reproduzidas abaixo), sem o efeito do cache
+LRU (que é medido à parte, com textos repetidos). A paridade das saídas é
+verificada em tests/infrastructure/test_text_normalizer.py.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_text_normalizer --texts 2000
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from infrastructure.processors.normalizers import text_normalizer  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+# --- Implementações de referência (versão original) ---
+
+def reference_normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    text = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    while "\n\n\n" in text:
+        text = text.replace("\n\n\n", "\n\n")
+    uppercase_ratio = sum(1 for c in text if c.isupper()) / max(len(text), 1)
+    if uppercase_ratio > 0.3:
+        sentences = re.split(r"(?<=[.!?])\s+", text)
+        sentences = [s.capitalize() for s in sentences if s]
+        text = " ".join(sentences)
+    return text.strip()
+
+def reference_clean_text_for_embedding(text: str) -> str:
+    if not text:
+        return ""
+    text = text.lower()
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"https?://\S+|www\.\S+", " ", text)
+    text = re.sub(r"\S+@\S+", " ", text)
+    text = re.sub(r"\b\d+\b", " ", text)
+    text = re.sub(r"([.!?]){2,}", r"\1", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+def reference_clean_query(query: str) -> str:
+    if not query:
+        return ""
+    query = unicodedata.normalize("NFKC", query)
+    query = re.sub(r"[^\w\s.!?]+", " ", query, flags=re.UNICODE)
+    query = re.sub(r"\s+", " ", query)
+    return query.strip()
+
+
+PAIRS = [
+    ("normalize_text", reference_normalize_text, text_normalizer.normalize_text),
+    ("clean_text_for_embedding", reference_clean_text_for_embedding, text_normalizer.clean_text_for_embedding),
+    ("clean_query", reference_clean_query, text_normalizer.clean_query),
+]
+
+def build_corpus(count: int) -> list:
+    """ Textos do tamanho de um chunk (~800 caracteres), todos distintos. """
+    base = (
+        "Nos termos do Art. 5º da Lei nº 13.123/2015, o acesso ao patrimônio genético "
+        "depende de cadastro no SisGen (https://sisgen.gov.br). Dúvidas: contato@mma.gov.br. "
+        "A repartição de benefícios será de 1% da receita líquida anual!!! Consulte o anexo III... "
+    )
+    return [f"Trecho {i}: " + base * 3 for i in range(count)]
+
+def bench(func, texts: list, clear_cache: bool) -> float:
+    if clear_cache:
+        for _, _, optimized in PAIRS:
+            inner = getattr(text_normalizer, f"_{optimized.__name__}", None)
+            if inner is not None and hasattr(inner, "cache_clear"):
+                inner.cache_clear()
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do normalizador de texto")
+    parser.add_argument("--texts", type=int, default=2000, help="Textos distintos por medição")
+    args = parser.parse_args()
+
+    texts = build_corpus(args.texts)
+    megabytes = sum(len(t) for t in texts) / 1e6
+    print(f"{'função':<26} {'original (t/s)':>15} {'novo (t/s)':>12} {'MB/s novo':>10} {'speedup':>8} {'com cache':>10}")
+    for name, reference, optimized in PAIRS:
+        ref_time = bench(reference, texts, clear_cache=False)
+        new_time = bench(optimized, texts, clear_cache=True)
+        cached_time = bench(optimized, texts, clear_cache=False) # Mesmos textos: acertos no LRU
+        print(
+            f"{name:<26} {len(texts) / ref_time:>15.0f} {len(texts) / new_time:>12.0f} "
+            f"{megabytes / new_time:>10.1f} {ref_time / new_time:>7.1f}x {len(texts) / cached_time:>10.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark do custo de tracing por requisição de chat, por configuração.
+
+Simula a árvore de spans de POST /chat (span do servidor, use case e ~10
+etapas com os mesmos atributos, incluindo query.text) usando
+`build_tracer_provider` com um exportador em memória (sem rede) e mede:
+  - tempo por requisição (µs), incluindo o flush final do BatchSpanProcessor;
+  - spans exportados por requisição;
+  - no modo tail: se todos os traces lentos ou com erro foram mantidos;
+  - no modo com limites: se query.text foi truncado.
+Uma fração das requisições é "lenta" (span raiz com duração acima do limiar,
+via timestamps explícitos) e outra termina com erro.
+O script sai com código 1 se alguma verificação falhar.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_tracing --requests 5000 --query-chars 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from opentelemetry import trace  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+from opentelemetry.trace import SpanKind, Status, StatusCode  # noqa: E402
+
+from config.config import Settings  # noqa: E402
+from infrastructure.telemetry.opentelemetry import build_tracer_provider  # noqa: E402
+
+STAGES = (
+    "query_processing.prepare_and_embed", "vector_search.find_similar", "keyword_search.find_by_keyword",
+    "ranking.rrf", "ranking.rerank_after_rrf", "context_compression", "context_preparation",
+    "prompt_building", "llm_generation", "llm.attempt",
+)
+
+CONFIGS = {
+    "sem tracing (NoOp)": None,
+    "none": {"OTEL_TRACES_EXPORTER": "none"},
+    "always_on sem limites": {"OTEL_TRACES_SAMPLER_RATIO": 1.0, "OTEL_SPAN_ATTRIBUTE_MAX_LENGTH": 0},
+    "always_on + limites": {"OTEL_TRACES_SAMPLER_RATIO": 1.0},
+    "ratio 0.1": {"OTEL_TRACES_SAMPLER_RATIO": 0.1},
+    "tail (0.1 + lentos/erros)": {"OTEL_TRACES_SAMPLER_RATIO": 0.1, "OTEL_TAIL_SAMPLING_ENABLED": True},
+}
+
+
+def simulate_request(tracer: trace.Tracer, query: str, slow: bool, error: bool, slow_threshold: float) -> None:
+    """ Reproduz os spans e atributos de uma requisição de chat. """
+    now = time.time_ns()
+    duration = int((slow_threshold * 1.5 if slow else 0.2) * 1e9)
+    root = tracer.start_span("POST /chat", kind=SpanKind.SERVER, start_time=now - duration)
+    with trace.use_span(root, end_on_exit=False):
+        root.set_attribute("http.method", "POST")
+        root.set_attribute("http.route", "/chat")
+        with tracer.start_as_current_span("process_query_use_case.execute", kind=SpanKind.SERVER) as span:
+            span.set_attribute("query.text", query)
+            span.set_attribute("query.length", len(query))
+            span.set_attribute("param.max_results", 4)
+            for i, stage in enumerate(STAGES):
+                with tracer.start_as_current_span(stage) as stage_span:
+                    stage_span.set_attribute("query.clean_text", query)
+                    stage_span.set_attribute("duration_ms", 10 + i)
+                    stage_span.set_attribute("result.chunks_found_count", 16)
+                    if error and stage == "llm_generation":
+                        stage_span.set_status(Status(StatusCode.ERROR, description="LLM indisponível"))
+                    else:
+                        stage_span.set_status(Status(StatusCode.OK))
+    root.end(end_time=now)
+
+
+def run(label: str, overrides: Optional[dict], args) -> Dict[str, float]:
+    settings = Settings(**overrides) if overrides is not None else None
+    exporter = InMemorySpanExporter()
+    if settings is None:
+        provider = trace.NoOpTracerProvider()
+    elif settings.OTEL_TRACES_EXPORTER == "none":
+        provider = build_tracer_provider("bench", settings)
+    else:
+        provider = build_tracer_provider("bench", settings, exporter=exporter)
+    tracer = provider.get_tracer(__name__)
+    slow_threshold = settings.OTEL_TAIL_SLOW_THRESHOLD_SECONDS if settings else 2.0
+
+    rng = random.Random(42)
+    query = ("Como calcular a repartição de benefícios do patrimônio genético? " * 100)[: args.query_chars]
+    kinds = [("slow" if r < args.slow_rate else "error" if r < args.slow_rate + args.error_rate else "ok")
+             for r in (rng.random() for _ in range(args.requests))]
+
+    start = time.perf_counter()
+    for kind in kinds:
+        simulate_request(tracer, query, kind == "slow", kind == "error", slow_threshold)
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+    elapsed = time.perf_counter() - start
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+    spans = exporter.get_finished_spans()
+    roots = [s for s in spans if s.parent is None]
+    slow_kept = sum(1 for s in roots if s.end_time - s.start_time >= slow_threshold * 1e9)
+    error_traces = {s.context.trace_id for s in spans if s.status.status_code == StatusCode.ERROR}
+    query_lengths = {len(s.attributes["query.text"]) for s in spans if "query.text" in s.attributes}
+    return {
+        "us_per_request": elapsed / args.requests * 1e6,
+        "spans_per_request": len(spans) / args.requests,
+        "traces": len(roots),
+        "slow_total": kinds.count("slow"),
+        "slow_kept": slow_kept,
+        "error_total": kinds.count("error"),
+        "error_kept": len(error_traces),
+        "query_text_length": max(query_lengths) if query_lengths else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do custo de tracing por configuração")
+    parser.add_argument("--requests", type=int, default=5000, help="Requisições simuladas por configuração")
+    parser.add_argument("--query-chars", type=int, default=2000, help="Tamanho de query.text")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="Fração de requisições lentas")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fração de requisições com erro")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{args.requests} requisições simuladas, query.text com {args.query_chars} caracteres\n")
+    print(f"{'configuração':<28} {'µs/req':>8} {'spans/req':>10} {'traces':>7} {'lentos':>9} {'erros':>9} {'query.text':>11}")
+    for label, overrides in CONFIGS.items():
+        r = run(label, overrides, args)
+        print(
+            f"{label:<28} {r['us_per_request']:>8.1f} {r['spans_per_request']:>10.2f} {r['traces']:>7} "
+            f"{r['slow_kept']:>4}/{r['slow_total']:<4} {r['error_kept']:>4}/{r['error_total']:<4} {r['query_text_length']:>11}"
+        )
+        if label.startswith("tail") and (r["slow_kept"] != r["slow_total"] or r["error_kept"] != r["error_total"]):
+            failures.append(f"{label}: traces lentos/com erro descartados")
+        if label == "always_on + limites" and r["query_text_length"] > Settings().OTEL_SPAN_ATTRIBUTE_MAX_LENGTH:
+            failures.append(f"{label}: query.text não truncado ({r['query_text_length']})")
+        if label == "none" and r["traces"]:
+            failures.append(f"{label}: spans exportados")
+
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
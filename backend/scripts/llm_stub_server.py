@@ -0,0 +1,117 @@
+"""
+Servidor stub compatível com a API OpenAI (POST /v1/chat/completions).
+
+Responde após uma latência configurável, sem chamar nenhum modelo, para
+testar o NvidiaProvider (pool de conexões, limite de concorrência, timeouts,
+hedging e fallback) sem consumir a API real. Registra o número máximo de requisições
+simultâneas recebidas (GET /stats).
+
+Uso (a partir de backend/):
+    python -m scripts.llm_stub_server --port 8089 --latency 0.5
+    python -m scripts.llm_stub_server --latency 0.3 --slow-rate 0.05 --slow-latency 4 --model-latency meta/llama3-8b-instruct=0.1
+    LLM_BASE_URL=http://127.0.0.1:8089/v1 API_KEY_NVIDEA=stub uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_latency: float = 5.0,
+    model_latency: Optional[Dict[str, float]] = None,
+) -> FastAPI:
+    """
+    Cria o app stub. `jitter` soma até esse valor (s) à latência; `failure_rate`
+    responde 503; `slow_rate` é a fração de respostas com `slow_latency` (cauda
+    lenta, para testar hedging); `model_latency` sobrepõe a latência por modelo
+    (ex: modelo de fallback mais rápido). Tudo pode ser alterado em execução via `app.state`.
+    """
+    app = FastAPI(title="LLM stub (OpenAI compatível)")
+    app.state.latency, app.state.jitter, app.state.failure_rate = latency, jitter, failure_rate
+    app.state.slow_rate, app.state.slow_latency = slow_rate, slow_latency
+    app.state.model_latency = dict(model_latency or {})
+    app.state.stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "connections": set()}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats = app.state.stats
+        body = await request.json()
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        client = request.scope.get("client")
+        if client:
+            stats["connections"].add(tuple(client))
+        try:
+            model = body.get("model", "stub")
+            if model in app.state.model_latency:
+                delay = app.state.model_latency[model]
+            elif app.state.slow_rate and random.random() < app.state.slow_rate:
+                delay = app.state.slow_latency
+            else:
+                delay = app.state.latency + random.uniform(0, app.state.jitter)
+            await asyncio.sleep(delay)
+            if app.state.failure_rate and random.random() < app.state.failure_rate:
+                return JSONResponse(status_code=503, content={"error": {"message": "stub: falha simulada"}})
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            content = f"Resposta stub para: {prompt[:80]}"
+            return {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()), "total_tokens": 0},
+            }
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        stats = app.state.stats
+        return {
+            "requests": stats["requests"],
+            "in_flight": stats["in_flight"],
+            "max_in_flight": stats["max_in_flight"],
+            "connections": len(stats["connections"]),
+        }
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        app.state.stats.update({"requests": 0, "max_in_flight": 0, "connections": set()})
+        return {"status": "ok"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub compatível OpenAI para testes do LLM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latência de cada resposta (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latência adicional aleatória máxima (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fração de respostas lentas (cauda)")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Latência das respostas lentas (s)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODELO=S", help="Latência fixa por modelo (repetível)")
+    args = parser.parse_args()
+    model_latency = {name: float(value) for name, value in (item.rsplit("=", 1) for item in args.model_latency)}
+    app = create_stub_app(args.latency, args.jitter, args.failure_rate, args.slow_rate, args.slow_latency, model_latency)
+    # keep-alive longo como o de provedores reais (o padrão do uvicorn, 5s, é menor que LLM_KEEPALIVE_SECONDS)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", timeout_keep_alive=60)
+
+
+if __name__ == "__main__":
+    main()
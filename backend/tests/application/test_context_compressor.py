@@ -0,0 +1,98 @@
+"""
+Testes da compressão extrativa do contexto (ExtractiveContextCompressor).
+"""
+
+from typing import List
+
+from application.interfaces.embedding_cache import TRAFFIC_CONTEXT
+from application.ranking.context_compressor import GAP_MARKER, ExtractiveContextCompressor
+from domain.aggregates.document.chunk import Chunk
+from domain.value_objects.embedding import Embedding
+
+QUERY_VECTOR = [1.0, 0.0]
+
+
+class KeywordEmbeddingProvider:
+    """ Sentenças com "benefício" apontam na direção da query; as demais são ortogonais. """
+
+    def __init__(self, zero: bool = False):
+        self.zero = zero
+        self.calls: List[tuple] = []
+
+    async def embed_batch(self, texts: List[str], traffic: str = "ingestion") -> List[Embedding]:
+        self.calls.append((list(texts), traffic))
+        if self.zero:
+            return [Embedding(vector=[0.0, 0.0]) for _ in texts]
+        return [Embedding(vector=[1.0, 0.0] if "benefício" in text else [0.0, 1.0]) for text in texts]
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def build_compressor(provider, max_tokens: int = 100) -> ExtractiveContextCompressor:
+    return ExtractiveContextCompressor(
+        embedding_provider=provider, count_tokens=count_words, max_tokens=max_tokens, min_sentence_chars=10
+    )
+
+
+async def test_keeps_relevant_sentences_in_original_order():
+    chunk = Chunk(id=1, text=(
+        "O benefício é repartido entre as comunidades. "
+        "A sede da empresa fica em outra cidade distante. "
+        "O acordo define como o benefício é pago anualmente."
+    ))
+    provider = KeywordEmbeddingProvider()
+
+    result = await build_compressor(provider, max_tokens=16).compress(QUERY_VECTOR, [(chunk, 0.8)])
+
+    assert len(result.passages) == 1
+    passage = result.passages[0]
+    assert passage.text == (
+        "O benefício é repartido entre as comunidades." + GAP_MARKER
+        + "O acordo define como o benefício é pago anualmente."
+    )
+    assert (passage.sentences_kept, passage.sentences_total) == (2, 3)
+    assert passage.score == 0.8
+    assert result.compressed_tokens <= 16 + count_words(GAP_MARKER)
+
+
+async def test_removes_overlap_and_short_fragments():
+    first = Chunk(id=1, text="Página 3. O benefício é repartido entre as comunidades.")
+    second = Chunk(id=2, text="O benefício é repartido entre as comunidades. O benefício tem prazo de dez anos.")
+    provider = KeywordEmbeddingProvider()
+
+    result = await build_compressor(provider).compress(QUERY_VECTOR, [(first, 0.9), (second, 0.7)])
+
+    assert result.duplicate_sentences == 1
+    sent_texts, _ = provider.calls[0]
+    assert "Página 3." not in sent_texts
+    assert [passage.text for passage in result.passages] == [
+        "O benefício é repartido entre as comunidades.",
+        "O benefício tem prazo de dez anos.",
+    ]
+
+
+async def test_oversized_best_sentence_is_truncated_to_budget():
+    chunk = Chunk(id=1, text="O benefício " + " ".join(f"palavra{i}" for i in range(30)) + ".")
+
+    result = await build_compressor(KeywordEmbeddingProvider(), max_tokens=5).compress(QUERY_VECTOR, [(chunk, 1.0)])
+
+    assert result.passages[0].text == "O benefício palavra0 palavra1 palavra2"
+    assert result.compressed_tokens == 5
+
+
+async def test_sentences_bypass_embedding_cache():
+    chunk = Chunk(id=1, text="O benefício é repartido entre as comunidades.")
+    provider = KeywordEmbeddingProvider()
+
+    await build_compressor(provider).compress(QUERY_VECTOR, [(chunk, 1.0)])
+
+    assert [traffic for _, traffic in provider.calls] == [TRAFFIC_CONTEXT]
+
+
+async def test_returns_none_without_usable_embeddings():
+    chunk = Chunk(id=1, text="O benefício é repartido entre as comunidades.")
+
+    assert await build_compressor(KeywordEmbeddingProvider(zero=True)).compress(QUERY_VECTOR, [(chunk, 1.0)]) is None
+    assert await build_compressor(KeywordEmbeddingProvider()).compress(QUERY_VECTOR, []) is None
@@ -0,0 +1,68 @@
+"""
+Testes dos decorators de log, tempo e métricas em casos de uso async: o
+empilhamento preserva a corrotina e as métricas medem a execução aguardada.
+"""
+
+import asyncio
+import inspect
+
+import pytest
+from prometheus_client import REGISTRY
+
+from application.decorators.logging_decorator import log_execution
+from application.decorators.metrics_decorator import track_stage, track_use_case_metrics
+from application.decorators.timing_decorator import log_execution_time
+
+WORK_SECONDS = 0.02
+
+
+class StackedUseCase:
+    @log_execution
+    @log_execution_time
+    @track_use_case_metrics
+    async def execute(self, fail: bool = False) -> str:
+        await asyncio.sleep(WORK_SECONDS)
+        if fail:
+            raise ValueError("falha simulada")
+        return "ok"
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stacked_decorators_keep_coroutine_function():
+    assert inspect.iscoroutinefunction(StackedUseCase.execute)
+    assert StackedUseCase.execute.__name__ == "execute"
+
+
+async def test_stacked_decorators_record_awaited_latency():
+    labels = {"use_case": "StackedUseCase"}
+    latency_before = sample("use_case_latency_seconds_sum", labels)
+    errors_before = sample("use_case_calls_total", {**labels, "status": "error"})
+
+    assert await StackedUseCase().execute() == "ok"
+    with pytest.raises(ValueError):
+        await StackedUseCase().execute(fail=True)
+
+    # Latência da corrotina aguardada (não só da sua criação) nas duas chamadas
+    assert sample("use_case_latency_seconds_sum", labels) - latency_before >= 2 * WORK_SECONDS
+    assert sample("use_case_calls_total", {**labels, "status": "error"}) - errors_before == 1
+
+
+async def test_track_stage_feeds_retrieval_time_by_phase():
+    @track_stage("teste_async")
+    async def async_stage():
+        await asyncio.sleep(WORK_SECONDS)
+
+    @track_stage("teste_sync")
+    def sync_stage():
+        raise RuntimeError("etapa falhou")
+
+    await async_stage()
+    with pytest.raises(RuntimeError):
+        sync_stage()
+
+    assert sample("rag_retrieval_time_seconds_count", {"phase": "teste_async"}) == 1
+    assert sample("rag_retrieval_time_seconds_sum", {"phase": "teste_async"}) >= WORK_SECONDS
+    assert sample("rag_retrieval_time_seconds_count", {"phase": "teste_sync"}) == 1 # Registrada mesmo com falha
@@ -0,0 +1,59 @@
+"""
+Testes da diversificação por Maximal Marginal Relevance.
+"""
+
+from application.ranking.mmr import maximal_marginal_relevance
+from domain.aggregates.document.chunk import Chunk
+
+
+def candidate(chunk_id: int, vector, score: float):
+    return Chunk(id=chunk_id, text=f"chunk {chunk_id}", vector=vector), score
+
+
+def ids(selection):
+    return [chunk.id for chunk, _ in selection]
+
+
+def test_near_duplicate_is_skipped_for_diverse_chunk():
+    candidates = [
+        candidate(1, [1.0, 0.0], 0.9),
+        candidate(2, [0.99, 0.01], 0.85), # Quase duplicata do primeiro
+        candidate(3, [0.0, 1.0], 0.6),
+    ]
+
+    assert ids(maximal_marginal_relevance(candidates, 2, lambda_mult=0.5)) == [1, 3]
+
+
+def test_lambda_one_keeps_relevance_order():
+    candidates = [
+        candidate(1, [1.0, 0.0], 0.9),
+        candidate(2, [1.0, 0.0], 0.8),
+        candidate(3, [0.0, 1.0], 0.1),
+    ]
+
+    assert ids(maximal_marginal_relevance(candidates, 3, lambda_mult=1.0)) == [1, 2, 3]
+
+
+def test_original_scores_are_preserved():
+    candidates = [candidate(1, [1.0, 0.0], 12.5), candidate(2, [0.0, 1.0], -3.0)]
+
+    assert [score for _, score in maximal_marginal_relevance(candidates, 2)] == [12.5, -3.0]
+
+
+def test_missing_embedding_returns_first_k_unchanged():
+    candidates = [
+        candidate(1, [1.0, 0.0], 0.9),
+        candidate(2, None, 0.8),
+        candidate(3, [0.0, 1.0], 0.7),
+    ]
+
+    assert ids(maximal_marginal_relevance(candidates, 2, lambda_mult=0.0)) == [1, 2]
+
+
+def test_edge_cases():
+    candidates = [candidate(1, [1.0, 0.0], 0.9), candidate(2, [0.0, 0.0], 0.9)]
+
+    assert maximal_marginal_relevance([], 3) == []
+    assert maximal_marginal_relevance(candidates, 0) == []
+    # k maior que o número de candidatos; vetor nulo e scores iguais não quebram a seleção
+    assert sorted(ids(maximal_marginal_relevance(candidates, 5))) == [1, 2]
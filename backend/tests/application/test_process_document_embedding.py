@@ -0,0 +1,74 @@
+"""
+Testes da etapa de embeddings do ProcessDocumentUseCase: uma falha na janela
+descarta apenas as páginas com erro.
+"""
+
+from types import SimpleNamespace
+
+from application.use_cases.document_processing.process_document import ProcessDocumentUseCase, _PipelineState
+from domain.value_objects.embedding import Embedding
+
+
+class FakeEmbedder:
+    """ Falha em qualquer lote que contenha um texto de `bad_texts`. """
+
+    def __init__(self, bad_texts):
+        self.bad_texts = set(bad_texts)
+        self.calls = []
+
+    async def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.bad_texts.intersection(texts):
+            raise RuntimeError("CUDA out of memory")
+        return [Embedding(vector=[float(len(text)), 1.0]) for text in texts]
+
+
+def build_use_case(embedder):
+    chunk_repo = SimpleNamespace(save_batch_with_embeddings=None)
+    return ProcessDocumentUseCase(
+        document_repository=SimpleNamespace(),
+        chunk_repository=chunk_repo,
+        text_extractor=SimpleNamespace(),
+        chunker=SimpleNamespace(),
+        embedding_provider=embedder,
+    )
+
+
+def window_of(pages):
+    return [(page, {"text": text, "metadata": {"page_number": page}}) for page, texts in pages for text in texts]
+
+
+async def test_window_is_embedded_in_a_single_call():
+    embedder = FakeEmbedder(bad_texts=[])
+    use_case = build_use_case(embedder)
+    state = _PipelineState(document_id=1, file_name="doc.pdf")
+
+    result = await use_case._embed_window(window_of([(1, ["a", "bb"]), (2, ["ccc"])]), state)
+
+    assert len(embedder.calls) == 1
+    assert [chunk.text for chunk, _ in result] == ["a", "bb", "ccc"]
+    assert [chunk.position for chunk, _ in result] == [0, 1, 2]
+
+
+async def test_failure_drops_only_the_failing_page():
+    embedder = FakeEmbedder(bad_texts=["ruim"])
+    use_case = build_use_case(embedder)
+    state = _PipelineState(document_id=1, file_name="doc.pdf")
+
+    result = await use_case._embed_window(window_of([(1, ["a", "bb"]), (2, ["ruim", "x"]), (3, ["ccc"])]), state)
+
+    assert [chunk.page_number for chunk, _ in result] == [1, 1, 3]
+    assert [chunk.position for chunk, _ in result] == [0, 1, 2]
+    assert all(vector is not None for _, vector in result)
+    assert state.total_chunks_failed == 2
+    assert len(embedder.calls) == 4 # Janela inteira + uma chamada por página
+
+
+async def test_single_page_failure_is_not_retried():
+    embedder = FakeEmbedder(bad_texts=["ruim"])
+    use_case = build_use_case(embedder)
+    state = _PipelineState(document_id=1, file_name="doc.pdf")
+
+    assert await use_case._embed_window(window_of([(5, ["ruim", "x"])]), state) == []
+    assert state.total_chunks_failed == 2
+    assert len(embedder.calls) == 1
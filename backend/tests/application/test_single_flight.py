@@ -0,0 +1,209 @@
+"""
+Testes do SingleFlight e da coalescência de consultas do ProcessQueryUseCase.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from application.concurrency.single_flight import SingleFlight
+from application.use_cases.rag.process_query_use_case import ProcessQueryUseCase
+from config.config import get_settings
+from domain.aggregates.document.chunk import Chunk
+from domain.value_objects.embedding import Embedding
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("teste")
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"valor": 42}
+
+    pending = [asyncio.create_task(flight.do("chave", work)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    outcomes = await asyncio.gather(*pending)
+
+    assert calls == 1
+    assert [is_leader for _, is_leader in outcomes] == [True, False, False]
+    assert all(result == {"valor": 42} for result, _ in outcomes)
+
+
+async def test_key_is_released_after_completion():
+    flight = SingleFlight("teste")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("chave", work) == (1, True)
+    assert await flight.do("chave", work) == (2, True)
+
+
+async def test_error_is_delivered_to_all_callers():
+    flight = SingleFlight("teste")
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        raise RuntimeError("falhou")
+
+    pending = [asyncio.create_task(flight.do("chave", work)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    release.set()
+    outcomes = await asyncio.gather(*pending, return_exceptions=True)
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+async def test_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight("teste")
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "resultado"
+
+    leader = asyncio.create_task(flight.do("chave", work))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(flight.do("chave", work))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+
+    assert await follower == ("resultado", False)
+
+
+# --- Coalescência no ProcessQueryUseCase com sessões reais ---
+
+class SessionChunkRepository:
+    """ Repositório de chunks que consulta uma AsyncSession real; a busca vetorial aguarda `gate`. """
+
+    def __init__(self, session: AsyncSession, gate: asyncio.Event, used_sessions: List[AsyncSession]):
+        self._session, self._gate, self._used_sessions = session, gate, used_sessions
+        self.search_started = asyncio.Event()
+
+    async def _query(self) -> None:
+        self._used_sessions.append(self._session)
+        await self._session.execute(text("SELECT 1"))
+
+    async def find_similar_chunks(self, embedding_vector, limit, filter_document_ids=None):
+        await self._query()
+        self.search_started.set()
+        await self._gate.wait()
+        await self._query()
+        return [(Chunk(id=1, document_id=1, text="Repartição de benefícios.", page_number=1, position=0), 0.9)]
+
+    async def find_by_keyword(self, query, limit, filter_document_ids=None):
+        await self._query()
+        return []
+
+
+class FakeEmbeddingProvider:
+    async def embed_text(self, text: str, traffic: str = "query") -> Embedding:
+        return Embedding(vector=[1.0, 0.0])
+
+
+class FakeLLMProvider:
+    async def generate_response(self, prompt, context=None, history=None, max_tokens=None, temperature=None) -> str:
+        return "resposta"
+
+
+class FakeReRanker:
+    async def rerank(self, query, chunks):
+        return [(chunk, 1.0) for chunk in chunks]
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("CHAT_SINGLE_FLIGHT_ENABLED", "true")
+    monkeypatch.setenv("CONTEXT_COMPRESSION_ENABLED", "false")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+async def test_cancelled_leader_does_not_share_its_request_session(engine, settings):
+    gate = asyncio.Event()
+    used_sessions: List[AsyncSession] = []
+    scope_repositories: List[SessionChunkRepository] = []
+
+    @asynccontextmanager
+    async def chunk_repository_scope():
+        async with AsyncSession(engine) as session:
+            repository = SessionChunkRepository(session, gate, used_sessions)
+            scope_repositories.append(repository)
+            yield repository
+
+    def build_use_case(request_session: AsyncSession) -> ProcessQueryUseCase:
+        return ProcessQueryUseCase(
+            embedding_provider=FakeEmbeddingProvider(),
+            llm_provider=FakeLLMProvider(),
+            chunk_repository=SessionChunkRepository(request_session, gate, used_sessions),
+            reranker=FakeReRanker(),
+            chunk_repository_scope=chunk_repository_scope,
+        )
+
+    leader_session, follower_session = AsyncSession(engine), AsyncSession(engine)
+    leader = asyncio.create_task(build_use_case(leader_session).execute("Qual a repartição?"))
+    while not scope_repositories:
+        await asyncio.sleep(0.01)
+    await scope_repositories[0].search_started.wait()
+    follower = asyncio.create_task(build_use_case(follower_session).execute("  qual a REPARTIÇÃO?"))
+    await asyncio.sleep(0.01)
+
+    # Cliente do líder desconecta: a requisição é cancelada e sua sessão fechada
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    await leader_session.close()
+    gate.set()
+
+    result = await follower
+    await follower_session.close()
+
+    assert result["response"] == "resposta"
+    assert len(scope_repositories) == 1
+    assert used_sessions and all(session is scope_repositories[0]._session for session in used_sessions)
+
+
+async def test_without_repository_scope_queries_are_not_coalesced(engine, settings):
+    gate = asyncio.Event()
+    gate.set()
+    used_sessions: List[AsyncSession] = []
+
+    def build_use_case(session: AsyncSession) -> ProcessQueryUseCase:
+        return ProcessQueryUseCase(
+            embedding_provider=FakeEmbeddingProvider(),
+            llm_provider=FakeLLMProvider(),
+            chunk_repository=SessionChunkRepository(session, gate, used_sessions),
+            reranker=FakeReRanker(),
+        )
+
+    async with AsyncSession(engine) as first, AsyncSession(engine) as second:
+        results = await asyncio.gather(build_use_case(first).execute("pergunta"), build_use_case(second).execute("pergunta"))
+
+    assert [result["response"] for result in results] == ["resposta", "resposta"]
+    # Busca vetorial (2 consultas) e por keyword (1) em cada execução
+    assert len(used_sessions) == 6
@@ -0,0 +1,68 @@
+"""
+Fixtures compartilhadas dos testes de infraestrutura.
+"""
+
+import asyncio
+import socket
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pytest
+import uvicorn
+
+from config.config import get_settings
+from infrastructure.llm.http_client import close_llm_http_client
+from scripts.llm_stub_server import create_stub_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@dataclass
+class LLMStub:
+    """ Stub OpenAI-compatível em execução; `app.state` altera latências e expõe as estatísticas. """
+    app: Any
+    base_url: str
+    configure: Callable[..., None]
+
+    @property
+    def stats(self) -> dict:
+        return self.app.state.stats
+
+
+@pytest.fixture
+async def llm_stub(monkeypatch):
+    """
+    Sobe `scripts.llm_stub_server` no event loop do teste (porta livre) e
+    aponta LLM_BASE_URL para ele. `configure(**settings)` altera variáveis
+    de ambiente e limpa o cache de `get_settings` (vale para provedores criados depois).
+    """
+    def configure(**values) -> None:
+        for key, value in values.items():
+            monkeypatch.setenv(key, str(value))
+        get_settings.cache_clear()
+
+    port = free_port()
+    configure(
+        LLM_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        API_KEY_NVIDEA="stub",
+        LLM_MODEL="stub/main",
+        LLM_MAX_RETRIES=0,
+    )
+    app = create_stub_app(latency=0.05)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.01)
+    try:
+        yield LLMStub(app=app, base_url=f"http://127.0.0.1:{port}/v1", configure=configure)
+    finally:
+        await close_llm_http_client()
+        server.should_exit = True
+        await server_task
+        get_settings.cache_clear()
@@ -0,0 +1,87 @@
+"""
+Testes do cache de embeddings: LRU em memória limitado em bytes, disco
+(SQLite) limitado em bytes, promoção de acertos do disco e chave estável.
+"""
+
+import pytest
+
+from application.interfaces.embedding_cache import embedding_cache_key
+from infrastructure.external_services.embedding.embedding_cache import (
+    InMemoryLRUEmbeddingCache, SqliteEmbeddingCache, TieredEmbeddingCache,
+)
+
+VECTOR_BYTES = 16 # 4 dimensões float32
+
+
+def vector(value: float):
+    return [value] * 4
+
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / "cache" / "embeddings.sqlite3")
+
+
+async def test_memory_evicts_least_recently_used_beyond_budget():
+    cache = InMemoryLRUEmbeddingCache(max_bytes=2 * VECTOR_BYTES)
+
+    await cache.set_many({"a": vector(1.0), "b": vector(2.0)})
+    await cache.get_many(["a"]) # "a" passa a ser a mais recente
+    await cache.set_many({"c": vector(3.0)})
+
+    assert await cache.get_many(["a", "b", "c"]) == {"a": vector(1.0), "c": vector(3.0)}
+    stats = cache.stats()
+    assert (stats["memory_bytes"], stats["memory_evictions"]) == (2 * VECTOR_BYTES, 1)
+
+
+async def test_memory_skips_vector_larger_than_budget():
+    cache = InMemoryLRUEmbeddingCache(max_bytes=VECTOR_BYTES)
+
+    await cache.set_many({"grande": [0.5] * 8})
+
+    assert await cache.get_many(["grande"]) == {}
+    assert cache.stats()["memory_bytes"] == 0
+
+
+async def test_disk_hit_is_promoted_to_memory(disk_path):
+    memory = InMemoryLRUEmbeddingCache(max_bytes=10 * VECTOR_BYTES)
+    disk = SqliteEmbeddingCache(disk_path)
+    await disk.set_many({"a": vector(0.5)})
+    cache = TieredEmbeddingCache(memory=memory, disk=disk)
+
+    assert await cache.get_many(["a", "b"]) == {"a": vector(0.5)}
+    assert await cache.get_many(["a"]) == {"a": vector(0.5)}
+
+    assert memory.stats()["memory_entries"] == 1
+    assert disk.stats()["disk_hits"] == 1 # A segunda leitura não foi ao disco
+
+
+async def test_disk_prunes_oldest_entries_beyond_budget(disk_path):
+    disk = SqliteEmbeddingCache(disk_path, max_bytes=2 * VECTOR_BYTES)
+
+    for key, value in (("a", 1.0), ("b", 2.0), ("c", 3.0)):
+        await disk.set_many({key: vector(value)})
+
+    assert await disk.get_many(["a", "b", "c"]) == {"b": vector(2.0), "c": vector(3.0)}
+    assert disk.stats()["disk_evictions"] == 1
+
+
+async def test_disk_without_budget_keeps_everything(disk_path):
+    disk = SqliteEmbeddingCache(disk_path)
+
+    await disk.set_many({str(i): vector(float(i)) for i in range(10)})
+
+    assert len(await disk.get_many([str(i) for i in range(10)])) == 10
+
+
+async def test_key_is_stable_across_processes(disk_path):
+    key = embedding_cache_key("modelo", "texto limpo")
+
+    assert key == embedding_cache_key("modelo", "texto limpo")
+    assert len(key) == 64 and int(key, 16) >= 0 # SHA-256 em hexadecimal
+    assert key != embedding_cache_key("outro-modelo", "texto limpo")
+    assert key != embedding_cache_key("modelo", "texto limpo.")
+
+    # Outra instância (ex: outro worker ou após reinício) encontra o vetor gravado
+    await SqliteEmbeddingCache(disk_path).set_many({key: vector(0.25)})
+    assert await SqliteEmbeddingCache(disk_path).get_many([key]) == {key: vector(0.25)}
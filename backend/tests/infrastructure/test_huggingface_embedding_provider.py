@@ -0,0 +1,75 @@
+"""
+Testes do HuggingFaceEmbeddingProvider com um modelo falso no lugar do
+SentenceTransformer: na ingestão, uma falha do modelo não pode virar vetor
+zero gravado no banco.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_huggingface")
+pytest.importorskip("sentence_transformers")
+
+from application.interfaces.embedding_cache import TRAFFIC_INGESTION, TRAFFIC_QUERY
+from application.use_cases.document_processing.process_document import ProcessDocumentUseCase, _PipelineState
+from config.config import get_settings
+from infrastructure.external_services.embedding.embedding_cache import InMemoryLRUEmbeddingCache
+from infrastructure.external_services.embedding.huggingface_embedding_provider import HuggingFaceEmbeddingProvider
+
+
+class FailingModel:
+    """ Falha em qualquer lote que contenha "ruim" (ex: OOM em um texto patológico). """
+
+    def encode(self, texts, **kwargs):
+        if any("ruim" in text for text in texts):
+            raise RuntimeError("CUDA out of memory")
+        return np.ones((len(texts), get_settings().EMBEDDING_DIMENSION), dtype=np.float32)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    # Modelo já "carregado" na classe: o provider o reutiliza sem baixar nada
+    monkeypatch.setattr(HuggingFaceEmbeddingProvider, "_model", FailingModel())
+    monkeypatch.setattr(HuggingFaceEmbeddingProvider, "_model_name", "modelo-teste")
+    return HuggingFaceEmbeddingProvider(cache=InMemoryLRUEmbeddingCache(max_bytes=1024 * 1024))
+
+
+def window_of(pages):
+    return [(page, {"text": text, "metadata": {"page_number": page}}) for page, texts in pages for text in texts]
+
+
+async def test_ingestion_failure_is_raised(provider):
+    with pytest.raises(RuntimeError):
+        await provider.embed_batch(["texto ruim"], traffic=TRAFFIC_INGESTION)
+
+
+async def test_query_failure_keeps_zero_vector_fallback(provider):
+    embeddings = await provider.embed_batch(["texto ruim"], traffic=TRAFFIC_QUERY)
+
+    assert embeddings[0].vector == [0.0] * get_settings().EMBEDDING_DIMENSION
+
+
+async def test_failed_page_is_not_persisted_with_zero_vectors(provider):
+    saved = []
+
+    async def save_batch_with_embeddings(chunks_with_vectors):
+        saved.extend(chunks_with_vectors)
+        return [chunk for chunk, _ in chunks_with_vectors]
+
+    use_case = ProcessDocumentUseCase(
+        document_repository=SimpleNamespace(),
+        chunk_repository=SimpleNamespace(save_batch_with_embeddings=save_batch_with_embeddings),
+        text_extractor=SimpleNamespace(),
+        chunker=SimpleNamespace(),
+        embedding_provider=provider,
+    )
+    state = _PipelineState(document_id=1, file_name="doc.pdf")
+
+    window = window_of([(1, ["primeira página"]), (2, ["página ruim", "outra"]), (3, ["terceira página"])])
+    await use_case._flush_chunks(await use_case._embed_window(window, state), state)
+
+    assert [chunk.page_number for chunk, _ in saved] == [1, 3]
+    assert all(any(vector) for _, vector in saved)
+    assert state.total_chunks_failed == 2
@@ -0,0 +1,174 @@
+"""
+Testes do IngestionWorker com repositório e sessões falsos (sem Postgres):
+lease perdido, falhas do heartbeat, falha definitiva e jobs sem tentativas.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config.config import Settings
+from domain.aggregates.ingestion.ingestion_job import IngestionJob, IngestionJobStatus
+from infrastructure.workers import ingestion_worker
+from infrastructure.workers.ingestion_worker import IngestionWorker
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeJobRepository:
+    """ Estado compartilhado entre as "sessões" do worker. """
+
+    def __init__(self, jobs=None, exhausted=None):
+        self.jobs = list(jobs or [])
+        self.exhausted = list(exhausted or [])
+        self.owner = True
+        self.progress_errors = 0
+        self.progress_calls = 0
+        self.calls = []
+
+    async def fail_expired_exhausted(self, lease_seconds, error):
+        exhausted, self.exhausted = self.exhausted, []
+        return exhausted
+
+    async def claim_next(self, worker_id, lease_seconds):
+        return self.jobs.pop(0) if self.jobs else None
+
+    async def update_progress(self, job_id, worker_id, stage, progress, document_id=None):
+        self.progress_calls += 1
+        if self.progress_errors:
+            self.progress_errors -= 1
+            raise ConnectionError("conexão com o banco perdida")
+        return self.owner
+
+    async def mark_succeeded(self, job_id, worker_id, document_id):
+        self.calls.append(("succeeded", job_id, document_id))
+        return True
+
+    async def mark_failed(self, job_id, worker_id, error, retry_delay_seconds=None, document_id=None):
+        self.calls.append(("failed", job_id, retry_delay_seconds, document_id))
+        return True
+
+    async def release(self, job_id, worker_id):
+        self.calls.append(("released", job_id))
+        return True
+
+
+class FakeUseCase:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.cancelled = False
+
+    async def execute(self, progress_callback, **kwargs):
+        await progress_callback("embedding", 0.5, 42)
+        try:
+            return await self.behaviour(progress_callback)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+@pytest.fixture
+def job_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+
+def build_worker(monkeypatch, repo, use_case):
+    monkeypatch.setattr(ingestion_worker, "SqlModelIngestionJobRepository", lambda session: repo)
+    monkeypatch.setattr(ingestion_worker, "_PROGRESS_FLUSH_MIN_INTERVAL_SECONDS", 0.01)
+    settings = Settings(INGESTION_HEARTBEAT_SECONDS=0.05, INGESTION_RETRY_BACKOFF_SECONDS=1.0)
+    worker = IngestionWorker(FakeSession, lambda session: use_case, worker_id="w1", settings=settings)
+    worker.cleaned = []
+
+    async def cleanup(document_id):
+        worker.cleaned.append(document_id)
+
+    monkeypatch.setattr(worker, "_cleanup_partial_document", cleanup)
+    return worker
+
+
+def make_job(file_path, attempts=1, max_attempts=3, document_id=None):
+    return IngestionJob(
+        id=7, status=IngestionJobStatus.RUNNING, file_name="doc.pdf", file_type="pdf",
+        file_path=file_path, attempts=attempts, max_attempts=max_attempts, document_id=document_id,
+    )
+
+
+async def test_lease_lost_cancels_processing(monkeypatch, job_file):
+    repo = FakeJobRepository(jobs=[make_job(job_file)])
+    repo.owner = False
+    use_case = FakeUseCase(lambda _: asyncio.sleep(30))
+    worker = build_worker(monkeypatch, repo, use_case)
+
+    assert await asyncio.wait_for(worker.run_once(), timeout=5)
+
+    assert use_case.cancelled
+    assert worker.cleaned == [42] # Documento parcial desta execução
+    assert repo.calls == [] # Nem sucesso, nem falha, nem release: o job é do outro worker
+
+
+async def test_heartbeat_errors_are_retried(monkeypatch, job_file):
+    repo = FakeJobRepository(jobs=[make_job(job_file)])
+    repo.progress_errors = 2
+
+    async def slow_success(_):
+        while repo.progress_calls < 4:
+            await asyncio.sleep(0.01)
+        return SimpleNamespace(id=42)
+
+    worker = build_worker(monkeypatch, repo, FakeUseCase(slow_success))
+
+    assert await asyncio.wait_for(worker.run_once(), timeout=10)
+    assert repo.calls == [("succeeded", 7, 42)]
+
+
+async def test_final_failure_removes_partial_document(monkeypatch, job_file):
+    repo = FakeJobRepository(jobs=[make_job(job_file, attempts=3, max_attempts=3)])
+
+    async def fail(_):
+        raise RuntimeError("extração falhou")
+
+    worker = build_worker(monkeypatch, repo, FakeUseCase(fail))
+
+    assert await worker.run_once()
+    assert repo.calls == [("failed", 7, None, 42)]
+    assert worker.cleaned == [42]
+
+
+async def test_retryable_failure_keeps_partial_document_for_next_attempt(monkeypatch, job_file):
+    repo = FakeJobRepository(jobs=[make_job(job_file, attempts=1, max_attempts=3)])
+
+    async def fail(_):
+        raise RuntimeError("timeout")
+
+    worker = build_worker(monkeypatch, repo, FakeUseCase(fail))
+
+    assert await worker.run_once()
+    assert repo.calls == [("failed", 7, 1.0, 42)]
+    assert worker.cleaned == []
+
+
+async def test_exhausted_expired_jobs_are_cleaned(monkeypatch, job_file):
+    repo = FakeJobRepository(exhausted=[make_job(job_file, attempts=3, document_id=99)])
+    worker = build_worker(monkeypatch, repo, FakeUseCase(lambda _: asyncio.sleep(0)))
+
+    assert not await worker.run_once()
+    assert worker.cleaned == [99]
+
+
+async def test_job_over_max_attempts_is_not_processed(monkeypatch, job_file):
+    repo = FakeJobRepository(jobs=[make_job(job_file, attempts=4, max_attempts=3, document_id=99)])
+    use_case = FakeUseCase(lambda _: asyncio.sleep(0))
+    worker = build_worker(monkeypatch, repo, use_case)
+
+    assert await worker.run_once()
+    assert repo.calls == [("failed", 7, None, None)]
+    assert worker.cleaned == [99]
@@ -0,0 +1,146 @@
+"""
+Testes de hedging e fallback do LLM: `hedged_call` isolado e o
+NvidiaProvider contra o stub local.
+"""
+
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from infrastructure.llm.hedging import HEDGE, PRIMARY, LatencyTracker, hedged_call
+from infrastructure.llm.providers.nvidia_provider import NvidiaProvider
+
+FALLBACK_MODEL = "stub/fallback-small"
+
+
+def metric(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class Attempt:
+    """ Tentativa simulada: responde após `delay` (ou falha com `error`) e registra cancelamento. """
+
+    def __init__(self, delay: float, result: str = "ok", error: Exception = None):
+        self.delay, self.result, self.error = delay, result, error
+        self.cancelled = False
+
+    async def __call__(self) -> str:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=4)
+    assert tracker.percentile(0.95) is None
+    for seconds in (5.0, 0.1, 0.2, 0.3, 0.4):
+        tracker.observe(seconds)
+    assert len(tracker) == 4
+    assert tracker.percentile(0.5) == 0.2
+    assert tracker.percentile(0.95) == 0.4
+
+
+async def test_fast_primary_does_not_hedge():
+    primary = Attempt(0.01, "primária")
+    hedge_factory_calls = []
+
+    result, winner, _, hedged = await hedged_call(primary, lambda: hedge_factory_calls.append(1), 0.5)
+
+    assert (result, winner, hedged) == ("primária", PRIMARY, False)
+    assert hedge_factory_calls == []
+
+
+async def test_hedge_wins_and_primary_is_cancelled():
+    primary, hedge = Attempt(5.0, "primária"), Attempt(0.01, "hedge")
+
+    result, winner, elapsed, hedged = await hedged_call(primary, lambda: hedge, 0.05)
+    await asyncio.sleep(0)
+
+    assert (result, winner, hedged) == ("hedge", HEDGE, True)
+    assert elapsed < 1.0
+    assert primary.cancelled
+
+
+async def test_skipped_hedge_waits_for_primary():
+    primary = Attempt(0.1, "primária")
+
+    result, winner, _, hedged = await hedged_call(primary, lambda: None, 0.01)
+
+    assert (result, winner, hedged) == ("primária", PRIMARY, False)
+
+
+async def test_error_is_raised_only_when_both_attempts_fail():
+    primary = Attempt(0.05, error=RuntimeError("primária"))
+    hedge = Attempt(0.2, "hedge")
+    result, winner, _, _ = await hedged_call(primary, lambda: hedge, 0.01)
+    assert (result, winner) == ("hedge", HEDGE)
+
+    primary = Attempt(0.05, error=RuntimeError("primária"))
+    hedge = Attempt(0.1, error=RuntimeError("hedge"))
+    with pytest.raises(RuntimeError, match="primária"):
+        await hedged_call(primary, lambda: hedge, 0.01)
+
+
+async def test_caller_cancellation_cancels_both_attempts():
+    primary, hedge = Attempt(5.0), Attempt(5.0)
+    task = asyncio.create_task(hedged_call(primary, lambda: hedge, 0.01))
+    await asyncio.sleep(0.05)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert primary.cancelled and hedge.cancelled
+
+
+async def test_provider_hedge_wins_against_slow_primary(llm_stub):
+    llm_stub.configure(
+        LLM_HEDGE_ENABLED=True,
+        LLM_HEDGE_MIN_SAMPLES=1000,
+        LLM_HEDGE_INITIAL_DELAY_SECONDS=0.2,
+        LLM_MAX_CONCURRENCY=4,
+    )
+    provider = NvidiaProvider()
+    sent_before = metric("llm_hedge_requests_total", {"outcome": "sent"})
+    wins_before = metric("llm_hedge_wins_total", {"winner": "hedge"})
+
+    # Primária lenta; a latência cai assim que ela chega ao stub, então o hedge responde rápido
+    llm_stub.app.state.latency = 2.0
+    generation = asyncio.create_task(provider.generate_response("pergunta"))
+    while llm_stub.stats["in_flight"] == 0:
+        await asyncio.sleep(0.01)
+    llm_stub.app.state.latency = 0.05
+    start = time.perf_counter()
+    response = await generation
+
+    assert response.startswith("Resposta stub")
+    assert time.perf_counter() - start < 1.0
+    assert llm_stub.stats["requests"] == 2
+    assert metric("llm_hedge_requests_total", {"outcome": "sent"}) - sent_before == 1
+    assert metric("llm_hedge_wins_total", {"winner": "hedge"}) - wins_before == 1
+    # A primária perdedora devolve sua vaga ao processar o cancelamento
+    await asyncio.sleep(0.05)
+    assert provider._in_flight == 0
+    assert not provider._semaphore.locked()
+
+
+async def test_provider_falls_back_when_budget_is_exhausted(llm_stub):
+    llm_stub.configure(LLM_LATENCY_BUDGET_SECONDS=0.3, LLM_FALLBACK_MODEL=FALLBACK_MODEL)
+    llm_stub.app.state.model_latency = {"stub/main": 2.0, FALLBACK_MODEL: 0.05}
+    provider = NvidiaProvider()
+    fallbacks_before = metric("llm_fallback_total", {"model": FALLBACK_MODEL})
+
+    start = time.perf_counter()
+    response = await provider.generate_response("pergunta com modelo principal lento")
+
+    assert response.startswith("Resposta stub")
+    assert time.perf_counter() - start < 1.0
+    assert metric("llm_fallback_total", {"model": FALLBACK_MODEL}) - fallbacks_before == 1
+    assert provider._in_flight == 0
@@ -0,0 +1,67 @@
+"""
+Testes dos exemplars de trace nos histogramas: a observação feita dentro de
+um span amostrado aparece com `trace_id` no /metrics em formato OpenMetrics.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+
+from infrastructure.metrics.prometheus.metrics_prometheus import (
+    REQUEST_LATENCY, create_metrics_app, current_trace_exemplar,
+)
+
+OPENMETRICS = "application/openmetrics-text"
+
+
+def observe_latency(endpoint: str) -> None:
+    REQUEST_LATENCY.labels(method="GET", endpoint=endpoint).observe(0.2, exemplar=current_trace_exemplar())
+
+
+async def scrape(accept: str) -> httpx.Response:
+    app = FastAPI()
+    app.mount("/metrics", create_metrics_app())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+        return await client.get("/metrics/", headers={"Accept": accept})
+
+
+def bucket_lines(body: str, endpoint: str):
+    return [line for line in body.splitlines() if line.startswith("request_latency_seconds_bucket") and f'endpoint="{endpoint}"' in line]
+
+
+async def test_sampled_span_exemplar_is_exposed_in_openmetrics():
+    tracer = TracerProvider(sampler=ALWAYS_ON).get_tracer(__name__)
+    with tracer.start_as_current_span("requisicao") as span:
+        trace_id = format(span.get_span_context().trace_id, "032x")
+        observe_latency("/teste-exemplar")
+
+    response = await scrape(OPENMETRICS)
+
+    assert response.headers["content-type"].startswith(OPENMETRICS)
+    assert any(f'# {{trace_id="{trace_id}"}} 0.2' in line for line in bucket_lines(response.text, "/teste-exemplar"))
+
+
+async def test_no_exemplar_without_sampled_span():
+    assert current_trace_exemplar() is None
+    tracer = TracerProvider(sampler=ALWAYS_OFF).get_tracer(__name__)
+    with tracer.start_as_current_span("nao-amostrado"):
+        assert current_trace_exemplar() is None
+        observe_latency("/teste-sem-exemplar")
+
+    lines = bucket_lines((await scrape(OPENMETRICS)).text, "/teste-sem-exemplar")
+
+    assert lines and not any("trace_id" in line for line in lines)
+
+
+@pytest.mark.parametrize("accept", ["text/plain", "*/*"])
+async def test_prometheus_text_format_omits_exemplars(accept):
+    tracer = TracerProvider(sampler=ALWAYS_ON).get_tracer(__name__)
+    with tracer.start_as_current_span("requisicao"):
+        observe_latency("/teste-texto")
+
+    response = await scrape(accept)
+
+    assert not response.headers["content-type"].startswith(OPENMETRICS)
+    assert bucket_lines(response.text, "/teste-texto") and "trace_id" not in response.text
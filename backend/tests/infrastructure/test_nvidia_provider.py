@@ -0,0 +1,63 @@
+"""
+Testes do NvidiaProvider assíncrono contra o stub local: limite de
+concorrência, recusa por fila esgotada e timeout por requisição.
+"""
+
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from infrastructure.llm.providers.nvidia_provider import NvidiaProvider
+from shared.exceptions import LLMServiceError
+
+
+def metric(name: str, labels: dict = None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+async def test_concurrency_is_capped(llm_stub):
+    llm_stub.configure(LLM_MAX_CONCURRENCY=2)
+    llm_stub.app.state.latency = 0.1
+    provider = NvidiaProvider()
+
+    responses = await asyncio.gather(*(provider.generate_response(f"pergunta {i}") for i in range(8)))
+
+    assert all(response.startswith("Resposta stub") for response in responses)
+    assert llm_stub.stats["requests"] == 8
+    assert llm_stub.stats["max_in_flight"] == 2
+    assert provider._in_flight == 0 and provider._waiting == 0
+
+
+async def test_queue_timeout_rejects_excess_generation(llm_stub):
+    llm_stub.configure(LLM_MAX_CONCURRENCY=1, LLM_QUEUE_TIMEOUT_SECONDS=0.2)
+    llm_stub.app.state.latency = 0.6
+    provider = NvidiaProvider()
+    rejections_before = metric("llm_queue_rejections_total")
+
+    outcomes = await asyncio.gather(
+        provider.generate_response("a"), provider.generate_response("b"), return_exceptions=True
+    )
+
+    rejected = [o for o in outcomes if isinstance(o, LLMServiceError)]
+    assert len(rejected) == 1
+    assert "sobrecarregado" in str(rejected[0])
+    assert metric("llm_queue_rejections_total") - rejections_before == 1
+    assert llm_stub.stats["requests"] == 1
+
+
+async def test_request_timeout_is_enforced(llm_stub):
+    llm_stub.configure(LLM_REQUEST_TIMEOUT_SECONDS=0.2)
+    llm_stub.app.state.latency = 2.0
+    provider = NvidiaProvider()
+
+    start = time.perf_counter()
+    with pytest.raises(LLMServiceError) as exc_info:
+        await provider.generate_response("lenta")
+
+    assert time.perf_counter() - start < 1.5
+    assert exc_info.value.__cause__ is not None
+    # A vaga é devolvida mesmo com a falha
+    assert provider._in_flight == 0
+    assert not provider._semaphore.locked()
@@ -0,0 +1,42 @@
+"""
+Testes do SpawnProcessPool compartilhado pela extração de PDF e pelo chunking.
+"""
+
+from config.config import get_settings
+from infrastructure.processors.process_pool import SpawnProcessPool, shutdown_process_pools
+
+
+def test_pool_is_reused_and_recreated_after_shutdown(monkeypatch):
+    monkeypatch.setenv("CHUNK_PROCESS_POOL_WORKERS", "2")
+    get_settings.cache_clear()
+    try:
+        pool = SpawnProcessPool("teste", "CHUNK_PROCESS_POOL_WORKERS")
+        executor = pool.get()
+        assert pool.get() is executor
+        assert pool.max_workers == 2
+        assert executor._mp_context.get_start_method() == "spawn"
+
+        pool.shutdown()
+        assert pool.get() is not executor
+    finally:
+        get_settings.cache_clear()
+        shutdown_process_pools()
+
+
+def test_zero_workers_uses_available_cpus(monkeypatch):
+    monkeypatch.setenv("PDF_PROCESS_POOL_WORKERS", "0")
+    get_settings.cache_clear()
+    try:
+        assert SpawnProcessPool("teste", "PDF_PROCESS_POOL_WORKERS").configured_workers() >= 1
+    finally:
+        get_settings.cache_clear()
+
+
+def test_shutdown_process_pools_closes_every_pool():
+    pools = [SpawnProcessPool("a", "PDF_PROCESS_POOL_WORKERS"), SpawnProcessPool("b", "CHUNK_PROCESS_POOL_WORKERS")]
+    executors = [pool.get() for pool in pools]
+
+    shutdown_process_pools()
+
+    assert all(pool._executor is None for pool in pools)
+    assert all(executor._shutdown_thread for executor in executors)
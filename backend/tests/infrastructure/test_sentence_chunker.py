@@ -0,0 +1,89 @@
+"""
+Testes do SentenceChunker: divisor de sentenças por regex (abreviações e
+iniciais), divisão de sentenças longas pelos offsets do tokenizer e limite
+dos chunks à janela do modelo de embeddings (CHUNK_MAX_TOKENS).
+"""
+
+import re
+
+import pytest
+
+from config.config import get_settings
+from infrastructure.processors.chunkers import sentence_chunker
+from infrastructure.processors.chunkers.sentence_chunker import SentenceChunker, _split_long_sentences, split_sentences_regex
+
+
+class WhitespaceTokenizer:
+    """ Tokenizer "fast" simplificado: um token por palavra, com offsets. """
+
+    def __call__(self, texts, add_special_tokens=False, truncation=False, return_offsets_mapping=False):
+        if isinstance(texts, str):
+            spans = [match.span() for match in re.finditer(r"\S+", texts)]
+            return {"input_ids": list(range(len(spans))), "offset_mapping": spans}
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def test_regex_splits_on_final_punctuation():
+    text = "Primeira frase. Segunda frase! Terceira frase? Quarta… Quinta sem ponto"
+
+    assert split_sentences_regex(text) == [
+        "Primeira frase.", "Segunda frase!", "Terceira frase?", "Quarta…", "Quinta sem ponto",
+    ]
+
+
+def test_regex_keeps_closing_quotes_with_sentence():
+    assert split_sentences_regex('Ele disse "basta." (Depois saiu.) Fim.') == ['Ele disse "basta."', "(Depois saiu.)", "Fim."]
+
+
+@pytest.mark.parametrize("text", [
+    "Conforme o Art. 5º da Lei nº 13.123, o Sr. Silva assinou o termo.",
+    "O Dr. Souza e a Profa. Lima revisaram as fls. 10 a 12.",
+    "O parecer de J. R. Almeida foi aprovado.",
+    "A reunião terminou às 10 h. depois do almoço voltaram.", # Minúscula após o ponto
+])
+def test_regex_does_not_split_abbreviations_or_initials(text):
+    assert split_sentences_regex(text) == [text]
+
+
+def test_regex_handles_empty_and_whitespace():
+    assert split_sentences_regex("") == []
+    assert split_sentences_regex("   \n ") == []
+
+
+def test_long_sentence_is_split_by_token_offsets():
+    sentence = "um  dois três\nquatro cinco seis sete"
+
+    sentences, lengths = _split_long_sentences(["curta.", sentence], [1, 7], 3, WhitespaceTokenizer())
+
+    assert sentences == ["curta.", "um  dois três", "quatro cinco seis", "sete"]
+    assert lengths == [1, 3, 3, 1]
+
+
+def test_chunk_size_is_capped_to_model_window():
+    max_tokens = get_settings().CHUNK_MAX_TOKENS
+
+    chunker = SentenceChunker(chunk_size=max_tokens * 4, splitter="regex", unit="tokens")
+
+    assert chunker.chunk_size == max_tokens - 2 # Reserva para os tokens especiais
+
+
+async def test_token_chunks_never_exceed_model_window(monkeypatch):
+    monkeypatch.setattr(sentence_chunker, "_get_tokenizer", lambda model_name: WhitespaceTokenizer())
+    max_tokens = get_settings().CHUNK_MAX_TOKENS
+    chunker = SentenceChunker(chunk_size=max_tokens * 4, splitter="regex", unit="tokens", overlap_sentences=2)
+    long_sentence = " ".join(f"palavra{i}" for i in range(max_tokens * 3)) + "."
+    page_text = " ".join(
+        ["Introdução curta.", "Outra frase de contexto.", long_sentence, "Frase final depois do trecho longo."]
+    )
+
+    [chunks] = await chunker.split_pages_to_chunks([(7, page_text)])
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk["text"]) <= max_tokens - 2 for chunk in chunks)
+    assert all(chunk["metadata"]["page_number"] == 7 for chunk in chunks)
+    # Nenhuma palavra se perde na divisão
+    assert {word for chunk in chunks for word in chunk["text"].split()} == set(page_text.split())
@@ -0,0 +1,124 @@
+"""
+Testes do TailSamplingSpanProcessor com o SDK real do OpenTelemetry
+(spans exportados para um InMemorySpanExporter).
+"""
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, TraceIdRatioBased
+from opentelemetry.trace import NonRecordingSpan, SpanContext, Status, StatusCode, TraceFlags
+
+from infrastructure.telemetry.tail_sampling import TailSamplingSpanProcessor
+
+SECOND_NS = 1_000_000_000
+
+
+class FixedTraceIds(RandomIdGenerator):
+    """ Gera os trace_ids informados, em ordem (para testar a fração amostrada). """
+
+    def __init__(self, *trace_ids: int):
+        self._trace_ids = list(trace_ids)
+
+    def generate_trace_id(self) -> int:
+        return self._trace_ids.pop(0)
+
+
+def build(ratio: float, slow_threshold_seconds: float = 1.0, max_buffered_traces: int = 2048, id_generator=None):
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingSpanProcessor(
+        SimpleSpanProcessor(exporter), ratio, slow_threshold_seconds, max_buffered_traces=max_buffered_traces
+    )
+    provider = TracerProvider(sampler=ALWAYS_ON, id_generator=id_generator or RandomIdGenerator())
+    provider.add_span_processor(processor)
+    return provider.get_tracer(__name__), exporter
+
+
+def run_trace(tracer, duration_ns: int = SECOND_NS // 100, child_error: bool = False, context=None):
+    """ Raiz com dois filhos; os filhos terminam antes da raiz. """
+    root = tracer.start_span("raiz", context=context, start_time=0)
+    root_context = trace.set_span_in_context(root)
+    for name in ("filho-1", "filho-2"):
+        child = tracer.start_span(name, context=root_context, start_time=1)
+        if child_error and name == "filho-1":
+            child.set_status(Status(StatusCode.ERROR, "falhou"))
+        child.end(end_time=2)
+    root.end(end_time=duration_ns)
+    return root
+
+
+def exported_names(exporter):
+    return [span.name for span in exporter.get_finished_spans()]
+
+
+def test_sampled_trace_is_exported_whole_after_root_ends():
+    tracer, exporter = build(ratio=1.0)
+
+    root = tracer.start_span("raiz", start_time=0)
+    child = tracer.start_span("filho", context=trace.set_span_in_context(root), start_time=1)
+    child.end(end_time=2)
+    assert exported_names(exporter) == [] # Aguardando a raiz
+
+    root.end(end_time=3)
+    assert exported_names(exporter) == ["filho", "raiz"]
+
+
+def test_fast_trace_outside_ratio_is_dropped():
+    tracer, exporter = build(ratio=0.0)
+
+    run_trace(tracer)
+
+    assert exported_names(exporter) == []
+
+
+def test_error_in_child_keeps_trace():
+    tracer, exporter = build(ratio=0.0)
+
+    run_trace(tracer, child_error=True)
+
+    assert exported_names(exporter) == ["filho-1", "filho-2", "raiz"]
+
+
+def test_slow_root_keeps_trace():
+    tracer, exporter = build(ratio=0.0, slow_threshold_seconds=0.5)
+
+    run_trace(tracer, duration_ns=SECOND_NS)
+
+    assert exported_names(exporter) == ["filho-1", "filho-2", "raiz"]
+
+
+def test_ratio_is_applied_by_trace_id():
+    bound = TraceIdRatioBased.get_bound_for_rate(0.5)
+    tracer, exporter = build(ratio=0.5, id_generator=FixedTraceIds(bound - 1, bound))
+
+    kept = run_trace(tracer)
+    run_trace(tracer)
+
+    assert {span.context.trace_id for span in exporter.get_finished_spans()} == {kept.context.trace_id}
+
+
+def test_span_with_remote_parent_is_local_root():
+    tracer, exporter = build(ratio=1.0)
+    remote_parent = SpanContext(trace_id=0xABC, span_id=0xDEF, is_remote=True, trace_flags=TraceFlags(TraceFlags.SAMPLED))
+
+    run_trace(tracer, context=trace.set_span_in_context(NonRecordingSpan(remote_parent)))
+
+    assert exported_names(exporter) == ["filho-1", "filho-2", "raiz"]
+
+
+def test_buffer_evicts_oldest_trace_beyond_limit():
+    tracer, exporter = build(ratio=1.0, max_buffered_traces=2)
+
+    roots = []
+    for i in range(3):
+        root = tracer.start_span(f"raiz-{i}", start_time=0)
+        child = tracer.start_span(f"filho-{i}", context=trace.set_span_in_context(root), start_time=1)
+        child.end(end_time=2)
+        roots.append(root)
+    for root in roots:
+        root.end(end_time=3)
+
+    # Os filhos do trace mais antigo saíram do buffer; sua raiz ainda é exportada
+    assert exported_names(exporter) == ["raiz-0", "filho-1", "raiz-1", "filho-2", "raiz-2"]
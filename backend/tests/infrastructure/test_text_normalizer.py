@@ -0,0 +1,69 @@
+"""
+Testes de paridade do normalizador de texto: `normalize_text`,
+`clean_text_for_embedding` e `clean_query` devem produzir exatamente a saída
+das implementações de referência (re.sub em sequência) em casos difíceis e
+em textos aleatórios gerados com semente fixa.
+"""
+
+import random
+
+import pytest
+
+from scripts.bench_text_normalizer import PAIRS
+
+FUZZ_CASES = 2000
+FUZZ_SEED = 42
+
+# Casos difíceis: controles, CR/LF, caixa alta, URLs/emails aninhados, NFKC, dígitos unicode
+GOLDEN_CASES = [
+    "",
+    "   ",
+    "Texto simples.",
+    "LEI Nº 13.123, DE 20 DE MAIO DE 2015. DISPÕE SOBRE O ACESSO! E AGORA? FIM",
+    "linha 1\r\nlinha 2\rlinha 3\n\n\n\n\nlinha 4\t\t com  tabs",
+    "nulo\x00 e controle\x07\x1b e \x0b vertical \x7f del \x1c sep",
+    "Veja https://exemplo.gov.br/a?b=1 e www.site.com.br, ou escreva para fulano@dominio.com.",
+    "a@http://x.y b@www.z http://a@b.c e-mail@@duplo @sozinho",
+    "ﬁm ① ² Ⅻ ℌ ＡＢＣ　largo café ção Œuvre ß İstanbul",
+    "números 123 e abc123 e 12abc e 1.000,50 e ٣٤ e ²³",
+    "pontuação!!! repetida??? e... reticências?!? .!.!",
+    "Consulta com símbolos: #tag, $preço, (parênteses), [colchetes], {chaves}, 50% & mais_um",
+    "Tudo EM MAIÚSCULAS AQUI. e minúsculas aqui! OUTRA FRASE? sim.",
+    " espaço unicode linha parágrafo\x85próxima",
+]
+
+ALPHABET = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    "áéíóúâêôãõçÁÉÍÓÚÇ .,;:!?!?...@/#$%&*()[]-_'\"\t\n\r\x00\x07\x0b\x1f\x7f"
+    "  ﬁ①²ℌＡß٣"
+)
+WORDS = ["http://", "https://a.b/", "www.", "@", "foo@bar.com", "123", "...", "!!!", "\r\n", "\n\n\n", "LEI", "Art. 5º"]
+
+
+def random_text(rng: random.Random, max_len: int = 200) -> str:
+    parts = []
+    for _ in range(rng.randint(0, max_len // 4)):
+        if rng.random() < 0.15:
+            parts.append(rng.choice(WORDS))
+        else:
+            parts.append("".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 8))))
+    return "".join(parts)
+
+
+def fuzz_cases():
+    rng = random.Random(FUZZ_SEED)
+    return [random_text(rng) for _ in range(FUZZ_CASES)]
+
+
+@pytest.mark.parametrize("name, reference, optimized", PAIRS, ids=[name for name, _, _ in PAIRS])
+@pytest.mark.parametrize("case", GOLDEN_CASES)
+def test_golden_case_matches_reference(name, reference, optimized, case):
+    assert optimized(case) == reference(case)
+
+
+@pytest.mark.parametrize("name, reference, optimized", PAIRS, ids=[name for name, _, _ in PAIRS])
+def test_fuzz_cases_match_reference(name, reference, optimized):
+    divergent = [case for case in fuzz_cases() if optimized(case) != reference(case)]
+
+    assert divergent[:3] == []
+
@@ -0,0 +1,117 @@
+"""
+Testes do CustomErrorHandlingMiddleware (ASGI puro), chamando o app
+diretamente: streaming, mapeamento exceção -> status e erro após o início
+da resposta.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from interface.middlewares.error_handling_middleware import CustomErrorHandlingMiddleware
+from shared.exceptions import (
+    CoreException, DatabaseError, LLMServiceError, ResourceNotFoundError, ServiceUnavailableError, ValidationError,
+)
+
+STREAM_CHUNKS = 4
+STREAM_DELAY = 0.05
+
+ERROR_CASES = {
+    "validation": (ValidationError("campo inválido"), 400, "Erro de validação: campo inválido"),
+    "value": (ValueError("limite negativo"), 400, "Valor inválido fornecido: limite negativo"),
+    "not_found": (ResourceNotFoundError("documento 7"), 404, "documento 7"),
+    "llm": (LLMServiceError("timeout"), 503, "Serviço de linguagem indisponível: timeout"),
+    "unavailable": (ServiceUnavailableError("embeddings"), 503, "Serviço indisponível: embeddings"),
+    "database": (DatabaseError("conexão recusada"), 503, "Erro no serviço de banco de dados: conexão recusada"),
+    "core": (CoreException("falha"), 500, "Erro interno na aplicação: falha"),
+    "unexpected": (RuntimeError("bug"), 500, "Ocorreu um erro interno inesperado no servidor."),
+}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream(fail_after: int = -1):
+        async def body():
+            for i in range(STREAM_CHUNKS):
+                if i == fail_after:
+                    raise LLMServiceError("conexão com o LLM perdida no meio do streaming")
+                await asyncio.sleep(STREAM_DELAY)
+                yield f"chunk {i}\n".encode()
+        return StreamingResponse(body(), media_type="text/plain")
+
+    @app.get("/error/{kind}")
+    async def error(kind: str):
+        raise ERROR_CASES[kind][0]
+
+    app.add_middleware(CustomErrorHandlingMiddleware)
+    return app
+
+
+async def call(app, path: str) -> dict:
+    """ Executa um GET diretamente no app ASGI, registrando status, chunks do corpo (com tempo) e exceção. """
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"teste")], "client": ("127.0.0.1", 50000), "server": ("teste", 80),
+    }
+    result = {"status": None, "starts": 0, "chunks": [], "error": None}
+    start = time.perf_counter()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600) # Cliente conectado até o fim da resposta
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["starts"] += 1
+        elif message["type"] == "http.response.body" and message.get("body"):
+            result["chunks"].append((time.perf_counter() - start, message["body"]))
+
+    try:
+        await app(scope, receive, send)
+    except Exception as exc:
+        result["error"] = exc
+    return result
+
+
+async def test_streaming_passes_through_incrementally():
+    result = await call(build_app(), "/stream")
+
+    assert result["status"] == 200
+    assert result["error"] is None
+    assert [body for _, body in result["chunks"]] == [f"chunk {i}\n".encode() for i in range(STREAM_CHUNKS)]
+    # O primeiro chunk chega após o seu atraso, não após o corpo inteiro
+    assert result["chunks"][0][0] < STREAM_DELAY * (STREAM_CHUNKS - 1)
+
+
+@pytest.mark.parametrize("kind", ERROR_CASES)
+async def test_exception_maps_to_status(kind):
+    _, expected_status, expected_detail = ERROR_CASES[kind]
+
+    result = await call(build_app(), f"/error/{kind}")
+
+    assert result["status"] == expected_status
+    assert result["error"] is None
+    assert json.loads(b"".join(body for _, body in result["chunks"])) == {"detail": expected_detail}
+
+
+async def test_error_after_response_start_is_reraised():
+    result = await call(build_app(), "/stream?fail_after=2")
+
+    assert isinstance(result["error"], LLMServiceError)
+    assert result["status"] == 200
+    assert result["starts"] == 1 # Nenhuma segunda resposta de erro
+    assert len(result["chunks"]) == 2
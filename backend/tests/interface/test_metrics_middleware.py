@@ -0,0 +1,79 @@
+"""
+Testes do PrometheusMetricsMiddleware (ASGI puro): as requisições são
+rotuladas pelo template da rota, não pelo path bruto.
+"""
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from prometheus_client import REGISTRY
+
+from infrastructure.metrics.prometheus.metrics_prometheus import create_metrics_app
+from interface.middlewares.error_handling_middleware import CustomErrorHandlingMiddleware
+from interface.middlewares.metrics_middleware import UNMATCHED_ENDPOINT, PrometheusMetricsMiddleware
+
+DOCUMENT_ROUTE = "/documents/{document_id}"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(prefix="/documents")
+
+    @router.get("/{document_id}")
+    async def get_document(document_id: int):
+        if document_id == 404:
+            raise HTTPException(status_code=404, detail="Documento não encontrado.")
+        if document_id == 500:
+            raise RuntimeError("falha inesperada")
+        return {"id": document_id}
+
+    app.include_router(router)
+    # Mesma ordem do app.py: o middleware de métricas envolve o de erros
+    app.add_middleware(CustomErrorHandlingMiddleware)
+    app.add_middleware(PrometheusMetricsMiddleware)
+    app.mount("/metrics", create_metrics_app())
+    return app
+
+
+def requests_total(endpoint: str, status: str) -> float:
+    return REGISTRY.get_sample_value(
+        "http_requests_total", {"method": "GET", "endpoint": endpoint, "status": status}
+    ) or 0.0
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://teste") as client:
+        yield client
+
+
+async def test_document_ids_share_one_series(client):
+    before = requests_total(DOCUMENT_ROUTE, "200")
+
+    for document_id in (1, 2, 3):
+        assert (await client.get(f"/documents/{document_id}")).status_code == 200
+
+    assert requests_total(DOCUMENT_ROUTE, "200") - before == 3
+    assert REGISTRY.get_sample_value(
+        "http_requests_total", {"method": "GET", "endpoint": "/documents/1", "status": "200"}
+    ) is None
+
+
+@pytest.mark.parametrize("status_code", [404, 500])
+async def test_error_responses_keep_route_template(client, status_code):
+    before = requests_total(DOCUMENT_ROUTE, str(status_code))
+
+    assert (await client.get(f"/documents/{status_code}")).status_code == status_code
+
+    assert requests_total(DOCUMENT_ROUTE, str(status_code)) - before == 1
+
+
+async def test_unknown_path_and_mounted_app(client):
+    unmatched_before = requests_total(UNMATCHED_ENDPOINT, "404")
+    metrics_before = requests_total("/metrics", "200")
+
+    assert (await client.get("/wp-admin/setup.php")).status_code == 404
+    assert (await client.get("/metrics/")).status_code == 200
+
+    assert requests_total(UNMATCHED_ENDPOINT, "404") - unmatched_before == 1
+    assert requests_total("/metrics", "200") - metrics_before == 1
@@ -1,8 +1,11 @@
 import os
+import uuid
+import asyncio
+import hashlib
 from os import listdir
 from os.path import isfile, join, isdir
 import logging
-from typing import List # Adicionar Type Hint
+from typing import Any, List, Tuple # Adicionar Type Hint
 
 logger = logging.getLogger(__name__)
 
@@ -29,3 +32,62 @@ def lista_arquivos(dir_path: str) -> List[str]:
          logger.error(f"Erro de permissão ou OS ao listar diretório {dir_path}: {e}")
 
     return arquivos_list
+
+def calcular_sha256_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """ Calcula o SHA-256 de um arquivo em blocos, sem carregá-lo inteiro na memória. """
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+class ArquivoMuitoGrandeError(Exception):
+    """ Upload excedeu o tamanho máximo permitido durante a gravação em disco. """
+    pass
+
+async def salvar_upload_ingestao(
+    storage_dir: str,
+    nome_arquivo: str,
+    upload: Any,
+    max_bytes: int,
+    tamanho_bloco: int = 1024 * 1024,
+) -> Tuple[str, int, str]:
+    """
+    Grava um upload no diretório de ingestão em blocos, sem carregar o
+    arquivo inteiro na memória, calculando o SHA-256 incrementalmente.
+
+    `upload` é qualquer objeto com `async read(n)` (ex: `UploadFile`).
+    Retorna (caminho absoluto, tamanho em bytes, hash SHA-256 hex).
+    Lança ArquivoMuitoGrandeError (e remove o arquivo parcial) se o tamanho
+    exceder `max_bytes`.
+    """
+    os.makedirs(storage_dir, exist_ok=True)
+    # Prefixo único evita colisão entre uploads com o mesmo nome; basename evita path traversal
+    nome_seguro = os.path.basename(nome_arquivo) or "upload"
+    caminho = os.path.abspath(join(storage_dir, f"{uuid.uuid4().hex}_{nome_seguro}"))
+    digest = hashlib.sha256()
+    tamanho = 0
+    destino = await asyncio.to_thread(open, caminho, "wb")
+    try:
+        while True:
+            bloco = await upload.read(tamanho_bloco)
+            if not bloco:
+                break
+            tamanho += len(bloco)
+            if tamanho > max_bytes:
+                raise ArquivoMuitoGrandeError(f"Arquivo excede o tamanho máximo de {max_bytes} bytes.")
+            digest.update(bloco)
+            # Escrita em disco fora do event loop
+            await asyncio.to_thread(destino.write, bloco)
+    except BaseException:
+        await asyncio.to_thread(destino.close)
+        await asyncio.to_thread(_remover_arquivo, caminho)
+        raise
+    await asyncio.to_thread(destino.close)
+    return caminho, tamanho, digest.hexdigest()
+
+def _remover_arquivo(caminho: str) -> None:
+    try:
+        os.remove(caminho)
+    except OSError as e:
+        logger.warning(f"Não foi possível remover o arquivo parcial {caminho}: {e}")